@@ -19,10 +19,15 @@ if db_url:
 
 # interpret the config file for Python logging.
 # This line sets up loggers basically.
-fileConfig(config.config_file_name)
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
 
-# import your model's Base metadata for 'autogenerate'
-from infrastructure.persistence.db import Base  # noqa
+# import your model's Base metadata for 'autogenerate'; every model module
+# must be imported so its table is registered on the shared Base
+from core.services.persistence.base import Base  # noqa
+from core.services.persistence import (  # noqa
+    emissao_job_model, idempotencia_model, item_da_nota_model, nota_fiscal_model,
+)
 
 target_metadata = Base.metadata
 
@@ -47,6 +52,12 @@ def run_migrations_online():
     """
     Run migrations in 'online' mode.
     """
+    # A connection passed by the caller (tests, scripts) wins over the URL
+    connection = config.attributes.get('connection')
+    if connection is not None:
+        _run_with(connection)
+        return
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section),
         prefix='sqlalchemy.',
@@ -54,13 +65,19 @@ def run_migrations_online():
     )
 
     with connectable.connect() as connection:
-        context.configure(
-            connection=connection,
-            target_metadata=target_metadata
-        )
+        _run_with(connection)
+
+
+def _run_with(connection):
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        # SQLite cannot ALTER most column properties in place
+        render_as_batch=connection.dialect.name == 'sqlite',
+    )
 
-        with context.begin_transaction():
-            context.run_migrations()
+    with context.begin_transaction():
+        context.run_migrations()
 
 
 if context.is_offline_mode():
@@ -17,45 +17,54 @@ down_revision: Union[str, None] = None
 branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
+# create_type=False: on PostgreSQL the type is created explicitly in upgrade()
+# with checkfirst, as create_table would emit an unguarded CREATE TYPE
+STATUS_NOTA = postgresql.ENUM(
+    'EM_PROCESSAMENTO', 'AUTORIZADA', 'REJEITADA', 'CANCELADA', name='statusnotamodel', create_type=False
+)
+
 
 def upgrade() -> None:
     """Upgrade schema."""
-    # ### commands auto generated by Alembic - please adjust! ###
-    op.drop_index(op.f('ix_nota_fiscal_chave_acesso'), table_name='nota_fiscal')
-    op.drop_table('nota_fiscal')
-    op.drop_table('item_da_nota')
-    # ### end Alembic commands ###
+    # The first autogenerate ran against an empty metadata and dropped the
+    # tables; the baseline creates them. The app also creates them at startup
+    # (create_all), so every table, index and enum type is guarded.
+    STATUS_NOTA.create(op.get_bind(), checkfirst=True)
+    op.create_table('nota_fiscal',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('chave_acesso', sa.String(length=44), nullable=True),
+    sa.Column('status', STATUS_NOTA, nullable=False),
+    sa.Column('data_emissao', sa.DateTime(), nullable=False),
+    sa.Column('protocolo_autorizacao', sa.String(), nullable=True),
+    sa.Column('emitente_cnpj', sa.String(length=14), nullable=False),
+    sa.Column('destinatario_cnpj', sa.String(length=14), nullable=False),
+    sa.Column('emitente_endereco', sa.JSON(), nullable=False),
+    sa.Column('destinatario_endereco', sa.JSON(), nullable=False),
+    sa.Column('impostos_totais', sa.JSON(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True,
+    )
+    op.create_index(op.f('ix_nota_fiscal_chave_acesso'), 'nota_fiscal', ['chave_acesso'], unique=True, if_not_exists=True)
+    op.create_table('item_da_nota',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('nota_id', sa.Uuid(), nullable=False),
+    sa.Column('sku', sa.String(), nullable=False),
+    sa.Column('descricao', sa.String(), nullable=False),
+    sa.Column('quantidade', sa.Integer(), nullable=False),
+    sa.Column('valor_unitario', sa.Float(), nullable=False),
+    sa.Column('cfop', sa.String(), nullable=False),
+    sa.Column('ncm', sa.String(), nullable=False),
+    sa.Column('cst', sa.String(), nullable=False),
+    sa.Column('impostos', sa.JSON(), nullable=False),
+    sa.ForeignKeyConstraint(['nota_id'], ['nota_fiscal.id']),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True,
+    )
 
 
 def downgrade() -> None:
     """Downgrade schema."""
-    # ### commands auto generated by Alembic - please adjust! ###
-    op.create_table('item_da_nota',
-    sa.Column('id', sa.INTEGER(), autoincrement=True, nullable=False),
-    sa.Column('nota_id', sa.UUID(), autoincrement=False, nullable=False),
-    sa.Column('sku', sa.VARCHAR(), autoincrement=False, nullable=False),
-    sa.Column('descricao', sa.VARCHAR(), autoincrement=False, nullable=False),
-    sa.Column('quantidade', sa.INTEGER(), autoincrement=False, nullable=False),
-    sa.Column('valor_unitario', sa.DOUBLE_PRECISION(precision=53), autoincrement=False, nullable=False),
-    sa.Column('cfop', sa.VARCHAR(), autoincrement=False, nullable=False),
-    sa.Column('ncm', sa.VARCHAR(), autoincrement=False, nullable=False),
-    sa.Column('cst', sa.VARCHAR(), autoincrement=False, nullable=False),
-    sa.Column('impostos', postgresql.JSON(astext_type=sa.Text()), autoincrement=False, nullable=False),
-    sa.ForeignKeyConstraint(['nota_id'], ['nota_fiscal.id'], name=op.f('item_da_nota_nota_id_fkey')),
-    sa.PrimaryKeyConstraint('id', name=op.f('item_da_nota_pkey'))
-    )
-    op.create_table('nota_fiscal',
-    sa.Column('id', sa.UUID(), autoincrement=False, nullable=False),
-    sa.Column('chave_acesso', sa.VARCHAR(length=44), autoincrement=False, nullable=True),
-    sa.Column('status', postgresql.ENUM('EM_PROCESSAMENTO', 'AUTORIZADA', 'REJEITADA', 'CANCELADA', name='statusnotamodel'), autoincrement=False, nullable=False),
-    sa.Column('data_emissao', postgresql.TIMESTAMP(), autoincrement=False, nullable=False),
-    sa.Column('protocolo_autorizacao', sa.VARCHAR(), autoincrement=False, nullable=True),
-    sa.Column('emitente_cnpj', sa.VARCHAR(length=14), autoincrement=False, nullable=False),
-    sa.Column('destinatario_cnpj', sa.VARCHAR(length=14), autoincrement=False, nullable=False),
-    sa.Column('emitente_endereco', postgresql.JSON(astext_type=sa.Text()), autoincrement=False, nullable=False),
-    sa.Column('destinatario_endereco', postgresql.JSON(astext_type=sa.Text()), autoincrement=False, nullable=False),
-    sa.Column('impostos_totais', postgresql.JSON(astext_type=sa.Text()), autoincrement=False, nullable=True),
-    sa.PrimaryKeyConstraint('id', name=op.f('nota_fiscal_pkey'))
-    )
-    op.create_index(op.f('ix_nota_fiscal_chave_acesso'), 'nota_fiscal', ['chave_acesso'], unique=True)
-    # ### end Alembic commands ###
+    op.drop_table('item_da_nota')
+    op.drop_index(op.f('ix_nota_fiscal_chave_acesso'), table_name='nota_fiscal')
+    op.drop_table('nota_fiscal')
+    STATUS_NOTA.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,82 @@
+"""emission queue, note versions, CC-e protocol and idempotency keys
+
+Revision ID: 5b0f2a9c7e41
+Revises: 146d52710ce9
+Create Date: 2026-10-17 09:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '5b0f2a9c7e41'
+down_revision: Union[str, None] = '146d52710ce9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Created explicitly with checkfirst, see STATUS_NOTA in 146d52710ce9
+STATUS_JOB = postgresql.ENUM(
+    'PENDENTE', 'PROCESSANDO', 'CONCLUIDO', 'FALHOU', name='statusemissaojob', create_type=False
+)
+
+
+def _colunas(tabela: str) -> set:
+    return {c['name'] for c in sa.inspect(op.get_bind()).get_columns(tabela)}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Tables created by the app at startup may already have these columns
+    colunas = _colunas('nota_fiscal')
+    with op.batch_alter_table('nota_fiscal') as batch_op:
+        if 'protocolo_cce' not in colunas:
+            batch_op.add_column(sa.Column('protocolo_cce', sa.String(), nullable=True))
+        if 'versao' not in colunas:
+            batch_op.add_column(sa.Column('versao', sa.Integer(), server_default='1', nullable=False))
+
+    STATUS_JOB.create(op.get_bind(), checkfirst=True)
+    op.create_table('emissao_job',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('nota_id', sa.Uuid(), nullable=False),
+    sa.Column('status', STATUS_JOB, nullable=False),
+    sa.Column('tentativas', sa.Integer(), nullable=False),
+    sa.Column('disponivel_em', sa.DateTime(), nullable=False),
+    sa.Column('travado_em', sa.DateTime(), nullable=True),
+    sa.Column('travado_por', sa.String(), nullable=True),
+    sa.Column('ultimo_erro', sa.Text(), nullable=True),
+    sa.Column('criado_em', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['nota_id'], ['nota_fiscal.id']),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('nota_id'),
+    if_not_exists=True,
+    )
+    op.create_index('ix_emissao_job_status_disponivel_em', 'emissao_job', ['status', 'disponivel_em'], if_not_exists=True)
+
+    op.create_table('idempotencia',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('chave', sa.String(length=255), nullable=False),
+    sa.Column('fingerprint', sa.String(length=64), nullable=False),
+    sa.Column('status_code', sa.Integer(), nullable=True),
+    sa.Column('corpo', sa.LargeBinary(), nullable=True),
+    sa.Column('headers', sa.Text(), nullable=True),
+    sa.Column('criado_em', sa.DateTime(), nullable=False),
+    sa.Column('concluido_em', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True,
+    )
+    op.create_index('ux_idempotencia_chave', 'idempotencia', ['chave'], unique=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ux_idempotencia_chave', table_name='idempotencia')
+    op.drop_table('idempotencia')
+    op.drop_index('ix_emissao_job_status_disponivel_em', table_name='emissao_job')
+    op.drop_table('emissao_job')
+    STATUS_JOB.drop(op.get_bind(), checkfirst=True)
+    with op.batch_alter_table('nota_fiscal') as batch_op:
+        batch_op.drop_column('versao')
+        batch_op.drop_column('protocolo_cce')
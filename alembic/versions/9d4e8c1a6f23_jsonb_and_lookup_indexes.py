@@ -0,0 +1,102 @@
+"""jsonb columns and lookup indexes
+
+Revision ID: 9d4e8c1a6f23
+Revises: 5b0f2a9c7e41
+Create Date: 2026-10-17 09:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from core.services.persistence.json_columns import campo_json
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4e8c1a6f23'
+down_revision: Union[str, None] = '5b0f2a9c7e41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# JSON columns converted to JSONB on PostgreSQL (other databases keep JSON)
+JSON_COLUMNS = (
+    ('nota_fiscal', 'emitente_endereco'),
+    ('nota_fiscal', 'destinatario_endereco'),
+    ('nota_fiscal', 'impostos_totais'),
+    ('item_da_nota', 'impostos'),
+)
+
+BTREE_INDEXES = (
+    ('ix_nota_fiscal_emitente_cnpj', 'nota_fiscal', 'emitente_cnpj'),
+    ('ix_nota_fiscal_destinatario_cnpj', 'nota_fiscal', 'destinatario_cnpj'),
+    ('ix_nota_fiscal_status', 'nota_fiscal', 'status'),
+    ('ix_nota_fiscal_data_emissao', 'nota_fiscal', 'data_emissao'),
+    ('ix_item_da_nota_nota_id', 'item_da_nota', 'nota_id'),
+)
+
+nota_fiscal = sa.table(
+    'nota_fiscal',
+    sa.column('destinatario_endereco'),
+    sa.column('impostos_totais'),
+)
+
+
+def _is_postgresql() -> bool:
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def _alter_json(tipo_novo, tipo_antigo, cast: str) -> None:
+    inspector = sa.inspect(op.get_bind())
+    for tabela, coluna in JSON_COLUMNS:
+        atual = next(c['type'] for c in inspector.get_columns(tabela) if c['name'] == coluna)
+        # JSONB herda de JSON: compara o tipo exato
+        if type(atual) is tipo_novo:
+            continue
+        op.alter_column(
+            tabela, coluna, type_=tipo_novo(), existing_type=tipo_antigo(),
+            postgresql_using=f'{coluna}::{cast}',
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if _is_postgresql():
+        _alter_json(postgresql.JSONB, postgresql.JSON, 'jsonb')
+
+    for nome, tabela, coluna in BTREE_INDEXES:
+        op.create_index(nome, tabela, [coluna], if_not_exists=True)
+
+    # Same expressions as NotaFiscalModel.__table_args__: the planner only
+    # uses an expression index when the query repeats the expression
+    op.create_index(
+        'ix_nota_fiscal_destinatario_uf_municipio', 'nota_fiscal',
+        [campo_json(nota_fiscal.c.destinatario_endereco, 'uf'),
+         campo_json(nota_fiscal.c.destinatario_endereco, 'municipio')],
+        if_not_exists=True,
+    )
+    op.create_index(
+        'ix_nota_fiscal_icms_total', 'nota_fiscal',
+        [campo_json(nota_fiscal.c.impostos_totais, 'icms', numerico=True)],
+        if_not_exists=True,
+    )
+    if _is_postgresql():
+        op.create_index(
+            'ix_nota_fiscal_destinatario_endereco_gin', 'nota_fiscal', ['destinatario_endereco'],
+            postgresql_using='gin',
+            postgresql_ops={'destinatario_endereco': 'jsonb_path_ops'},
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if _is_postgresql():
+        op.drop_index('ix_nota_fiscal_destinatario_endereco_gin', table_name='nota_fiscal')
+    op.drop_index('ix_nota_fiscal_icms_total', table_name='nota_fiscal')
+    op.drop_index('ix_nota_fiscal_destinatario_uf_municipio', table_name='nota_fiscal')
+    for nome, tabela, _ in reversed(BTREE_INDEXES):
+        op.drop_index(nome, table_name=tabela)
+
+    if _is_postgresql():
+        _alter_json(postgresql.JSON, postgresql.JSONB, 'json')
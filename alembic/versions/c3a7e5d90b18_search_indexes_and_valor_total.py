@@ -0,0 +1,66 @@
+"""invoice search: valor_total column and composite keyset indexes
+
+Revision ID: c3a7e5d90b18
+Revises: 9d4e8c1a6f23
+Create Date: 2026-10-17 10:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3a7e5d90b18'
+down_revision: Union[str, None] = '9d4e8c1a6f23'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Each equality filter followed by the keyset order (data_emissao, id)
+COMPOSITE_INDEXES = (
+    ('ix_nota_fiscal_emissao', ['data_emissao', 'id']),
+    ('ix_nota_fiscal_emitente_emissao', ['emitente_cnpj', 'data_emissao', 'id']),
+    ('ix_nota_fiscal_destinatario_emissao', ['destinatario_cnpj', 'data_emissao', 'id']),
+    ('ix_nota_fiscal_status_emissao', ['status', 'data_emissao', 'id']),
+    ('ix_nota_fiscal_valor_total', ['valor_total']),
+)
+
+# Single-column indexes from 9d4e8c1a6f23, now prefixes of the composite ones
+REPLACED_INDEXES = (
+    ('ix_nota_fiscal_emitente_cnpj', 'emitente_cnpj'),
+    ('ix_nota_fiscal_destinatario_cnpj', 'destinatario_cnpj'),
+    ('ix_nota_fiscal_status', 'status'),
+    ('ix_nota_fiscal_data_emissao', 'data_emissao'),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    colunas = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('nota_fiscal')}
+    if 'valor_total' not in colunas:
+        with op.batch_alter_table('nota_fiscal') as batch_op:
+            batch_op.add_column(
+                sa.Column('valor_total', sa.Numeric(15, 2), server_default='0', nullable=False)
+            )
+        # Existing notes: total of their items
+        op.execute(
+            'UPDATE nota_fiscal SET valor_total = COALESCE(('
+            'SELECT ROUND(CAST(SUM(i.quantidade * i.valor_unitario) AS NUMERIC), 2) '
+            'FROM item_da_nota i WHERE i.nota_id = nota_fiscal.id), 0)'
+        )
+
+    for nome, _ in REPLACED_INDEXES:
+        op.drop_index(nome, table_name='nota_fiscal', if_exists=True)
+    for nome, colunas_indice in COMPOSITE_INDEXES:
+        op.create_index(nome, 'nota_fiscal', colunas_indice, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for nome, _ in reversed(COMPOSITE_INDEXES):
+        op.drop_index(nome, table_name='nota_fiscal')
+    for nome, coluna in REPLACED_INDEXES:
+        op.create_index(nome, 'nota_fiscal', [coluna])
+    # Plain DROP COLUMN (SQLite >= 3.35): a batch copy of the table would lose
+    # the expression indexes, which SQLite cannot reflect
+    op.drop_column('nota_fiscal', 'valor_total')
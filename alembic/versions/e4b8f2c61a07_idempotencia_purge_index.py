@@ -0,0 +1,26 @@
+"""idempotencia: criado_em index for the purge of old keys
+
+Revision ID: e4b8f2c61a07
+Revises: c3a7e5d90b18
+Create Date: 2026-10-17 14:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b8f2c61a07'
+down_revision: Union[str, None] = 'c3a7e5d90b18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_idempotencia_criado_em', 'idempotencia', ['criado_em'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_idempotencia_criado_em', table_name='idempotencia')
@@ -0,0 +1,132 @@
+# app/container.py
+"""
+Application-scoped container: the objects shared by every request (async
+engine, SEFAZ client, signer, the stateless SEFAZ adapters over them, event
+publisher, tax engine, invoice cache, idempotency keys and emission workers) are built once at
+startup from Settings and released in reverse order at shutdown. Request
+dependencies only read its attributes.
+"""
+import asyncio
+from contextlib import AsyncExitStack
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from app.config.settings import Settings
+from core.services.calculadora_impostos import CalculadoraImpostos
+from core.services.ports.event_publisher_port import EventPublisherPort
+from infrastructure.adapters.cancelamento_nota_adapter import AsyncNotaFiscalCancelamentoAdapter
+from infrastructure.adapters.carta_correcao_nota_adapter import AsyncNotaFiscalCorreccaoAdapter
+from infrastructure.adapters.emissao_nota_adapter import AsyncNotaFiscalEmissaoAdapter
+from infrastructure.adapters.idempotencia import CoordenadorIdempotencia
+from infrastructure.adapters.idempotencia_sqlalchemy import idempotencia_store
+from infrastructure.adapters.nota_fiscal_cache import NotaCache, build_nota_cache
+from infrastructure.adapters.regras_tributarias import build_calculadora, regras_do_arquivo
+from infrastructure.external_services.async_sefaz_client import AsyncSefazClient, AsyncSefazStubClient
+from infrastructure.external_services.certificate_store import build_signer
+from infrastructure.external_services.signer import Signer
+from infrastructure.messaging.event_publisher import MicroBatchEventPublisher
+from infrastructure.messaging.transports import InProcessTransport, JsonLinesFileTransport
+from infrastructure.persistence.db import to_async_url
+from infrastructure.workers.emission_worker import EmissionWorkerPool
+
+
+class Container:
+    """
+    Holds the shared infrastructure of one application instance.
+
+    Attributes are available between `start()` and `stop()`; `stop()` drains
+    the emission workers before closing the clients they use and disposes the
+    engine last.
+    """
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.async_engine: Optional[AsyncEngine] = None
+        self.session_factory: Optional[async_sessionmaker] = None
+        self.sefaz_client = None
+        self.signer: Optional[Signer] = None
+        self.emissao_adapter: Optional[AsyncNotaFiscalEmissaoAdapter] = None
+        self.cancelamento_adapter: Optional[AsyncNotaFiscalCancelamentoAdapter] = None
+        self.correcao_adapter: Optional[AsyncNotaFiscalCorreccaoAdapter] = None
+        self.event_publisher: Optional[EventPublisherPort] = None
+        self.calculadora: Optional[CalculadoraImpostos] = None
+        self.nota_cache: Optional[NotaCache] = None
+        self.idempotencia: Optional[CoordenadorIdempotencia] = None
+        self.emission_workers: Optional[EmissionWorkerPool] = None
+        self._stack: Optional[AsyncExitStack] = None
+
+    @property
+    def started(self) -> bool:
+        return self._stack is not None
+
+    async def start(self) -> None:
+        if self._stack is not None:
+            return
+        s = self.settings
+        stack = AsyncExitStack()
+        try:
+            self.async_engine = create_async_engine(
+                s.async_database_url or to_async_url(s.database_url), pool_pre_ping=True
+            )
+            stack.push_async_callback(self.async_engine.dispose)
+            self.session_factory = async_sessionmaker(self.async_engine, autoflush=False, expire_on_commit=False)
+
+            # Without SEFAZ_BASE_URL the service keeps running against the stub
+            self.sefaz_client = AsyncSefazClient(s.sefaz_base_url) if s.sefaz_base_url else AsyncSefazStubClient()
+            stack.push_async_callback(self.sefaz_client.aclose)
+
+            # A1 certificates (per-CNPJ directory and/or single PFX) sign on a process pool
+            self.signer = build_signer(s.signer_cert_dir, s.signer_cert_path, s.signer_cert_password)
+            # shutdown(wait=True) do pool de processos: fora do event loop
+            stack.push_async_callback(asyncio.to_thread, self.signer.close)
+
+            self.emissao_adapter = AsyncNotaFiscalEmissaoAdapter(self.sefaz_client, self.signer)
+            self.cancelamento_adapter = AsyncNotaFiscalCancelamentoAdapter(self.sefaz_client, self.signer)
+            self.correcao_adapter = AsyncNotaFiscalCorreccaoAdapter(self.sefaz_client)
+
+            self.event_publisher = MicroBatchEventPublisher(
+                JsonLinesFileTransport(s.events_file) if s.events_file else InProcessTransport()
+            )
+            self.event_publisher.start()
+            # Envia o que ainda estiver no buffer de eventos (join da thread, fora do event loop)
+            stack.push_async_callback(asyncio.to_thread, self.event_publisher.stop)
+
+            self.calculadora = build_calculadora(s.tax_rules_file)
+            regras = regras_do_arquivo(self.calculadora)
+            if regras is not None:
+                # Recarga do arquivo de regras numa thread, fora do event loop
+                regras.start()
+                stack.push_async_callback(asyncio.to_thread, regras.stop)
+            self.nota_cache = build_nota_cache(s.nota_cache_size, s.nota_cache_ttl)
+            self.idempotencia = CoordenadorIdempotencia(
+                idempotencia_store(self.session_factory),
+                max_entries=s.idempotency_cache_size,
+                ttl=s.idempotency_cache_ttl,
+                retencao=s.idempotency_retention,
+            )
+            if s.idempotency_retention > 0:
+                # Purga periódica das chaves antigas da tabela idempotencia
+                await self.idempotencia.start()
+                stack.push_async_callback(self.idempotencia.stop)
+
+            self.emission_workers = EmissionWorkerPool(
+                self.session_factory,
+                lambda: self.emissao_adapter,
+                workers=s.emission_workers,
+                poll_interval=s.emission_poll_interval,
+                publisher=self.event_publisher,
+                calculadora=self.calculadora,
+            )
+            if s.emission_workers > 0:
+                await self.emission_workers.start()
+            stack.push_async_callback(self.emission_workers.stop)
+        except BaseException:
+            await stack.aclose()
+            raise
+        self._stack = stack
+
+    async def stop(self) -> None:
+        if self._stack is None:
+            return
+        stack, self._stack = self._stack, None
+        await stack.aclose()
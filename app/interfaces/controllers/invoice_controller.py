@@ -1,31 +1,52 @@
 # app/interfaces/controllers/invoice_controller.py
-from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel, Field, constr, conint, confloat
-from typing import List, Optional, Dict, TypeAlias
+import base64
+import binascii
+import hashlib
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import AfterValidator, BaseModel, Field, constr, conint, confloat
+from starlette.background import BackgroundTask
+from typing import Annotated, AsyncIterator, List, Literal, Optional, Dict, TypeAlias, Union
 from uuid import UUID
-from datetime import datetime
+from datetime import datetime, timezone
 
 from core.entities.nota_fiscal import NotaFiscal, ItemDaNota
-from core.value_objects.cnpjcpf import CnpjCpf
+from core.enum.status_nota import StatusNota
+from core.value_objects.cnpjcpf import CnpjCpf, documento_valido
 from core.value_objects.endereço import Endereco
 from core.value_objects.imposto import Imposto
-from core.exceptions.domain_exceptions import DomainException, NotaNaoEncontradaException
-from core.services.ports.nota_fiscal_repository_port import NotaFiscalRepository
-from application.use_cases.emit_invoice import EmitInvoiceUseCase
-from application.use_cases.cancel_invoice import CancelInvoiceUseCase
-from application.use_cases.correct_invoice import CorrectionInvoiceUseCase
-from infrastructure.adapters.emissao_nota_adapter import NotaFiscalEmissaoAdapter
-from infrastructure.adapters.cancelamento_nota_adapter import NotaFiscalCancelamentoAdapter
-from infrastructure.adapters.carta_correcao_nota_adapter import NotaFiscalCorreccaoAdapter
-from infrastructure.adapters.nota_fiscal_sqlalchemy import NotaFiscalSqlAlchemyAdapter
-from infrastructure.external_services.sefaz_client import SefazClient
-from infrastructure.external_services.signer import Signer
-from infrastructure.persistence.db import SessionLocal
+from core.exceptions.domain_exceptions import (
+    DomainException, IdempotenciaChaveReutilizadaException, IdempotenciaEmAndamentoException,
+    NotaNaoEncontradaException,
+)
+from core.services.ports.fila_emissao_port import FilaEmissaoPort
+from core.services.ports.idempotencia_port import RespostaIdempotente
+from core.services.ports.nota_fiscal_repository_port import (
+    AsyncNotaFiscalRepository, FiltroNotas, KeysetCursor, VersaoNota,
+)
+from application.use_cases.accept_invoice import AcceptInvoiceUseCase
+from application.use_cases.emit_invoice import AsyncEmitInvoiceUseCase, BatchEmissionResult
+from application.use_cases.cancel_invoice import AsyncCancelInvoiceUseCase
+from application.use_cases.correct_invoice import AsyncCorrectionInvoiceUseCase
+from infrastructure.adapters.fila_emissao_sqlalchemy import FilaEmissaoSqlAlchemyAdapter
+from infrastructure.adapters.nota_fiscal_sqlalchemy_async import NotaFiscalAsyncSqlAlchemyAdapter
+from infrastructure.adapters.idempotencia import CoordenadorIdempotencia
+from infrastructure.adapters.nota_fiscal_cache import CachedAsyncNotaFiscalRepository, NotaCache
+from app.container import Container
+from app.interfaces.serializers.etag import etag_nota, etag_pagina, if_none_match
+from app.interfaces.serializers.nota_fiscal_json import (
+    RawJSONResponse, encode_nota, encode_notas, json_str, nota_json, objeto_json,
+)
 
 router = APIRouter(prefix="/invoices", tags=["invoices"])
 
 # Type aliases for readability
-CNPJType: TypeAlias = constr(pattern=r'^\d{14}$')
+def _check_digits(numero: str) -> str:
+    if not documento_valido(numero):
+        raise ValueError("dígitos verificadores do CNPJ inválidos")
+    return numero
+
+CNPJType: TypeAlias = Annotated[constr(pattern=r'^\d{14}$'), AfterValidator(_check_digits)]
 UFType: TypeAlias = constr(pattern=r'^[A-Z]{2}$')
 CEPType: TypeAlias = constr(pattern=r'^\d{8}$')
 CFOPType: TypeAlias = constr(pattern=r'^\d{4}$')
@@ -84,109 +105,398 @@ class InvoiceResponseSchema(BaseModel):
     impostos_totais: Optional[Dict[str, float]]
     itens: List[ItemResponseSchema]
 
+class InvoiceBatchCreateSchema(BaseModel):
+    notas: List[InvoiceCreateSchema] = Field(..., min_length=1, max_length=500)
+
+class InvoiceBatchItemResultSchema(BaseModel):
+    index: int
+    status: str
+    invoice: Optional[InvoiceResponseSchema] = None
+    error: Optional[str] = None
+
+class EmissionAcceptedSchema(BaseModel):
+    id: UUID
+    status: str
+    status_url: str
+
+class EmissionJobStatusSchema(BaseModel):
+    nota_id: UUID
+    status: str
+    tentativas: int
+    ultimo_erro: Optional[str] = None
+    invoice: Optional[InvoiceResponseSchema] = None
+
 class CorrectionRequest(BaseModel):
     texto_correcao: constr(min_length=1, max_length=500) = Field(..., description="Texto da Carta de Correção")
 
-# Dependency providers
+# Dependency providers: shared objects live in the application Container
+# (built at startup, see app/main.py); these are attribute lookups.
 
-def get_db_session():
-    session = SessionLocal()
-    try:
+def get_container(request: Request) -> Container:
+    return request.app.state.container
+
+
+async def get_db_session(container: Container = Depends(get_container)):
+    async with container.session_factory() as session:
         yield session
-    finally:
-        session.close()
 
 
-def get_emit_use_case(session=Depends(get_db_session)) -> EmitInvoiceUseCase:
-    repo = NotaFiscalSqlAlchemyAdapter(session)
-    client = SefazClient()
-    signer = Signer()
-    adapter = NotaFiscalEmissaoAdapter(client, signer)
-    return EmitInvoiceUseCase(adapter, repo)
+def get_nota_cache(container: Container = Depends(get_container)) -> Optional[NotaCache]:
+    return container.nota_cache
 
 
-def get_cancel_use_case(session=Depends(get_db_session)) -> CancelInvoiceUseCase:
-    repo = NotaFiscalSqlAlchemyAdapter(session)
-    client = SefazClient()
-    signer = Signer()
-    adapter = NotaFiscalCancelamentoAdapter(client, signer)
-    return CancelInvoiceUseCase(adapter, repo)
+def get_idempotencia(container: Container = Depends(get_container)) -> Optional[CoordenadorIdempotencia]:
+    return container.idempotencia
 
 
-def get_correction_use_case(session=Depends(get_db_session)) -> CorrectionInvoiceUseCase:
-    repo = NotaFiscalSqlAlchemyAdapter(session)
-    client = SefazClient()
-    adapter = NotaFiscalCorreccaoAdapter(client)
-    return CorrectionInvoiceUseCase(adapter, repo)
+def cached_repository(session, cache: Optional[NotaCache]) -> AsyncNotaFiscalRepository:
+    repo = NotaFiscalAsyncSqlAlchemyAdapter(session)
+    return CachedAsyncNotaFiscalRepository(repo, cache) if cache is not None else repo
 
 
-def get_repository(session=Depends(get_db_session)) -> NotaFiscalRepository:
-    return NotaFiscalSqlAlchemyAdapter(session)
+def get_emit_use_case(
+    session=Depends(get_db_session),
+    container: Container = Depends(get_container)
+) -> AsyncEmitInvoiceUseCase:
+    return AsyncEmitInvoiceUseCase(
+        container.emissao_adapter,
+        NotaFiscalAsyncSqlAlchemyAdapter(session),
+        publisher=container.event_publisher,
+        calculadora=container.calculadora,
+    )
 
-# Routes
-@router.post("/", response_model=InvoiceResponseSchema, status_code=status.HTTP_201_CREATED)
-def emit_invoice(
-    payload: InvoiceCreateSchema,
-    use_case: EmitInvoiceUseCase = Depends(get_emit_use_case)
-) -> InvoiceResponseSchema:
+
+def get_cancel_use_case(
+    session=Depends(get_db_session),
+    container: Container = Depends(get_container)
+) -> AsyncCancelInvoiceUseCase:
+    return AsyncCancelInvoiceUseCase(
+        container.cancelamento_adapter,
+        cached_repository(session, container.nota_cache),
+        publisher=container.event_publisher,
+    )
+
+
+def get_correction_use_case(
+    session=Depends(get_db_session),
+    container: Container = Depends(get_container)
+) -> AsyncCorrectionInvoiceUseCase:
+    return AsyncCorrectionInvoiceUseCase(
+        container.correcao_adapter,
+        cached_repository(session, container.nota_cache),
+        publisher=container.event_publisher,
+    )
+
+
+def get_accept_use_case(session=Depends(get_db_session)) -> AcceptInvoiceUseCase:
+    return AcceptInvoiceUseCase(FilaEmissaoSqlAlchemyAdapter(session))
+
+
+def get_fila_emissao(session=Depends(get_db_session)) -> FilaEmissaoPort:
+    return FilaEmissaoSqlAlchemyAdapter(session)
+
+
+def get_repository(session=Depends(get_db_session), cache=Depends(get_nota_cache)) -> AsyncNotaFiscalRepository:
+    return cached_repository(session, cache)
+
+
+def get_stream_session(container: Container = Depends(get_container)):
+    # Dependências com yield são finalizadas antes do corpo de um StreamingResponse
+    # ser enviado; a rota de streaming fecha esta sessão ao terminar.
+    return container.session_factory()
+
+
+def get_stream_repository(session=Depends(get_stream_session)) -> AsyncNotaFiscalRepository:
+    return NotaFiscalAsyncSqlAlchemyAdapter(session)
+
+# Keyset cursor helpers
+
+def encode_cursor(nf: Union[NotaFiscal, VersaoNota]) -> str:
+    raw = f"{nf.data_emissao.isoformat()}|{nf.id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> KeysetCursor:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        data_emissao, nota_id = raw.split("|")
+        return datetime.fromisoformat(data_emissao), UUID(nota_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido")
+
+# Notas a partir deste número de itens guardam os itens em colunas (ItensColunares)
+ITENS_COLUNARES_A_PARTIR_DE = 256
+
+def build_nota(payload: InvoiceCreateSchema) -> NotaFiscal:
+    colunar = len(payload.itens) >= ITENS_COLUNARES_A_PARTIR_DE
     nota = NotaFiscal(
         CnpjCpf(payload.emitente_cnpj),
         CnpjCpf(payload.destinatario_cnpj),
-        Endereco(**payload.emitente_endereco.dict()),
-        Endereco(**payload.destinatario_endereco.dict())
+        Endereco(**payload.emitente_endereco.model_dump()),
+        Endereco(**payload.destinatario_endereco.model_dump()),
+        itens_colunares=colunar
     )
+    if colunar:
+        for item in payload.itens:
+            impostos = Imposto(**item.impostos)
+            nota.itens.adicionar(
+                item.sku, item.descricao, item.quantidade, item.valor_unitario, item.cfop, item.ncm, item.cst,
+                impostos.icms, impostos.ipi, impostos.pis, impostos.cofins,
+            )
+        return nota
     for item in payload.itens:
-        data = item.dict()
+        data = item.model_dump()
         impostos_dict = data.pop('impostos')
         nota.adicionar_item(ItemDaNota(**data, impostos=Imposto(**impostos_dict)))
+    return nota
+
+def wants_async(prefer: Optional[str]) -> bool:
+    # RFC 7240: "Prefer: respond-async" pede que o servidor aceite e processe depois
+    if not prefer:
+        return False
+    return any(p.strip().lower() == "respond-async" for p in prefer.split(","))
+
+def fingerprint(payload: BaseModel) -> str:
+    return hashlib.sha256(payload.model_dump_json().encode()).hexdigest()
+
+def stored_response(resposta: RespostaIdempotente) -> Response:
+    return RawJSONResponse(resposta.corpo, status_code=resposta.status_code, headers=resposta.headers)
+
+def utc_naive(valor: Optional[datetime]) -> Optional[datetime]:
+    # data_emissao é gravada em UTC sem fuso
+    if valor is None or valor.tzinfo is None:
+        return valor
+    return valor.astimezone(timezone.utc).replace(tzinfo=None)
+
+def check_range(nome: str, minimo, maximo) -> None:
+    if minimo is not None and maximo is not None and minimo > maximo:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Faixa de {nome} inválida")
+
+def not_modified(etag: str, ultima: Optional[VersaoNota] = None) -> Response:
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    if ultima is not None:
+        response.headers["X-Next-Cursor"] = encode_cursor(ultima)
+    return response
+
+# Routes
+@router.post(
+    "/",
+    response_model=InvoiceResponseSchema,
+    status_code=status.HTTP_201_CREATED,
+    responses={status.HTTP_202_ACCEPTED: {"model": EmissionAcceptedSchema}},
+)
+async def emit_invoice(
+    payload: InvoiceCreateSchema,
+    prefer: Optional[str] = Header(None),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    use_case: AsyncEmitInvoiceUseCase = Depends(get_emit_use_case),
+    accept_use_case: AcceptInvoiceUseCase = Depends(get_accept_use_case),
+    idempotencia: Optional[CoordenadorIdempotencia] = Depends(get_idempotencia)
+) -> Response:
+    async def emitir() -> RespostaIdempotente:
+        nota = build_nota(payload)
+        if wants_async(prefer):
+            job = await accept_use_case.execute(nota)
+            status_url = router.url_path_for("get_emission_job", nota_id=str(job.nota_id))
+            body = EmissionAcceptedSchema(id=job.nota_id, status=nota.status.value, status_url=status_url)
+            return RespostaIdempotente(
+                status.HTTP_202_ACCEPTED,
+                body.model_dump_json().encode(),
+                {"Location": status_url, "Preference-Applied": "respond-async"},
+            )
+        try:
+            resultado = await use_case.execute(nota)
+        except DomainException as e:
+            # Rejeição de domínio é definitiva: fica guardada como a resposta da chave
+            return RespostaIdempotente(
+                status.HTTP_400_BAD_REQUEST, objeto_json({"detail": json_str(str(e))}).encode(), {}
+            )
+        return RespostaIdempotente(status.HTTP_201_CREATED, encode_nota(resultado), {})
+
+    if idempotency_key is None or idempotencia is None:
+        return stored_response(await emitir())
+    if not 1 <= len(idempotency_key) <= 255:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Idempotency-Key inválida")
     try:
-        resultado = use_case.execute(nota)
-    except DomainException as e:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
-    resp = resultado.to_dict()
-    resp['itens'] = [{**it, 'total': it['quantidade'] * it['valor_unitario']} for it in resp['itens']]
-    return InvoiceResponseSchema(**resp)
+        resultado = await idempotencia.executar(idempotency_key, fingerprint(payload), emitir)
+    except IdempotenciaEmAndamentoException as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e), headers={"Retry-After": "1"})
+    except IdempotenciaChaveReutilizadaException as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    response = stored_response(resultado.resposta)
+    if resultado.repetida:
+        response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+@router.post("/batch", response_model=List[InvoiceBatchItemResultSchema])
+async def emit_invoice_batch(
+    payload: InvoiceBatchCreateSchema,
+    use_case: AsyncEmitInvoiceUseCase = Depends(get_emit_use_case)
+) -> Response:
+    # Notas que falham na construção (value objects) não entram no lote,
+    # mas mantêm seu índice na resposta
+    notas = []
+    results: Dict[int, str] = {}
+
+    def erro(index: int, mensagem: Optional[str]) -> str:
+        return objeto_json({"index": str(index), "status": '"ERRO"', "invoice": "null", "error": json_str(mensagem)})
+
+    for index, nota_payload in enumerate(payload.notas):
+        try:
+            notas.append((index, build_nota(nota_payload)))
+        except (ValueError, DomainException) as e:
+            results[index] = erro(index, str(e))
+
+    emitted: List[BatchEmissionResult] = await use_case.execute_batch([nota for _, nota in notas])
+    for (index, _), resultado in zip(notas, emitted):
+        if resultado.nota is None:
+            results[index] = erro(index, resultado.erro)
+            continue
+        results[index] = objeto_json({
+            "index": str(index),
+            "status": json_str(resultado.nota.status.value),
+            "invoice": nota_json(resultado.nota),
+            "error": "null",
+        })
+    body = "[" + ",".join(results[index] for index in range(len(payload.notas))) + "]"
+    return RawJSONResponse(body.encode())
 
 @router.get("/", response_model=List[InvoiceResponseSchema])
-def list_invoices(repo: NotaFiscalRepository = Depends(get_repository)) -> List[InvoiceResponseSchema]:
-    results = []
-    for nf in repo.list_all():
-        data = nf.to_dict()
-        data['itens'] = [{**it, 'total': it['quantidade'] * it['valor_unitario']} for it in data['itens']]
-        results.append(InvoiceResponseSchema(**data))
-    return results
+async def list_invoices(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    if_none_match_header: Optional[str] = Header(None, alias="If-None-Match"),
+    repo: AsyncNotaFiscalRepository = Depends(get_repository)
+) -> Response:
+    after = decode_cursor(cursor) if cursor else None
+    if if_none_match_header:
+        # Só as versões da página: sem itens e sem serializar
+        versoes = await repo.list_page_versoes(limit, after)
+        etag = etag_pagina(versoes, limit)
+        if if_none_match(if_none_match_header, etag):
+            return not_modified(etag, versoes[-1] if len(versoes) == limit else None)
+    notas = await repo.list_page(limit, after)
+    response = RawJSONResponse(encode_notas(notas))
+    response.headers["ETag"] = etag_pagina(map(VersaoNota.da_nota, notas), limit)
+    # Página cheia: pode haver mais notas depois da última entregue
+    if len(notas) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(notas[-1])
+    return response
+
+async def _ndjson_lines(notas: AsyncIterator[NotaFiscal]) -> AsyncIterator[bytes]:
+    async for nf in notas:
+        yield encode_nota(nf) + b"\n"
+
+@router.get("/stream")
+async def stream_invoices(
+    batch_size: int = Query(500, ge=1, le=5000),
+    repo: AsyncNotaFiscalRepository = Depends(get_stream_repository),
+    session=Depends(get_stream_session)
+) -> StreamingResponse:
+    return StreamingResponse(
+        _ndjson_lines(repo.iter_all(batch_size)),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(session.close),
+    )
+
+@router.get("/search", response_model=List[InvoiceResponseSchema])
+async def search_invoices(
+    emitente_cnpj: Optional[str] = Query(None, pattern=r'^\d{14}$'),
+    destinatario_cnpj: Optional[str] = Query(None, pattern=r'^\d{14}$'),
+    status_nota: Optional[StatusNota] = Query(None, alias="status"),
+    emitida_de: Optional[datetime] = None,
+    emitida_ate: Optional[datetime] = None,
+    valor_total_min: Optional[float] = Query(None, ge=0),
+    valor_total_max: Optional[float] = Query(None, ge=0),
+    icms_min: Optional[float] = Query(None, ge=0),
+    icms_max: Optional[float] = Query(None, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    count: Literal["none", "exact", "estimate"] = "none",
+    repo: AsyncNotaFiscalRepository = Depends(get_repository)
+) -> Response:
+    filtro = FiltroNotas(
+        emitente_cnpj=emitente_cnpj,
+        destinatario_cnpj=destinatario_cnpj,
+        status=status_nota,
+        emitida_de=utc_naive(emitida_de),
+        emitida_ate=utc_naive(emitida_ate),
+        valor_total_min=valor_total_min,
+        valor_total_max=valor_total_max,
+        icms_min=icms_min,
+        icms_max=icms_max,
+    )
+    check_range("emissão", filtro.emitida_de, filtro.emitida_ate)
+    check_range("valor total", valor_total_min, valor_total_max)
+    check_range("ICMS", icms_min, icms_max)
+    after = decode_cursor(cursor) if cursor else None
+    notas = await repo.search(filtro, limit, after)
+    response = RawJSONResponse(encode_notas(notas))
+    if len(notas) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(notas[-1])
+    if count != "none":
+        # "estimate" evita o COUNT(*) completo em tabelas grandes
+        contagem = await repo.count(filtro, estimate=count == "estimate")
+        header = "X-Total-Count" if contagem.exata else "X-Total-Count-Estimate"
+        response.headers[header] = str(contagem.total)
+    return response
+
+@router.get("/jobs/{nota_id}", response_model=EmissionJobStatusSchema)
+async def get_emission_job(
+    nota_id: UUID,
+    fila: FilaEmissaoPort = Depends(get_fila_emissao),
+    repo: AsyncNotaFiscalRepository = Depends(get_repository)
+) -> Response:
+    job = await fila.get_by_nota(nota_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Emissão não encontrada")
+    nf = await repo.get_by_id(nota_id)
+    body = objeto_json({
+        "nota_id": f'"{nota_id}"',
+        "status": json_str(job.status.value),
+        "tentativas": str(int(job.tentativas)),
+        "ultimo_erro": json_str(job.ultimo_erro),
+        "invoice": nota_json(nf) if nf else "null",
+    })
+    return RawJSONResponse(body.encode())
 
 @router.get("/{chave_acesso}", response_model=InvoiceResponseSchema)
-def get_invoice(chave_acesso: str, repo: NotaFiscalRepository = Depends(get_repository)) -> InvoiceResponseSchema:
-    nf = repo.get_by_chave(chave_acesso)
+async def get_invoice(
+    chave_acesso: str,
+    if_none_match_header: Optional[str] = Header(None, alias="If-None-Match"),
+    repo: AsyncNotaFiscalRepository = Depends(get_repository)
+) -> Response:
+    if if_none_match_header:
+        # Uma busca indexada pela versão decide o 304 antes de carregar os itens
+        versao = await repo.get_versao(chave_acesso)
+        if versao is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Nota não encontrada")
+        etag = etag_nota(versao.id, versao.versao)
+        if if_none_match(if_none_match_header, etag):
+            return not_modified(etag)
+    nf = await repo.get_by_chave(chave_acesso)
     if not nf:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Nota não encontrada")
-    data = nf.to_dict()
-    data['itens'] = [{**it, 'total': it['quantidade'] * it['valor_unitario']} for it in data['itens']]
-    return InvoiceResponseSchema(**data)
+    return RawJSONResponse(encode_nota(nf), headers={"ETag": etag_nota(nf.id, nf.versao)})
 
 @router.post("/{chave_acesso}/cancel", response_model=InvoiceResponseSchema)
-def cancel_invoice(chave_acesso: str, use_case: CancelInvoiceUseCase = Depends(get_cancel_use_case)) -> InvoiceResponseSchema:
+async def cancel_invoice(chave_acesso: str, use_case: AsyncCancelInvoiceUseCase = Depends(get_cancel_use_case)) -> Response:
     try:
-        nf = use_case.execute(chave_acesso)
+        nf = await use_case.execute(chave_acesso)
     except NotaNaoEncontradaException as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
-    data = nf.to_dict()
-    data['itens'] = [{**it, 'total': it['quantidade'] * it['valor_unitario']} for it in data['itens']]
-    return InvoiceResponseSchema(**data)
+    return RawJSONResponse(encode_nota(nf))
 
 @router.post("/{chave_acesso}/correction", response_model=InvoiceResponseSchema)
-def correct_invoice(
+async def correct_invoice(
     chave_acesso: str,
     payload: CorrectionRequest,
-    use_case: CorrectionInvoiceUseCase = Depends(get_correction_use_case)
-) -> InvoiceResponseSchema:
+    use_case: AsyncCorrectionInvoiceUseCase = Depends(get_correction_use_case)
+) -> Response:
     try:
-        nf = use_case.execute(chave_acesso, payload.texto_correcao)
+        nf = await use_case.execute(chave_acesso, payload.texto_correcao)
     except NotaNaoEncontradaException as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except DomainException as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
-    data = nf.to_dict()
-    data['itens'] = [{**it, 'total': it['quantidade'] * it['valor_unitario']} for it in data['itens']]
-    return InvoiceResponseSchema(**data)
+    return RawJSONResponse(encode_nota(nf))
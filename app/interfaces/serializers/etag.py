@@ -0,0 +1,44 @@
+# app/interfaces/serializers/etag.py
+"""
+ETags for invoice resources, derived from the persisted version only, so a
+conditional request can be answered without loading items or serializing.
+"""
+from hashlib import blake2b
+from typing import Iterable, Optional
+from uuid import UUID
+
+from core.services.ports.nota_fiscal_repository_port import VersaoNota
+
+
+def etag_nota(nota_id: UUID, versao: int) -> str:
+    return f'"{nota_id.hex}-{versao}"'
+
+
+def etag_pagina(versoes: Iterable[VersaoNota], limit: int) -> str:
+    """
+    ETag of a list page: changes when a note enters/leaves the page or is saved
+    again. `limit` is included because it decides the X-Next-Cursor header.
+    """
+    h = blake2b(limit.to_bytes(4, "big"), digest_size=16)
+    for v in versoes:
+        h.update(v.id.bytes)
+        h.update(v.versao.to_bytes(8, "big"))
+    return f'"p-{h.hexdigest()}"'
+
+
+def if_none_match(header: Optional[str], etag: str) -> bool:
+    """
+    True when an If-None-Match header matches `etag` (weak comparison, RFC 9110).
+    """
+    if not header:
+        return False
+    header = header.strip()
+    if header == "*":
+        return True
+    for candidato in header.split(","):
+        candidato = candidato.strip()
+        if candidato.startswith("W/"):
+            candidato = candidato[2:]
+        if candidato == etag:
+            return True
+    return False
@@ -0,0 +1,111 @@
+# app/interfaces/serializers/nota_fiscal_json.py
+"""
+Direct NotaFiscal -> JSON encoder for the invoice routes.
+
+The payload is the one InvoiceResponseSchema would produce, written straight
+from the entity in a single string join: no intermediate dicts and no pydantic
+model per invoice (and per item) that is validated only to be dumped again.
+Columnar items are read from their columns without building ItemDaNota objects.
+"""
+from datetime import datetime, timedelta
+from json.encoder import encode_basestring
+from typing import Dict, Iterable, Optional
+
+from fastapi.responses import Response
+
+from core.entities.nota_fiscal import NotaFiscal, linhas_dos_itens
+from core.value_objects.endereço import Endereco
+from core.value_objects.imposto import Imposto
+
+_ZERO = timedelta(0)
+_float = float.__repr__
+_str = encode_basestring
+
+
+class RawJSONResponse(Response):
+    """
+    Response whose content is already-encoded JSON bytes, sent as is.
+    Routes keep their `response_model` for the OpenAPI schema only.
+    """
+    media_type = "application/json"
+
+
+def json_str(valor: Optional[str]) -> str:
+    return "null" if valor is None else _str(valor)
+
+
+def _data(valor: datetime) -> str:
+    texto = valor.isoformat()
+    # Mesmo formato do pydantic: UTC como "Z"
+    if valor.utcoffset() == _ZERO:
+        return texto[:-6] + "Z"
+    return texto
+
+
+def _endereco(e: Endereco) -> str:
+    return (
+        f'{{"logradouro":{_str(e.logradouro)},"numero":{_str(e.numero)},'
+        f'"municipio":{_str(e.municipio)},"uf":{_str(e.uf)},"cep":{_str(e.cep)},'
+        f'"complemento":{_str(e.complemento)},"bairro":{_str(e.bairro)}}}'
+    )
+
+
+def _imposto(i: Optional[Imposto]) -> str:
+    if i is None:
+        return "null"
+    return (
+        f'{{"icms":{_float(float(i.icms))},"ipi":{_float(float(i.ipi))},'
+        f'"pis":{_float(float(i.pis))},"cofins":{_float(float(i.cofins))}}}'
+    )
+
+
+def _itens(itens) -> str:
+    partes = []
+    append = partes.append
+    for sku, descricao, quantidade, valor_unitario, cfop, ncm, cst, icms, ipi, pis, cofins in linhas_dos_itens(itens):
+        quantidade = int(quantidade)
+        valor_unitario = float(valor_unitario)
+        append(
+            f'{{"sku":{_str(sku)},"descricao":{_str(descricao)},"quantidade":{quantidade},'
+            f'"valor_unitario":{_float(valor_unitario)},"cfop":{_str(cfop)},"ncm":{_str(ncm)},'
+            f'"cst":{_str(cst)},"impostos":{{"icms":{_float(float(icms))},"ipi":{_float(float(ipi))},'
+            f'"pis":{_float(float(pis))},"cofins":{_float(float(cofins))}}},'
+            f'"total":{_float(quantidade * valor_unitario)}}}'
+        )
+    return "[" + ",".join(partes) + "]"
+
+
+def nota_json(nf: NotaFiscal) -> str:
+    """
+    JSON text of one invoice, same fields and order as InvoiceResponseSchema.
+    """
+    return (
+        f'{{"id":"{nf.id}","chave_acesso":{json_str(nf.chave_acesso)},'
+        f'"status":{_str(nf.status.value)},"data_emissao":"{_data(nf.data_emissao)}",'
+        f'"protocolo_autorizacao":{json_str(nf.protocolo_autorizacao)},'
+        f'"protocolo_cce":{json_str(nf.protocolo_cce)},'
+        f'"emitente_cnpj":{_str(nf.emitente_cnpj.numero)},'
+        f'"destinatario_cnpj":{_str(nf.destinatario_cnpj.numero)},'
+        f'"emitente_endereco":{_endereco(nf.emitente_endereco)},'
+        f'"destinatario_endereco":{_endereco(nf.destinatario_endereco)},'
+        f'"impostos_totais":{_imposto(nf.impostos_totais)},'
+        f'"itens":{_itens(nf.itens)}}}'
+    )
+
+
+def objeto_json(campos: Dict[str, str]) -> str:
+    """
+    JSON object from already-encoded values (e.g. `nota_json` output).
+    """
+    return "{" + ",".join(f"{_str(k)}:{v}" for k, v in campos.items()) + "}"
+
+
+def encode_nota(nf: NotaFiscal) -> bytes:
+    return nota_json(nf).encode()
+
+
+def encode_notas(notas: Iterable[NotaFiscal]) -> bytes:
+    """
+    JSON array of invoices, as returned by the list route.
+    """
+    return ("[" + ",".join(map(nota_json, notas)) + "]").encode()
@@ -1,31 +1,42 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from infrastructure.persistence.db import engine
 from core.services.persistence.nota_fiscal_model import Base as NotaBase
 from core.services.persistence.item_da_nota_model import Base as ItemBase
+from core.services.persistence.emissao_job_model import Base as JobBase
+from core.services.persistence.idempotencia_model import Base as IdempotenciaBase
 
-
+from app.config.settings import get_settings
+from app.container import Container
 from app.interfaces.controllers.invoice_controller import router as invoice_router
 
 NotaBase.metadata.create_all(bind=engine)
 ItemBase.metadata.create_all(bind=engine)
+JobBase.metadata.create_all(bind=engine)
+IdempotenciaBase.metadata.create_all(bind=engine)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Clientes, assinador, publisher, engine e workers (EMISSION_WORKERS) são
+    # criados uma vez aqui; no shutdown os workers são drenados antes de fechar
+    # o pool HTTP da SEFAZ, e o engine assíncrono é o último a ser liberado.
+    container = Container(get_settings())
+    await container.start()
+    app.state.container = container
+    try:
+        yield
+    finally:
+        await container.stop()
+
 
 app = FastAPI(
     title="Invoice Service",
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # Inclui seu controller de invoices
 app.include_router(invoice_router)
-
-# (Opcional) eventos de ciclo de vida
-@app.on_event("startup")
-async def on_startup():
-    # aqui você poderia carregar configurações, conexões a filas, etc.
-    pass
-
-@app.on_event("shutdown")
-async def on_shutdown():
-    # fechar conexões, liberar recursos, etc.
-    pass
@@ -2,6 +2,8 @@
 """
 Converte entre modelos SQLAlchemy (infrastructure.persistence.db) e entidades de domínio.
 """
+from typing import List, Tuple
+
 from core.entities.nota_fiscal import NotaFiscal, ItemDaNota
 from core.value_objects.cnpjcpf import CnpjCpf
 from core.value_objects.endereço import Endereco
@@ -13,10 +15,9 @@ from core.services.persistence.item_da_nota_model import ItemDaNotaModel
 class NotaFiscalMapper:
     @staticmethod
     def to_entity(model: NotaFiscalModel) -> NotaFiscal:
-        # Obtém lista de itens
-        raw_items = getattr(model, 'itens', None) or getattr(model, 'items', [])
+        # Itens já vêm carregados conforme a estratégia de loading do repositório
         itens = []
-        for m in raw_items:
+        for m in model.items:
             item = ItemDaNota(
                 sku=m.sku,
                 descricao=m.descricao,
@@ -29,10 +30,10 @@ class NotaFiscalMapper:
             )
             itens.append(item)
 
-        # Cria a entidade de domínio
+        # Cria a entidade de domínio; documentos gravados não são revalidados
         nf = NotaFiscal(
-            CnpjCpf(model.emitente_cnpj),
-            CnpjCpf(model.destinatario_cnpj),
+            CnpjCpf.de_confianca(model.emitente_cnpj),
+            CnpjCpf.de_confianca(model.destinatario_cnpj),
             Endereco(**model.emitente_endereco),
             Endereco(**model.destinatario_endereco)
         )
@@ -46,6 +47,7 @@ class NotaFiscalMapper:
         nf.data_emissao = model.data_emissao
         nf.protocolo_autorizacao = model.protocolo_autorizacao
         nf.impostos_totais = Imposto(**model.impostos_totais) if model.impostos_totais else None
+        nf.versao = model.versao or 0
         # protocolo de correção se existir
         if hasattr(model, 'protocolo_cce'):
             setattr(nf, 'protocolo_cce', model.protocolo_cce)
@@ -62,9 +64,10 @@ class NotaFiscalMapper:
             protocolo_autorizacao=nf.protocolo_autorizacao,
             emitente_cnpj=nf.emitente_cnpj.numero,
             destinatario_cnpj=nf.destinatario_cnpj.numero,
-            emitente_endereco=nf.emitente_endereco.__dict__,
-            destinatario_endereco=nf.destinatario_endereco.__dict__,
-            impostos_totais=(nf.impostos_totais.__dict__ if nf.impostos_totais else None)
+            emitente_endereco=nf.emitente_endereco.to_dict(),
+            destinatario_endereco=nf.destinatario_endereco.to_dict(),
+            impostos_totais=(nf.impostos_totais.to_dict() if nf.impostos_totais else None),
+            valor_total=round(nf.valor_total(), 2),
         )
         # Ajusta protocolo de correção se existir
         if getattr(nf, 'protocolo_cce', None) is not None:
@@ -82,8 +85,42 @@ class NotaFiscalMapper:
                 cfop=it.cfop,
                 ncm=it.ncm,
                 cst=it.cst,
-                impostos=it.impostos.__dict__
+                impostos=it.impostos.to_dict()
             )
             item_models.append(item_model)
         model.items = item_models
         return model
+
+    @staticmethod
+    def to_rows(nf: NotaFiscal) -> Tuple[dict, List[dict]]:
+        # Linhas planas para INSERT em massa (sem instanciar modelos ORM)
+        nota_row = {
+            "id": nf.id,
+            "chave_acesso": nf.chave_acesso,
+            "status": nf.status.value,
+            "data_emissao": nf.data_emissao,
+            "protocolo_autorizacao": nf.protocolo_autorizacao,
+            "protocolo_cce": nf.protocolo_cce,
+            "emitente_cnpj": nf.emitente_cnpj.numero,
+            "destinatario_cnpj": nf.destinatario_cnpj.numero,
+            "emitente_endereco": nf.emitente_endereco.to_dict(),
+            "destinatario_endereco": nf.destinatario_endereco.to_dict(),
+            "impostos_totais": (nf.impostos_totais.to_dict() if nf.impostos_totais else None),
+            "valor_total": round(nf.valor_total(), 2),
+            "versao": 1,
+        }
+        item_rows = [
+            {
+                "nota_id": nf.id,
+                "sku": it.sku,
+                "descricao": it.descricao,
+                "quantidade": it.quantidade,
+                "valor_unitario": it.valor_unitario,
+                "cfop": it.cfop,
+                "ncm": it.ncm,
+                "cst": it.cst,
+                "impostos": it.impostos.to_dict(),
+            }
+            for it in nf.itens
+        ]
+        return nota_row, item_rows
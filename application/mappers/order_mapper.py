@@ -0,0 +1,32 @@
+# application/mappers/order_mapper.py
+"""
+Converte o payload de um evento "pedido pago" na entidade NotaFiscal.
+O payload segue o mesmo formato do corpo de POST /invoices.
+"""
+from core.entities.nota_fiscal import NotaFiscal, ItemDaNota
+from core.value_objects.cnpjcpf import CnpjCpf
+from core.value_objects.endereço import Endereco
+from core.value_objects.imposto import Imposto
+
+
+class OrderMapper:
+    @staticmethod
+    def to_entity(payload: dict) -> NotaFiscal:
+        """
+        Raises:
+            KeyError, TypeError, ValueError: payload incompleto ou inválido.
+        """
+        nota = NotaFiscal(
+            CnpjCpf(payload["emitente_cnpj"]),
+            CnpjCpf(payload["destinatario_cnpj"]),
+            Endereco(**payload["emitente_endereco"]),
+            Endereco(**payload["destinatario_endereco"]),
+        )
+        itens = payload["itens"]
+        if not itens:
+            raise ValueError("Pedido sem itens")
+        for item in itens:
+            data = dict(item)
+            impostos = data.pop("impostos")
+            nota.adicionar_item(ItemDaNota(**data, impostos=Imposto(**impostos)))
+        return nota
@@ -0,0 +1,25 @@
+from core.entities.nota_fiscal import NotaFiscal
+from core.enum.status_nota import StatusNota
+from core.services.ports.fila_emissao_port import EmissaoJob, FilaEmissaoPort
+
+
+class AcceptInvoiceUseCase:
+    """
+    Accept-then-process emission: the note is stored as EM_PROCESSAMENTO and
+    queued, and the SEFAZ round trip happens later in a background worker.
+    """
+    def __init__(self, fila: FilaEmissaoPort):
+        self.fila = fila
+
+    async def execute(self, nota: NotaFiscal) -> EmissaoJob:
+        """
+        Persists the note and its emission job in one transaction.
+
+        Args:
+            nota (NotaFiscal): the domain entity with all required data.
+
+        Returns:
+            EmissaoJob: the queued job, used to build the status URL.
+        """
+        nota.status = StatusNota.EM_PROCESSAMENTO
+        return await self.fila.enqueue(nota)
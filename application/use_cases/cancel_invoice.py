@@ -2,25 +2,32 @@
 """
 Use case for canceling an invoice.
 """
+from typing import Optional
+
 from core.entities.nota_fiscal import NotaFiscal
+from core.enum.status_nota import StatusNota
+from core.events.domain_events import NotaCancelada
 from core.exceptions.domain_exceptions import NotaNaoEncontradaException
-from core.services.ports.cancelamento_nota_port import CancelamentoNotaPort
-from core.services.ports.nota_fiscal_repository_port import NotaFiscalRepository
+from core.services.ports.cancelamento_nota_port import AsyncCancelamentoNotaPort, CancelamentoNotaPort
+from core.services.ports.event_publisher_port import EventPublisherPort
+from core.services.ports.nota_fiscal_repository_port import AsyncNotaFiscalRepository, NotaFiscalRepository
 
 class CancelInvoiceUseCase:
     """
     Orchestrates the invoice cancellation workflow:
     1) Retrieves the existing NotaFiscal by access key.
     2) Calls the CancelamentoNotaPort to send the cancellation to SEFAZ.
-    3) Persists the updated NotaFiscal with status CANCELADA or REJEITADA.
+    3) Persists only the new status (CANCELADA or REJEITADA) and protocol.
     """
     def __init__(
         self,
         cancel_port: CancelamentoNotaPort,
         repository: NotaFiscalRepository,
+        publisher: Optional[EventPublisherPort] = None,
     ):
         self.cancel_port = cancel_port
         self.repository = repository
+        self.publisher = publisher
 
     def execute(self, chave_acesso: str) -> NotaFiscal:
         """
@@ -43,10 +50,58 @@ class CancelInvoiceUseCase:
         # 2. Trigger external cancellation on stub
         nota_result = self.cancel_port.cancelar(chave_acesso)
 
-        # 3. Update only status and protocol on original nota
+        # 3. Persist only status and protocol: one UPDATE, items are not rewritten
+        versao = self.repository.update_status(chave_acesso, nota_result.status, nota_result.protocolo_autorizacao)
+        if versao is None:
+            raise NotaNaoEncontradaException(f"Nota com chave {chave_acesso} não encontrada.")
+
+        # 4. Reflect the change on the entity returned to the caller
         nota.status = nota_result.status
         nota.protocolo_autorizacao = nota_result.protocolo_autorizacao
+        nota.versao = versao.versao
+
+        # 5. Notify downstream systems (only enqueues, never waits on the broker)
+        if self.publisher is not None and nota.status is StatusNota.CANCELADA:
+            self.publisher.publish(NotaCancelada.from_nota(nota))
+        return nota
+
+
+class AsyncCancelInvoiceUseCase:
+    """
+    Async counterpart of CancelInvoiceUseCase, with the same three steps.
+    """
+    def __init__(
+        self,
+        cancel_port: AsyncCancelamentoNotaPort,
+        repository: AsyncNotaFiscalRepository,
+        publisher: Optional[EventPublisherPort] = None,
+    ):
+        self.cancel_port = cancel_port
+        self.repository = repository
+        self.publisher = publisher
 
-        # 4. Persist the updated entity
-        self.repository.save(nota)
+    async def execute(self, chave_acesso: str) -> NotaFiscal:
+        """
+        Executes the cancellation process for a given access key.
+
+        Raises:
+            NotaNaoEncontradaException: if no invoice is found for the key.
+        """
+        nota = await self.repository.get_by_chave(chave_acesso)
+        if not nota:
+            raise NotaNaoEncontradaException(f"Nota com chave {chave_acesso} não encontrada.")
+
+        nota_result = await self.cancel_port.cancelar(chave_acesso)
+
+        versao = await self.repository.update_status(
+            chave_acesso, nota_result.status, nota_result.protocolo_autorizacao
+        )
+        if versao is None:
+            raise NotaNaoEncontradaException(f"Nota com chave {chave_acesso} não encontrada.")
+
+        nota.status = nota_result.status
+        nota.protocolo_autorizacao = nota_result.protocolo_autorizacao
+        nota.versao = versao.versao
+        if self.publisher is not None and nota.status is StatusNota.CANCELADA:
+            self.publisher.publish(NotaCancelada.from_nota(nota))
         return nota
@@ -2,13 +2,17 @@
 """
 Caso de uso: Emissão de Carta de Correção Eletrônica.
 """
+from typing import Optional
+
 from core.entities.nota_fiscal import NotaFiscal
+from core.events.domain_events import CCeRegistrada
 from core.exceptions.domain_exceptions import DomainException, NotaNaoEncontradaException
 from core.enum.status_nota import StatusNota
-from core.services.ports.carta_correcao_port import CartaCorrecaoPort
+from core.services.ports.carta_correcao_port import AsyncCartaCorrecaoPort, CartaCorrecaoPort
 from core.services.persistence.nota_fiscal_model import NotaFiscalModel
 from core.services.persistence.item_da_nota_model import ItemDaNotaModel
-from core.services.ports.nota_fiscal_repository_port import NotaFiscalRepository
+from core.services.ports.event_publisher_port import EventPublisherPort
+from core.services.ports.nota_fiscal_repository_port import AsyncNotaFiscalRepository, NotaFiscalRepository
 
 
 class CorrectionInvoiceUseCase:
@@ -16,15 +20,17 @@ class CorrectionInvoiceUseCase:
     1) Busca a NotaFiscal autorizada.
     2) Valida se status == AUTORIZADA.
     3) Envia correção para SEFAZ via CartaCorrecaoPort.
-    4) Atualiza protocolo_cce na entidade e persiste.
+    4) Persiste só o protocolo_cce (um UPDATE, sem regravar itens).
     """
     def __init__(
         self,
         correction_port: CartaCorrecaoPort,
         repository: NotaFiscalRepository,
+        publisher: Optional[EventPublisherPort] = None,
     ):
         self.correction_port = correction_port
         self.repository = repository
+        self.publisher = publisher
 
     def execute(self, chave_acesso: str, texto_correcao: str) -> NotaFiscal:
         # Recupera nota
@@ -39,9 +45,48 @@ class CorrectionInvoiceUseCase:
         # Dispara correção via port
         resultado = self.correction_port.corrigir(chave_acesso, texto_correcao)
 
-        # Atualiza protocolo da correção na entidade
+        # Persiste só o protocolo da correção
+        versao = self.repository.record_event(chave_acesso, resultado.protocol_number)
+        if versao is None:
+            raise NotaNaoEncontradaException(f"Nota com chave {chave_acesso} não encontrada.")
+
         nota.protocolo_cce = resultado.protocol_number
+        nota.versao = versao.versao
+        if self.publisher is not None:
+            self.publisher.publish(CCeRegistrada.from_nota(nota, texto_correcao))
+        return nota
+
 
-        # Persiste a alteração
-        self.repository.save(nota)
+class AsyncCorrectionInvoiceUseCase:
+    """
+    Versão assíncrona de CorrectionInvoiceUseCase, com as mesmas regras.
+    """
+    def __init__(
+        self,
+        correction_port: AsyncCartaCorrecaoPort,
+        repository: AsyncNotaFiscalRepository,
+        publisher: Optional[EventPublisherPort] = None,
+    ):
+        self.correction_port = correction_port
+        self.repository = repository
+        self.publisher = publisher
+
+    async def execute(self, chave_acesso: str, texto_correcao: str) -> NotaFiscal:
+        nota = await self.repository.get_by_chave(chave_acesso)
+        if nota is None:
+            raise NotaNaoEncontradaException(f"Nota com chave {chave_acesso} não encontrada.")
+
+        if nota.status is not StatusNota.AUTORIZADA:
+            raise DomainException("Somente notas autorizadas podem receber Carta de Correção.")
+
+        resultado = await self.correction_port.corrigir(chave_acesso, texto_correcao)
+
+        versao = await self.repository.record_event(chave_acesso, resultado.protocol_number)
+        if versao is None:
+            raise NotaNaoEncontradaException(f"Nota com chave {chave_acesso} não encontrada.")
+
+        nota.protocolo_cce = resultado.protocol_number
+        nota.versao = versao.versao
+        if self.publisher is not None:
+            self.publisher.publish(CCeRegistrada.from_nota(nota, texto_correcao))
         return nota
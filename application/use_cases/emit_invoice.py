@@ -1,7 +1,41 @@
+import asyncio
+from typing import List, NamedTuple, Optional
 
 from core.entities.nota_fiscal import NotaFiscal
-from core.services.ports.emissao_nota_port import EmissaoNotaPort
-from core.services.ports.nota_fiscal_repository_port import NotaFiscalRepository
+from core.enum.status_nota import StatusNota
+from core.events.domain_events import NotaEmitida
+from core.exceptions.domain_exceptions import DomainException
+from core.services.calculadora_impostos import CalculadoraImpostos
+from core.services.ports.emissao_nota_port import AsyncEmissaoNotaPort, EmissaoNotaPort
+from core.services.ports.event_publisher_port import EventPublisherPort
+from core.services.ports.nota_fiscal_repository_port import AsyncNotaFiscalRepository, NotaFiscalRepository
+
+
+class BatchEmissionResult(NamedTuple):
+    nota: Optional[NotaFiscal]
+    erro: Optional[str] = None
+
+
+def falha_de_emissao(e: Exception) -> BatchEmissionResult:
+    # Rejeições de domínio já trazem a mensagem para o cliente
+    if isinstance(e, DomainException):
+        return BatchEmissionResult(nota=None, erro=str(e))
+    return BatchEmissionResult(nota=None, erro=f"Falha na emissão: {e or type(e).__name__}")
+
+
+def falha_de_gravacao(nota: NotaFiscal, e: Exception) -> BatchEmissionResult:
+    return BatchEmissionResult(
+        nota=None, erro=f"Nota {nota.status.value} (chave {nota.chave_acesso}) não foi gravada: {e or type(e).__name__}"
+    )
+
+
+def publish_emitidas(publisher: Optional[EventPublisherPort], notas: List[NotaFiscal]) -> None:
+    # Só notas autorizadas geram NotaEmitida; publish apenas enfileira
+    if publisher is None:
+        return
+    for nota in notas:
+        if nota.status is StatusNota.AUTORIZADA:
+            publisher.publish(NotaEmitida.from_nota(nota))
 
 
 class EmitInvoiceUseCase:
@@ -10,9 +44,13 @@ class EmitInvoiceUseCase:
         self,
         emissor: EmissaoNotaPort,
         repository: NotaFiscalRepository,
+        publisher: Optional[EventPublisherPort] = None,
+        calculadora: Optional[CalculadoraImpostos] = None,
     ):
         self.emissor = emissor
         self.repository = repository
+        self.publisher = publisher
+        self.calculadora = calculadora or CalculadoraImpostos()
 
     def execute(self, nota: NotaFiscal) -> NotaFiscal:
         """
@@ -24,8 +62,132 @@ class EmitInvoiceUseCase:
         Returns:
             NotaFiscal: the updated entity with status, chave_acesso, protocolo_autorizacao.
         """
+        # Item taxes and impostos_totais go into the XML, so compute them first
+        self.calculadora.calcular(nota)
         # Trigger external emission (XML generation, signing, sending)
         nota_emitida = self.emissor.emitir(nota)
         # Persist the updated entity
         self.repository.save(nota_emitida)
+        publish_emitidas(self.publisher, [nota_emitida])
+        return nota_emitida
+
+    def execute_batch(self, notas: List[NotaFiscal]) -> List[BatchEmissionResult]:
+        """
+        Emits a group of notes and persists every emitted one in a single bulk write.
+
+        An error raised for one note is recorded in its result and does not stop
+        the others. If the bulk write fails, the notes are saved one by one so a
+        bad row does not discard notes SEFAZ already authorized.
+
+        Args:
+            notas (List[NotaFiscal]): the domain entities to emit.
+
+        Returns:
+            List[BatchEmissionResult]: one result per input note, in the same order.
+        """
+        results = []
+        for nota in notas:
+            try:
+                self.calculadora.calcular(nota)
+                results.append(BatchEmissionResult(nota=self.emissor.emitir(nota)))
+            except Exception as e:
+                results.append(falha_de_emissao(e))
+        emitidas = [r.nota for r in results if r.nota is not None]
+        if not emitidas:
+            return results
+        # One round trip and one commit for the whole group
+        try:
+            self.repository.save_many(emitidas)
+        except Exception:
+            for index, result in enumerate(results):
+                if result.nota is None:
+                    continue
+                try:
+                    self.repository.save(result.nota)
+                except Exception as e:
+                    results[index] = falha_de_gravacao(result.nota, e)
+            emitidas = [r.nota for r in results if r.nota is not None]
+        publish_emitidas(self.publisher, emitidas)
+        return results
+
+
+class AsyncEmitInvoiceUseCase:
+    """
+    Async counterpart of EmitInvoiceUseCase: the SEFAZ round trip and the
+    database write are awaited, so one worker can hold many emissions in flight.
+    """
+    def __init__(
+        self,
+        emissor: AsyncEmissaoNotaPort,
+        repository: AsyncNotaFiscalRepository,
+        batch_concurrency: int = 16,
+        publisher: Optional[EventPublisherPort] = None,
+        calculadora: Optional[CalculadoraImpostos] = None,
+    ):
+        self.emissor = emissor
+        self.repository = repository
+        self.batch_concurrency = batch_concurrency
+        self.publisher = publisher
+        self.calculadora = calculadora or CalculadoraImpostos()
+
+    async def execute(self, nota: NotaFiscal) -> NotaFiscal:
+        """
+        Executes the emission process and saves the result.
+
+        Args:
+            nota (NotaFiscal): the domain entity with all required data.
+
+        Returns:
+            NotaFiscal: the updated entity with status, chave_acesso, protocolo_autorizacao.
+        """
+        self.calculadora.calcular(nota)
+        nota_emitida = await self.emissor.emitir(nota)
+        await self.persist(nota_emitida)
         return nota_emitida
+
+    async def persist(self, nota_emitida: NotaFiscal) -> None:
+        """
+        Saves and publishes a note SEFAZ has already answered for. Callers
+        retrying after a failed write use this instead of `execute`, which
+        would emit the note again.
+        """
+        await self.repository.save(nota_emitida)
+        publish_emitidas(self.publisher, [nota_emitida])
+
+    async def execute_batch(self, notas: List[NotaFiscal]) -> List[BatchEmissionResult]:
+        """
+        Emits a group of notes concurrently (at most `batch_concurrency` SEFAZ
+        calls at a time) and persists every emitted one in a single bulk write,
+        with the same per-note error handling as EmitInvoiceUseCase.execute_batch.
+
+        Returns:
+            List[BatchEmissionResult]: one result per input note, in the same order.
+        """
+        semaphore = asyncio.Semaphore(self.batch_concurrency)
+
+        async def emitir(nota: NotaFiscal) -> BatchEmissionResult:
+            async with semaphore:
+                try:
+                    self.calculadora.calcular(nota)
+                    return BatchEmissionResult(nota=await self.emissor.emitir(nota))
+                except Exception as e:
+                    return falha_de_emissao(e)
+
+        results = list(await asyncio.gather(*(emitir(nota) for nota in notas)))
+        emitidas = [r.nota for r in results if r.nota is not None]
+        if not emitidas:
+            return results
+        try:
+            await self.repository.save_many(emitidas)
+        except Exception:
+            # Uma linha ruim derruba o INSERT do lote: grava nota a nota
+            for index, result in enumerate(results):
+                if result.nota is None:
+                    continue
+                try:
+                    await self.repository.save(result.nota)
+                except Exception as e:
+                    results[index] = falha_de_gravacao(result.nota, e)
+            emitidas = [r.nota for r in results if r.nota is not None]
+        publish_emitidas(self.publisher, emitidas)
+        return results
@@ -0,0 +1,102 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional
+
+from application.use_cases.emit_invoice import publish_emitidas
+from core.entities.nota_fiscal import NotaFiscal
+from core.enum.status_nota import StatusNota
+from core.exceptions.domain_exceptions import DomainException
+from core.services.calculadora_impostos import CalculadoraImpostos
+from core.services.ports.emissao_nota_port import AsyncEmissaoNotaPort
+from core.services.ports.event_publisher_port import EventPublisherPort
+from core.services.ports.fila_emissao_port import EmissaoJob, FilaEmissaoPort
+from core.services.ports.nota_fiscal_repository_port import AsyncNotaFiscalRepository
+
+
+class ProcessEmissionJobUseCase:
+    """
+    Runs one queued emission: emits the stored note, then saves the result
+    and completes the job in one transaction. Transient failures are retried
+    with exponential backoff until `max_tentativas` is reached; a domain
+    rejection fails the job at once.
+
+    A job whose note already left EM_PROCESSAMENTO (e.g. reclaimed after a
+    crash) is completed without emitting again. Once SEFAZ has answered, only
+    the write is retried (`persist_tentativas` times); if it keeps failing the
+    job fails for good with the SEFAZ answer in its error, instead of going
+    back to the queue to be emitted again.
+    """
+    def __init__(
+        self,
+        emissor: AsyncEmissaoNotaPort,
+        repository: AsyncNotaFiscalRepository,
+        fila: FilaEmissaoPort,
+        max_tentativas: int = 5,
+        backoff_base: float = 2.0,
+        backoff_max: float = 300.0,
+        persist_tentativas: int = 3,
+        persist_backoff: float = 0.5,
+        publisher: Optional[EventPublisherPort] = None,
+        calculadora: Optional[CalculadoraImpostos] = None,
+    ):
+        self.emissor = emissor
+        self.repository = repository
+        self.fila = fila
+        self.max_tentativas = max_tentativas
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.persist_tentativas = persist_tentativas
+        self.persist_backoff = persist_backoff
+        self.publisher = publisher
+        self.calculadora = calculadora or CalculadoraImpostos()
+
+    async def execute(self, job: EmissaoJob) -> None:
+        nota = await self.repository.get_by_id(job.nota_id)
+        if nota is None:
+            await self.fila.fail(job.id, "Nota não encontrada", None)
+            return
+        if nota.status is not StatusNota.EM_PROCESSAMENTO:
+            # Já emitida por uma tentativa anterior: emitir de novo geraria outra chave
+            await self.fila.complete(job.id)
+            return
+        if job.tentativas >= self.max_tentativas:
+            # Retomado após travas expiradas (worker caiu no meio) vezes demais
+            await self.fila.fail(job.id, job.ultimo_erro or "Tentativas esgotadas", None)
+            return
+        try:
+            self.calculadora.calcular(nota)
+            nota_emitida = await self.emissor.emitir(nota)
+        except DomainException as e:
+            # Rejeição definitiva: repetir não muda o resultado
+            await self.fila.fail(job.id, str(e), None)
+            return
+        except Exception as e:
+            tentativas = job.tentativas + 1
+            retry_at = None
+            if tentativas < self.max_tentativas:
+                atraso = min(self.backoff_base ** tentativas, self.backoff_max)
+                retry_at = datetime.utcnow() + timedelta(seconds=atraso)
+            await self.fila.fail(job.id, str(e) or type(e).__name__, retry_at)
+            return
+        if await self._concluir(job, nota_emitida):
+            publish_emitidas(self.publisher, [nota_emitida])
+
+    async def _concluir(self, job: EmissaoJob, nota_emitida: NotaFiscal) -> bool:
+        espera = self.persist_backoff
+        for tentativa in range(1, self.persist_tentativas + 1):
+            try:
+                await self.fila.complete(job.id, nota_emitida)
+                return True
+            except Exception as e:
+                erro = e
+            if tentativa < self.persist_tentativas:
+                await asyncio.sleep(espera)
+                espera *= 2
+        # Sem retry_at: voltar para a fila chamaria a SEFAZ de novo e geraria outra chave
+        await self.fila.fail(
+            job.id,
+            f"Nota {nota_emitida.status.value} pela SEFAZ (chave {nota_emitida.chave_acesso}, "
+            f"protocolo {nota_emitida.protocolo_autorizacao}) mas não gravada: {erro or type(erro).__name__}",
+            None,
+        )
+        return False
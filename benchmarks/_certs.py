@@ -0,0 +1,34 @@
+"""Self-signed A1-like certificates generated on the fly for signing benchmarks and tests."""
+from datetime import datetime, timedelta, timezone
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives.serialization import pkcs12
+from cryptography.x509.oid import NameOID
+
+
+def make_certificate(cnpj: str = "12345678000195", days: int = 365, key_size: int = 2048):
+    key = rsa.generate_private_key(public_exponent=65537, key_size=key_size)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, f"EMPRESA TESTE:{cnpj}")])
+    now = datetime.now(timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1))
+        .not_valid_after(now + timedelta(days=days))
+        .sign(key, hashes.SHA256())
+    )
+    return key, certificate
+
+
+def write_pfx(path, key, certificate, password: str = "senha") -> None:
+    data = pkcs12.serialize_key_and_certificates(
+        b"a1", key, certificate, None,
+        serialization.BestAvailableEncryption(password.encode()),
+    )
+    with open(path, "wb") as f:
+        f.write(data)
@@ -0,0 +1,60 @@
+"""
+Custo da CalculadoraImpostos na emissão de notas grandes: tempo do caminho
+atual (XML sem cálculo de impostos) vs o mesmo caminho com o cálculo, sem e
+com regras de alíquotas, para itens em lista e colunares. Sai com código 1
+se o cálculo passar do orçamento por item.
+
+    python -m benchmarks.bench_calculadora_impostos --items 1000 5000 --budget-us 5.0
+"""
+import argparse
+import sys
+import time
+
+from core.services.calculadora_impostos import CalculadoraImpostos
+from core.services.ports.aliquotas_port import AliquotasPort
+from core.value_objects.aliquotas import Aliquotas
+from infrastructure.external_services.nfe_xml_builder import NFeXmlBuilder
+from benchmarks.bench_itens_colunares import make_nota
+
+
+class AliquotasFixas(AliquotasPort):
+    def __init__(self):
+        self.aliquotas = Aliquotas(18, 5, "1.65", "7.6")
+
+    def aliquotas_para(self, ncm, cfop, uf_origem, uf_destino):
+        return self.aliquotas
+
+
+def timeit(fn, repeat: int = 20) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--budget-us", type=float, default=5.0, help="custo máximo do cálculo por item (µs)")
+    args = parser.parse_args()
+
+    builder = NFeXmlBuilder()
+    calculadoras = {"informados": CalculadoraImpostos(), "alíquotas": CalculadoraImpostos(AliquotasFixas())}
+    estourou = False
+    print(f"{'itens':>6} {'itens em':<9} {'impostos':<11} {'xml':>10} {'cálculo':>10} {'µs/item':>8} {'extra':>7}")
+    for itens in args.items:
+        for colunar in (False, True):
+            nota = make_nota(itens, colunar)
+            base = timeit(lambda: builder.build(nota))
+            for label, calculadora in calculadoras.items():
+                calculo = timeit(lambda: calculadora.calcular(nota))
+                por_item = calculo / itens * 1e6
+                estourou |= por_item > args.budget_us
+                print(f"{itens:>6} {'colunas' if colunar else 'lista':<9} {label:<11} {base * 1e3:>7.2f} ms "
+                      f"{calculo * 1e3:>7.2f} ms {por_item:>8.2f} {calculo / base:>6.0%}")
+    print(f"orçamento: {args.budget_us} µs/item — {'ESTOURADO' if estourou else 'ok'}")
+    sys.exit(1 if estourou else 0)
+
+
+if __name__ == "__main__":
+    main()
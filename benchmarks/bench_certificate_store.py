@@ -0,0 +1,50 @@
+"""
+Cost per signature with a PFX parsed on every call (Signer per request)
+vs. a CertificateStore hit, for a few emitentes.
+
+    python -m benchmarks.bench_certificate_store --calls 200
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from infrastructure.external_services.certificate_store import CertificateStore, DirectoryCertificateLocator
+from infrastructure.external_services.signer import Signer
+from benchmarks._certs import make_certificate, write_pfx
+
+XML = '<NFe><infNFe Id="NFe1" versao="4.00"><ide><nNF>1</nNF></ide></infNFe></NFe>'
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--tenants", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as base:
+        cnpjs = [f"{i:014d}" for i in range(1, args.tenants + 1)]
+        for cnpj in cnpjs:
+            write_pfx(Path(base, f"{cnpj}.pfx"), *make_certificate(cnpj))
+
+        start = time.perf_counter()
+        for i in range(args.calls):
+            cnpj = cnpjs[i % len(cnpjs)]
+            Signer(str(Path(base, f"{cnpj}.pfx")), "senha").sign(XML)
+        per_request = (time.perf_counter() - start) / args.calls
+
+        store = CertificateStore(DirectoryCertificateLocator(base, default_password="senha"))
+        for cnpj in cnpjs:
+            store.get(cnpj)
+        start = time.perf_counter()
+        for i in range(args.calls):
+            store.sign(XML, cnpjs[i % len(cnpjs)])
+        cached = (time.perf_counter() - start) / args.calls
+
+    print(f"tenants={args.tenants} calls={args.calls}")
+    print(f"{'pfx per call':>14}: {per_request * 1000:7.3f} ms/signature")
+    print(f"{'store hit':>14}: {cached * 1000:7.3f} ms/signature  ({per_request / cached:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Chave de acesso: geração em lote e validação do DV (módulo 11) comparadas com
+uma implementação direta, dígito a dígito, para milhões de chaves.
+
+    python -m benchmarks.bench_chave_acesso --keys 2000000
+"""
+import argparse
+import time
+from datetime import datetime
+from random import randrange
+
+from core.enum.uf import CODIGO_IBGE_UF
+from core.value_objects.chave_acesso import ChaveAcesso, gerar_chaves, validar_chave
+
+
+def dv_naive(base: str) -> str:
+    soma, peso = 0, 2
+    for digito in reversed(base):
+        soma += int(digito) * peso
+        peso = 2 if peso == 9 else peso + 1
+    resto = soma % 11
+    return "0" if resto < 2 else str(11 - resto)
+
+
+def gerar_naive(uf, data_emissao, cnpj, serie, numeros):
+    chaves = []
+    for numero in numeros:
+        base = (f"{CODIGO_IBGE_UF[uf]}{data_emissao:%y%m}{cnpj}55{serie:03d}"
+                f"{numero:09d}1{randrange(100_000_000):08d}")
+        chaves.append(base + dv_naive(base))
+    return chaves
+
+
+def validar_naive(chave: str) -> bool:
+    return len(chave) == 44 and chave.isdigit() and dv_naive(chave[:43]) == chave[43]
+
+
+def measure(label: str, fn, n: int) -> float:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:>8.2f} s {n / elapsed:>14,.0f} chaves/s")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keys", type=int, default=1_000_000)
+    args = parser.parse_args()
+    n = args.keys
+    args_chave = ("SP", datetime(2025, 3, 1), "12345678000195", 1, range(1, n + 1))
+
+    naive = measure("gerar (dígito a dígito)", lambda: gerar_naive(*args_chave), n)
+    lote = measure("gerar_chaves (lote)", lambda: gerar_chaves(*args_chave), n)
+    print(f"{'':<28} {naive / lote:>8.1f}x")
+
+    chaves = gerar_chaves(*args_chave)
+    naive = measure("validar (dígito a dígito)", lambda: [validar_naive(c) for c in chaves], n)
+    rapido = measure("validar_chave", lambda: [validar_chave(c) for c in chaves], n)
+    print(f"{'':<28} {naive / rapido:>8.1f}x")
+
+    amostra = chaves[: n // 10]
+    measure("parse (uf, aamm, cnpj)", lambda: [(c.uf, c.aamm, c.cnpj) for c in map(ChaveAcesso.parse, amostra)],
+            len(amostra))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Validação de CNPJ/CPF: construção de CnpjCpf (com o cache de documentos já
+validados) e validar_documentos em lote, comparados com a validação direta
+(re.sub + dígitos verificadores calculados dígito a dígito).
+
+    python -m benchmarks.bench_documentos --documents 1000000 --distinct 5000
+"""
+import argparse
+import re
+import time
+from random import Random
+
+from core.value_objects.cnpjcpf import CnpjCpf, documento_valido, validar_documentos
+
+
+def _dv(base: str, pesos) -> str:
+    resto = sum(int(d) * p for d, p in zip(base, pesos)) % 11
+    return "0" if resto < 2 else str(11 - resto)
+
+
+def gerar_cnpj(rng: Random) -> str:
+    base = f"{rng.randrange(10 ** 8):08d}0001"
+    base += _dv(base, (5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2))
+    return base + _dv(base, (6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2))
+
+
+def gerar_cpf(rng: Random) -> str:
+    base = f"{rng.randrange(10 ** 9):09d}"
+    base += _dv(base, range(10, 1, -1))
+    return base + _dv(base, range(11, 1, -1))
+
+
+def validar_naive(numero: str) -> bool:
+    limpo = re.sub(r"\D", "", numero)
+    if len(limpo) == 14:
+        pesos = ((5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2), (6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2))
+    elif len(limpo) == 11:
+        pesos = (range(10, 1, -1), range(11, 1, -1))
+    else:
+        return False
+    n = len(limpo) - 2
+    return _dv(limpo[:n], pesos[0]) == limpo[n] and _dv(limpo[:n + 1], pesos[1]) == limpo[n + 1]
+
+
+def measure(label: str, fn, n: int) -> float:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {elapsed:>7.2f} s {n / elapsed:>14,.0f} docs/s")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documents", type=int, default=1_000_000)
+    parser.add_argument("--distinct", type=int, default=5000, help="documentos distintos que se repetem no fluxo")
+    args = parser.parse_args()
+
+    rng = Random(42)
+    distintos = [gerar_cnpj(rng) if i % 2 else gerar_cpf(rng) for i in range(args.distinct)]
+    fluxo = [distintos[rng.randrange(len(distintos))] for _ in range(args.documents)]
+    unicos = [gerar_cnpj(rng) for _ in range(args.documents // 5)]
+    n = len(fluxo)
+
+    print(f"{n:,} documentos, {len(distintos):,} distintos")
+    base = measure("re.sub + DV (por documento)", lambda: [validar_naive(d) for d in fluxo], n)
+    documento_valido.cache_clear()
+    cached = measure("CnpjCpf (com cache)", lambda: [CnpjCpf(d) for d in fluxo], n)
+    lote = measure("validar_documentos (lote)", lambda: validar_documentos(fluxo), n)
+    print(f"{'':<34} cache {base / cached:.1f}x, lote {base / lote:.1f}x")
+    print(f"cache: {documento_valido.cache_info()}")
+
+    print(f"\n{len(unicos):,} CNPJs todos distintos")
+    base = measure("re.sub + DV (por documento)", lambda: [validar_naive(d) for d in unicos], len(unicos))
+    documento_valido.cache_clear()
+    single = measure("documento_valido (sem repetição)", lambda: [documento_valido(d) for d in unicos], len(unicos))
+    lote = measure("validar_documentos (lote)", lambda: validar_documentos(unicos), len(unicos))
+    print(f"{'':<34} individual {base / single:.1f}x, lote {base / lote:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
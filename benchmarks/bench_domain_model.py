@@ -0,0 +1,152 @@
+"""
+Memória por nota e tempo de construção do modelo de domínio, comparando as
+classes com __slots__ (core.entities / core.value_objects) com as versões
+anteriores, baseadas em __dict__ e com validadores recriados a cada instância.
+
+    python -m benchmarks.bench_domain_model --notes 100000 --items 5
+"""
+import argparse
+import gc
+import re
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional
+from uuid import UUID, uuid4
+
+from core.entities.nota_fiscal import ItemDaNota, NotaFiscal
+from core.enum.status_nota import StatusNota
+from core.value_objects.cnpjcpf import CnpjCpf
+from core.value_objects.endereço import Endereco
+from core.value_objects.imposto import Imposto
+
+
+# Versões anteriores (sem __slots__, regex e conjunto de UFs recriados por instância)
+
+@dataclass(frozen=True)
+class LegacyCnpjCpf:
+    numero: str
+
+    def __post_init__(self):
+        limpo = re.sub(r"\D", "", self.numero)
+        if len(limpo) not in (11, 14):
+            raise ValueError(f"CNPJ/CPF inválido: {self.numero}")
+        object.__setattr__(self, 'numero', limpo)
+
+
+@dataclass(frozen=True)
+class LegacyEndereco:
+    logradouro: str
+    numero: str
+    municipio: str
+    uf: str
+    cep: str
+    complemento: str = ""
+    bairro: str = ""
+
+    def __post_init__(self):
+        cep_limpo = re.sub(r"\D", "", self.cep)
+        if not re.fullmatch(r"\d{8}", cep_limpo):
+            raise ValueError(f"CEP inválido: {self.cep}")
+        uf_up = self.uf.strip().upper()
+        estados = {
+            "AC", "AL", "AP", "AM", "BA", "CE", "DF", "ES", "GO", "MA",
+            "MT", "MS", "MG", "PA", "PB", "PR", "PE", "PI", "RJ", "RN",
+            "RS", "RO", "RR", "SC", "SP", "SE", "TO"
+        }
+        if uf_up not in estados:
+            raise ValueError(f"UF inválido: {self.uf}")
+        object.__setattr__(self, 'cep', cep_limpo)
+        object.__setattr__(self, 'uf', uf_up)
+
+
+@dataclass(frozen=True)
+class LegacyImposto:
+    icms: float
+    ipi: float
+    pis: float
+    cofins: float
+
+
+class LegacyItemDaNota:
+    def __init__(self, sku, descricao, quantidade, valor_unitario, cfop, ncm, cst, impostos):
+        self.sku = sku
+        self.descricao = descricao
+        self.quantidade = quantidade
+        self.valor_unitario = valor_unitario
+        self.cfop = cfop
+        self.ncm = ncm
+        self.cst = cst
+        self.impostos = impostos
+
+
+class LegacyNotaFiscal:
+    def __init__(self, emitente_cnpj, destinatario_cnpj, emitente_endereco, destinatario_endereco):
+        self.emitente_cnpj = emitente_cnpj
+        self.destinatario_cnpj = destinatario_cnpj
+        self.emitente_endereco = emitente_endereco
+        self.destinatario_endereco = destinatario_endereco
+        self.itens: List = []
+        self.id: UUID = uuid4()
+        self.chave_acesso: Optional[str] = None
+        self.status = StatusNota.EM_PROCESSAMENTO
+        self.data_emissao = datetime.utcnow()
+        self.protocolo_autorizacao = None
+        self.impostos_totais = None
+        self.protocolo_cce = None
+
+    def adicionar_item(self, item) -> None:
+        self.itens.append(item)
+
+
+MODELS = {
+    "antes (__dict__)": (LegacyNotaFiscal, LegacyItemDaNota, LegacyCnpjCpf, LegacyEndereco, LegacyImposto),
+    "depois (__slots__)": (NotaFiscal, ItemDaNota, CnpjCpf, Endereco, Imposto),
+}
+
+
+def build(model, i: int, itens: int):
+    nota_cls, item_cls, doc_cls, end_cls, imp_cls = model
+    # Valores vindos de JSON/banco: strings novas a cada nota, como no fluxo real
+    nota = nota_cls(
+        doc_cls("".join(["12345678", "000195"])),
+        doc_cls("".join(["98765432", "000198"])),
+        end_cls("Av. Paulista", str(1000 + i), "Sao Paulo", "sp", "01310-100", "Sala 1", "Bela Vista"),
+        end_cls("Rua da Assembleia", str(i), "Rio de Janeiro", "rj", "20011-000", "", "Centro"),
+    )
+    for n in range(itens):
+        nota.adicionar_item(item_cls(
+            f"SKU{n:05d}", f"Produto {n}", n + 1, 19.9,
+            "".join(["61", "02"]), "".join(["8517", "6277"]), "".join(["10", "2"]),
+            imp_cls(2.39, 0.0, 0.13, 0.6),
+        ))
+    return nota
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--notes", type=int, default=100_000)
+    parser.add_argument("--items", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{args.notes:,} notas com {args.items} itens")
+    print(f"{'modelo':<20} {'bytes/nota':>12} {'construção':>14}")
+    for label, model in MODELS.items():
+        gc.collect()
+        tracemalloc.start()
+        notas = [build(model, i, args.items) for i in range(args.notes)]
+        memoria, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del notas
+        gc.collect()
+
+        start = time.perf_counter()
+        notas = [build(model, i, args.items) for i in range(args.notes)]
+        elapsed = time.perf_counter() - start
+        del notas
+        print(f"{label:<20} {memoria / args.notes:>12,.0f} {elapsed / args.notes * 1e6:>11.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
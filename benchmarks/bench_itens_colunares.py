@@ -0,0 +1,67 @@
+"""
+Notas com milhares de itens: lista de ItemDaNota vs ItensColunares (arrays
+tipados), medindo memória dos itens, totais/impostos, to_dict e XML.
+
+    python -m benchmarks.bench_itens_colunares --items 1000 5000
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from core.entities.nota_fiscal import ItemDaNota, NotaFiscal
+from core.value_objects.cnpjcpf import CnpjCpf
+from core.value_objects.endereço import Endereco
+from core.value_objects.imposto import Imposto
+from infrastructure.external_services.nfe_xml_builder import NFeXmlBuilder
+
+
+def make_nota(itens: int, colunar: bool) -> NotaFiscal:
+    nota = NotaFiscal(
+        CnpjCpf("12345678000195"),
+        CnpjCpf("98765432000198"),
+        Endereco("Av. Paulista", "1000", "Sao Paulo", "SP", "01310100"),
+        Endereco("Rua da Assembleia", "10", "Rio de Janeiro", "RJ", "20011000"),
+        itens_colunares=colunar,
+    )
+    for i in range(itens):
+        if colunar:
+            nota.itens.adicionar(f"SKU{i:05d}", f"Produto {i}", i % 7 + 1, 19.9 + i,
+                                 "6102", "85176277", "102", 2.39, 0.0, 0.13, 0.6)
+        else:
+            nota.adicionar_item(ItemDaNota(f"SKU{i:05d}", f"Produto {i}", i % 7 + 1, 19.9 + i,
+                                           "6102", "85176277", "102", Imposto(2.39, 0.0, 0.13, 0.6)))
+    return nota
+
+
+def timeit(fn, repeat: int = 20) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, nargs="+", default=[1000, 5000])
+    args = parser.parse_args()
+    builder = NFeXmlBuilder()
+
+    print(f"{'itens':>6} {'armazenamento':<14} {'memória':>10} {'totais':>10} {'to_dict':>10} {'xml':>10}")
+    for itens in args.items:
+        for colunar in (False, True):
+            gc.collect()
+            tracemalloc.start()
+            nota = make_nota(itens, colunar)
+            memoria, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            totais = timeit(lambda: (nota.valor_total(), nota.somar_impostos()))
+            to_dict = timeit(nota.to_dict)
+            xml = timeit(lambda: builder.build(nota))
+            label = "colunar" if colunar else "lista"
+            print(f"{itens:>6} {label:<14} {memoria / 1024:>7,.0f} KiB {totais * 1e3:>7.3f} ms "
+                  f"{to_dict * 1e3:>7.2f} ms {xml * 1e3:>7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
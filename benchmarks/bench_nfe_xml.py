@@ -0,0 +1,132 @@
+"""
+NF-e XML generation: compiled templates (NFeXmlBuilder) vs a straightforward
+ElementTree implementation of the same layout, for 1, 100 and 1000 items.
+
+    python -m benchmarks.bench_nfe_xml
+"""
+import argparse
+import time
+import xml.etree.ElementTree as ET
+from datetime import timezone
+
+from core.enum.uf import CODIGO_IBGE_UF
+from core.entities.nota_fiscal import ItemDaNota, NotaFiscal
+from core.value_objects.cnpjcpf import CnpjCpf
+from core.value_objects.endereço import Endereco
+from core.value_objects.imposto import Imposto
+from infrastructure.external_services.nfe_xml_builder import BRT, NFE_NS, NFeXmlBuilder
+
+
+def make_nota(itens: int) -> NotaFiscal:
+    nota = NotaFiscal(
+        CnpjCpf("12345678000195"),
+        CnpjCpf("98765432000198"),
+        Endereco("Av. Paulista", "1000", "Sao Paulo", "SP", "01310100", "Sala 1", "Bela Vista"),
+        Endereco("Rua da Assembleia", "10", "Rio de Janeiro", "RJ", "20011000", "", "Centro"),
+    )
+    for i in range(itens):
+        nota.adicionar_item(ItemDaNota(
+            sku=f"SKU{i:05d}", descricao=f"Produto {i}", quantidade=i % 7 + 1, valor_unitario=19.9,
+            cfop="6102", ncm="85176277", cst="102",
+            impostos=Imposto(icms=2.39, ipi=0.0, pis=0.13, cofins=0.6),
+        ))
+    return nota
+
+
+def _sub(parent, tag, text=None):
+    el = ET.SubElement(parent, tag)
+    if text is not None:
+        el.text = text
+    return el
+
+
+def _endereco(parent, tag, endereco):
+    el = _sub(parent, tag)
+    for name, value in (("xLgr", endereco.logradouro), ("nro", endereco.numero), ("xCpl", endereco.complemento),
+                        ("xBairro", endereco.bairro), ("xMun", endereco.municipio), ("UF", endereco.uf),
+                        ("CEP", endereco.cep), ("cPais", "1058"), ("xPais", "BRASIL")):
+        _sub(el, name, value)
+
+
+def build_with_elementtree(nota: NotaFiscal) -> str:
+    root = ET.Element("NFe", xmlns=NFE_NS)
+    inf = _sub(root, "infNFe")
+    inf.set("versao", "4.00")
+    inf.set("Id", "NFe" + nota.id.hex)
+    ide = _sub(inf, "ide")
+    for name, value in (("cUF", CODIGO_IBGE_UF[nota.emitente_endereco.uf]), ("cNF", "00000000"),
+                        ("natOp", "VENDA DE MERCADORIA"), ("mod", "55"), ("serie", "1"), ("nNF", "0"),
+                        ("dhEmi", nota.data_emissao.replace(tzinfo=timezone.utc).astimezone(BRT).isoformat(timespec="seconds")),
+                        ("tpNF", "1"), ("idDest", "2"), ("tpImp", "1"), ("tpEmis", "1"), ("cDV", "0"),
+                        ("tpAmb", "2"), ("finNFe", "1"), ("indFinal", "1"), ("indPres", "2"),
+                        ("procEmi", "0"), ("verProc", "ecom-invoice-service")):
+        _sub(ide, name, value)
+    emit = _sub(inf, "emit")
+    _sub(emit, "CNPJ", nota.emitente_cnpj.numero)
+    _endereco(emit, "enderEmit", nota.emitente_endereco)
+    dest = _sub(inf, "dest")
+    _sub(dest, "CNPJ", nota.destinatario_cnpj.numero)
+    _endereco(dest, "enderDest", nota.destinatario_endereco)
+    _sub(dest, "indIEDest", "9")
+    totals = [0.0] * 5
+    for n, item in enumerate(nota.itens, 1):
+        det = _sub(inf, "det")
+        det.set("nItem", str(n))
+        prod = _sub(det, "prod")
+        total = item.quantidade * item.valor_unitario
+        for name, value in (("cProd", item.sku), ("cEAN", "SEM GTIN"), ("xProd", item.descricao),
+                            ("NCM", item.ncm), ("CFOP", item.cfop), ("uCom", "UN"),
+                            ("qCom", f"{item.quantidade:.4f}"), ("vUnCom", f"{item.valor_unitario:.10f}"),
+                            ("vProd", f"{total:.2f}"), ("cEANTrib", "SEM GTIN"), ("uTrib", "UN"),
+                            ("qTrib", f"{item.quantidade:.4f}"), ("vUnTrib", f"{item.valor_unitario:.10f}"),
+                            ("indTot", "1")):
+            _sub(prod, name, value)
+        imposto = _sub(det, "imposto")
+        icms = _sub(_sub(imposto, "ICMS"), "ICMSSN")
+        _sub(icms, "orig", "0")
+        _sub(icms, "CSOSN", item.cst)
+        _sub(icms, "vICMS", f"{item.impostos.icms:.2f}")
+        ipi = _sub(imposto, "IPI")
+        _sub(ipi, "cEnq", "999")
+        _sub(_sub(ipi, "IPITrib"), "vIPI", f"{item.impostos.ipi:.2f}")
+        _sub(_sub(_sub(imposto, "PIS"), "PISOutr"), "vPIS", f"{item.impostos.pis:.2f}")
+        _sub(_sub(_sub(imposto, "COFINS"), "COFINSOutr"), "vCOFINS", f"{item.impostos.cofins:.2f}")
+        for i, value in enumerate((item.impostos.icms, total, item.impostos.ipi, item.impostos.pis, item.impostos.cofins)):
+            totals[i] += value
+    tot = _sub(_sub(inf, "total"), "ICMSTot")
+    for name, value in zip(("vICMS", "vProd", "vIPI", "vPIS", "vCOFINS"), totals):
+        _sub(tot, name, f"{value:.2f}")
+    _sub(tot, "vNF", f"{totals[1] + totals[2]:.2f}")
+    return ET.tostring(root, encoding="unicode")
+
+
+def timeit(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget", type=float, default=0.5, help="segundos aproximados por medição")
+    args = parser.parse_args()
+
+    builder = NFeXmlBuilder()
+    print(f"{'items':>6} {'elementtree':>14} {'template':>14} {'speedup':>8}")
+    for itens in (1, 100, 1000):
+        nota = make_nota(itens)
+        repeat = max(1, int(args.budget / max(timeit(lambda: build_with_elementtree(nota), 1), 1e-6)))
+        et = timeit(lambda: build_with_elementtree(nota), repeat)
+        tpl = timeit(lambda: builder.build(nota), repeat)
+        print(f"{itens:>6} {et * 1e3:>11.3f} ms {tpl * 1e3:>11.3f} ms {et / tpl:>7.1f}x")
+
+    notas = [make_nota(20) for _ in range(500)]
+    start = time.perf_counter()
+    builder.build_many(notas)
+    bulk = time.perf_counter() - start
+    print(f"build_many: {len(notas) / bulk:,.0f} notes/s (20 items each)")
+
+
+if __name__ == "__main__":
+    main()
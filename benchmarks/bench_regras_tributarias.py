@@ -0,0 +1,81 @@
+"""
+Resolução de alíquotas por item: varredura da lista de regras vs índice
+(trie de NCM + tabelas CFOP x UF), sem e com o LRU, e o custo de compilar
+o índice numa troca a quente.
+
+    python -m benchmarks.bench_regras_tributarias --rules 20000 --lookups 20000
+"""
+import argparse
+import time
+from random import Random
+
+from core.enum.uf import CODIGO_IBGE_UF
+from core.value_objects.aliquotas import Aliquotas
+from infrastructure.adapters.regras_tributarias import CURINGA, IndiceRegras, RegraTributaria
+
+UFS = sorted(CODIGO_IBGE_UF)
+CFOPS = ["5102", "5405", "6102", "6108", "6404"]
+
+
+def gerar_regras(n: int, rng: Random):
+    regras = [RegraTributaria("", CURINGA, CURINGA, CURINGA, Aliquotas(17, 0, "1.65", "7.6"))]
+    for _ in range(n):
+        ncm = f"{rng.randrange(10 ** 8):08d}"[: rng.choice((2, 4, 6, 8))]
+        regras.append(RegraTributaria(
+            ncm, rng.choice(CFOPS + [CURINGA]), rng.choice(UFS + [CURINGA]), rng.choice(UFS + [CURINGA]),
+            Aliquotas(rng.choice((4, 7, 12, 18)), 0, "1.65", "7.6"),
+        ))
+    return regras
+
+
+def resolver_varrendo(regras, ncm, cfop, uf_origem, uf_destino):
+    # Mesma precedência do índice: prefixo mais longo, depois chave mais específica, última linha vence
+    melhor, melhor_rank = None, None
+    for regra in regras:
+        if not ncm.startswith(regra.ncm):
+            continue
+        if regra.cfop not in (cfop, CURINGA) or regra.uf_origem not in (uf_origem, CURINGA) \
+                or regra.uf_destino not in (uf_destino, CURINGA):
+            continue
+        rank = (len(regra.ncm), regra.cfop != CURINGA, regra.uf_origem != CURINGA, regra.uf_destino != CURINGA)
+        if melhor_rank is None or rank >= melhor_rank:
+            melhor, melhor_rank = regra.aliquotas, rank
+    return melhor
+
+
+def measure(label: str, fn, n: int) -> float:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<30} {elapsed:>8.3f} s {n / elapsed:>14,.0f} consultas/s")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rules", type=int, default=20_000)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    parser.add_argument("--distinct-items", type=int, default=2_000, help="itens distintos do catálogo consultado")
+    args = parser.parse_args()
+
+    rng = Random(7)
+    regras = gerar_regras(args.rules, rng)
+    catalogo = [(f"{rng.randrange(10 ** 8):08d}", rng.choice(CFOPS), rng.choice(UFS), rng.choice(UFS))
+                for _ in range(args.distinct_items)]
+    consultas = [rng.choice(catalogo) for _ in range(args.lookups)]
+
+    start = time.perf_counter()
+    indice = IndiceRegras(regras)
+    print(f"compilação do índice ({len(regras):,} regras): {(time.perf_counter() - start) * 1e3:.0f} ms")
+
+    amostra = consultas[: max(1, args.lookups // 100)]
+    varredura = measure("varredura da lista", lambda: [resolver_varrendo(regras, *c) for c in amostra], len(amostra))
+    sem_cache = measure("índice, sem LRU", lambda: [indice._resolver(*c) for c in consultas], len(consultas))
+    com_cache = measure("índice + LRU", lambda: [indice.resolver(*c) for c in consultas], len(consultas))
+    print(f"{'':<30} índice {varredura / len(amostra) / (sem_cache / len(consultas)):,.0f}x, "
+          f"com LRU {varredura / len(amostra) / (com_cache / len(consultas)):,.0f}x")
+    assert all(indice.resolver(*c) == resolver_varrendo(regras, *c) for c in amostra)
+
+
+if __name__ == "__main__":
+    main()
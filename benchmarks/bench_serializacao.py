@@ -0,0 +1,50 @@
+"""
+Serialização de páginas da listagem (GET /invoices): caminho antigo
+(to_dict + InvoiceResponseSchema + model_dump_json) vs encoder direto
+(encode_notas), em µs por nota.
+
+    python -m benchmarks.bench_serializacao --page 100 1000 --items 3 50
+"""
+import argparse
+import time
+
+from app.interfaces.controllers.invoice_controller import InvoiceResponseSchema
+from app.interfaces.serializers.nota_fiscal_json import encode_notas
+from benchmarks.bench_itens_colunares import make_nota
+
+
+def schema_page(notas) -> bytes:
+    results = []
+    for nf in notas:
+        data = nf.to_dict()
+        data['itens'] = [{**it, 'total': it['quantidade'] * it['valor_unitario']} for it in data['itens']]
+        results.append(InvoiceResponseSchema(**data))
+    # Equivalente ao que o FastAPI fazia com o response_model da rota
+    return b"[" + b",".join(r.model_dump_json().encode() for r in results) + b"]"
+
+
+def timeit(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--page", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--items", type=int, nargs="+", default=[3, 50])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'página':>6} {'itens':>6} {'schema':>12} {'direto':>12} {'ganho':>7}")
+    for itens in args.items:
+        for page in args.page:
+            notas = [make_nota(itens, False) for _ in range(page)]
+            schema = timeit(lambda: schema_page(notas), args.repeat) / page
+            direto = timeit(lambda: encode_notas(notas), args.repeat) / page
+            print(f"{page:>6} {itens:>6} {schema * 1e6:>8.1f} µs {direto * 1e6:>8.1f} µs {schema / direto:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
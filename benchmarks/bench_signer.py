@@ -0,0 +1,54 @@
+"""
+Signature throughput: inline Signer vs ProcessPoolSigner with 1..N processes.
+
+Uses a locally generated RSA-2048 key and self-signed certificate.
+
+    python -m benchmarks.bench_signer --docs 400
+"""
+import argparse
+import time
+
+from infrastructure.external_services.signer import ProcessPoolSigner, Signer, available_cores
+from benchmarks._certs import make_certificate
+
+
+def documents(count: int):
+    item = "<det><prod><cProd>SKU001</cProd><qCom>1</qCom><vUnCom>10.00</vUnCom></prod></det>"
+    return [
+        f'<NFe><infNFe Id="NFe{i:044d}" versao="4.00"><ide><nNF>{i}</nNF></ide>{item * 20}</infNFe></NFe>'
+        for i in range(count)
+    ]
+
+
+def measure(signer, docs) -> float:
+    signer.sign_many(docs[:8])  # aquece o pool
+    start = time.perf_counter()
+    signer.sign_many(docs)
+    return len(docs) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=400)
+    parser.add_argument("--max-processes", type=int, default=available_cores())
+    args = parser.parse_args()
+
+    key, certificate = make_certificate()
+    docs = documents(args.docs)
+
+    inline = measure(Signer(private_key=key, certificate=certificate), docs)
+    print(f"cores={available_cores()} docs={args.docs}")
+    print(f"{'inline':>12}: {inline:8.1f} docs/s")
+    for processes in sorted({1, 2, 4, args.max_processes} - {0}):
+        if processes > args.max_processes:
+            continue
+        signer = ProcessPoolSigner(private_key=key, certificate=certificate, processes=processes)
+        try:
+            rate = measure(signer, docs)
+        finally:
+            signer.close()
+        print(f"{f'pool x{processes}':>12}: {rate:8.1f} docs/s  ({rate / inline:.2f}x inline)")
+
+
+if __name__ == "__main__":
+    main()
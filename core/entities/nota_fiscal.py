@@ -2,9 +2,13 @@
 """
 Domínio da Nota Fiscal eletrônica e ItemDaNota.
 """
+import sys
+from array import array
+from collections.abc import MutableSequence
+from operator import mul
 from uuid import UUID, uuid4
 from datetime import datetime
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional, Union
 
 from core.value_objects.cnpjcpf import CnpjCpf
 from core.value_objects.endereço import Endereco
@@ -12,6 +16,8 @@ from core.value_objects.imposto import Imposto
 from core.enum.status_nota import StatusNota
 
 class ItemDaNota:
+    __slots__ = ("sku", "descricao", "quantidade", "valor_unitario", "cfop", "ncm", "cst", "impostos")
+
     def __init__(
         self,
         sku: str,
@@ -27,9 +33,10 @@ class ItemDaNota:
         self.descricao = descricao
         self.quantidade = quantidade
         self.valor_unitario = valor_unitario
-        self.cfop = cfop
-        self.ncm = ncm
-        self.cst = cst
+        # Códigos fiscais se repetem entre itens: uma única string por valor
+        self.cfop = sys.intern(cfop)
+        self.ncm = sys.intern(ncm)
+        self.cst = sys.intern(cst)
         self.impostos = impostos
 
     @property
@@ -45,26 +52,165 @@ class ItemDaNota:
             "cfop": self.cfop,
             "ncm": self.ncm,
             "cst": self.cst,
-            "impostos": self.impostos.__dict__,
+            "impostos": self.impostos.to_dict(),
             "total": self.total,
         }
 
+class ItensColunares(MutableSequence):
+    """
+    Itens da nota em colunas: quantidades, valores unitários e os quatro impostos
+    em arrays tipados contíguos; sku, descrição, CFOP, NCM e CST em listas paralelas.
+    Pensado para notas com milhares de itens: nenhum ItemDaNota/Imposto fica alocado
+    por linha e os totais são somados direto sobre os arrays.
+
+    Indexação e iteração devolvem ItemDaNota montados na hora (cópias): alterar um
+    deles não altera a nota; para isso, atribua o item de volta (`itens[i] = item`).
+    """
+    __slots__ = (
+        "sku", "descricao", "cfop", "ncm", "cst",
+        "quantidade", "valor_unitario", "icms", "ipi", "pis", "cofins",
+    )
+
+    def __init__(self, itens: Iterable[ItemDaNota] = ()):
+        self.sku: List[str] = []
+        self.descricao: List[str] = []
+        self.cfop: List[str] = []
+        self.ncm: List[str] = []
+        self.cst: List[str] = []
+        self.quantidade = array("q")
+        self.valor_unitario = array("d")
+        self.icms = array("d")
+        self.ipi = array("d")
+        self.pis = array("d")
+        self.cofins = array("d")
+        self.extend(itens)
+
+    def _colunas(self):
+        return (self.sku, self.descricao, self.quantidade, self.valor_unitario, self.cfop,
+                self.ncm, self.cst, self.icms, self.ipi, self.pis, self.cofins)
+
+    @staticmethod
+    def _valores(item: ItemDaNota) -> tuple:
+        imp = item.impostos
+        return (item.sku, item.descricao, item.quantidade, item.valor_unitario,
+                item.cfop, item.ncm, item.cst, imp.icms, imp.ipi, imp.pis, imp.cofins)
+
+    def adicionar(
+        self, sku: str, descricao: str, quantidade: int, valor_unitario: float,
+        cfop: str, ncm: str, cst: str, icms: float, ipi: float, pis: float, cofins: float,
+    ) -> None:
+        """
+        Acrescenta uma linha sem criar ItemDaNota/Imposto.
+        """
+        self.sku.append(sku)
+        self.descricao.append(descricao)
+        self.quantidade.append(quantidade)
+        self.valor_unitario.append(valor_unitario)
+        self.cfop.append(sys.intern(cfop))
+        self.ncm.append(sys.intern(ncm))
+        self.cst.append(sys.intern(cst))
+        self.icms.append(icms)
+        self.ipi.append(ipi)
+        self.pis.append(pis)
+        self.cofins.append(cofins)
+
+    def append(self, item: ItemDaNota) -> None:
+        self.adicionar(*self._valores(item))
+
+    def _item(self, i: int) -> ItemDaNota:
+        return ItemDaNota(
+            self.sku[i], self.descricao[i], self.quantidade[i], self.valor_unitario[i],
+            self.cfop[i], self.ncm[i], self.cst[i],
+            Imposto(self.icms[i], self.ipi[i], self.pis[i], self.cofins[i]),
+        )
+
+    def __len__(self) -> int:
+        return len(self.sku)
+
+    def __getitem__(self, i: Union[int, slice]):
+        if isinstance(i, slice):
+            return [self._item(j) for j in range(*i.indices(len(self)))]
+        return self._item(range(len(self))[i])
+
+    def __setitem__(self, i: int, item: ItemDaNota) -> None:
+        i = range(len(self))[i]
+        for coluna, valor in zip(self._colunas(), self._valores(item)):
+            coluna[i] = valor
+
+    def __delitem__(self, i: int) -> None:
+        i = range(len(self))[i]
+        for coluna in self._colunas():
+            del coluna[i]
+
+    def insert(self, i: int, item: ItemDaNota) -> None:
+        for coluna, valor in zip(self._colunas(), self._valores(item)):
+            coluna.insert(i, valor)
+
+    def __iter__(self) -> Iterator[ItemDaNota]:
+        for i in range(len(self)):
+            yield self._item(i)
+
+    def totais(self) -> List[float]:
+        """
+        Total de cada linha (quantidade * valor unitário).
+        """
+        return list(map(mul, self.quantidade, self.valor_unitario))
+
+    def valor_total(self) -> float:
+        return sum(map(mul, self.quantidade, self.valor_unitario))
+
+    def somar_impostos(self) -> Imposto:
+        return Imposto(sum(self.icms), sum(self.ipi), sum(self.pis), sum(self.cofins))
+
+    def to_dicts(self) -> List[dict]:
+        return [
+            {
+                "sku": sku, "descricao": descricao, "quantidade": quantidade,
+                "valor_unitario": valor_unitario, "cfop": cfop, "ncm": ncm, "cst": cst,
+                "impostos": {"icms": icms, "ipi": ipi, "pis": pis, "cofins": cofins},
+                "total": total,
+            }
+            for sku, descricao, quantidade, valor_unitario, cfop, ncm, cst, icms, ipi, pis, cofins, total
+            in zip(*self._colunas(), self.totais())
+        ]
+
+def linhas_dos_itens(itens: Union[List[ItemDaNota], ItensColunares]) -> Iterator[tuple]:
+    """
+    Itera os itens como tuplas (sku, descricao, quantidade, valor_unitario, cfop,
+    ncm, cst, icms, ipi, pis, cofins); itens colunares são lidos direto das colunas.
+    """
+    if isinstance(itens, ItensColunares):
+        return zip(*itens._colunas())
+    return (
+        (it.sku, it.descricao, it.quantidade, it.valor_unitario, it.cfop, it.ncm, it.cst,
+         it.impostos.icms, it.impostos.ipi, it.impostos.pis, it.impostos.cofins)
+        for it in itens
+    )
+
 class NotaFiscal:
     """
     Entidade de domínio representando uma NF-e.
     """
+    __slots__ = (
+        "emitente_cnpj", "destinatario_cnpj", "emitente_endereco", "destinatario_endereco",
+        "itens", "id", "chave_acesso", "status", "data_emissao", "protocolo_autorizacao",
+        "impostos_totais", "protocolo_cce", "versao",
+    )
+
     def __init__(
         self,
         emitente_cnpj: CnpjCpf,
         destinatario_cnpj: CnpjCpf,
         emitente_endereco: Endereco,
-        destinatario_endereco: Endereco
+        destinatario_endereco: Endereco,
+        itens_colunares: bool = False
     ):
         self.emitente_cnpj = emitente_cnpj
         self.destinatario_cnpj = destinatario_cnpj
         self.emitente_endereco = emitente_endereco
         self.destinatario_endereco = destinatario_endereco
-        self.itens: List[ItemDaNota] = []
+        # Lista de ItemDaNota ou, para notas com muitos itens, ItensColunares
+        self.itens: Union[List[ItemDaNota], ItensColunares] = ItensColunares() if itens_colunares else []
         self.id: UUID = uuid4()
         self.chave_acesso: Optional[str] = None
         self.status: StatusNota = StatusNota.EM_PROCESSAMENTO
@@ -72,10 +218,32 @@ class NotaFiscal:
         self.protocolo_autorizacao: Optional[str] = None
         self.impostos_totais: Optional[Imposto] = None
         self.protocolo_cce: Optional[str] = None
+        # Versão persistida (0 = ainda não salva); incrementada pelo repositório a cada save()
+        self.versao: int = 0
 
     def adicionar_item(self, item: ItemDaNota) -> None:
         self.itens.append(item)
 
+    def valor_total(self) -> float:
+        if isinstance(self.itens, ItensColunares):
+            return self.itens.valor_total()
+        return sum(item.total for item in self.itens)
+
+    def somar_impostos(self) -> Imposto:
+        """
+        Soma, por tributo, os impostos dos itens.
+        """
+        if isinstance(self.itens, ItensColunares):
+            return self.itens.somar_impostos()
+        icms = ipi = pis = cofins = 0.0
+        for item in self.itens:
+            imp = item.impostos
+            icms += imp.icms
+            ipi += imp.ipi
+            pis += imp.pis
+            cofins += imp.cofins
+        return Imposto(icms, ipi, pis, cofins)
+
     def to_dict(self) -> dict:
         return {
             "id": str(self.id),
@@ -86,8 +254,9 @@ class NotaFiscal:
             "protocolo_cce": self.protocolo_cce,
             "emitente_cnpj": self.emitente_cnpj.numero,
             "destinatario_cnpj": self.destinatario_cnpj.numero,
-            "emitente_endereco": self.emitente_endereco.__dict__,
-            "destinatario_endereco": self.destinatario_endereco.__dict__,
-            "impostos_totais": (self.impostos_totais.__dict__ if self.impostos_totais else None),
-            "itens": [item.to_dict() for item in self.itens],
+            "emitente_endereco": self.emitente_endereco.to_dict(),
+            "destinatario_endereco": self.destinatario_endereco.to_dict(),
+            "impostos_totais": (self.impostos_totais.to_dict() if self.impostos_totais else None),
+            "itens": (self.itens.to_dicts() if isinstance(self.itens, ItensColunares)
+                      else [item.to_dict() for item in self.itens]),
         }
@@ -0,0 +1,13 @@
+from enum import Enum
+
+class ItemLoading(Enum):
+    """
+    Como o repositório carrega os itens de cada nota.
+
+    JOINED:   um único SELECT com JOIN — ideal para busca de uma nota.
+    SELECTIN: um SELECT ... IN (...) por lote de notas — ideal para listagens.
+    LAZY:     um SELECT por nota no primeiro acesso aos itens (N+1).
+    """
+    JOINED   = "JOINED"
+    SELECTIN = "SELECTIN"
+    LAZY     = "LAZY"
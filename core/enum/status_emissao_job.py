@@ -0,0 +1,7 @@
+from enum import Enum
+
+class StatusEmissaoJob(Enum):
+    PENDENTE    = "PENDENTE"
+    PROCESSANDO = "PROCESSANDO"
+    CONCLUIDO   = "CONCLUIDO"
+    FALHOU      = "FALHOU"
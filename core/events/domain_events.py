@@ -0,0 +1,87 @@
+# core/events/domain_events.py
+"""
+Eventos de domínio publicados para sistemas downstream.
+"""
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Optional
+from uuid import UUID, uuid4
+
+from core.entities.nota_fiscal import NotaFiscal
+
+
+@dataclass(frozen=True, kw_only=True)
+class DomainEvent:
+    """
+    Base dos eventos de nota fiscal.
+
+    Attributes:
+        nota_id (UUID): id interno da nota.
+        chave_acesso (str): chave de acesso da NF-e, quando já autorizada.
+        emitente_cnpj (str): CNPJ do emitente; usado como chave de partição.
+        event_id (UUID): identificador único do evento, para deduplicação.
+        ocorrido_em (datetime): instante (UTC) em que o fato ocorreu.
+    """
+    nota_id: UUID
+    chave_acesso: Optional[str]
+    emitente_cnpj: str
+    event_id: UUID = field(default_factory=uuid4)
+    ocorrido_em: datetime = field(default_factory=datetime.utcnow)
+
+    @property
+    def tipo(self) -> str:
+        return type(self).__name__
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["tipo"] = self.tipo
+        data["nota_id"] = str(self.nota_id)
+        data["event_id"] = str(self.event_id)
+        data["ocorrido_em"] = self.ocorrido_em.isoformat()
+        return data
+
+
+@dataclass(frozen=True, kw_only=True)
+class NotaEmitida(DomainEvent):
+    protocolo_autorizacao: Optional[str]
+    valor_total: float
+
+    @classmethod
+    def from_nota(cls, nota: NotaFiscal) -> "NotaEmitida":
+        return cls(
+            nota_id=nota.id,
+            chave_acesso=nota.chave_acesso,
+            emitente_cnpj=nota.emitente_cnpj.numero,
+            protocolo_autorizacao=nota.protocolo_autorizacao,
+            valor_total=nota.valor_total(),
+        )
+
+
+@dataclass(frozen=True, kw_only=True)
+class NotaCancelada(DomainEvent):
+    protocolo: Optional[str]
+
+    @classmethod
+    def from_nota(cls, nota: NotaFiscal) -> "NotaCancelada":
+        return cls(
+            nota_id=nota.id,
+            chave_acesso=nota.chave_acesso,
+            emitente_cnpj=nota.emitente_cnpj.numero,
+            protocolo=nota.protocolo_autorizacao,
+        )
+
+
+@dataclass(frozen=True, kw_only=True)
+class CCeRegistrada(DomainEvent):
+    protocolo_cce: Optional[str]
+    texto_correcao: str
+
+    @classmethod
+    def from_nota(cls, nota: NotaFiscal, texto_correcao: str) -> "CCeRegistrada":
+        return cls(
+            nota_id=nota.id,
+            chave_acesso=nota.chave_acesso,
+            emitente_cnpj=nota.emitente_cnpj.numero,
+            protocolo_cce=nota.protocolo_cce,
+            texto_correcao=texto_correcao,
+        )
@@ -11,3 +11,18 @@ class NotaNaoEncontradaException(DomainException):
 
     def __init__(self, message: str = "Recurso não encontrado no domínio."):
         super().__init__(message)
+
+class CertificadoIndisponivelException(DomainException):
+
+    def __init__(self, message: str = "Certificado digital do emitente indisponível."):
+        super().__init__(message)
+
+class IdempotenciaEmAndamentoException(DomainException):
+
+    def __init__(self, message: str = "Uma requisição com esta Idempotency-Key ainda está em andamento."):
+        super().__init__(message)
+
+class IdempotenciaChaveReutilizadaException(DomainException):
+
+    def __init__(self, message: str = "Idempotency-Key já usada com outro corpo de requisição."):
+        super().__init__(message)
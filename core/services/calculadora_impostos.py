@@ -0,0 +1,121 @@
+# core/services/calculadora_impostos.py
+"""
+Cálculo dos impostos dos itens e dos totais da NF-e em centavos inteiros.
+"""
+from array import array
+from itertools import repeat
+from operator import add, attrgetter, floordiv, itemgetter, mul, truediv
+from typing import List, Optional, Sequence
+
+from core.entities.nota_fiscal import ItensColunares, NotaFiscal
+from core.services.ports.aliquotas_port import AliquotasPort
+from core.value_objects.aliquotas import ESCALA_ALIQUOTA
+from core.value_objects.imposto import Imposto
+
+# Preço unitário em milionésimos (vUnCom admite mais casas que centavos)
+_ESCALA_PRECO = 1_000_000
+# base (centavos) * alíquota (percentual * ESCALA_ALIQUOTA) -> centavos
+_DIVISOR_IMPOSTO = 100 * ESCALA_ALIQUOTA
+_TRIBUTOS = ("icms", "ipi", "pis", "cofins")
+_QUANTIDADE, _VALOR_UNITARIO, _NCM, _CFOP, _IMPOSTOS = map(
+    attrgetter, ("quantidade", "valor_unitario", "ncm", "cfop", "impostos")
+)
+
+
+def _arredondar_divisao(valores, divisor: int):
+    # Divisão inteira com arredondamento half-up (valores não negativos)
+    return map(floordiv, map(add, valores, repeat(divisor // 2)), repeat(divisor))
+
+
+def _centavos(valores: Sequence[float]) -> List[int]:
+    # Reais -> centavos com o mesmo half-up das bases, a partir de milionésimos
+    # (0.125 * 100 é 12.5 no float e round() daria 12, half-to-even)
+    milionesimos = map(round, map(mul, valores, repeat(_ESCALA_PRECO)))
+    return list(_arredondar_divisao(milionesimos, _ESCALA_PRECO // 100))
+
+
+class CalculadoraImpostos:
+    """
+    Calcula ICMS, IPI, PIS e COFINS de todos os itens da nota de uma vez e
+    preenche `impostos_totais`.
+
+    A base de cálculo de cada item é o valor do produto (quantidade * valor
+    unitário), arredondada para centavos. Itens com alíquotas (via `AliquotasPort`)
+    têm os impostos recalculados; itens sem regra mantêm os valores informados.
+    As contas são feitas em centavos inteiros, coluna a coluna, então os totais
+    são exatos independentemente do número de itens.
+    """
+    def __init__(self, aliquotas: Optional[AliquotasPort] = None):
+        self.aliquotas = aliquotas
+
+    def calcular(self, nota: NotaFiscal) -> Imposto:
+        itens = nota.itens
+        colunar = isinstance(itens, ItensColunares)
+        if colunar:
+            quantidades, precos = itens.quantidade, itens.valor_unitario
+            ncms, cfops = itens.ncm, itens.cfop
+            declarados = [itens.icms, itens.ipi, itens.pis, itens.cofins]
+        else:
+            quantidades = list(map(_QUANTIDADE, itens))
+            precos = list(map(_VALOR_UNITARIO, itens))
+            ncms = list(map(_NCM, itens))
+            cfops = list(map(_CFOP, itens))
+            impostos = list(map(_IMPOSTOS, itens))
+            declarados = [list(map(attrgetter(tributo), impostos)) for tributo in _TRIBUTOS]
+
+        regras = self._regras(nota, ncms, cfops)
+        if regras is None:
+            centavos = [_centavos(coluna) for coluna in declarados]
+        else:
+            precos_escalados = map(round, map(mul, precos, repeat(_ESCALA_PRECO)))
+            bases = list(_arredondar_divisao(
+                map(mul, quantidades, precos_escalados), _ESCALA_PRECO // 100
+            ))
+            centavos = self._calcular_colunas(bases, regras, list(zip(ncms, cfops)), declarados)
+            self._atualizar_itens(itens, colunar, centavos)
+
+        totais = Imposto(*(sum(coluna) / 100 for coluna in centavos))
+        nota.impostos_totais = totais
+        return totais
+
+    def _regras(self, nota: NotaFiscal, ncms, cfops) -> Optional[dict]:
+        # Alíquotas (inteiras) por par NCM/CFOP distinto; None se nenhum item tem regra
+        if self.aliquotas is None or not ncms:
+            return None
+        uf_origem = nota.emitente_endereco.uf
+        uf_destino = nota.destinatario_endereco.uf
+        regras = {}
+        for ncm, cfop in dict.fromkeys(zip(ncms, cfops)):
+            aliquotas = self.aliquotas.aliquotas_para(ncm, cfop, uf_origem, uf_destino)
+            regras[ncm, cfop] = aliquotas.escala if aliquotas is not None else None
+        if all(escala is None for escala in regras.values()):
+            return None
+        return regras
+
+    @staticmethod
+    def _calcular_colunas(bases: List[int], regras: dict, pares: list, declarados) -> List[List[int]]:
+        escalas = set(regras.values())
+        if len(escalas) == 1:
+            # Uma única regra para todos os itens: alíquota constante por coluna
+            (escala,) = escalas
+            return [list(_arredondar_divisao(map(mul, bases, repeat(aliquota)), _DIVISOR_IMPOSTO))
+                    for aliquota in escala]
+        # imposto = base * alíquota (itens com regra) + informado (itens sem regra)
+        sem_regra = (0, 0, 0, 0)
+        por_item = list(map({par: escala or sem_regra for par, escala in regras.items()}.__getitem__, pares))
+        manter = list(map({par: int(escala is None) for par, escala in regras.items()}.__getitem__, pares))
+        return [
+            list(map(add, _arredondar_divisao(map(mul, bases, map(itemgetter(k), por_item)), _DIVISOR_IMPOSTO),
+                     map(mul, _centavos(informados), manter)))
+            for k, informados in enumerate(declarados)
+        ]
+
+    @staticmethod
+    def _atualizar_itens(itens, colunar: bool, centavos: List[List[int]]) -> None:
+        valores = [list(map(truediv, coluna, repeat(100))) for coluna in centavos]
+        if colunar:
+            for tributo, coluna in zip(_TRIBUTOS, valores):
+                setattr(itens, tributo, array("d", coluna))
+            return
+        for item, imposto in zip(itens, map(Imposto, *valores)):
+            item.impostos = imposto
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, DateTime, Enum as SQLEnum, ForeignKey, Index, Integer, String, Text, Uuid
+from datetime import datetime
+from core.enum.status_emissao_job import StatusEmissaoJob
+from core.services.persistence.base import Base
+
+
+class EmissaoJobModel(Base):
+    __tablename__ = "emissao_job"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    nota_id = Column(Uuid(as_uuid=True), ForeignKey("nota_fiscal.id"), nullable=False, unique=True)
+    status = Column(SQLEnum(StatusEmissaoJob), nullable=False, default=StatusEmissaoJob.PENDENTE)
+    tentativas = Column(Integer, nullable=False, default=0)
+    disponivel_em = Column(DateTime, nullable=False, default=datetime.utcnow)
+    travado_em = Column(DateTime, nullable=True)
+    travado_por = Column(String, nullable=True)
+    ultimo_erro = Column(Text, nullable=True)
+    criado_em = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    # Índice usado pelo claim dos workers: status + disponibilidade
+    __table_args__ = (
+        Index("ix_emissao_job_status_disponivel_em", "status", "disponivel_em"),
+    )
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, DateTime, Index, Integer, LargeBinary, String, Text
+from datetime import datetime
+from core.services.persistence.base import Base
+
+
+class IdempotenciaModel(Base):
+    __tablename__ = "idempotencia"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    chave = Column(String(255), nullable=False)
+    # Hash do corpo da requisição: a mesma chave com outro corpo é recusada
+    fingerprint = Column(String(64), nullable=False)
+    # Sem status_code a primeira execução ainda está em andamento
+    status_code = Column(Integer, nullable=True)
+    corpo = Column(LargeBinary, nullable=True)
+    headers = Column(Text, nullable=True)
+    criado_em = Column(DateTime, nullable=False, default=datetime.utcnow)
+    concluido_em = Column(DateTime, nullable=True)
+
+    # O índice único é o que serializa requisições concorrentes com a mesma chave
+    __table_args__ = (
+        Index("ux_idempotencia_chave", "chave", unique=True),
+        # Purga das chaves antigas por criado_em
+        Index("ix_idempotencia_criado_em", "criado_em"),
+    )
@@ -1,15 +1,16 @@
-from sqlalchemy import Column, Integer, String, Float, JSON, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Uuid
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from core.services.persistence.base import Base
+from core.services.persistence.json_columns import JsonDocumento
 
 
 class ItemDaNotaModel(Base):
     __tablename__ = "item_da_nota"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    nota_id = Column(PGUUID(as_uuid=True), ForeignKey("nota_fiscal.id"), nullable=False)
+    # Indexada: o carregamento selectin busca itens por nota_id IN (...)
+    nota_id = Column(Uuid(as_uuid=True), ForeignKey("nota_fiscal.id"), nullable=False, index=True)
     sku = Column(String, nullable=False)
     descricao = Column(String, nullable=False)
     quantidade = Column(Integer, nullable=False)
@@ -17,6 +18,6 @@ class ItemDaNotaModel(Base):
     cfop = Column(String, nullable=False)
     ncm = Column(String, nullable=False)
     cst = Column(String, nullable=False)
-    impostos = Column(JSON, nullable=False)
+    impostos = Column(JsonDocumento, nullable=False)
 
     nota = relationship("NotaFiscalModel", back_populates="items")
\ No newline at end of file
@@ -0,0 +1,51 @@
+"""
+Colunas JSON dos modelos: JSONB no PostgreSQL (indexável com GIN e por
+expressão), JSON nos demais bancos.
+"""
+import re
+
+from sqlalchemy import JSON, Numeric, String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ColumnElement
+from sqlalchemy.sql.visitors import InternalTraversal
+
+JsonDocumento = JSON().with_variant(JSONB(), "postgresql")
+
+_CHAVE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class campo_json(ColumnElement):
+    """
+    Campo de primeiro nível de uma coluna JSON, como texto ou, com
+    `numerico=True`, como número.
+
+    A chave é escrita literal no SQL (não como parâmetro): o planner só usa um
+    índice de expressão quando a consulta repete a expressão do índice, então
+    índices e filtros devem ser montados com este mesmo construtor.
+    """
+    inherit_cache = True
+    _traverse_internals = [
+        ("coluna", InternalTraversal.dp_clauseelement),
+        ("chave", InternalTraversal.dp_string),
+        ("numerico", InternalTraversal.dp_boolean),
+    ]
+
+    def __init__(self, coluna, chave: str, numerico: bool = False):
+        if not _CHAVE.match(chave):
+            raise ValueError(f"chave JSON inválida: {chave!r}")
+        self.coluna = coluna
+        self.chave = chave
+        self.numerico = numerico
+        self.type = Numeric() if numerico else String()
+
+
+@compiles(campo_json)
+def _campo_json(element, compiler, **kw):
+    return f"json_extract({compiler.process(element.coluna, **kw)}, '$.{element.chave}')"
+
+
+@compiles(campo_json, "postgresql")
+def _campo_json_pg(element, compiler, **kw):
+    valor = f"({compiler.process(element.coluna, **kw)} ->> '{element.chave}')"
+    return f"({valor}::numeric)" if element.numerico else valor
@@ -1,26 +1,58 @@
-from sqlalchemy import Column, String, DateTime, Enum as SQLEnum, JSON
-from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy import Column, String, DateTime, Enum as SQLEnum, Index, Integer, Numeric, Uuid
 from sqlalchemy.orm import relationship
 from uuid import uuid4
 from datetime import datetime
 from core.services.persistence.status_nota_model import StatusNotaModel
 from core.services.persistence.base import Base
+from core.services.persistence.json_columns import JsonDocumento, campo_json
 
 
 class NotaFiscalModel(Base):
     __tablename__ = "nota_fiscal"
 
-    id = Column(PGUUID(as_uuid=True), primary_key=True, default=uuid4)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid4)
     chave_acesso = Column(String(44), unique=True, index=True, nullable=True)
     status = Column(SQLEnum(StatusNotaModel), nullable=False, default=StatusNotaModel.EM_PROCESSAMENTO)
     data_emissao = Column(DateTime, default=datetime.utcnow, nullable=False)
     protocolo_autorizacao = Column(String, nullable=True)
+    protocolo_cce = Column(String, nullable=True)
 
     emitente_cnpj = Column(String(14), nullable=False)
     destinatario_cnpj = Column(String(14), nullable=False)
-    emitente_endereco = Column(JSON, nullable=False)
-    destinatario_endereco = Column(JSON, nullable=False)
-    impostos_totais = Column(JSON, nullable=True)
+    emitente_endereco = Column(JsonDocumento, nullable=False)
+    destinatario_endereco = Column(JsonDocumento, nullable=False)
+    impostos_totais = Column(JsonDocumento, nullable=True)
+    # Soma dos itens, gravada junto com a nota para a busca por faixa de valor
+    valor_total = Column(Numeric(15, 2, asdecimal=False), nullable=False, default=0, server_default="0")
+    # Incrementada a cada save(); identifica a representação da nota (ETag).
+    # O UPDATE só passa se a versão no banco ainda for a lida no merge.
+    versao = Column(Integer, nullable=False, default=1, server_default="1")
 
     items = relationship("ItemDaNotaModel", back_populates="nota", cascade="all, delete-orphan")
 
+    __mapper_args__ = {"version_id_col": versao, "version_id_generator": False}
+
+    __table_args__ = (
+        # Busca/paginação keyset: cada filtro por igualdade seguido de (data_emissao, id)
+        # entrega a página já na ordem do cursor, sem ordenar em memória
+        Index("ix_nota_fiscal_emissao", data_emissao, id),
+        Index("ix_nota_fiscal_emitente_emissao", emitente_cnpj, data_emissao, id),
+        Index("ix_nota_fiscal_destinatario_emissao", destinatario_cnpj, data_emissao, id),
+        Index("ix_nota_fiscal_status_emissao", status, data_emissao, id),
+        Index("ix_nota_fiscal_valor_total", valor_total),
+        # Índices de expressão: consultas precisam filtrar com o mesmo campo_json
+        Index(
+            "ix_nota_fiscal_destinatario_uf_municipio",
+            campo_json(destinatario_endereco, "uf"),
+            campo_json(destinatario_endereco, "municipio"),
+        ),
+        Index("ix_nota_fiscal_icms_total", campo_json(impostos_totais, "icms", numerico=True)),
+        # Containment (@>) sobre o endereço inteiro; GIN só existe no PostgreSQL
+        Index(
+            "ix_nota_fiscal_destinatario_endereco_gin",
+            destinatario_endereco,
+            postgresql_using="gin",
+            postgresql_ops={"destinatario_endereco": "jsonb_path_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+
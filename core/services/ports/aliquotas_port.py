@@ -0,0 +1,17 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from core.value_objects.aliquotas import Aliquotas
+
+
+class AliquotasPort(ABC):
+    """
+    Fonte das alíquotas aplicáveis a um item (regras fiscais por NCM, CFOP e UFs).
+    """
+    @abstractmethod
+    def aliquotas_para(self, ncm: str, cfop: str, uf_origem: str, uf_destino: str) -> Optional[Aliquotas]:
+        """
+        Retorna as alíquotas do item ou None quando nenhuma regra se aplica;
+        nesse caso os impostos informados no item são mantidos.
+        """
+        pass
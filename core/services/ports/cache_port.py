@@ -0,0 +1,23 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+
+
+class CacheCompartilhadoPort(ABC):
+    """
+    Cache compartilhado entre instâncias do serviço (ex.: Redis/Memcached).
+    Guarda bytes com TTL; falhas do cache nunca devem derrubar a requisição.
+    """
+    @abstractmethod
+    def get(self, chave: str) -> Optional[bytes]:
+        """
+        Retorna o valor armazenado ou None se ausente/expirado.
+        """
+        pass
+
+    @abstractmethod
+    def set(self, chave: str, valor: bytes, ttl: float) -> None:
+        pass
+
+    @abstractmethod
+    def delete(self, chave: str) -> None:
+        pass
@@ -10,4 +10,14 @@ class CancelamentoNotaPort(ABC):
         Solicita o cancelamento de uma NF-e já autorizada.
         Retorna a NotaFiscal com status cancelado.
         """
-        pass
\ No newline at end of file
+        pass
+
+
+
+class AsyncCancelamentoNotaPort(ABC):
+    @abstractmethod
+    async def cancelar(self, chave_acesso: str) -> NotaFiscal:
+        """
+        Versão assíncrona de CancelamentoNotaPort.cancelar.
+        """
+        pass
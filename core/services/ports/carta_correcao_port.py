@@ -10,4 +10,14 @@ class CartaCorrecaoPort(ABC):
         Emite uma Carta de Correcao Eletronica (CC-e) para a NF-e especificada.
         Retorna a NotaFiscal após processamento da CC-e.
         """
-        pass
\ No newline at end of file
+        pass
+
+
+
+class AsyncCartaCorrecaoPort(ABC):
+    @abstractmethod
+    async def corrigir(self, chave_acesso: str, texto_correcao: str) -> NotaFiscal:
+        """
+        Versão assíncrona de CartaCorrecaoPort.corrigir.
+        """
+        pass
@@ -11,3 +11,13 @@ class EmissaoNotaPort(ABC):
         Retorna a NotaFiscal atualizada com chave de acesso e protocolo preenchidos.
         """
         pass
+
+
+class AsyncEmissaoNotaPort(ABC):
+    @abstractmethod
+    async def emitir(self, nota: NotaFiscal) -> NotaFiscal:
+        """
+        Versão assíncrona de EmissaoNotaPort.emitir: não bloqueia o event loop
+        enquanto aguarda a SEFAZ.
+        """
+        pass
@@ -0,0 +1,17 @@
+from abc import ABC, abstractmethod
+
+from core.events.domain_events import DomainEvent
+
+
+class EventPublisherPort(ABC):
+    """
+    Saída de eventos de domínio. `publish` é chamado no caminho da requisição
+    e não pode esperar pelo broker: implementações apenas enfileiram.
+    """
+    @abstractmethod
+    def publish(self, event: DomainEvent) -> bool:
+        """
+        Enfileira o evento para envio assíncrono.
+        Retorna False se o evento foi descartado por falta de espaço.
+        """
+        pass
@@ -0,0 +1,57 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import List, NamedTuple, Optional
+from uuid import UUID
+
+from core.entities.nota_fiscal import NotaFiscal
+from core.enum.status_emissao_job import StatusEmissaoJob
+
+
+class EmissaoJob(NamedTuple):
+    id: int
+    nota_id: UUID
+    status: StatusEmissaoJob
+    tentativas: int
+    ultimo_erro: Optional[str] = None
+
+
+class FilaEmissaoPort(ABC):
+    """
+    Fila persistente de emissões pendentes, drenada por workers em background.
+    Várias instâncias da aplicação podem consumir a mesma fila em paralelo.
+    """
+    @abstractmethod
+    async def enqueue(self, nota: NotaFiscal) -> EmissaoJob:
+        """
+        Persiste a nota (EM_PROCESSAMENTO) e o job de emissão na mesma transação.
+        """
+        pass
+
+    @abstractmethod
+    async def claim(self, worker_id: str, limit: int, lock_timeout: float) -> List[EmissaoJob]:
+        """
+        Reserva até `limit` jobs disponíveis para `worker_id`, ignorando os que
+        outro worker já travou. Jobs travados há mais de `lock_timeout` segundos
+        são considerados abandonados e podem ser retomados; a retomada conta
+        como uma tentativa.
+        """
+        pass
+
+    @abstractmethod
+    async def complete(self, job_id: int, nota: Optional[NotaFiscal] = None) -> None:
+        """
+        Conclui o job; com `nota`, grava a nota emitida na mesma transação.
+        """
+        pass
+
+    @abstractmethod
+    async def fail(self, job_id: int, erro: str, retry_at: Optional[datetime]) -> None:
+        """
+        Registra a falha; com `retry_at` o job volta a PENDENTE a partir dessa
+        data, sem ele o job termina como FALHOU.
+        """
+        pass
+
+    @abstractmethod
+    async def get_by_nota(self, nota_id: UUID) -> Optional[EmissaoJob]:
+        pass
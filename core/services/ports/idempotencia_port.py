@@ -0,0 +1,55 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, NamedTuple, Optional
+
+
+class RespostaIdempotente(NamedTuple):
+    """
+    Resposta final de uma requisição idempotente, devolvida de novo a cada repetição.
+    """
+    status_code: int
+    corpo: bytes
+    headers: Dict[str, str]
+
+
+class RegistroIdempotencia(NamedTuple):
+    chave: str
+    fingerprint: str
+    criado_em: datetime
+    # None enquanto a primeira execução ainda está em andamento
+    resposta: Optional[RespostaIdempotente] = None
+
+
+class IdempotenciaPort(ABC):
+    """
+    Registro durável de chaves de idempotência (header Idempotency-Key),
+    compartilhado entre instâncias do serviço.
+    """
+    @abstractmethod
+    async def reservar(self, chave: str, fingerprint: str) -> Optional[RegistroIdempotencia]:
+        """
+        Registra `chave` como em andamento. Retorna None quando a reserva é
+        desta chamada; senão, o registro já existente (concluído ou em andamento).
+        Uma reserva em andamento nunca é retomada, por mais antiga que seja: a
+        operação pode já ter acontecido. Ela só sai por `liberar` ou `purgar`.
+        """
+        pass
+
+    @abstractmethod
+    async def concluir(self, chave: str, resposta: RespostaIdempotente) -> None:
+        pass
+
+    @abstractmethod
+    async def liberar(self, chave: str) -> None:
+        """
+        Remove uma reserva em andamento, permitindo que a requisição seja repetida.
+        """
+        pass
+
+    @abstractmethod
+    async def purgar(self, antes_de: datetime) -> int:
+        """
+        Remove as chaves criadas antes de `antes_de` (concluídas ou não) e
+        retorna quantas foram removidas.
+        """
+        pass
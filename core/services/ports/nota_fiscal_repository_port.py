@@ -1,7 +1,80 @@
 from abc import ABC, abstractmethod
-from typing import Optional, List
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterator, Iterator, NamedTuple, Optional, List, Tuple
+from uuid import UUID
 
 from core.entities.nota_fiscal import NotaFiscal
+from core.enum.item_loading import ItemLoading
+from core.enum.status_nota import StatusNota
+
+# Posição de keyset: (data_emissao, id) da última nota já entregue.
+KeysetCursor = Tuple[datetime, UUID]
+
+
+class VersaoNota(NamedTuple):
+    """
+    Identidade e versão de uma nota, sem itens: o suficiente para ETags
+    e para o cursor keyset.
+    """
+    id: UUID
+    versao: int
+    data_emissao: datetime
+
+    @classmethod
+    def da_nota(cls, nota: NotaFiscal) -> "VersaoNota":
+        return cls(nota.id, nota.versao, nota.data_emissao)
+
+
+@dataclass(frozen=True, slots=True)
+class FiltroNotas:
+    """
+    Critérios de busca de notas; campos None não filtram. O período de
+    emissão é [emitida_de, emitida_ate) e as faixas de valor são inclusivas.
+    """
+    emitente_cnpj: Optional[str] = None
+    destinatario_cnpj: Optional[str] = None
+    status: Optional[StatusNota] = None
+    emitida_de: Optional[datetime] = None
+    emitida_ate: Optional[datetime] = None
+    valor_total_min: Optional[float] = None
+    valor_total_max: Optional[float] = None
+    icms_min: Optional[float] = None
+    icms_max: Optional[float] = None
+
+    def aceita(self, nota: NotaFiscal) -> bool:
+        """
+        Avalia o filtro sobre uma nota em memória (mesma semântica da consulta SQL).
+        """
+        if self.emitente_cnpj is not None and nota.emitente_cnpj.numero != self.emitente_cnpj:
+            return False
+        if self.destinatario_cnpj is not None and nota.destinatario_cnpj.numero != self.destinatario_cnpj:
+            return False
+        if self.status is not None and nota.status is not self.status:
+            return False
+        if self.emitida_de is not None and nota.data_emissao < self.emitida_de:
+            return False
+        if self.emitida_ate is not None and nota.data_emissao >= self.emitida_ate:
+            return False
+        if not _na_faixa(round(nota.valor_total(), 2), self.valor_total_min, self.valor_total_max):
+            return False
+        if self.icms_min is not None or self.icms_max is not None:
+            if nota.impostos_totais is None:
+                return False
+            return _na_faixa(nota.impostos_totais.icms, self.icms_min, self.icms_max)
+        return True
+
+
+def _na_faixa(valor: float, minimo: Optional[float], maximo: Optional[float]) -> bool:
+    return (minimo is None or valor >= minimo) and (maximo is None or valor <= maximo)
+
+
+class ContagemNotas(NamedTuple):
+    """
+    Resultado de count(): `exata` é False quando `total` é uma estimativa.
+    """
+    total: int
+    exata: bool
 
 
 class NotaFiscalRepository(ABC):
@@ -12,13 +85,217 @@ class NotaFiscalRepository(ABC):
         """
         pass
 
+    def save_many(self, notas: List[NotaFiscal]) -> None:
+        """
+        Persiste um lote de notas novas. Implementações devem sobrescrever
+        com uma escrita em massa; o padrão apenas delega a save().
+        """
+        for nota in notas:
+            self.save(nota)
+
     @abstractmethod
-    def get_by_chave(self, chave_acesso: str) -> Optional[NotaFiscal]:
+    def get_by_chave(self, chave_acesso: str, loading: ItemLoading = ItemLoading.JOINED) -> Optional[NotaFiscal]:
         """
         Recupera a NotaFiscal pela chave de acesso, ou None se não existir.
+        `loading` define como os itens são carregados.
         """
         pass
 
+    def get_versao(self, chave_acesso: str) -> Optional[VersaoNota]:
+        """
+        Versão atual da nota, ou None se não existir. Implementações devem
+        sobrescrever com uma consulta só dessas colunas, sem carregar itens.
+        """
+        nota = self.get_by_chave(chave_acesso)
+        return VersaoNota.da_nota(nota) if nota else None
+
+    def update_status(
+        self, chave_acesso: str, status: StatusNota, protocolo_autorizacao: Optional[str]
+    ) -> Optional[VersaoNota]:
+        """
+        Altera só o status e o protocolo da nota e incrementa a versão.
+        Retorna a nova versão, ou None se a nota não existir. Implementações
+        devem sobrescrever com um único UPDATE, sem carregar nem regravar itens.
+        """
+        nota = self.get_by_chave(chave_acesso)
+        if nota is None:
+            return None
+        nota.status = status
+        nota.protocolo_autorizacao = protocolo_autorizacao
+        self.save(nota)
+        return VersaoNota.da_nota(nota)
+
+    def record_event(self, chave_acesso: str, protocolo_cce: str) -> Optional[VersaoNota]:
+        """
+        Registra o protocolo de um evento da nota (CC-e) e incrementa a versão,
+        nos mesmos termos de update_status.
+        """
+        nota = self.get_by_chave(chave_acesso)
+        if nota is None:
+            return None
+        nota.protocolo_cce = protocolo_cce
+        self.save(nota)
+        return VersaoNota.da_nota(nota)
+
     @abstractmethod
-    def list_all(self) -> List[NotaFiscal]:
-        pass
\ No newline at end of file
+    def list_all(self, loading: ItemLoading = ItemLoading.SELECTIN) -> List[NotaFiscal]:
+        pass
+
+    @abstractmethod
+    def list_page(
+        self,
+        limit: int,
+        after: Optional[KeysetCursor] = None,
+        loading: ItemLoading = ItemLoading.SELECTIN,
+    ) -> List[NotaFiscal]:
+        """
+        Retorna até `limit` notas ordenadas por (data_emissao, id),
+        começando estritamente depois da posição `after`.
+        """
+        pass
+
+    def list_page_versoes(self, limit: int, after: Optional[KeysetCursor] = None) -> List[VersaoNota]:
+        """
+        Mesma página de list_page, apenas com as versões das notas.
+        """
+        return [VersaoNota.da_nota(nota) for nota in self.list_page(limit, after)]
+
+    def search(
+        self,
+        filtro: FiltroNotas,
+        limit: int,
+        after: Optional[KeysetCursor] = None,
+        loading: ItemLoading = ItemLoading.SELECTIN,
+    ) -> List[NotaFiscal]:
+        """
+        Até `limit` notas que atendem `filtro`, na ordem e com o cursor de
+        list_page. O padrão filtra as páginas de list_page em memória;
+        implementações devem sobrescrever com uma consulta indexada.
+        """
+        encontradas: List[NotaFiscal] = []
+        while len(encontradas) < limit:
+            page = self.list_page(limit, after, loading)
+            encontradas.extend(nota for nota in page if filtro.aceita(nota))
+            if len(page) < limit:
+                break
+            after = (page[-1].data_emissao, page[-1].id)
+        return encontradas[:limit]
+
+    def count(self, filtro: FiltroNotas, estimate: bool = False) -> ContagemNotas:
+        """
+        Quantidade de notas que atendem `filtro`. Com `estimate=True` a
+        implementação pode devolver uma estimativa (exata=False) em vez de
+        contar a tabela inteira.
+        """
+        return ContagemNotas(sum(1 for nota in self.iter_all() if filtro.aceita(nota)), True)
+
+    def iter_all(self, batch_size: int = 500, loading: ItemLoading = ItemLoading.SELECTIN) -> Iterator[NotaFiscal]:
+        """
+        Percorre todas as notas em lotes de `batch_size` via keyset,
+        mantendo em memória apenas um lote por vez.
+        """
+        after: Optional[KeysetCursor] = None
+        while True:
+            page = self.list_page(batch_size, after, loading)
+            yield from page
+            if len(page) < batch_size:
+                return
+            last = page[-1]
+            after = (last.data_emissao, last.id)
+
+
+class AsyncNotaFiscalRepository(ABC):
+    """
+    Contrato assíncrono equivalente a NotaFiscalRepository, para o caminho
+    de requisição que roda inteiramente no event loop.
+    """
+    @abstractmethod
+    async def save(self, nota: NotaFiscal) -> None:
+        pass
+
+    async def save_many(self, notas: List[NotaFiscal]) -> None:
+        for nota in notas:
+            await self.save(nota)
+
+    @abstractmethod
+    async def get_by_chave(self, chave_acesso: str, loading: ItemLoading = ItemLoading.JOINED) -> Optional[NotaFiscal]:
+        pass
+
+    @abstractmethod
+    async def get_by_id(self, nota_id: UUID, loading: ItemLoading = ItemLoading.JOINED) -> Optional[NotaFiscal]:
+        """
+        Recupera a nota pelo id interno; usado para notas ainda sem chave de acesso.
+        """
+        pass
+
+    async def get_versao(self, chave_acesso: str) -> Optional[VersaoNota]:
+        nota = await self.get_by_chave(chave_acesso)
+        return VersaoNota.da_nota(nota) if nota else None
+
+    async def update_status(
+        self, chave_acesso: str, status: StatusNota, protocolo_autorizacao: Optional[str]
+    ) -> Optional[VersaoNota]:
+        nota = await self.get_by_chave(chave_acesso)
+        if nota is None:
+            return None
+        nota.status = status
+        nota.protocolo_autorizacao = protocolo_autorizacao
+        await self.save(nota)
+        return VersaoNota.da_nota(nota)
+
+    async def record_event(self, chave_acesso: str, protocolo_cce: str) -> Optional[VersaoNota]:
+        nota = await self.get_by_chave(chave_acesso)
+        if nota is None:
+            return None
+        nota.protocolo_cce = protocolo_cce
+        await self.save(nota)
+        return VersaoNota.da_nota(nota)
+
+    @abstractmethod
+    async def list_all(self, loading: ItemLoading = ItemLoading.SELECTIN) -> List[NotaFiscal]:
+        pass
+
+    @abstractmethod
+    async def list_page(
+        self,
+        limit: int,
+        after: Optional[KeysetCursor] = None,
+        loading: ItemLoading = ItemLoading.SELECTIN,
+    ) -> List[NotaFiscal]:
+        pass
+
+    async def list_page_versoes(self, limit: int, after: Optional[KeysetCursor] = None) -> List[VersaoNota]:
+        return [VersaoNota.da_nota(nota) for nota in await self.list_page(limit, after)]
+
+    async def search(
+        self,
+        filtro: FiltroNotas,
+        limit: int,
+        after: Optional[KeysetCursor] = None,
+        loading: ItemLoading = ItemLoading.SELECTIN,
+    ) -> List[NotaFiscal]:
+        encontradas: List[NotaFiscal] = []
+        while len(encontradas) < limit:
+            page = await self.list_page(limit, after, loading)
+            encontradas.extend(nota for nota in page if filtro.aceita(nota))
+            if len(page) < limit:
+                break
+            after = (page[-1].data_emissao, page[-1].id)
+        return encontradas[:limit]
+
+    async def count(self, filtro: FiltroNotas, estimate: bool = False) -> ContagemNotas:
+        total = 0
+        async for nota in self.iter_all():
+            total += filtro.aceita(nota)
+        return ContagemNotas(total, True)
+
+    async def iter_all(self, batch_size: int = 500, loading: ItemLoading = ItemLoading.SELECTIN) -> AsyncIterator[NotaFiscal]:
+        after: Optional[KeysetCursor] = None
+        while True:
+            page = await self.list_page(batch_size, after, loading)
+            for nota in page:
+                yield nota
+            if len(page) < batch_size:
+                return
+            last = page[-1]
+            after = (last.data_emissao, last.id)
@@ -0,0 +1,35 @@
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Tuple
+
+# Alíquotas são guardadas também como inteiros em 1/10000 de ponto percentual
+ESCALA_ALIQUOTA = 10_000
+
+@dataclass(frozen=True, slots=True)
+class Aliquotas:
+    """
+    Value Object com as alíquotas (em percentual: 18 = 18%) de um item.
+
+    Attributes:
+        icms, ipi, pis, cofins (Decimal): percentuais com até 4 casas decimais.
+        escala (Tuple[int, int, int, int]): as mesmas alíquotas em inteiros
+            (percentual * 10000), usadas no cálculo em centavos.
+    """
+    icms: Decimal
+    ipi: Decimal
+    pis: Decimal
+    cofins: Decimal
+    escala: Tuple[int, int, int, int] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        escala = []
+        for nome in ("icms", "ipi", "pis", "cofins"):
+            valor = Decimal(str(getattr(self, nome)))
+            if valor < 0 or valor > 100:
+                raise ValueError(f"Alíquota de {nome.upper()} inválida: {valor}")
+            inteiro = valor * ESCALA_ALIQUOTA
+            if inteiro != inteiro.to_integral_value():
+                raise ValueError(f"Alíquota de {nome.upper()} com mais de 4 casas decimais: {valor}")
+            object.__setattr__(self, nome, valor)
+            escala.append(int(inteiro))
+        object.__setattr__(self, 'escala', tuple(escala))
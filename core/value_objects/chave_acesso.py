@@ -0,0 +1,172 @@
+from dataclasses import dataclass
+from datetime import datetime
+from operator import mul
+from random import randrange
+from typing import Iterable, List, Optional
+
+from core.enum.uf import CODIGO_IBGE_UF, UF_POR_CODIGO_IBGE
+
+# Pesos do módulo 11, da esquerda para a direita sobre os 43 dígitos da base
+# (2..9 repetidos a partir do último dígito)
+_PESOS = tuple(2 + (i % 8) for i in range(43))[::-1]
+# Soma dos pesos vezes ord('0'): permite somar bytes ASCII direto, sem int() por dígito
+_AJUSTE_ASCII = 48 * sum(_PESOS)
+# Os 25 primeiros dígitos (cUF..serie) e os 18 seguintes (nNF, tpEmis, cNF)
+_PESOS_PREFIXO = _PESOS[:25]
+_PESOS_SUFIXO = _PESOS[25:]
+_AJUSTE_SUFIXO = 48 * sum(_PESOS_SUFIXO)
+
+
+def _dv_da_soma(soma: int) -> str:
+    resto = soma % 11
+    return "0" if resto < 2 else str(11 - resto)
+
+
+def calcular_dv(base: str) -> str:
+    """
+    Dígito verificador (módulo 11) dos 43 primeiros dígitos da chave.
+    """
+    return _dv_da_soma(sum(map(mul, base.encode(), _PESOS)) - _AJUSTE_ASCII)
+
+
+def validar_chave(chave: str) -> bool:
+    """
+    True se `chave` tem 44 dígitos e o DV confere.
+    """
+    if len(chave) != 44 or not (chave.isascii() and chave.isdigit()):
+        return False
+    return calcular_dv(chave[:43]) == chave[43]
+
+
+def validar_chaves(chaves: Iterable[str]) -> List[bool]:
+    return [validar_chave(chave) for chave in chaves]
+
+
+@dataclass(frozen=True)
+class ChaveAcesso:
+    """
+    Value Object da chave de acesso da NF-e (44 dígitos):
+    cUF(2) AAMM(4) CNPJ(14) mod(2) serie(3) nNF(9) tpEmis(1) cNF(8) cDV(1).
+    """
+    valor: str
+
+    def __post_init__(self):
+        if not validar_chave(self.valor):
+            raise ValueError(f"Chave de acesso inválida: {self.valor}")
+
+    # Campos por fatiamento, sem regex
+
+    @property
+    def cuf(self) -> str:
+        return self.valor[0:2]
+
+    @property
+    def uf(self) -> Optional[str]:
+        return UF_POR_CODIGO_IBGE.get(self.valor[0:2])
+
+    @property
+    def aamm(self) -> str:
+        return self.valor[2:6]
+
+    @property
+    def ano(self) -> int:
+        return 2000 + int(self.valor[2:4])
+
+    @property
+    def mes(self) -> int:
+        return int(self.valor[4:6])
+
+    @property
+    def cnpj(self) -> str:
+        return self.valor[6:20]
+
+    @property
+    def modelo(self) -> str:
+        return self.valor[20:22]
+
+    @property
+    def serie(self) -> int:
+        return int(self.valor[22:25])
+
+    @property
+    def numero(self) -> int:
+        return int(self.valor[25:34])
+
+    @property
+    def tp_emis(self) -> str:
+        return self.valor[34]
+
+    @property
+    def codigo(self) -> str:
+        return self.valor[35:43]
+
+    @property
+    def dv(self) -> str:
+        return self.valor[43]
+
+    def __str__(self) -> str:
+        return self.valor
+
+    @classmethod
+    def parse(cls, chave: str) -> "ChaveAcesso":
+        return cls(chave)
+
+    @classmethod
+    def try_parse(cls, chave: Optional[str]) -> Optional["ChaveAcesso"]:
+        if chave is None or not validar_chave(chave):
+            return None
+        return cls(chave)
+
+    @classmethod
+    def gerar(
+        cls,
+        uf: str,
+        data_emissao: datetime,
+        cnpj: str,
+        serie: int,
+        numero: int,
+        modelo: str = "55",
+        tp_emis: str = "1",
+        codigo: Optional[int] = None,
+    ) -> "ChaveAcesso":
+        return cls(gerar_chaves(uf, data_emissao, cnpj, serie, [numero], modelo, tp_emis,
+                                None if codigo is None else [codigo])[0])
+
+
+def _codigo_aleatorio(numero: int) -> int:
+    # cNF não pode repetir o nNF
+    while True:
+        codigo = randrange(100_000_000)
+        if codigo != numero:
+            return codigo
+
+
+def gerar_chaves(
+    uf: str,
+    data_emissao: datetime,
+    cnpj: str,
+    serie: int,
+    numeros: Iterable[int],
+    modelo: str = "55",
+    tp_emis: str = "1",
+    codigos: Optional[Iterable[int]] = None,
+) -> List[str]:
+    """
+    Gera as chaves de vários números de um mesmo emitente/série/período.
+    O prefixo comum (cUF..serie) e sua soma ponderada são calculados uma vez;
+    por chave só os 18 dígitos restantes entram no módulo 11.
+    `codigos` (cNF) é gerado aleatoriamente quando omitido.
+    """
+    prefixo = f"{CODIGO_IBGE_UF[uf]}{data_emissao:%y%m}{cnpj:0>14}{modelo:0>2}{serie:03d}"
+    if len(prefixo) != 25 or not prefixo.isdigit():
+        raise ValueError(f"Dados inválidos para a chave de acesso: {prefixo}")
+    soma_prefixo = sum(map(mul, prefixo.encode(), _PESOS_PREFIXO)) - 48 * sum(_PESOS_PREFIXO)
+
+    numeros = list(numeros)
+    codigos = [_codigo_aleatorio(n) for n in numeros] if codigos is None else list(codigos)
+    chaves = []
+    for numero, codigo in zip(numeros, codigos):
+        sufixo = f"{numero:09d}{tp_emis}{codigo:08d}"
+        soma = soma_prefixo + sum(map(mul, sufixo.encode(), _PESOS_SUFIXO)) - _AJUSTE_SUFIXO
+        chaves.append(prefixo + sufixo + _dv_da_soma(soma))
+    return chaves
@@ -1,20 +1,111 @@
-import re
 from dataclasses import dataclass
+import sys
+from functools import lru_cache
+from itertools import repeat
+from operator import add, and_, eq, mod, mul, not_
+from typing import Iterable, List
 
-@dataclass(frozen=True)
+# Pesos dos dígitos verificadores
+_PESOS_CPF = (tuple(range(10, 1, -1)), tuple(range(11, 1, -1)))
+_PESOS_CNPJ = ((5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2), (6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2))
+_PESOS = {11: _PESOS_CPF, 14: _PESOS_CNPJ}
+# DV (como byte ASCII) indexado pelo resto da divisão por 11
+_DV_POR_RESTO = tuple(48 if resto < 2 else 48 + 11 - resto for resto in range(11))
+# Sequências repetidas passam no módulo 11, mas não são documentos válidos
+_REPETIDOS = frozenset(d * n for d in "0123456789" for n in (11, 14))
+# Tabela para str.translate que remove a formatação (. / -)
+_FORMATACAO = str.maketrans("", "", " ./-")
+
+# Documentos já validados; emitentes e destinatários se repetem entre notas
+CACHE_DOCUMENTOS = 65536
+
+
+def normalizar_documento(numero: str) -> str:
+    """
+    Remove a formatação do documento, mantendo só os dígitos.
+    """
+    if numero.isascii() and numero.isdigit():
+        return numero
+    limpo = numero.translate(_FORMATACAO)
+    if limpo.isascii() and limpo.isdigit():
+        return limpo
+    return "".join(c for c in numero if "0" <= c <= "9")
+
+
+def _dv_confere(numero: bytes, pesos) -> bool:
+    n = len(pesos)
+    soma = sum(map(mul, numero, pesos)) - 48 * sum(pesos)
+    return _DV_POR_RESTO[soma % 11] == numero[n]
+
+
+@lru_cache(maxsize=CACHE_DOCUMENTOS)
+def documento_valido(numero: str) -> bool:
+    """
+    True se `numero` (só dígitos) é um CPF ou CNPJ com dígitos verificadores corretos.
+    Resultados ficam em cache LRU limitado (ver `documento_valido.cache_info()`).
+    """
+    pesos = _PESOS.get(len(numero))
+    if pesos is None or numero in _REPETIDOS or not (numero.isascii() and numero.isdigit()):
+        return False
+    dados = numero.encode()
+    return _dv_confere(dados, pesos[0]) and _dv_confere(dados, pesos[1])
+
+
+def _validar_colunas(documentos: List[str], largura: int) -> List[bool]:
+    # Todos os documentos com o mesmo tamanho, concatenados: a coluna j é buffer[j::largura].
+    # As somas ponderadas são encadeadas coluna a coluna com map, sem laço Python por documento.
+    buffer = "".join(documentos).encode()
+    resultado = map(not_, map(_REPETIDOS.__contains__, documentos))
+    for pesos in _PESOS[largura]:
+        n = len(pesos)
+        somas = repeat(-48 * sum(pesos))
+        for j, peso in enumerate(pesos):
+            somas = map(add, somas, map(mul, buffer[j::largura], repeat(peso)))
+        dvs = map(_DV_POR_RESTO.__getitem__, map(mod, somas, repeat(11)))
+        resultado = map(and_, resultado, map(eq, dvs, buffer[n::largura]))
+    return list(resultado)
+
+
+def validar_documentos(documentos: Iterable[str]) -> List[bool]:
+    """
+    Valida um lote de CPFs/CNPJs (com ou sem formatação), na ordem recebida.
+    Documentos repetidos são validados uma vez e os dígitos verificadores são
+    calculados por colunas sobre o lote inteiro.
+    """
+    normalizados = list(map(normalizar_documento, documentos))
+    unicos = dict.fromkeys(normalizados, False)
+    for largura in _PESOS:
+        grupo = [doc for doc in unicos if len(doc) == largura]
+        if grupo:
+            unicos.update(zip(grupo, _validar_colunas(grupo, largura)))
+    return list(map(unicos.__getitem__, normalizados))
+
+
+@dataclass(frozen=True, slots=True)
 class CnpjCpf:
     """
     Value Object representing a Brazilian CNPJ (14 digits) or CPF (11 digits).
 
     Attributes:
-        numero (str): Only digits, validated length of 11 (CPF) or 14 (CNPJ).
+        numero (str): Only digits, validated length of 11 (CPF) or 14 (CNPJ)
+            and check digits.
     """
     numero: str
 
     def __post_init__(self):
-        # Remove any non-digit characters
-        limpo = re.sub(r"\D", "", self.numero)
-        if len(limpo) not in (11, 14):
+        limpo = normalizar_documento(self.numero)
+        if not documento_valido(limpo):
             raise ValueError(f"CNPJ/CPF inválido: {self.numero}")
-        # Optionally, could add checksum validation here
-        object.__setattr__(self, 'numero', limpo)
+        # Os mesmos emitentes/destinatários se repetem entre notas
+        object.__setattr__(self, 'numero', sys.intern(limpo))
+
+    @classmethod
+    def de_confianca(cls, numero: str) -> "CnpjCpf":
+        """
+        Normaliza sem conferir os dígitos verificadores. Só para documentos
+        já gravados, que podem ser anteriores à validação: ela é feita na
+        entrada (API e eventos de pedido), não na leitura do banco.
+        """
+        documento = object.__new__(cls)
+        object.__setattr__(documento, 'numero', sys.intern(normalizar_documento(numero)))
+        return documento
@@ -1,7 +1,13 @@
 import re
 from dataclasses import dataclass
 
-@dataclass(frozen=True)
+from core.enum.uf import CODIGO_IBGE_UF
+
+# Instância canônica de cada UF: endereços da mesma UF compartilham a string
+UFS = {uf: uf for uf in CODIGO_IBGE_UF}
+_NAO_DIGITO = re.compile(r"\D")
+
+@dataclass(frozen=True, slots=True)
 class Endereco:
     logradouro: str
     numero: str
@@ -13,17 +19,25 @@ class Endereco:
 
     def __post_init__(self):
         # Valida e limpa o cep
-        cep_limpo = re.sub(r"\D", "", self.cep)
-        if not re.fullmatch(r"\d{8}", cep_limpo):
+        cep_limpo = self.cep
+        if not (cep_limpo.isascii() and cep_limpo.isdigit()):
+            cep_limpo = _NAO_DIGITO.sub("", cep_limpo)
+        if len(cep_limpo) != 8 or not cep_limpo.isascii():
             raise ValueError(f"CEP inválido: {self.cep}")
         # Normaliza o uf
-        uf_up = self.uf.strip().upper()
-        estados = {
-            "AC","AL","AP","AM","BA","CE","DF","ES","GO","MA",
-            "MT","MS","MG","PA","PB","PR","PE","PI","RJ","RN",
-            "RS","RO","RR","SC","SP","SE","TO"
-        }
-        if uf_up not in estados:
+        uf_up = UFS.get(self.uf) or UFS.get(self.uf.strip().upper())
+        if uf_up is None:
             raise ValueError(f"UF inválido: {self.uf}")
         object.__setattr__(self, 'cep', cep_limpo)
         object.__setattr__(self, 'uf', uf_up)
+
+    def to_dict(self) -> dict:
+        return {
+            "logradouro": self.logradouro,
+            "numero": self.numero,
+            "municipio": self.municipio,
+            "uf": self.uf,
+            "cep": self.cep,
+            "complemento": self.complemento,
+            "bairro": self.bairro,
+        }
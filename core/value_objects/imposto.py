@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Imposto:
     """
     Value Object representing tax values for a fiscal note.
@@ -20,3 +20,6 @@ class Imposto:
     def total_geral(self) -> float:
         """Retorna a soma de todos os impostos."""
         return self.icms + self.ipi + self.pis + self.cofins
+
+    def to_dict(self) -> dict:
+        return {"icms": self.icms, "ipi": self.ipi, "pis": self.pis, "cofins": self.cofins}
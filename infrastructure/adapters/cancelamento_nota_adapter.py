@@ -1,9 +1,18 @@
+from typing import Optional
+
 from core.entities.nota_fiscal import NotaFiscal
 from core.enum.status_nota import StatusNota
-from core.services.ports.cancelamento_nota_port import CancelamentoNotaPort
+from core.value_objects.chave_acesso import ChaveAcesso
+from core.services.ports.cancelamento_nota_port import AsyncCancelamentoNotaPort, CancelamentoNotaPort
+from infrastructure.external_services.async_sefaz_client import AsyncSefazClient
 from infrastructure.external_services.sefaz_client import SefazClient
 from infrastructure.external_services.signer import Signer
 
+
+def emitente_cnpj_da_chave(chave_acesso: str) -> Optional[str]:
+    chave = ChaveAcesso.try_parse(chave_acesso)
+    return chave.cnpj if chave else None
+
 class NotaFiscalCancelamentoAdapter(CancelamentoNotaPort):
     def __init__(self, sefaz_client: SefazClient, signer: Signer):
         self.sefaz_client = sefaz_client
@@ -11,7 +20,7 @@ class NotaFiscalCancelamentoAdapter(CancelamentoNotaPort):
 
     def cancelar(self, chave_acesso: str) -> NotaFiscal:
         xml = self.sefaz_client.generate_cancel_xml(chave_acesso)
-        signed = self.signer.sign(xml)
+        signed = self.signer.sign(xml, emitente_cnpj_da_chave(chave_acesso))
         response = self.sefaz_client.send_cancel(signed)
         nota = NotaFiscal(
             emitente_cnpj=None,
@@ -22,4 +31,25 @@ class NotaFiscalCancelamentoAdapter(CancelamentoNotaPort):
         nota.chave_acesso = chave_acesso
         nota.protocolo_autorizacao = response.protocol_number
         nota.status = StatusNota.CANCELADA if response.status == 'CANCELADO' else StatusNota.REJEITADA
-        return nota
\ No newline at end of file
+        return nota
+
+
+class AsyncNotaFiscalCancelamentoAdapter(AsyncCancelamentoNotaPort):
+    def __init__(self, sefaz_client: AsyncSefazClient, signer: Signer):
+        self.sefaz_client = sefaz_client
+        self.signer = signer
+
+    async def cancelar(self, chave_acesso: str) -> NotaFiscal:
+        xml = self.sefaz_client.generate_cancel_xml(chave_acesso)
+        signed = await self.signer.asign(xml, emitente_cnpj_da_chave(chave_acesso))
+        response = await self.sefaz_client.send_cancel(signed)
+        nota = NotaFiscal(
+            emitente_cnpj=None,
+            destinatario_cnpj=None,
+            emitente_endereco=None,
+            destinatario_endereco=None
+        )
+        nota.chave_acesso = chave_acesso
+        nota.protocolo_autorizacao = response.protocol_number
+        nota.status = StatusNota.CANCELADA if response.status == 'CANCELADO' else StatusNota.REJEITADA
+        return nota
@@ -1,4 +1,5 @@
-from core.services.ports.carta_correcao_port import CartaCorrecaoPort
+from core.services.ports.carta_correcao_port import AsyncCartaCorrecaoPort, CartaCorrecaoPort
+from infrastructure.external_services.async_sefaz_client import AsyncSefazClient
 from infrastructure.external_services.sefaz_client import SefazClient
 
 class NotaFiscalCorreccaoAdapter(CartaCorrecaoPort):
@@ -9,3 +10,12 @@ class NotaFiscalCorreccaoAdapter(CartaCorrecaoPort):
         xml = self.client.generate_cce_xml(chave_acesso, texto_correcao)
         response = self.client.send_cce(xml)
         return response
+
+class AsyncNotaFiscalCorreccaoAdapter(AsyncCartaCorrecaoPort):
+    def __init__(self, client: AsyncSefazClient):
+        self.client = client
+
+    async def corrigir(self, chave_acesso: str, texto_correcao: str):
+        xml = self.client.generate_cce_xml(chave_acesso, texto_correcao)
+        response = await self.client.send_cce(xml)
+        return response
@@ -1,6 +1,7 @@
 from core.entities.nota_fiscal import NotaFiscal
 from core.enum.status_nota import StatusNota
-from core.services.ports.emissao_nota_port import EmissaoNotaPort
+from core.services.ports.emissao_nota_port import AsyncEmissaoNotaPort, EmissaoNotaPort
+from infrastructure.external_services.async_sefaz_client import AsyncSefazClient
 from infrastructure.external_services.sefaz_client import SefazClient
 from infrastructure.external_services.signer import Signer
 
@@ -11,7 +12,7 @@ class NotaFiscalEmissaoAdapter(EmissaoNotaPort):
 
     def emitir(self, nota: NotaFiscal) -> NotaFiscal:
         xml = self.sefaz_client.generate_xml(nota)
-        signed_xml = self.signer.sign(xml)
+        signed_xml = self.signer.sign(xml, nota.emitente_cnpj.numero)
         response = self.sefaz_client.send_xml(signed_xml)
         if response.status == 'AUTORIZADO':
             nota.chave_acesso = response.access_key
@@ -20,3 +21,20 @@ class NotaFiscalEmissaoAdapter(EmissaoNotaPort):
         else:
             nota.status = StatusNota.REJEITADA
         return nota
+
+class AsyncNotaFiscalEmissaoAdapter(AsyncEmissaoNotaPort):
+    def __init__(self, sefaz_client: AsyncSefazClient, signer: Signer):
+        self.sefaz_client = sefaz_client
+        self.signer = signer
+
+    async def emitir(self, nota: NotaFiscal) -> NotaFiscal:
+        xml = self.sefaz_client.generate_xml(nota)
+        signed_xml = await self.signer.asign(xml, nota.emitente_cnpj.numero)
+        response = await self.sefaz_client.send_xml(signed_xml)
+        if response.status == 'AUTORIZADO':
+            nota.chave_acesso = response.access_key
+            nota.protocolo_autorizacao = response.protocol_number
+            nota.status = StatusNota.AUTORIZADA
+        else:
+            nota.status = StatusNota.REJEITADA
+        return nota
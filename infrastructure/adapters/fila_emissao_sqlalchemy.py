@@ -0,0 +1,143 @@
+from datetime import datetime, timedelta
+from typing import List, Optional
+from uuid import UUID
+
+from sqlalchemy import and_, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.entities.nota_fiscal import NotaFiscal
+from core.enum.status_emissao_job import StatusEmissaoJob
+from core.services.ports.fila_emissao_port import EmissaoJob, FilaEmissaoPort
+from core.services.persistence.emissao_job_model import EmissaoJobModel
+from core.services.persistence.nota_fiscal_model import NotaFiscalModel
+from core.services.persistence.item_da_nota_model import ItemDaNotaModel
+from application.mappers.nota_fiscal_mapper import NotaFiscalMapper
+
+
+def _to_job(model: EmissaoJobModel) -> EmissaoJob:
+    return EmissaoJob(
+        id=model.id,
+        nota_id=model.nota_id,
+        status=model.status,
+        tentativas=model.tentativas,
+        ultimo_erro=model.ultimo_erro,
+    )
+
+
+class FilaEmissaoSqlAlchemyAdapter(FilaEmissaoPort):
+    """
+    Fila de emissão sobre a tabela emissao_job.
+
+    O claim usa SELECT ... FOR UPDATE SKIP LOCKED, então workers concorrentes
+    (inclusive em outras instâncias) nunca reservam o mesmo job. Em bancos sem
+    suporte (SQLite) a cláusula é omitida pelo dialeto.
+    """
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def enqueue(self, nota: NotaFiscal) -> EmissaoJob:
+        nota_row, item_rows = NotaFiscalMapper.to_rows(nota)
+        await self.session.execute(insert(NotaFiscalModel), [nota_row])
+        if item_rows:
+            await self.session.execute(insert(ItemDaNotaModel), item_rows)
+        model = EmissaoJobModel(
+            nota_id=nota.id,
+            status=StatusEmissaoJob.PENDENTE,
+            tentativas=0,
+            disponivel_em=datetime.utcnow(),
+        )
+        self.session.add(model)
+        await self.session.flush()
+        job = _to_job(model)
+        await self.session.commit()
+        return job
+
+    async def claim(self, worker_id: str, limit: int, lock_timeout: float) -> List[EmissaoJob]:
+        now = datetime.utcnow()
+        abandonado = now - timedelta(seconds=lock_timeout)
+        stmt = (
+            select(EmissaoJobModel)
+            .where(or_(
+                and_(EmissaoJobModel.status == StatusEmissaoJob.PENDENTE,
+                     EmissaoJobModel.disponivel_em <= now),
+                and_(EmissaoJobModel.status == StatusEmissaoJob.PROCESSANDO,
+                     EmissaoJobModel.travado_em < abandonado),
+            ))
+            .order_by(EmissaoJobModel.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        models = (await self.session.execute(stmt)).scalars().all()
+        jobs = []
+        for model in models:
+            # Sem SKIP LOCKED dois workers podem ler o mesmo job: fica com ele
+            # só quem ainda encontrar a linha no estado lido
+            travado_em = EmissaoJobModel.travado_em
+            extra = {}
+            if model.status is StatusEmissaoJob.PROCESSANDO:
+                # Trava expirada: o worker anterior caiu no meio da tentativa
+                extra = dict(tentativas=EmissaoJobModel.tentativas + 1, ultimo_erro="Trava expirada")
+            result = await self.session.execute(
+                update(EmissaoJobModel)
+                .where(
+                    EmissaoJobModel.id == model.id,
+                    EmissaoJobModel.status == model.status,
+                    travado_em.is_(None) if model.travado_em is None else travado_em == model.travado_em,
+                )
+                .values(status=StatusEmissaoJob.PROCESSANDO, travado_em=now, travado_por=worker_id, **extra)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 1:
+                job = _to_job(model)._replace(status=StatusEmissaoJob.PROCESSANDO)
+                if extra:
+                    job = job._replace(tentativas=model.tentativas + 1, ultimo_erro=extra["ultimo_erro"])
+                jobs.append(job)
+        await self.session.commit()
+        return jobs
+
+    async def complete(self, job_id: int, nota: Optional[NotaFiscal] = None) -> None:
+        versao = None
+        try:
+            if nota is not None:
+                model = await self.session.merge(NotaFiscalMapper.to_model(nota))
+                versao = (model.versao or 0) + 1
+                model.versao = versao
+            await self.session.execute(
+                update(EmissaoJobModel)
+                .where(EmissaoJobModel.id == job_id)
+                .values(status=StatusEmissaoJob.CONCLUIDO, travado_em=None, travado_por=None)
+            )
+            # Nota emitida e job concluído no mesmo commit
+            await self.session.commit()
+        except Exception:
+            # Sessão pronta para uma nova tentativa de complete() ou fail()
+            await self.session.rollback()
+            raise
+        if versao is not None:
+            nota.versao = versao
+
+    async def fail(self, job_id: int, erro: str, retry_at: Optional[datetime]) -> None:
+        # Descarta o que a tentativa deixou pendente na sessão compartilhada
+        await self.session.rollback()
+        values = dict(
+            tentativas=EmissaoJobModel.tentativas + 1,
+            ultimo_erro=erro,
+            travado_em=None,
+            travado_por=None,
+        )
+        if retry_at is None:
+            values["status"] = StatusEmissaoJob.FALHOU
+        else:
+            values["status"] = StatusEmissaoJob.PENDENTE
+            values["disponivel_em"] = retry_at
+        await self.session.execute(
+            update(EmissaoJobModel).where(EmissaoJobModel.id == job_id).values(**values)
+        )
+        await self.session.commit()
+
+    async def get_by_nota(self, nota_id: UUID) -> Optional[EmissaoJob]:
+        result = await self.session.execute(
+            select(EmissaoJobModel).filter_by(nota_id=nota_id)
+        )
+        model = result.scalar_one_or_none()
+        return _to_job(model) if model else None
@@ -0,0 +1,245 @@
+# infrastructure/adapters/idempotencia.py
+"""
+Idempotent execution of requests carrying an Idempotency-Key.
+
+The durable record lives behind IdempotenciaPort (unique index on the key),
+which is what serializes duplicates across instances. In front of it, each
+instance keeps:
+
+- a hot LRU of completed keys, so a retry of a finished request is answered
+  from memory with no database round trip;
+- the executions in flight, so a concurrent duplicate arriving at the same
+  instance waits for the first one and gets its response instead of running
+  the operation again.
+
+A duplicate whose first execution is in flight on another instance gets
+IdempotenciaEmAndamentoException; the client retries and then receives the
+stored response. A reservation is never taken over, however old: if storing
+the response failed, the operation already ran, so duplicates keep getting
+IdempotenciaEmAndamentoException until the key is purged after `retencao`.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import AsyncContextManager, Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+
+from core.exceptions.domain_exceptions import (
+    IdempotenciaChaveReutilizadaException, IdempotenciaEmAndamentoException,
+)
+from core.services.ports.idempotencia_port import IdempotenciaPort, RespostaIdempotente
+
+logger = logging.getLogger(__name__)
+
+
+class ResultadoIdempotente(NamedTuple):
+    resposta: RespostaIdempotente
+    # True quando a resposta veio de uma execução anterior (não desta chamada)
+    repetida: bool
+
+
+class CoordenadorIdempotencia:
+    """
+    Runs an operation at most once per idempotency key.
+
+    Args:
+        store_factory (Callable): opens an IdempotenciaPort for one operation
+            (see `idempotencia_store`).
+        max_entries (int): completed keys kept in the hot LRU.
+        ttl (float): seconds a completed key stays in the hot LRU; older keys
+            are answered from the store.
+        retencao (float): seconds a key is kept in the store; `start()` runs
+            a purge of older keys every `purge_interval` seconds.
+        concluir_tentativas (int): attempts to store a response before giving
+            up and leaving the key reserved.
+        concluir_backoff (float): base delay in seconds between those
+            attempts, doubled after each one.
+
+    Responses with status >= 500 are not stored: the key is released and the
+    request can be retried.
+    """
+    def __init__(
+        self,
+        store_factory: Callable[[], AsyncContextManager[IdempotenciaPort]],
+        max_entries: int = 10000,
+        ttl: float = 86400.0,
+        retencao: float = 86400.0,
+        purge_interval: float = 3600.0,
+        concluir_tentativas: int = 3,
+        concluir_backoff: float = 0.2,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_entries < 1:
+            raise ValueError("max_entries must be >= 1")
+        self.store_factory = store_factory
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.retencao = retencao
+        self.purge_interval = purge_interval
+        self.concluir_tentativas = max(1, concluir_tentativas)
+        self.concluir_backoff = concluir_backoff
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._concluidas: "OrderedDict[str, Tuple[str, RespostaIdempotente, float]]" = OrderedDict()
+        self._em_andamento: Dict[str, Tuple[str, asyncio.Future]] = {}
+        self.hits = 0
+        self.stored_hits = 0
+        self.waits = 0
+        self.executions = 0
+        self._purga: Optional[asyncio.Task] = None
+        self._parando: Optional[asyncio.Event] = None
+
+    async def executar(
+        self,
+        chave: str,
+        fingerprint: str,
+        operacao: Callable[[], Awaitable[RespostaIdempotente]],
+    ) -> ResultadoIdempotente:
+        """
+        Returns the stored response for `chave`, or runs `operacao` and stores
+        its response. `fingerprint` identifies the request body: reusing a key
+        with a different one raises IdempotenciaChaveReutilizadaException.
+        """
+        while True:
+            concluida = self._concluida(chave)
+            if concluida is not None:
+                _conferir(concluida[0], fingerprint)
+                self.hits += 1
+                return ResultadoIdempotente(concluida[1], True)
+            andamento = self._em_andamento.get(chave)
+            if andamento is None:
+                break
+            _conferir(andamento[0], fingerprint)
+            self.waits += 1
+            # shield: uma requisição em espera cancelada não cancela a execução
+            resposta = await asyncio.shield(andamento[1])
+            if resposta is not None:
+                return ResultadoIdempotente(resposta, True)
+            # A primeira execução falhou e liberou a chave: esta tenta de novo
+
+        futuro = asyncio.get_running_loop().create_future()
+        self._em_andamento[chave] = (fingerprint, futuro)
+        resposta = None
+        try:
+            async with self.store_factory() as store:
+                existente = await store.reservar(chave, fingerprint)
+            if existente is not None:
+                _conferir(existente.fingerprint, fingerprint)
+                if existente.resposta is None:
+                    raise IdempotenciaEmAndamentoException()
+                self.stored_hits += 1
+                resposta = existente.resposta
+                self._guardar(chave, fingerprint, resposta)
+                return ResultadoIdempotente(resposta, True)
+
+            self.executions += 1
+            try:
+                nova = await operacao()
+            except BaseException:
+                await self._liberar(chave)
+                raise
+            if nova.status_code >= 500:
+                await self._liberar(chave)
+                return ResultadoIdempotente(nova, False)
+            await self._concluir(chave, nova)
+            resposta = nova
+            self._guardar(chave, fingerprint, resposta)
+            return ResultadoIdempotente(resposta, False)
+        finally:
+            del self._em_andamento[chave]
+            futuro.set_result(resposta)
+
+    async def purgar(self) -> int:
+        """
+        Removes the keys created more than `retencao` seconds ago from the
+        store. Returns how many were removed.
+        """
+        antes_de = datetime.utcnow() - timedelta(seconds=self.retencao)
+        async with self.store_factory() as store:
+            return await store.purgar(antes_de)
+
+    async def start(self) -> None:
+        if self._purga is not None:
+            return
+        self._parando = asyncio.Event()
+        self._purga = asyncio.create_task(self._purgar_periodicamente())
+
+    async def stop(self) -> None:
+        if self._purga is None:
+            return
+        self._parando.set()
+        await asyncio.gather(self._purga, return_exceptions=True)
+        self._purga = None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._concluidas),
+                "in_flight": len(self._em_andamento),
+                "hits": self.hits,
+                "stored_hits": self.stored_hits,
+                "waits": self.waits,
+                "executions": self.executions,
+            }
+
+    def _concluida(self, chave: str) -> Optional[Tuple[str, RespostaIdempotente, float]]:
+        with self._lock:
+            entrada = self._concluidas.get(chave)
+            if entrada is None:
+                return None
+            if entrada[2] <= self._clock():
+                del self._concluidas[chave]
+                return None
+            self._concluidas.move_to_end(chave)
+            return entrada
+
+    def _guardar(self, chave: str, fingerprint: str, resposta: RespostaIdempotente) -> None:
+        with self._lock:
+            self._concluidas[chave] = (fingerprint, resposta, self._clock() + self.ttl)
+            self._concluidas.move_to_end(chave)
+            while len(self._concluidas) > self.max_entries:
+                self._concluidas.popitem(last=False)
+
+    async def _concluir(self, chave: str, resposta: RespostaIdempotente) -> None:
+        for tentativa in range(self.concluir_tentativas):
+            if tentativa:
+                await asyncio.sleep(self.concluir_backoff * 2 ** (tentativa - 1))
+            try:
+                async with self.store_factory() as store:
+                    await store.concluir(chave, resposta)
+                return
+            except Exception as e:
+                erro = e
+        # A operação já aconteceu: a resposta segue para o cliente e fica no
+        # LRU; no banco a chave continua reservada (409) até ser purgada
+        logger.error(
+            "Idempotency key %s not stored after %d attempts: %s", chave, self.concluir_tentativas, erro
+        )
+
+    async def _purgar_periodicamente(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._parando.wait(), self.purge_interval)
+                return
+            except asyncio.TimeoutError:
+                pass
+            try:
+                removidas = await self.purgar()
+                if removidas:
+                    logger.info("Purged %d idempotency keys", removidas)
+            except Exception:
+                logger.exception("idempotency key purge failed")
+
+    async def _liberar(self, chave: str) -> None:
+        try:
+            async with self.store_factory() as store:
+                await store.liberar(chave)
+        except Exception as e:
+            logger.warning("Idempotency key %s not released: %s", chave, e)
+
+
+def _conferir(esperado: str, fingerprint: str) -> None:
+    if esperado != fingerprint:
+        raise IdempotenciaChaveReutilizadaException()
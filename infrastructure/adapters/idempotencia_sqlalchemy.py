@@ -0,0 +1,87 @@
+import json
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import AsyncContextManager, Callable, Optional
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from core.services.ports.idempotencia_port import IdempotenciaPort, RegistroIdempotencia, RespostaIdempotente
+from core.services.persistence.idempotencia_model import IdempotenciaModel
+
+
+class IdempotenciaSqlAlchemyAdapter(IdempotenciaPort):
+    """
+    Chaves de idempotência na tabela idempotencia.
+
+    A reserva é um INSERT contra o índice único de `chave`: entre requisições
+    concorrentes (inclusive em outras instâncias) só uma consegue inserir; as
+    demais leem a linha existente. Cada operação confirma a própria transação.
+    """
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def reservar(self, chave: str, fingerprint: str) -> Optional[RegistroIdempotencia]:
+        m = IdempotenciaModel
+        while True:
+            try:
+                await self.session.execute(
+                    insert(m).values(chave=chave, fingerprint=fingerprint, criado_em=datetime.utcnow())
+                )
+                await self.session.commit()
+                return None
+            except IntegrityError:
+                await self.session.rollback()
+            row = (await self.session.execute(
+                select(m.fingerprint, m.criado_em, m.status_code, m.corpo, m.headers).where(m.chave == chave)
+            )).one_or_none()
+            if row is None:
+                # Liberada entre o INSERT e o SELECT: tenta reservar de novo
+                continue
+            if row.status_code is not None:
+                resposta = RespostaIdempotente(row.status_code, row.corpo, json.loads(row.headers or "{}"))
+                return RegistroIdempotencia(chave, row.fingerprint, row.criado_em, resposta)
+            # Em andamento, ou a resposta não chegou a ser gravada: a operação
+            # pode ter acontecido, então a reserva não é retomada
+            return RegistroIdempotencia(chave, row.fingerprint, row.criado_em)
+
+    async def concluir(self, chave: str, resposta: RespostaIdempotente) -> None:
+        await self.session.execute(
+            update(IdempotenciaModel)
+            .where(IdempotenciaModel.chave == chave)
+            .values(
+                status_code=resposta.status_code,
+                corpo=resposta.corpo,
+                headers=json.dumps(resposta.headers),
+                concluido_em=datetime.utcnow(),
+            )
+        )
+        await self.session.commit()
+
+    async def liberar(self, chave: str) -> None:
+        await self.session.execute(
+            delete(IdempotenciaModel)
+            .where(IdempotenciaModel.chave == chave, IdempotenciaModel.status_code.is_(None))
+        )
+        await self.session.commit()
+
+    async def purgar(self, antes_de: datetime) -> int:
+        result = await self.session.execute(
+            delete(IdempotenciaModel).where(IdempotenciaModel.criado_em < antes_de)
+        )
+        await self.session.commit()
+        return result.rowcount
+
+
+def idempotencia_store(session_factory: async_sessionmaker) -> Callable[[], AsyncContextManager[IdempotenciaPort]]:
+    """
+    Opens one short session per store operation, so no connection is held
+    while the idempotent request itself runs.
+    """
+    @asynccontextmanager
+    async def abrir():
+        async with session_factory() as session:
+            yield IdempotenciaSqlAlchemyAdapter(session)
+
+    return abrir
@@ -0,0 +1,375 @@
+# infrastructure/adapters/nota_fiscal_cache.py
+"""
+Read-through cache for invoices looked up by access key.
+
+Two tiers: an in-process LRU bounded by entry count and TTL, then an optional
+shared tier (CacheCompartilhadoPort) reachable by every instance. Entries are
+pickled entities, so every hit hands out a fresh NotaFiscal: a use case that
+changes the note it read never changes the cached copy.
+
+The repository decorators invalidate the key in both tiers as soon as a write
+commits. Other instances only drop their local copy when it expires, so the
+local TTL bounds how stale a read served by another instance can be.
+"""
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from itertools import count
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from core.entities.nota_fiscal import NotaFiscal
+from core.enum.item_loading import ItemLoading
+from core.enum.status_nota import StatusNota
+from core.services.ports.cache_port import CacheCompartilhadoPort
+from core.services.ports.nota_fiscal_repository_port import (
+    AsyncNotaFiscalRepository, ContagemNotas, FiltroNotas, KeysetCursor, NotaFiscalRepository, VersaoNota,
+)
+
+logger = logging.getLogger(__name__)
+
+PREFIXO_CHAVE = "nfe:"
+
+
+class MemoriaCacheCompartilhado(CacheCompartilhadoPort):
+    """
+    Local stand-in for the shared tier (tests and single-instance setups).
+    """
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._dados: Dict[str, Tuple[bytes, float]] = {}
+
+    def get(self, chave: str) -> Optional[bytes]:
+        with self._lock:
+            entrada = self._dados.get(chave)
+            if entrada is None:
+                return None
+            if entrada[1] <= self._clock():
+                del self._dados[chave]
+                return None
+            return entrada[0]
+
+    def set(self, chave: str, valor: bytes, ttl: float) -> None:
+        with self._lock:
+            self._dados[chave] = (valor, self._clock() + ttl)
+
+    def delete(self, chave: str) -> None:
+        with self._lock:
+            self._dados.pop(chave, None)
+
+
+class NotaCache:
+    """
+    Invoice cache keyed by access key.
+
+    Args:
+        max_entries (int): local LRU size; the least recently used entry is
+            evicted when it is full.
+        ttl (float): seconds an entry lives in either tier.
+        shared (CacheCompartilhadoPort): optional shared tier, checked on a
+            local miss and filled on a database read.
+    """
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl: float = 30.0,
+        shared: Optional[CacheCompartilhadoPort] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_entries < 1:
+            raise ValueError("max_entries must be >= 1")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.shared = shared
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._local: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        # Leituras em andamento: um save() no meio descarta o preenchimento
+        self._pendentes: Dict[str, int] = {}
+        self._tokens = count()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.shared_errors = 0
+
+    def get(self, chave: str) -> Optional[NotaFiscal]:
+        agora = self._clock()
+        valor = None
+        with self._lock:
+            entrada = self._local.get(chave)
+            if entrada is not None:
+                if entrada[1] > agora:
+                    self._local.move_to_end(chave)
+                    self.hits += 1
+                    valor = entrada[0]
+                else:
+                    del self._local[chave]
+                    self.expirations += 1
+        if valor is not None:
+            return pickle.loads(valor)
+        if self.shared is not None:
+            valor = self._shared(self.shared.get, PREFIXO_CHAVE + chave)
+            if valor is not None:
+                with self._lock:
+                    self.shared_hits += 1
+                    self._guardar(chave, valor, agora)
+                return pickle.loads(valor)
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def reservar(self, chave: str) -> int:
+        """
+        Marks a database read for `chave` as in flight; pass the token to `put`.
+        """
+        with self._lock:
+            token = next(self._tokens)
+            self._pendentes[chave] = token
+            return token
+
+    def put(self, chave: str, nota: Optional[NotaFiscal], token: int) -> bool:
+        """
+        Stores the note read from the database, unless the key was invalidated
+        (or read again) since `reservar` returned `token`. A None note only
+        ends the reservation: missing notes are not cached.
+        """
+        valor = pickle.dumps(nota, pickle.HIGHEST_PROTOCOL) if nota is not None else None
+        with self._lock:
+            if self._pendentes.get(chave) != token:
+                return False
+            del self._pendentes[chave]
+            if valor is None:
+                return False
+            self._guardar(chave, valor, self._clock())
+        if self.shared is not None:
+            self._shared(self.shared.set, PREFIXO_CHAVE + chave, valor, self.ttl)
+        return True
+
+    def invalidate(self, chave: Optional[str]) -> None:
+        if not chave:
+            return
+        with self._lock:
+            self._pendentes.pop(chave, None)
+            if self._local.pop(chave, None) is not None:
+                self.invalidations += 1
+        if self.shared is not None:
+            self._shared(self.shared.delete, PREFIXO_CHAVE + chave)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._local.clear()
+            self._pendentes.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._local),
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "shared_errors": self.shared_errors,
+            }
+
+    def __len__(self) -> int:
+        return len(self._local)
+
+    def _guardar(self, chave: str, valor: bytes, agora: float) -> None:
+        # Chamado com self._lock adquirido
+        self._local[chave] = (valor, agora + self.ttl)
+        self._local.move_to_end(chave)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+            self.evictions += 1
+
+    def _shared(self, operacao, *args):
+        # O tier compartilhado é uma otimização: falhas viram miss, nunca erro da requisição
+        try:
+            return operacao(*args)
+        except Exception as e:
+            with self._lock:
+                self.shared_errors += 1
+            logger.warning("Shared invoice cache %s failed: %s", operacao.__name__, e)
+            return None
+
+
+class CachedNotaFiscalRepository(NotaFiscalRepository):
+    """
+    NotaFiscalRepository decorator: get_by_chave reads through `cache`,
+    save()/save_many() and the narrow updates invalidate the written keys
+    after the write.
+    """
+    def __init__(self, inner: NotaFiscalRepository, cache: NotaCache):
+        self.inner = inner
+        self.cache = cache
+
+    def save(self, nota: NotaFiscal) -> None:
+        try:
+            self.inner.save(nota)
+        finally:
+            self.cache.invalidate(nota.chave_acesso)
+
+    def save_many(self, notas: List[NotaFiscal]) -> None:
+        try:
+            self.inner.save_many(notas)
+        finally:
+            for nota in notas:
+                self.cache.invalidate(nota.chave_acesso)
+
+    def get_by_chave(self, chave_acesso: str, loading: ItemLoading = ItemLoading.JOINED) -> Optional[NotaFiscal]:
+        nota = self.cache.get(chave_acesso)
+        if nota is not None:
+            return nota
+        token = self.cache.reservar(chave_acesso)
+        nota = None
+        try:
+            nota = self.inner.get_by_chave(chave_acesso, loading)
+        finally:
+            self.cache.put(chave_acesso, nota, token)
+        return nota
+
+    def update_status(
+        self, chave_acesso: str, status: StatusNota, protocolo_autorizacao: Optional[str]
+    ) -> Optional[VersaoNota]:
+        try:
+            return self.inner.update_status(chave_acesso, status, protocolo_autorizacao)
+        finally:
+            self.cache.invalidate(chave_acesso)
+
+    def record_event(self, chave_acesso: str, protocolo_cce: str) -> Optional[VersaoNota]:
+        try:
+            return self.inner.record_event(chave_acesso, protocolo_cce)
+        finally:
+            self.cache.invalidate(chave_acesso)
+
+    def get_versao(self, chave_acesso: str) -> Optional[VersaoNota]:
+        return self.inner.get_versao(chave_acesso)
+
+    def list_all(self, loading: ItemLoading = ItemLoading.SELECTIN) -> List[NotaFiscal]:
+        return self.inner.list_all(loading)
+
+    def list_page(
+        self,
+        limit: int,
+        after: Optional[KeysetCursor] = None,
+        loading: ItemLoading = ItemLoading.SELECTIN,
+    ) -> List[NotaFiscal]:
+        return self.inner.list_page(limit, after, loading)
+
+    def list_page_versoes(self, limit: int, after: Optional[KeysetCursor] = None) -> List[VersaoNota]:
+        return self.inner.list_page_versoes(limit, after)
+
+    def search(
+        self,
+        filtro: FiltroNotas,
+        limit: int,
+        after: Optional[KeysetCursor] = None,
+        loading: ItemLoading = ItemLoading.SELECTIN,
+    ) -> List[NotaFiscal]:
+        return self.inner.search(filtro, limit, after, loading)
+
+    def count(self, filtro: FiltroNotas, estimate: bool = False) -> ContagemNotas:
+        return self.inner.count(filtro, estimate)
+
+    def iter_all(self, batch_size: int = 500, loading: ItemLoading = ItemLoading.SELECTIN) -> Iterator[NotaFiscal]:
+        return self.inner.iter_all(batch_size, loading)
+
+
+class CachedAsyncNotaFiscalRepository(AsyncNotaFiscalRepository):
+    """
+    Async counterpart of CachedNotaFiscalRepository.
+    """
+    def __init__(self, inner: AsyncNotaFiscalRepository, cache: NotaCache):
+        self.inner = inner
+        self.cache = cache
+
+    async def save(self, nota: NotaFiscal) -> None:
+        try:
+            await self.inner.save(nota)
+        finally:
+            self.cache.invalidate(nota.chave_acesso)
+
+    async def save_many(self, notas: List[NotaFiscal]) -> None:
+        try:
+            await self.inner.save_many(notas)
+        finally:
+            for nota in notas:
+                self.cache.invalidate(nota.chave_acesso)
+
+    async def get_by_chave(self, chave_acesso: str, loading: ItemLoading = ItemLoading.JOINED) -> Optional[NotaFiscal]:
+        nota = self.cache.get(chave_acesso)
+        if nota is not None:
+            return nota
+        token = self.cache.reservar(chave_acesso)
+        nota = None
+        try:
+            nota = await self.inner.get_by_chave(chave_acesso, loading)
+        finally:
+            self.cache.put(chave_acesso, nota, token)
+        return nota
+
+    async def get_by_id(self, nota_id: UUID, loading: ItemLoading = ItemLoading.JOINED) -> Optional[NotaFiscal]:
+        return await self.inner.get_by_id(nota_id, loading)
+
+    async def update_status(
+        self, chave_acesso: str, status: StatusNota, protocolo_autorizacao: Optional[str]
+    ) -> Optional[VersaoNota]:
+        try:
+            return await self.inner.update_status(chave_acesso, status, protocolo_autorizacao)
+        finally:
+            self.cache.invalidate(chave_acesso)
+
+    async def record_event(self, chave_acesso: str, protocolo_cce: str) -> Optional[VersaoNota]:
+        try:
+            return await self.inner.record_event(chave_acesso, protocolo_cce)
+        finally:
+            self.cache.invalidate(chave_acesso)
+
+    async def get_versao(self, chave_acesso: str) -> Optional[VersaoNota]:
+        return await self.inner.get_versao(chave_acesso)
+
+    async def list_all(self, loading: ItemLoading = ItemLoading.SELECTIN) -> List[NotaFiscal]:
+        return await self.inner.list_all(loading)
+
+    async def list_page(
+        self,
+        limit: int,
+        after: Optional[KeysetCursor] = None,
+        loading: ItemLoading = ItemLoading.SELECTIN,
+    ) -> List[NotaFiscal]:
+        return await self.inner.list_page(limit, after, loading)
+
+    async def list_page_versoes(self, limit: int, after: Optional[KeysetCursor] = None) -> List[VersaoNota]:
+        return await self.inner.list_page_versoes(limit, after)
+
+    async def search(
+        self,
+        filtro: FiltroNotas,
+        limit: int,
+        after: Optional[KeysetCursor] = None,
+        loading: ItemLoading = ItemLoading.SELECTIN,
+    ) -> List[NotaFiscal]:
+        return await self.inner.search(filtro, limit, after, loading)
+
+    async def count(self, filtro: FiltroNotas, estimate: bool = False) -> ContagemNotas:
+        return await self.inner.count(filtro, estimate)
+
+    def iter_all(self, batch_size: int = 500, loading: ItemLoading = ItemLoading.SELECTIN) -> AsyncIterator[NotaFiscal]:
+        return self.inner.iter_all(batch_size, loading)
+
+
+def build_nota_cache(max_entries: int, ttl: float, shared: Optional[CacheCompartilhadoPort] = None) -> Optional[NotaCache]:
+    """
+    Cache for the service; a TTL or size of 0 disables it (returns None).
+    """
+    if ttl <= 0 or max_entries <= 0:
+        return None
+    return NotaCache(max_entries, ttl, shared)
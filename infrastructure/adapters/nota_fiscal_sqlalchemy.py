@@ -1,30 +1,156 @@
-from typing import Optional, List
-from sqlalchemy.orm import Session
+import json
+from typing import Iterator, Optional, List
+from sqlalchemy import func, insert, select, tuple_, update
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session, joinedload, lazyload, selectinload
+from sqlalchemy.sql.base import Executable
+from sqlalchemy.sql.expression import ClauseElement
 
 from core.entities.nota_fiscal import NotaFiscal
-from core.services.ports.nota_fiscal_repository_port import NotaFiscalRepository
+from core.enum.item_loading import ItemLoading
+from core.enum.status_nota import StatusNota
+from core.services.ports.nota_fiscal_repository_port import (
+    ContagemNotas, FiltroNotas, KeysetCursor, NotaFiscalRepository, VersaoNota,
+)
+from core.services.persistence.json_columns import campo_json
 from core.services.persistence.nota_fiscal_model import NotaFiscalModel
+from core.services.persistence.item_da_nota_model import ItemDaNotaModel
 from application.mappers.nota_fiscal_mapper import NotaFiscalMapper
 
+_ITEM_LOADERS = {
+    ItemLoading.JOINED: joinedload,
+    ItemLoading.SELECTIN: selectinload,
+    ItemLoading.LAZY: lazyload,
+}
+
+def _update_por_chave(chave_acesso: str, **valores):
+    # Um UPDATE pela chave, sem tocar em item_da_nota; RETURNING traz a nova versão
+    return (
+        update(NotaFiscalModel)
+        .where(NotaFiscalModel.chave_acesso == chave_acesso)
+        .values(versao=NotaFiscalModel.versao + 1, **valores)
+        .returning(NotaFiscalModel.id, NotaFiscalModel.versao, NotaFiscalModel.data_emissao)
+    )
+
+def _condicoes(filtro: FiltroNotas) -> list:
+    """
+    Cláusulas WHERE de um FiltroNotas. Emitente, destinatário e status são
+    a primeira coluna de um índice (coluna, data_emissao, id); o ICMS usa o
+    mesmo campo_json do índice de expressão.
+    """
+    nota = NotaFiscalModel
+    icms = campo_json(nota.impostos_totais, "icms", numerico=True)
+    condicoes = []
+    if filtro.emitente_cnpj is not None:
+        condicoes.append(nota.emitente_cnpj == filtro.emitente_cnpj)
+    if filtro.destinatario_cnpj is not None:
+        condicoes.append(nota.destinatario_cnpj == filtro.destinatario_cnpj)
+    if filtro.status is not None:
+        condicoes.append(nota.status == filtro.status.value)
+    if filtro.emitida_de is not None:
+        condicoes.append(nota.data_emissao >= filtro.emitida_de)
+    if filtro.emitida_ate is not None:
+        condicoes.append(nota.data_emissao < filtro.emitida_ate)
+    if filtro.valor_total_min is not None:
+        condicoes.append(nota.valor_total >= filtro.valor_total_min)
+    if filtro.valor_total_max is not None:
+        condicoes.append(nota.valor_total <= filtro.valor_total_max)
+    if filtro.icms_min is not None:
+        condicoes.append(icms >= filtro.icms_min)
+    if filtro.icms_max is not None:
+        condicoes.append(icms <= filtro.icms_max)
+    return condicoes
+
+# Até este total a contagem estimada é exata: o COUNT lê no máximo este número de linhas
+CONTAGEM_EXATA_ATE = 1000
+
+def _contagem(filtro: FiltroNotas, limite: Optional[int] = None):
+    ids = select(NotaFiscalModel.id).where(*_condicoes(filtro))
+    if limite is not None:
+        ids = ids.limit(limite)
+    return select(func.count()).select_from(ids.subquery())
+
+class _Explain(Executable, ClauseElement):
+    # EXPLAIN (FORMAT JSON) do PostgreSQL; os parâmetros passam pelo compilador normal
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+@compiles(_Explain, "postgresql")
+def _explain_pg(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+def _estimativa(filtro: FiltroNotas):
+    return _Explain(select(NotaFiscalModel.id).where(*_condicoes(filtro)))
+
+def _linhas_do_plano(plano) -> int:
+    if isinstance(plano, str):
+        plano = json.loads(plano)
+    return int(plano[0]["Plan"]["Plan Rows"])
+
+def _contagem_estimada(total_limitado: int, plano=None) -> ContagemNotas:
+    """
+    Resultado do modo estimado: abaixo de CONTAGEM_EXATA_ATE o COUNT limitado
+    já é o total; acima, vale a estimativa do planner (PostgreSQL) ou, sem
+    ela, o próprio limite.
+    """
+    if total_limitado < CONTAGEM_EXATA_ATE:
+        return ContagemNotas(total_limitado, True)
+    estimado = _linhas_do_plano(plano) if plano is not None else 0
+    return ContagemNotas(max(total_limitado, estimado), False)
+
 class NotaFiscalSqlAlchemyAdapter(NotaFiscalRepository):
     def __init__(self, session: Session):
         self.session = session
 
+    def _query(self, loading: ItemLoading):
+        return self.session.query(NotaFiscalModel).options(_ITEM_LOADERS[loading](NotaFiscalModel.items))
+
     def save(self, nota: NotaFiscal) -> None:
         """
         Persiste ou atualiza a NotaFiscal e seus itens no banco de dados.
         """
-        model = NotaFiscalMapper.to_model(nota)
-        self.session.merge(model)
-        self.session.commit()
+        try:
+            model = self.session.merge(NotaFiscalMapper.to_model(nota))
+            # merge() carregou a versão atual (None para nota nova)
+            versao = (model.versao or 0) + 1
+            model.versao = versao
+            self.session.commit()
+        except Exception:
+            # Deixa a sessão utilizável para as próximas gravações
+            self.session.rollback()
+            raise
+        nota.versao = versao
+
+    def save_many(self, notas: List[NotaFiscal]) -> None:
+        """
+        Insere um lote de notas novas com dois INSERTs executemany
+        (nota_fiscal e item_da_nota) e um único commit.
+        """
+        nota_rows = []
+        item_rows = []
+        for nota in notas:
+            nota_row, rows = NotaFiscalMapper.to_rows(nota)
+            nota_rows.append(nota_row)
+            item_rows.extend(rows)
+        try:
+            self.session.execute(insert(NotaFiscalModel), nota_rows)
+            if item_rows:
+                self.session.execute(insert(ItemDaNotaModel), item_rows)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        for nota in notas:
+            nota.versao = 1
 
-    def get_by_chave(self, chave_acesso: str) -> Optional[NotaFiscal]:
+    def get_by_chave(self, chave_acesso: str, loading: ItemLoading = ItemLoading.JOINED) -> Optional[NotaFiscal]:
         """
         Busca o modelo no banco e delega a conversão Model → Entity ao mapper.
         """
         model = (
-            self.session
-                .query(NotaFiscalModel)
+            self._query(loading)
                 .filter_by(chave_acesso=chave_acesso)
                 .one_or_none()
         )
@@ -32,11 +158,111 @@ class NotaFiscalSqlAlchemyAdapter(NotaFiscalRepository):
             return None
         return NotaFiscalMapper.to_entity(model)
 
+    def get_versao(self, chave_acesso: str) -> Optional[VersaoNota]:
+        """
+        Uma busca pelo índice de chave_acesso, sem itens.
+        """
+        row = (
+            self.session.query(NotaFiscalModel.id, NotaFiscalModel.versao, NotaFiscalModel.data_emissao)
+                .filter_by(chave_acesso=chave_acesso)
+                .one_or_none()
+        )
+        return VersaoNota(*row) if row else None
+
+    def update_status(
+        self, chave_acesso: str, status: StatusNota, protocolo_autorizacao: Optional[str]
+    ) -> Optional[VersaoNota]:
+        """
+        Um único UPDATE ... RETURNING: nem a nota nem os itens são carregados.
+        """
+        row = self.session.execute(
+            _update_por_chave(chave_acesso, status=status.value, protocolo_autorizacao=protocolo_autorizacao)
+        ).one_or_none()
+        self.session.commit()
+        return VersaoNota(*row) if row else None
+
+    def record_event(self, chave_acesso: str, protocolo_cce: str) -> Optional[VersaoNota]:
+        row = self.session.execute(_update_por_chave(chave_acesso, protocolo_cce=protocolo_cce)).one_or_none()
+        self.session.commit()
+        return VersaoNota(*row) if row else None
 
-    def list_all(self) -> List[NotaFiscal]:
+    def list_all(self, loading: ItemLoading = ItemLoading.SELECTIN) -> List[NotaFiscal]:
         """
         Retorna todas as notas fiscais persistidas no banco.
         """
-        models = self.session.query(NotaFiscalModel).all()
+        models = self._query(loading).all()
+        return [NotaFiscalMapper.to_entity(m) for m in models]
+
+    def list_page(
+        self,
+        limit: int,
+        after: Optional[KeysetCursor] = None,
+        loading: ItemLoading = ItemLoading.SELECTIN,
+    ) -> List[NotaFiscal]:
+        """
+        Página keyset sobre (data_emissao, id): o filtro por tupla evita OFFSET
+        e mantém o custo constante independente da profundidade da página.
+        """
+        query = self._query(loading)
+        if after is not None:
+            query = query.filter(tuple_(NotaFiscalModel.data_emissao, NotaFiscalModel.id) > tuple_(*after))
+        models = (
+            query
+                .order_by(NotaFiscalModel.data_emissao, NotaFiscalModel.id)
+                .limit(limit)
+                .all()
+        )
         return [NotaFiscalMapper.to_entity(m) for m in models]
 
+    def list_page_versoes(self, limit: int, after: Optional[KeysetCursor] = None) -> List[VersaoNota]:
+        query = self.session.query(NotaFiscalModel.id, NotaFiscalModel.versao, NotaFiscalModel.data_emissao)
+        if after is not None:
+            query = query.filter(tuple_(NotaFiscalModel.data_emissao, NotaFiscalModel.id) > tuple_(*after))
+        rows = query.order_by(NotaFiscalModel.data_emissao, NotaFiscalModel.id).limit(limit).all()
+        return [VersaoNota(*row) for row in rows]
+
+    def search(
+        self,
+        filtro: FiltroNotas,
+        limit: int,
+        after: Optional[KeysetCursor] = None,
+        loading: ItemLoading = ItemLoading.SELECTIN,
+    ) -> List[NotaFiscal]:
+        """
+        Página keyset filtrada: com um filtro por igualdade, o índice composto
+        entrega as linhas já na ordem (data_emissao, id), sem ordenação extra.
+        """
+        query = self._query(loading).filter(*_condicoes(filtro))
+        if after is not None:
+            query = query.filter(tuple_(NotaFiscalModel.data_emissao, NotaFiscalModel.id) > tuple_(*after))
+        models = query.order_by(NotaFiscalModel.data_emissao, NotaFiscalModel.id).limit(limit).all()
+        return [NotaFiscalMapper.to_entity(m) for m in models]
+
+    def count(self, filtro: FiltroNotas, estimate: bool = False) -> ContagemNotas:
+        """
+        COUNT(*) exato ou, com `estimate`, um COUNT limitado a
+        CONTAGEM_EXATA_ATE linhas completado pela estimativa do planner.
+        """
+        if not estimate:
+            return ContagemNotas(self.session.execute(_contagem(filtro)).scalar_one(), True)
+        total = self.session.execute(_contagem(filtro, CONTAGEM_EXATA_ATE)).scalar_one()
+        plano = None
+        if total >= CONTAGEM_EXATA_ATE and self.session.get_bind().dialect.name == "postgresql":
+            plano = self.session.execute(_estimativa(filtro)).scalar_one()
+        return _contagem_estimada(total, plano)
+
+    def iter_all(self, batch_size: int = 500, loading: ItemLoading = ItemLoading.SELECTIN) -> Iterator[NotaFiscal]:
+        """
+        Igual ao iter_all do port, mas descarta o identity map da sessão
+        a cada lote para que a memória não cresça com o tamanho da tabela.
+        """
+        after: Optional[KeysetCursor] = None
+        while True:
+            page = self.list_page(batch_size, after, loading)
+            # As entidades já foram mapeadas; os modelos ORM não são mais necessários
+            self.session.expunge_all()
+            yield from page
+            if len(page) < batch_size:
+                return
+            last = page[-1]
+            after = (last.data_emissao, last.id)
@@ -0,0 +1,190 @@
+from typing import AsyncIterator, Optional, List
+from uuid import UUID
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.entities.nota_fiscal import NotaFiscal
+from core.enum.item_loading import ItemLoading
+from core.enum.status_nota import StatusNota
+from core.services.ports.nota_fiscal_repository_port import (
+    AsyncNotaFiscalRepository, ContagemNotas, FiltroNotas, KeysetCursor, VersaoNota,
+)
+from core.services.persistence.nota_fiscal_model import NotaFiscalModel
+from core.services.persistence.item_da_nota_model import ItemDaNotaModel
+from application.mappers.nota_fiscal_mapper import NotaFiscalMapper
+from infrastructure.adapters.nota_fiscal_sqlalchemy import (
+    CONTAGEM_EXATA_ATE, _ITEM_LOADERS, _condicoes, _contagem, _contagem_estimada, _estimativa, _update_por_chave,
+)
+
+class NotaFiscalAsyncSqlAlchemyAdapter(AsyncNotaFiscalRepository):
+    """
+    Implementação assíncrona do repositório sobre AsyncSession.
+
+    AsyncSession não permite lazy load implícito, então ItemLoading.LAZY
+    é tratado como SELECTIN.
+    """
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    def _select(self, loading: ItemLoading):
+        if loading is ItemLoading.LAZY:
+            loading = ItemLoading.SELECTIN
+        return select(NotaFiscalModel).options(_ITEM_LOADERS[loading](NotaFiscalModel.items))
+
+    async def save(self, nota: NotaFiscal) -> None:
+        """
+        Persiste ou atualiza a NotaFiscal e seus itens no banco de dados.
+        """
+        try:
+            model = await self.session.merge(NotaFiscalMapper.to_model(nota))
+            # merge() carregou a versão atual (None para nota nova)
+            versao = (model.versao or 0) + 1
+            model.versao = versao
+            await self.session.commit()
+        except Exception:
+            # Deixa a sessão utilizável para as próximas gravações
+            await self.session.rollback()
+            raise
+        nota.versao = versao
+
+    async def save_many(self, notas: List[NotaFiscal]) -> None:
+        """
+        Insere um lote de notas novas com dois INSERTs executemany e um único commit.
+        """
+        nota_rows = []
+        item_rows = []
+        for nota in notas:
+            nota_row, rows = NotaFiscalMapper.to_rows(nota)
+            nota_rows.append(nota_row)
+            item_rows.extend(rows)
+        try:
+            await self.session.execute(insert(NotaFiscalModel), nota_rows)
+            if item_rows:
+                await self.session.execute(insert(ItemDaNotaModel), item_rows)
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+        for nota in notas:
+            nota.versao = 1
+
+    async def get_by_chave(self, chave_acesso: str, loading: ItemLoading = ItemLoading.JOINED) -> Optional[NotaFiscal]:
+        """
+        Busca o modelo no banco e delega a conversão Model → Entity ao mapper.
+        """
+        result = await self.session.execute(
+            self._select(loading).filter_by(chave_acesso=chave_acesso)
+        )
+        model = result.unique().scalar_one_or_none()
+        if not model:
+            return None
+        return NotaFiscalMapper.to_entity(model)
+
+    async def get_versao(self, chave_acesso: str) -> Optional[VersaoNota]:
+        """
+        Uma busca pelo índice de chave_acesso, sem itens.
+        """
+        result = await self.session.execute(
+            select(NotaFiscalModel.id, NotaFiscalModel.versao, NotaFiscalModel.data_emissao)
+            .filter_by(chave_acesso=chave_acesso)
+        )
+        row = result.one_or_none()
+        return VersaoNota(*row) if row else None
+
+    async def update_status(
+        self, chave_acesso: str, status: StatusNota, protocolo_autorizacao: Optional[str]
+    ) -> Optional[VersaoNota]:
+        """
+        Um único UPDATE ... RETURNING: nem a nota nem os itens são carregados.
+        """
+        result = await self.session.execute(
+            _update_por_chave(chave_acesso, status=status.value, protocolo_autorizacao=protocolo_autorizacao)
+        )
+        row = result.one_or_none()
+        await self.session.commit()
+        return VersaoNota(*row) if row else None
+
+    async def record_event(self, chave_acesso: str, protocolo_cce: str) -> Optional[VersaoNota]:
+        result = await self.session.execute(_update_por_chave(chave_acesso, protocolo_cce=protocolo_cce))
+        row = result.one_or_none()
+        await self.session.commit()
+        return VersaoNota(*row) if row else None
+
+    async def get_by_id(self, nota_id: UUID, loading: ItemLoading = ItemLoading.JOINED) -> Optional[NotaFiscal]:
+        result = await self.session.execute(self._select(loading).filter_by(id=nota_id))
+        model = result.unique().scalar_one_or_none()
+        if not model:
+            return None
+        return NotaFiscalMapper.to_entity(model)
+
+    async def list_all(self, loading: ItemLoading = ItemLoading.SELECTIN) -> List[NotaFiscal]:
+        """
+        Retorna todas as notas fiscais persistidas no banco.
+        """
+        result = await self.session.execute(self._select(loading))
+        return [NotaFiscalMapper.to_entity(m) for m in result.unique().scalars()]
+
+    async def list_page(
+        self,
+        limit: int,
+        after: Optional[KeysetCursor] = None,
+        loading: ItemLoading = ItemLoading.SELECTIN,
+    ) -> List[NotaFiscal]:
+        """
+        Página keyset sobre (data_emissao, id).
+        """
+        stmt = self._select(loading)
+        if after is not None:
+            stmt = stmt.where(tuple_(NotaFiscalModel.data_emissao, NotaFiscalModel.id) > tuple_(*after))
+        stmt = stmt.order_by(NotaFiscalModel.data_emissao, NotaFiscalModel.id).limit(limit)
+        result = await self.session.execute(stmt)
+        return [NotaFiscalMapper.to_entity(m) for m in result.unique().scalars()]
+
+    async def list_page_versoes(self, limit: int, after: Optional[KeysetCursor] = None) -> List[VersaoNota]:
+        stmt = select(NotaFiscalModel.id, NotaFiscalModel.versao, NotaFiscalModel.data_emissao)
+        if after is not None:
+            stmt = stmt.where(tuple_(NotaFiscalModel.data_emissao, NotaFiscalModel.id) > tuple_(*after))
+        stmt = stmt.order_by(NotaFiscalModel.data_emissao, NotaFiscalModel.id).limit(limit)
+        result = await self.session.execute(stmt)
+        return [VersaoNota(*row) for row in result]
+
+    async def search(
+        self,
+        filtro: FiltroNotas,
+        limit: int,
+        after: Optional[KeysetCursor] = None,
+        loading: ItemLoading = ItemLoading.SELECTIN,
+    ) -> List[NotaFiscal]:
+        """
+        Página keyset filtrada; ver NotaFiscalSqlAlchemyAdapter.search.
+        """
+        stmt = self._select(loading).where(*_condicoes(filtro))
+        if after is not None:
+            stmt = stmt.where(tuple_(NotaFiscalModel.data_emissao, NotaFiscalModel.id) > tuple_(*after))
+        stmt = stmt.order_by(NotaFiscalModel.data_emissao, NotaFiscalModel.id).limit(limit)
+        result = await self.session.execute(stmt)
+        return [NotaFiscalMapper.to_entity(m) for m in result.unique().scalars()]
+
+    async def count(self, filtro: FiltroNotas, estimate: bool = False) -> ContagemNotas:
+        if not estimate:
+            return ContagemNotas((await self.session.execute(_contagem(filtro))).scalar_one(), True)
+        total = (await self.session.execute(_contagem(filtro, CONTAGEM_EXATA_ATE))).scalar_one()
+        plano = None
+        if total >= CONTAGEM_EXATA_ATE and self.session.get_bind().dialect.name == "postgresql":
+            plano = (await self.session.execute(_estimativa(filtro))).scalar_one()
+        return _contagem_estimada(total, plano)
+
+    async def iter_all(self, batch_size: int = 500, loading: ItemLoading = ItemLoading.SELECTIN) -> AsyncIterator[NotaFiscal]:
+        """
+        Percorre todas as notas em lotes keyset, descartando o identity map a cada lote.
+        """
+        after: Optional[KeysetCursor] = None
+        while True:
+            page = await self.list_page(batch_size, after, loading)
+            self.session.expunge_all()
+            for nota in page:
+                yield nota
+            if len(page) < batch_size:
+                return
+            last = page[-1]
+            after = (last.data_emissao, last.id)
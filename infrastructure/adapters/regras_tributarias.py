@@ -0,0 +1,234 @@
+# infrastructure/adapters/regras_tributarias.py
+"""
+Tax rate rules (NCM x CFOP x UF pair) loaded from a local CSV file.
+
+The rules are compiled into an immutable index: a digit trie over NCM
+prefixes whose nodes hold hash tables keyed by (CFOP, UF origem, UF destino),
+with "*" as a wildcard. Lookups go through an LRU and only read the current
+index. A background thread checks the rules file every interval; a changed
+file is compiled there, off the request path, and swapped in with a single
+reference assignment, so readers never see a half-built index.
+"""
+import csv
+import logging
+import os
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from core.services.calculadora_impostos import CalculadoraImpostos
+from core.services.ports.aliquotas_port import AliquotasPort
+from core.value_objects.aliquotas import Aliquotas
+
+logger = logging.getLogger(__name__)
+
+CURINGA = "*"
+COLUNAS = ("ncm", "cfop", "uf_origem", "uf_destino", "icms", "ipi", "pis", "cofins")
+
+
+class RegraTributaria(NamedTuple):
+    ncm: str
+    cfop: str
+    uf_origem: str
+    uf_destino: str
+    aliquotas: Aliquotas
+
+
+def _campo(valor: Optional[str]) -> str:
+    valor = (valor or "").strip().upper()
+    return valor or CURINGA
+
+
+def ler_regras(path: str) -> List[RegraTributaria]:
+    """
+    Reads a CSV with the header ncm,cfop,uf_origem,uf_destino,icms,ipi,pis,cofins.
+    `ncm` is a prefix of 0 to 8 digits; empty or "*" in cfop/UF matches any value.
+    """
+    regras = []
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        faltando = set(COLUNAS) - set(reader.fieldnames or ())
+        if faltando:
+            raise ValueError(f"{path}: colunas ausentes: {', '.join(sorted(faltando))}")
+        for linha, row in enumerate(reader, 2):
+            ncm = (row["ncm"] or "").strip().replace(".", "")
+            if ncm == CURINGA:
+                ncm = ""
+            if len(ncm) > 8 or not (ncm.isdigit() or ncm == ""):
+                raise ValueError(f"{path}:{linha}: NCM inválido: {row['ncm']!r}")
+            try:
+                aliquotas = Aliquotas(*(row[c].strip() or "0" for c in ("icms", "ipi", "pis", "cofins")))
+            except (ValueError, ArithmeticError) as e:
+                raise ValueError(f"{path}:{linha}: {e}") from e
+            regras.append(RegraTributaria(
+                ncm, _campo(row["cfop"]), _campo(row["uf_origem"]), _campo(row["uf_destino"]), aliquotas
+            ))
+    return regras
+
+
+class _No:
+    __slots__ = ("filhos", "tabela")
+
+    def __init__(self):
+        self.filhos: Dict[str, "_No"] = {}
+        self.tabela: Optional[Dict[Tuple[str, str, str], Aliquotas]] = None
+
+
+class IndiceRegras:
+    """
+    Immutable, precomputed rule index.
+
+    Resolution walks the NCM trie one digit at a time and returns the rule of
+    the longest NCM prefix that has one for the item. Within a prefix the
+    (CFOP, UF origem, UF destino) table is probed from the most to the least
+    specific key, wildcards last. When two rules have the same key, the later
+    line in the file wins.
+    """
+    # Ordem de busca dentro de um prefixo: mais específica primeiro
+    _CHAVES = (
+        lambda c, o, d: (c, o, d),
+        lambda c, o, d: (c, o, CURINGA),
+        lambda c, o, d: (c, CURINGA, d),
+        lambda c, o, d: (c, CURINGA, CURINGA),
+        lambda c, o, d: (CURINGA, o, d),
+        lambda c, o, d: (CURINGA, o, CURINGA),
+        lambda c, o, d: (CURINGA, CURINGA, d),
+        lambda c, o, d: (CURINGA, CURINGA, CURINGA),
+    )
+
+    def __init__(self, regras: Iterable[RegraTributaria], cache_size: int = 65536):
+        self.raiz = _No()
+        self.total = 0
+        for regra in regras:
+            no = self.raiz
+            for digito in regra.ncm:
+                no = no.filhos.setdefault(digito, _No())
+            if no.tabela is None:
+                no.tabela = {}
+            no.tabela[regra.cfop, regra.uf_origem, regra.uf_destino] = regra.aliquotas
+            self.total += 1
+        # Cada índice tem seu próprio cache: a troca de índice descarta os resultados antigos
+        self.resolver = lru_cache(maxsize=cache_size)(self._resolver)
+
+    def _resolver(self, ncm: str, cfop: str, uf_origem: str, uf_destino: str) -> Optional[Aliquotas]:
+        tabelas = []
+        no = self.raiz
+        if no.tabela:
+            tabelas.append(no.tabela)
+        for digito in ncm:
+            no = no.filhos.get(digito)
+            if no is None:
+                break
+            if no.tabela:
+                tabelas.append(no.tabela)
+        for tabela in reversed(tabelas):
+            for chave in self._CHAVES:
+                aliquotas = tabela.get(chave(cfop, uf_origem, uf_destino))
+                if aliquotas is not None:
+                    return aliquotas
+        return None
+
+
+def _stamp(path: str) -> Tuple[int, int]:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+class RegrasTributariasArquivoAdapter(AliquotasPort):
+    """
+    AliquotasPort backed by a rules file, reloaded when the file changes.
+
+    Args:
+        path (str): CSV rules file (see `ler_regras`).
+        cache_size (int): LRU entries per compiled index.
+        reload_check_interval (float): seconds between two checks of the rules
+            file by the thread started with `start()`.
+    """
+    def __init__(self, path: str, cache_size: int = 65536, reload_check_interval: float = 5.0):
+        self.path = path
+        self.cache_size = cache_size
+        self.reload_check_interval = reload_check_interval
+        self._lock = threading.Lock()
+        self._stamp = _stamp(path)
+        self.indice = IndiceRegras(ler_regras(path), cache_size)
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self.reloads = 0
+        self.reload_errors = 0
+
+    def aliquotas_para(self, ncm: str, cfop: str, uf_origem: str, uf_destino: str) -> Optional[Aliquotas]:
+        # Só lê o índice atual: stat() e recompilação ficam na thread de recarga
+        return self.indice.resolver(ncm, cfop, uf_origem, uf_destino)
+
+    def start(self) -> None:
+        """
+        Starts the thread that reloads the rules file when it changes.
+        """
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._watch, name="tax-rules-reload", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _watch(self) -> None:
+        while not self._stopping.wait(self.reload_check_interval):
+            self.recarregar_se_mudou()
+
+    def recarregar_se_mudou(self) -> bool:
+        """
+        Compiles and swaps in the rules file if it changed since the last load.
+        A file that fails to parse is logged and the current index is kept.
+        """
+        if not self._lock.acquire(blocking=False):
+            # Outra thread já está verificando/recarregando; segue com o índice atual
+            return False
+        try:
+            try:
+                stamp = _stamp(self.path)
+            except OSError as e:
+                self.reload_errors += 1
+                logger.warning("Rules file %s not reloaded: %s", self.path, e)
+                return False
+            if stamp == self._stamp:
+                return False
+            try:
+                indice = IndiceRegras(ler_regras(self.path), self.cache_size)
+            except (OSError, ValueError) as e:
+                # Não tenta de novo o mesmo arquivo inválido; a próxima gravação dispara outra carga
+                self._stamp = stamp
+                self.reload_errors += 1
+                logger.warning("Rules file %s not reloaded: %s", self.path, e)
+                return False
+            # Troca atômica: leitores pegam o índice antigo ou o novo, nunca um parcial
+            self.indice = indice
+            self._stamp = stamp
+            self.reloads += 1
+            return True
+        finally:
+            self._lock.release()
+
+
+def build_calculadora(rules_file: Optional[str], reload_check_interval: float = 5.0) -> CalculadoraImpostos:
+    """
+    Tax engine for the service: with a rules file, item taxes are computed
+    from its rates; without one, the declared item taxes are totalled. The
+    caller starts and stops the reload thread (see `regras_do_arquivo`).
+    """
+    if not rules_file:
+        return CalculadoraImpostos()
+    return CalculadoraImpostos(RegrasTributariasArquivoAdapter(rules_file, reload_check_interval=reload_check_interval))
+
+
+def regras_do_arquivo(calculadora: CalculadoraImpostos) -> Optional[RegrasTributariasArquivoAdapter]:
+    """
+    The file-backed rules of a tax engine built by `build_calculadora`, if any.
+    """
+    aliquotas = calculadora.aliquotas
+    return aliquotas if isinstance(aliquotas, RegrasTributariasArquivoAdapter) else None
@@ -0,0 +1,185 @@
+# infrastructure/external_services/async_sefaz_client.py
+"""
+Asynchronous client for SEFAZ web services.
+Keeps one bounded keep-alive connection pool per host, so emissions reuse
+TLS sessions instead of paying a handshake per request, and never block a
+threadpool worker while waiting on SEFAZ.
+"""
+import asyncio
+import xml.etree.ElementTree as ET
+from typing import Dict, Mapping, Optional
+from urllib.parse import urljoin, urlsplit
+
+import httpx
+
+from infrastructure.external_services.sefaz_client import SefazClient, SefazResponse, SefazXmlGenerator
+
+DEFAULT_ENDPOINTS: Dict[str, str] = {
+    "autorizacao": "/nfe/autorizacao",
+    "cancelamento": "/nfe/evento",
+    "cce": "/nfe/evento",
+}
+
+class _TransporteCompartilhado(httpx.AsyncBaseTransport):
+    """
+    Forwards requests to a caller-owned transport. Closing a per-host client
+    closes its transport, so this wrapper keeps that from closing the shared
+    one once per host.
+    """
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        # Quem criou o transporte é quem o fecha
+        pass
+
+
+class AsyncSefazClient(SefazXmlGenerator):
+    """
+    Instances are meant to be shared by the whole application: create one at
+    startup and close it with `aclose()` at shutdown.
+
+    Args:
+        base_url (str): root URL of the SEFAZ authorizer.
+        endpoints (Mapping[str, str]): per-service path or absolute URL; services
+            pointing at different hosts get independent pools.
+        max_connections_per_host (int): hard limit of open connections per host;
+            extra requests wait for a free connection (up to `pool_timeout`).
+        max_keepalive_per_host (int): idle connections kept open per host.
+        keepalive_expiry (float): seconds an idle connection is kept.
+        connect_timeout, read_timeout, write_timeout, pool_timeout (float): seconds.
+        verify, cert: TLS settings forwarded to httpx (SEFAZ requires the A1
+            client certificate for mutual TLS).
+        transport (httpx.AsyncBaseTransport): optional transport override; when
+            given, the pool limits above are the transport's responsibility. It
+            is shared by every per-host client and owned by the caller:
+            `aclose()` does not close it.
+    """
+    def __init__(
+        self,
+        base_url: str,
+        endpoints: Optional[Mapping[str, str]] = None,
+        max_connections_per_host: int = 10,
+        max_keepalive_per_host: int = 10,
+        keepalive_expiry: float = 30.0,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 30.0,
+        write_timeout: float = 10.0,
+        pool_timeout: float = 10.0,
+        verify=True,
+        cert=None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.base_url = base_url
+        self.endpoints = {**DEFAULT_ENDPOINTS, **(endpoints or {})}
+        self._limits = httpx.Limits(
+            max_connections=max_connections_per_host,
+            max_keepalive_connections=max_keepalive_per_host,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._timeout = httpx.Timeout(
+            connect=connect_timeout,
+            read=read_timeout,
+            write=write_timeout,
+            pool=pool_timeout,
+        )
+        self._verify = verify
+        self._cert = cert
+        self._transport = _TransporteCompartilhado(transport) if transport is not None else None
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self) -> "AsyncSefazClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """
+        Closes every pooled connection.
+        """
+        async with self._lock:
+            clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            await client.aclose()
+
+    async def _client_for(self, url: str) -> httpx.AsyncClient:
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        client = self._clients.get(origin)
+        if client is None:
+            async with self._lock:
+                client = self._clients.get(origin)
+                if client is None:
+                    client = httpx.AsyncClient(
+                        limits=self._limits,
+                        timeout=self._timeout,
+                        verify=self._verify,
+                        cert=self._cert,
+                        transport=self._transport,
+                    )
+                    self._clients[origin] = client
+        return client
+
+    async def _post(self, service: str, signed_xml: str) -> SefazResponse:
+        url = urljoin(self.base_url, self.endpoints[service])
+        client = await self._client_for(url)
+        response = await client.post(
+            url,
+            content=signed_xml.encode(),
+            headers={"Content-Type": "application/xml; charset=utf-8"},
+        )
+        response.raise_for_status()
+        return self._parse(response.content)
+
+    @staticmethod
+    def _parse(body: bytes) -> SefazResponse:
+        root = ET.fromstring(body)
+        return SefazResponse(
+            status=root.findtext("status", default=""),
+            access_key=root.findtext("chaveAcesso", default=""),
+            protocol_number=root.findtext("protocolo", default=""),
+        )
+
+    async def send_xml(self, signed_xml: str) -> SefazResponse:
+        """
+        Envia o XML assinado ao SEFAZ para autorização.
+        """
+        return await self._post("autorizacao", signed_xml)
+
+    async def send_cancel(self, signed_xml: str) -> SefazResponse:
+        """
+        Envia XML de cancelamento ao SEFAZ.
+        """
+        return await self._post("cancelamento", signed_xml)
+
+    async def send_cce(self, signed_xml: str) -> SefazResponse:
+        """
+        Envia XML de CC-e ao SEFAZ.
+        """
+        return await self._post("cce", signed_xml)
+
+
+class AsyncSefazStubClient(SefazXmlGenerator):
+    """
+    Async facade over the SefazClient stub, used while no SEFAZ endpoint is
+    configured. Exposes the same interface as AsyncSefazClient.
+    """
+    def __init__(self):
+        self._stub = SefazClient()
+
+    async def aclose(self) -> None:
+        pass
+
+    async def send_xml(self, signed_xml: str) -> SefazResponse:
+        return self._stub.send_xml(signed_xml)
+
+    async def send_cancel(self, signed_xml: str) -> SefazResponse:
+        return self._stub.send_cancel(signed_xml)
+
+    async def send_cce(self, signed_xml: str) -> SefazResponse:
+        return self._stub.send_cce(signed_xml)
@@ -0,0 +1,321 @@
+# infrastructure/external_services/certificate_store.py
+"""
+Multi-tenant store of A1 certificates keyed by emitente CNPJ.
+Each PFX is parsed once and its Signer kept in a bounded LRU; expired
+certificates are the first to go when room is needed, and a certificate
+file replaced on disk is picked up without restarting the service.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+from core.exceptions.domain_exceptions import CertificadoIndisponivelException
+from infrastructure.external_services.signer import ProcessPoolSigner, Signer, available_cores, load_pkcs12
+
+
+class CertificateRef(NamedTuple):
+    path: str
+    password: Optional[str] = None
+
+
+class CertificateLocator(ABC):
+    @abstractmethod
+    def locate(self, cnpj: str) -> Optional[CertificateRef]:
+        """
+        Returns where the certificate of `cnpj` lives, or None if there is none.
+        """
+        pass
+
+
+class DirectoryCertificateLocator(CertificateLocator):
+    """
+    Looks for `<base_dir>/<cnpj>.pfx` (or .p12). Passwords come from
+    `passwords` by CNPJ, falling back to `default_password`.
+    """
+    def __init__(
+        self,
+        base_dir: str,
+        passwords: Optional[Mapping[str, str]] = None,
+        default_password: Optional[str] = None,
+        extensions: Tuple[str, ...] = (".pfx", ".p12"),
+    ):
+        self.base_dir = base_dir
+        self.passwords = dict(passwords or {})
+        self.default_password = default_password
+        self.extensions = extensions
+
+    def locate(self, cnpj: str) -> Optional[CertificateRef]:
+        for ext in self.extensions:
+            path = os.path.join(self.base_dir, f"{cnpj}{ext}")
+            if os.path.isfile(path):
+                return CertificateRef(path, self.passwords.get(cnpj, self.default_password))
+        return None
+
+
+class _Entry:
+    __slots__ = ("signer", "path", "stamp", "not_valid_after", "checked_at")
+
+    def __init__(self, signer: Signer, path: str, stamp: Tuple[int, int], not_valid_after: Optional[datetime], checked_at: float):
+        self.signer = signer
+        self.path = path
+        self.stamp = stamp
+        self.not_valid_after = not_valid_after
+        self.checked_at = checked_at
+
+    def expired(self, now: datetime) -> bool:
+        return self.not_valid_after is not None and now >= self.not_valid_after
+
+
+def _stamp(path: str) -> Tuple[int, int]:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+class CertificateStore:
+    """
+    Args:
+        locator (CertificateLocator): finds the PFX of each CNPJ.
+        max_entries (int): parsed certificates kept in memory.
+        reload_check_interval (float): minimum seconds between two stat() calls
+            on the same certificate file; 0 checks on every use.
+        default_signer (Signer): used when no CNPJ is given or the CNPJ has no
+            certificate. Without it, such calls raise CertificadoIndisponivelException.
+        digest (str): digest algorithm of the signatures.
+    """
+    def __init__(
+        self,
+        locator: CertificateLocator,
+        max_entries: int = 256,
+        reload_check_interval: float = 5.0,
+        default_signer: Optional[Signer] = None,
+        digest: str = "sha1",
+    ):
+        self.locator = locator
+        self.max_entries = max_entries
+        self.reload_check_interval = reload_check_interval
+        self.default_signer = default_signer
+        self.digest = digest
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.reloads = 0
+        self.evictions = 0
+
+    def get(self, cnpj: Optional[str]) -> Signer:
+        """
+        Returns the signer for `cnpj`, loading or reloading its certificate
+        when needed.
+
+        Raises:
+            CertificadoIndisponivelException: no certificate for the CNPJ (and
+                no default signer), or the certificate is expired.
+        """
+        if not cnpj:
+            return self._default(cnpj)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(cnpj)
+            if entry is not None:
+                self._entries.move_to_end(cnpj)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if entry is not None:
+            expired = entry.expired(datetime.now(timezone.utc))
+            if not expired and now - entry.checked_at < self.reload_check_interval:
+                return entry.signer
+            entry = self._revalidate(cnpj, entry, now)
+        else:
+            entry = self._load(cnpj, now)
+        if entry is None:
+            return self._default(cnpj)
+        if entry.expired(datetime.now(timezone.utc)):
+            raise CertificadoIndisponivelException(f"Certificado do emitente {cnpj} expirado.")
+        return entry.signer
+
+    def _default(self, cnpj: Optional[str]) -> Signer:
+        if self.default_signer is None:
+            raise CertificadoIndisponivelException(f"Nenhum certificado configurado para o emitente {cnpj}.")
+        return self.default_signer
+
+    def _revalidate(self, cnpj: str, entry: _Entry, now: float) -> Optional[_Entry]:
+        try:
+            stamp = _stamp(entry.path)
+        except FileNotFoundError:
+            # Arquivo removido ou movido: procura de novo pelo locator
+            self.invalidate(cnpj)
+            return self._load(cnpj, now)
+        if stamp == entry.stamp:
+            entry.checked_at = now
+            return entry
+        self.reloads += 1
+        return self._load(cnpj, now)
+
+    def _load(self, cnpj: str, now: float) -> Optional[_Entry]:
+        ref = self.locator.locate(cnpj)
+        if ref is None:
+            return None
+        stamp = _stamp(ref.path)
+        private_key, certificate = load_pkcs12(ref.path, ref.password)
+        entry = _Entry(
+            Signer(private_key=private_key, certificate=certificate, digest=self.digest),
+            ref.path,
+            stamp,
+            certificate.not_valid_after_utc if certificate is not None else None,
+            now,
+        )
+        with self._lock:
+            self.loads += 1
+            self._entries[cnpj] = entry
+            self._entries.move_to_end(cnpj)
+            self._evict()
+        return entry
+
+    def _evict(self) -> None:
+        # Chamado com o lock: primeiro os expirados, depois o menos usado
+        if len(self._entries) <= self.max_entries:
+            return
+        now = datetime.now(timezone.utc)
+        for cnpj in [c for c, e in self._entries.items() if e.expired(now)]:
+            del self._entries[cnpj]
+            self.evictions += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, cnpj: Optional[str] = None) -> None:
+        """
+        Drops one CNPJ (or every entry) so the next use reloads from disk.
+        """
+        with self._lock:
+            if cnpj is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(cnpj, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # Mesma interface do Signer, com o CNPJ do emitente
+
+    def sign(self, xml: str, cnpj: Optional[str] = None) -> str:
+        return self.get(cnpj).sign(xml)
+
+    def sign_many(self, xmls: Iterable[str], cnpj: Optional[str] = None) -> List[str]:
+        return self.get(cnpj).sign_many(xmls)
+
+    async def asign(self, xml: str, cnpj: Optional[str] = None) -> str:
+        return self.sign(xml, cnpj)
+
+    async def asign_many(self, xmls: Iterable[str], cnpj: Optional[str] = None) -> List[str]:
+        return self.sign_many(xmls, cnpj)
+
+    def close(self) -> None:
+        self.invalidate()
+
+
+# Cada processo do pool mantém sua própria CertificateStore
+_worker_store: Optional[CertificateStore] = None
+
+
+def _init_worker(locator: CertificateLocator, default_ref: Optional[CertificateRef], store_kwargs: Dict) -> None:
+    global _worker_store
+    default_signer = Signer(default_ref.path, default_ref.password) if default_ref else None
+    _worker_store = CertificateStore(locator, default_signer=default_signer, **store_kwargs)
+
+
+def _sign_in_worker(xml: str, cnpj: Optional[str]) -> str:
+    return _worker_store.sign(xml, cnpj)
+
+
+def _sign_many_in_worker(xmls: List[str], cnpj: Optional[str]) -> List[str]:
+    return _worker_store.sign_many(xmls, cnpj)
+
+
+class ProcessPoolCertificateSigner:
+    """
+    Multi-tenant counterpart of ProcessPoolSigner: every worker process keeps
+    its own CertificateStore built from the same (picklable) locator, so each
+    certificate is parsed at most once per process and RSA work is spread over
+    the available cores.
+    """
+    def __init__(
+        self,
+        locator: CertificateLocator,
+        default_ref: Optional[CertificateRef] = None,
+        processes: Optional[int] = None,
+        chunk_size: int = 16,
+        **store_kwargs,
+    ):
+        self.locator = locator
+        self.default_ref = default_ref
+        self.processes = processes or available_cores()
+        self.chunk_size = chunk_size
+        self.store_kwargs = store_kwargs
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.locator, self.default_ref, self.store_kwargs),
+            )
+        return self._executor
+
+    def sign(self, xml: str, cnpj: Optional[str] = None) -> str:
+        return self._pool().submit(_sign_in_worker, xml, cnpj).result()
+
+    def sign_many(self, xmls: Iterable[str], cnpj: Optional[str] = None) -> List[str]:
+        xmls = list(xmls)
+        chunks = [xmls[i:i + self.chunk_size] for i in range(0, len(xmls), self.chunk_size)]
+        return [s for chunk in self._pool().map(_sign_many_in_worker, chunks, [cnpj] * len(chunks)) for s in chunk]
+
+    async def asign(self, xml: str, cnpj: Optional[str] = None) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool(), _sign_in_worker, xml, cnpj)
+
+    async def asign_many(self, xmls: Iterable[str], cnpj: Optional[str] = None) -> List[str]:
+        loop = asyncio.get_running_loop()
+        xmls = list(xmls)
+        chunks = [xmls[i:i + self.chunk_size] for i in range(0, len(xmls), self.chunk_size)]
+        results = await asyncio.gather(*(
+            loop.run_in_executor(self._pool(), _sign_many_in_worker, chunk, cnpj) for chunk in chunks
+        ))
+        return [s for chunk in results for s in chunk]
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+def build_signer(
+    cert_dir: Optional[str] = None,
+    cert_path: Optional[str] = None,
+    cert_password: Optional[str] = None,
+):
+    """
+    Picks the signer for the configured certificates:
+    a directory of per-CNPJ PFX files (with `cert_path` as fallback), a
+    single PFX, or the stub signer when nothing is configured.
+    """
+    if cert_dir:
+        default_ref = CertificateRef(cert_path, cert_password) if cert_path else None
+        return ProcessPoolCertificateSigner(
+            DirectoryCertificateLocator(cert_dir, default_password=cert_password),
+            default_ref=default_ref,
+        )
+    if cert_path:
+        return ProcessPoolSigner(cert_path, cert_password)
+    return Signer()
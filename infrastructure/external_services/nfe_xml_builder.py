@@ -0,0 +1,225 @@
+# infrastructure/external_services/nfe_xml_builder.py
+"""
+Montagem do XML da NF-e (layout 4.00: ide, emit, dest, det, total).
+
+O layout é declarado uma vez como árvore de tags e compilado na importação
+em templates %-format planos, um por seção. Montar uma nota passa a ser um
+punhado de formatações de string num único buffer, unido uma só vez, em vez
+de criar um nó DOM por tag.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from core.entities.nota_fiscal import NotaFiscal, linhas_dos_itens
+from core.enum.uf import CODIGO_IBGE_UF
+from core.value_objects.endereço import Endereco
+from core.value_objects.chave_acesso import ChaveAcesso
+
+NFE_NS = "http://www.portalfiscal.inf.br/nfe"
+BRT = timezone(timedelta(hours=-3))
+
+
+class Field(NamedTuple):
+    name: str
+    fmt: str = "%s"
+
+
+class Tag(NamedTuple):
+    name: str
+    children: Tuple[Union["Tag", Field], ...]
+    attrs: Tuple[Tuple[str, Field], ...] = ()
+
+
+class Template(NamedTuple):
+    text: str
+    fields: Tuple[str, ...]
+
+    def render(self, values: dict) -> str:
+        return self.text % tuple([values[name] for name in self.fields])
+
+
+def compile_template(*nodes: Union[Tag, Field]) -> Template:
+    """
+    Achata uma árvore do layout num único template %-format, com a ordem dos
+    campos. O layout da NF-e não tem '%' literal em nomes de tag.
+    """
+    parts: List[str] = []
+    fields: List[str] = []
+
+    def walk(node):
+        if isinstance(node, Field):
+            parts.append(node.fmt)
+            fields.append(node.name)
+            return
+        parts.append(f"<{node.name}")
+        for attr, field in node.attrs:
+            parts.append(f' {attr}="{field.fmt}"')
+            fields.append(field.name)
+        parts.append(">")
+        for child in node.children:
+            walk(child)
+        parts.append(f"</{node.name}>")
+
+    for node in nodes:
+        walk(node)
+    return Template("".join(parts), tuple(fields))
+
+
+def _leaf(tag: str, name: Optional[str] = None, fmt: str = "%s") -> Tag:
+    return Tag(tag, (Field(name or tag, fmt),))
+
+
+def _endereco(tag: str) -> Tag:
+    return Tag(tag, (
+        _leaf("xLgr"), _leaf("nro"), _leaf("xCpl"), _leaf("xBairro"),
+        _leaf("xMun"), _leaf("UF"), _leaf("CEP"), _leaf("cPais"), _leaf("xPais"),
+    ))
+
+
+# Layout compilado uma única vez
+
+OPEN = Template(f'<NFe xmlns="{NFE_NS}"><infNFe versao="4.00" Id="%s">', ("id",))
+
+IDE = compile_template(Tag("ide", (
+    _leaf("cUF"), _leaf("cNF"), _leaf("natOp"), _leaf("mod"), _leaf("serie"), _leaf("nNF"),
+    _leaf("dhEmi"), _leaf("tpNF"), _leaf("idDest"), _leaf("tpImp"), _leaf("tpEmis"),
+    _leaf("cDV"), _leaf("tpAmb"), _leaf("finNFe"), _leaf("indFinal"), _leaf("indPres"),
+    _leaf("procEmi"), _leaf("verProc"),
+)))
+
+EMIT = compile_template(Tag("emit", (_leaf("CNPJ"), _endereco("enderEmit"))))
+
+DEST_CNPJ = compile_template(Tag("dest", (_leaf("CNPJ"), _endereco("enderDest"), _leaf("indIEDest"))))
+DEST_CPF = compile_template(Tag("dest", (_leaf("CPF"), _endereco("enderDest"), _leaf("indIEDest"))))
+
+DET = compile_template(Tag("det", (
+    Tag("prod", (
+        _leaf("cProd"), _leaf("cEAN"), _leaf("xProd"), _leaf("NCM"), _leaf("CFOP"),
+        _leaf("uCom"), _leaf("qCom", fmt="%.4f"), _leaf("vUnCom", fmt="%.10f"),
+        _leaf("vProd", fmt="%.2f"), _leaf("cEANTrib"), _leaf("uTrib"),
+        _leaf("qTrib", "qCom", fmt="%.4f"), _leaf("vUnTrib", "vUnCom", fmt="%.10f"),
+        _leaf("indTot"),
+    )),
+    Tag("imposto", (
+        Tag("ICMS", (Tag("ICMSSN", (_leaf("orig"), _leaf("CSOSN"), _leaf("vICMS", fmt="%.2f"))),)),
+        Tag("IPI", (_leaf("cEnq"), Tag("IPITrib", (_leaf("vIPI", fmt="%.2f"),)))),
+        Tag("PIS", (Tag("PISOutr", (_leaf("vPIS", fmt="%.2f"),)),)),
+        Tag("COFINS", (Tag("COFINSOutr", (_leaf("vCOFINS", fmt="%.2f"),)),)),
+    )),
+), attrs=(("nItem", Field("nItem", "%d")),)))
+
+TOTAL = compile_template(Tag("total", (Tag("ICMSTot", (
+    _leaf("vICMS", fmt="%.2f"), _leaf("vProd", fmt="%.2f"), _leaf("vIPI", fmt="%.2f"),
+    _leaf("vPIS", fmt="%.2f"), _leaf("vCOFINS", fmt="%.2f"), _leaf("vNF", fmt="%.2f"),
+)),)))
+
+CLOSE = "</infNFe></NFe>"
+
+_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"})
+
+
+def escape(value) -> str:
+    text = "" if value is None else str(value)
+    # Caminho rápido: a maioria dos campos não tem caracteres especiais
+    if "&" in text or "<" in text or ">" in text or '"' in text:
+        return text.translate(_ESCAPES)
+    return text
+
+
+class NFeXmlBuilder:
+    """
+    Gera o XML de emissão (infNFe) de uma ou várias notas.
+
+    Args:
+        tp_amb (int): 1 = produção, 2 = homologação.
+        nat_op (str): natureza da operação.
+        ver_proc (str): versão do aplicativo emissor.
+    """
+    def __init__(self, tp_amb: int = 2, nat_op: str = "VENDA DE MERCADORIA", ver_proc: str = "ecom-invoice-service"):
+        self.tp_amb = str(tp_amb)
+        self.nat_op = escape(nat_op)
+        self.ver_proc = escape(ver_proc)
+
+    @staticmethod
+    def _endereco(endereco: Endereco) -> dict:
+        return {
+            "xLgr": escape(endereco.logradouro),
+            "nro": escape(endereco.numero),
+            "xCpl": escape(endereco.complemento),
+            "xBairro": escape(endereco.bairro),
+            "xMun": escape(endereco.municipio),
+            "UF": endereco.uf,
+            "CEP": endereco.cep,
+            "cPais": "1058",
+            "xPais": "BRASIL",
+        }
+
+    @staticmethod
+    def _numeracao(nota: NotaFiscal) -> Tuple[str, str, str, str, str]:
+        # serie, nNF, tpEmis, cNF e cDV vêm da chave de acesso quando ela já existe
+        chave = ChaveAcesso.try_parse(nota.chave_acesso)
+        if chave:
+            return str(chave.serie), str(chave.numero), chave.tp_emis, chave.codigo, chave.dv
+        return "1", "0", "1", "00000000", "0"
+
+    def _write(self, out: List[str], nota: NotaFiscal) -> None:
+        serie, numero, tp_emis, cnf, cdv = self._numeracao(nota)
+        emit_end = nota.emitente_endereco
+        dest_end = nota.destinatario_endereco
+        data_emissao = nota.data_emissao
+        if data_emissao.tzinfo is None:
+            data_emissao = data_emissao.replace(tzinfo=timezone.utc)
+
+        out.append(OPEN.text % ("NFe" + (nota.chave_acesso or nota.id.hex),))
+        out.append(IDE.render({
+            "cUF": CODIGO_IBGE_UF[emit_end.uf], "cNF": cnf, "natOp": self.nat_op, "mod": "55",
+            "serie": serie, "nNF": numero,
+            "dhEmi": data_emissao.astimezone(BRT).isoformat(timespec="seconds"),
+            "tpNF": "1", "idDest": "1" if emit_end.uf == dest_end.uf else "2", "tpImp": "1",
+            "tpEmis": tp_emis, "cDV": cdv, "tpAmb": self.tp_amb, "finNFe": "1", "indFinal": "1",
+            "indPres": "2", "procEmi": "0", "verProc": self.ver_proc,
+        }))
+        out.append(EMIT.render({"CNPJ": nota.emitente_cnpj.numero, **self._endereco(emit_end)}))
+        documento = nota.destinatario_cnpj.numero
+        dest = DEST_CNPJ if len(documento) == 14 else DEST_CPF
+        out.append(dest.render({
+            "CNPJ": documento, "CPF": documento, "indIEDest": "9", **self._endereco(dest_end),
+        }))
+
+        det = DET.text
+        for n, (sku, descricao, quantidade, valor_unitario, cfop, ncm, cst, icms, ipi, pis, cofins) in enumerate(
+            linhas_dos_itens(nota.itens), 1
+        ):
+            # Mesma ordem de DET.fields, sem montar um dict por item
+            out.append(det % (
+                n, escape(sku), "SEM GTIN", escape(descricao), ncm, cfop,
+                "UN", quantidade, valor_unitario, quantidade * valor_unitario, "SEM GTIN", "UN",
+                quantidade, valor_unitario, "1",
+                "0", cst, icms, "999", ipi, pis, cofins,
+            ))
+
+        v_prod = nota.valor_total()
+        # impostos_totais (calculados em centavos) quando a nota já passou pela calculadora
+        impostos = nota.impostos_totais or nota.somar_impostos()
+        out.append(TOTAL.render({
+            "vICMS": impostos.icms, "vProd": v_prod, "vIPI": impostos.ipi, "vPIS": impostos.pis,
+            "vCOFINS": impostos.cofins, "vNF": v_prod + impostos.ipi,
+        }))
+        out.append(CLOSE)
+
+    def build(self, nota: NotaFiscal) -> str:
+        out: List[str] = []
+        self._write(out, nota)
+        return "".join(out)
+
+    def build_many(self, notas: Iterable[NotaFiscal]) -> List[str]:
+        """
+        Gera um documento por nota, reaproveitando um único buffer.
+        """
+        out: List[str] = []
+        documents = []
+        for nota in notas:
+            self._write(out, nota)
+            documents.append("".join(out))
+            out.clear()
+        return documents
@@ -3,34 +3,36 @@
 Client stub for interacting with SEFAZ web services.
 Provides methods to generate XML and send requests for NF-e, cancellation, and CC-e.
 """
-import uuid
+from datetime import datetime
 from random import randint
-from typing import NamedTuple
+from typing import Iterable, List, NamedTuple, Optional
 from core.entities.nota_fiscal import NotaFiscal
+from core.enum.uf import UF_POR_CODIGO_IBGE
+from core.value_objects.chave_acesso import ChaveAcesso
+from infrastructure.external_services.nfe_xml_builder import NFeXmlBuilder
 
 class SefazResponse(NamedTuple):
     status: str
     access_key: str
     protocol_number: str
 
-class SefazClient:
+class SefazXmlGenerator:
+    """
+    Geração dos XMLs enviados à SEFAZ, compartilhada pelos clientes síncrono e assíncrono.
+    """
+    nfe_builder = NFeXmlBuilder()
+
     def generate_xml(self, nota: NotaFiscal) -> str:
         """
         Converte a entidade NotaFiscal em XML conforme layout NF-e.
         """
-        # TODO: implementar conversão real para XML
-        return f"<nfe><id>{nota.id}</id></nfe>"
+        return self.nfe_builder.build(nota)
 
-    def send_xml(self, signed_xml: str) -> SefazResponse:
+    def generate_xml_many(self, notas: Iterable[NotaFiscal]) -> List[str]:
         """
-        Envia o XML assinado ao SEFAZ para autorização.
-        Gera valores únicos para chave de acesso e protocolo.
+        Gera o XML de um lote de notas.
         """
-        # Gera chave de acesso única de 44 caracteres
-        unique_access_key = uuid.uuid4().hex[:44].ljust(44, '0')
-        # Gera protocolo aleatório de 9 dígitos
-        protocol_number = str(randint(100000000, 999999999))
-        return SefazResponse(status="AUTORIZADO", access_key=unique_access_key, protocol_number=protocol_number)
+        return self.nfe_builder.build_many(notas)
 
     def generate_cancel_xml(self, access_key: str) -> str:
         """
@@ -38,18 +40,52 @@ class SefazClient:
         """
         return f"<cancel><key>{access_key}</key></cancel>"
 
-    def send_cancel(self, signed_xml: str) -> SefazResponse:
+    def generate_cce_xml(self, access_key: str, correction_text: str) -> str:
         """
-        Envia XML de cancelamento ao SEFAZ.
+        Gera XML de Carta de Correção Eletrônica (CC-e).
+        """
+        return f"<cce><key>{access_key}</key><text>{correction_text}</text></cce>"
+
+def _texto_da_tag(xml: str, tag: str, inicio: int = 0) -> Optional[str]:
+    abre = xml.find(f"<{tag}>", inicio)
+    if abre < 0:
+        return None
+    abre += len(tag) + 2
+    fecha = xml.find("</", abre)
+    return xml[abre:fecha] if fecha >= 0 else None
+
+def chave_acesso_do_xml(xml: str) -> str:
+    """
+    Monta uma chave de acesso válida a partir da ide/emit do XML da NF-e.
+    O nNF é aleatório: o stub não mantém a numeração do emitente.
+    """
+    uf = UF_POR_CODIGO_IBGE.get(_texto_da_tag(xml, "cUF") or "", "SP")
+    emit = xml.find("<emit>")
+    cnpj = (_texto_da_tag(xml, "CNPJ", emit) if emit >= 0 else None) or "0" * 14
+    serie = _texto_da_tag(xml, "serie") or "1"
+    dh_emi = _texto_da_tag(xml, "dhEmi")
+    data_emissao = datetime.fromisoformat(dh_emi) if dh_emi else datetime.utcnow()
+    return ChaveAcesso.gerar(
+        uf, data_emissao, cnpj, int(serie), randint(1, 999999999)
+    ).valor
+
+class SefazClient(SefazXmlGenerator):
+    def send_xml(self, signed_xml: str) -> SefazResponse:
+        """
+        Envia o XML assinado ao SEFAZ para autorização.
+        Gera valores únicos para chave de acesso e protocolo.
         """
+        unique_access_key = chave_acesso_do_xml(signed_xml)
+        # Gera protocolo aleatório de 9 dígitos
         protocol_number = str(randint(100000000, 999999999))
-        return SefazResponse(status="CANCELADO", access_key=signed_xml, protocol_number=protocol_number)
+        return SefazResponse(status="AUTORIZADO", access_key=unique_access_key, protocol_number=protocol_number)
 
-    def generate_cce_xml(self, access_key: str, correction_text: str) -> str:
+    def send_cancel(self, signed_xml: str) -> SefazResponse:
         """
-        Gera XML de Carta de Correção Eletrônica (CC-e).
+        Envia XML de cancelamento ao SEFAZ.
         """
-        return f"<cce><key>{access_key}</key><text>{correction_text}</text></cce>"
+        protocol_number = str(randint(100000000, 999999999))
+        return SefazResponse(status="CANCELADO", access_key=signed_xml, protocol_number=protocol_number)
 
     def send_cce(self, signed_xml: str) -> SefazResponse:
         """
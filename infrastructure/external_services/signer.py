@@ -1,24 +1,306 @@
 # infrastructure/external_services/signer.py
 """
 Module responsible for digital signature of XML documents.
-Provides a Signer class that applies a cryptographic signature to an XML string.
+Provides a Signer class that applies an enveloped XMLDSig signature (RSA)
+to an XML string, and a ProcessPoolSigner that runs the same work on a
+pool of processes so signing bursts use every core instead of one.
 """
+import asyncio
+import base64
+import hashlib
+import multiprocessing
+import os
+import re
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional, Tuple
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from cryptography.hazmat.primitives.serialization import pkcs12
+
+from infrastructure.external_services.xml_c14n import by_id, by_local_name, canonicalize
+
+DS_NS = "http://www.w3.org/2000/09/xmldsig#"
+C14N_ALGORITHM = "http://www.w3.org/TR/2001/REC-xml-c14n-20010315"
+ENVELOPED_ALGORITHM = "http://www.w3.org/2000/09/xmldsig#enveloped-signature"
+
+# Layout NF-e 4.00: RSA-SHA1 com digest SHA1
+_ALGORITHMS = {
+    "sha1": ("http://www.w3.org/2000/09/xmldsig#sha1",
+             "http://www.w3.org/2000/09/xmldsig#rsa-sha1", hashes.SHA1),
+    "sha256": ("http://www.w3.org/2001/04/xmlenc#sha256",
+               "http://www.w3.org/2001/04/xmldsig-more#rsa-sha256", hashes.SHA256),
+}
+
+
+def available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def load_pkcs12(cert_path: str, cert_password: Optional[str]) -> Tuple[rsa.RSAPrivateKey, Optional[x509.Certificate]]:
+    """
+    Loads the private key and certificate of an A1 (PFX/PKCS#12) file.
+    """
+    with open(cert_path, "rb") as f:
+        data = f.read()
+    password = cert_password.encode() if cert_password else None
+    key, certificate, _ = pkcs12.load_key_and_certificates(data, password)
+    return key, certificate
+
+
+def _reference_id(root: ET.Element) -> Optional[str]:
+    # NF-e assina o elemento com atributo Id (infNFe, infEvento); sem ele, o documento todo
+    return next((el.get("Id") for el in root.iter() if el.get("Id")), None)
+
+
+def _c14n(xml: str, element_id: Optional[str]) -> bytes:
+    # Canonicaliza a partir do texto: o elemento herda o namespace padrão da raiz
+    return canonicalize(xml, by_id(element_id) if element_id else None)
+
+
+def _insert_before_root_end(xml: str, fragment: str) -> str:
+    end = xml.rstrip().rfind("</")
+    if end == -1:
+        raise ValueError("XML sem elemento raiz com fechamento explícito")
+    return xml[:end] + fragment + xml[end:]
+
+
+def _signed_info(uri: str, digest_value: str, digest: str) -> str:
+    digest_uri, signature_uri, _ = _ALGORITHMS[digest]
+    return (
+        f'<SignedInfo xmlns="{DS_NS}">'
+        f'<CanonicalizationMethod Algorithm="{C14N_ALGORITHM}"></CanonicalizationMethod>'
+        f'<SignatureMethod Algorithm="{signature_uri}"></SignatureMethod>'
+        f'<Reference URI="{uri}">'
+        f'<Transforms>'
+        f'<Transform Algorithm="{ENVELOPED_ALGORITHM}"></Transform>'
+        f'<Transform Algorithm="{C14N_ALGORITHM}"></Transform>'
+        f'</Transforms>'
+        f'<DigestMethod Algorithm="{digest_uri}"></DigestMethod>'
+        f'<DigestValue>{digest_value}</DigestValue>'
+        f'</Reference>'
+        f'</SignedInfo>'
+    )
+
+
+def sign_xml(
+    xml: str,
+    private_key: rsa.RSAPrivateKey,
+    certificate: Optional[x509.Certificate] = None,
+    digest: str = "sha1",
+) -> str:
+    """
+    Returns `xml` with an enveloped <Signature> appended as the last child
+    of the root element.
+    """
+    ref_id = _reference_id(ET.fromstring(xml))
+    uri = f"#{ref_id}" if ref_id else ""
+    digest_value = base64.b64encode(hashlib.new(digest, _c14n(xml, ref_id)).digest()).decode()
+    signed_info = _signed_info(uri, digest_value, digest)
+
+    # SignedInfo é canonicalizado no lugar onde ficará no documento, com o contexto herdado
+    in_place = _insert_before_root_end(xml, f'<Signature xmlns="{DS_NS}">{signed_info}</Signature>')
+    hash_cls = _ALGORITHMS[digest][2]
+    signature = private_key.sign(
+        canonicalize(in_place, by_local_name("SignedInfo")), padding.PKCS1v15(), hash_cls()
+    )
+
+    key_info = ""
+    if certificate is not None:
+        der = certificate.public_bytes(serialization.Encoding.DER)
+        key_info = (
+            f"<KeyInfo><X509Data><X509Certificate>{base64.b64encode(der).decode()}"
+            f"</X509Certificate></X509Data></KeyInfo>"
+        )
+    signature_xml = (
+        f'<Signature xmlns="{DS_NS}">{signed_info}'
+        f"<SignatureValue>{base64.b64encode(signature).decode()}</SignatureValue>"
+        f"{key_info}</Signature>"
+    )
+    # Insere antes do fechamento da raiz, preservando o XML original byte a byte
+    return _insert_before_root_end(xml, signature_xml)
+
+
+def verify_xml(signed_xml: str, public_key: rsa.RSAPublicKey) -> bool:
+    """
+    Checks the reference digest and the signature value of a document
+    produced by `sign_xml`.
+    """
+    root = ET.fromstring(signed_xml)
+    signature = root.find(f"{{{DS_NS}}}Signature")
+    if signature is None:
+        return False
+
+    signed_info = signature.find(f"{{{DS_NS}}}SignedInfo")
+    reference = signed_info.find(f"{{{DS_NS}}}Reference")
+    digest_uri = reference.find(f"{{{DS_NS}}}DigestMethod").get("Algorithm")
+    digest = next(name for name, (uri, _, _) in _ALGORITHMS.items() if uri == digest_uri)
+
+    uri = reference.get("URI")
+    # Transformação enveloped: o digest é do documento sem a própria assinatura
+    unsigned = re.sub(r"<Signature\b.*?</Signature>", "", signed_xml, count=1, flags=re.S)
+    try:
+        referenced = _c14n(unsigned, uri[1:] if uri else None)
+    except ValueError:
+        return False
+    expected = base64.b64encode(hashlib.new(digest, referenced).digest()).decode()
+    if reference.findtext(f"{{{DS_NS}}}DigestValue") != expected:
+        return False
+
+    try:
+        public_key.verify(
+            base64.b64decode(signature.findtext(f"{{{DS_NS}}}SignatureValue")),
+            canonicalize(signed_xml, by_local_name("SignedInfo")),
+            padding.PKCS1v15(),
+            _ALGORITHMS[digest][2](),
+        )
+    except Exception:
+        return False
+    return True
+
 
 class Signer:
     """
-    Stub for XML signer. In production, use libraries like xmlsec or PyKCS11
-    to apply XAdES or similar signatures using a digital certificate.
+    Signs XML documents with the A1 certificate at `cert_path`, or with an
+    already loaded `private_key`/`certificate` pair.
+
+    Without any key the signer stays in stub mode and only wraps the XML,
+    which is what the SEFAZ stub expects during development.
     """
-    def __init__(self, cert_path: str = None, cert_password: str = None):
-        # TODO: load certificate from path (A1) or USB token (A3)
+    def __init__(
+        self,
+        cert_path: str = None,
+        cert_password: str = None,
+        private_key: Optional[rsa.RSAPrivateKey] = None,
+        certificate: Optional[x509.Certificate] = None,
+        digest: str = "sha1",
+    ):
         self.cert_path = cert_path
         self.cert_password = cert_password
+        if cert_path and private_key is None:
+            private_key, certificate = load_pkcs12(cert_path, cert_password)
+        self.private_key = private_key
+        self.certificate = certificate
+        self.digest = digest
 
-    def sign(self, xml: str) -> str:
+    def sign(self, xml: str, cnpj: Optional[str] = None) -> str:
         """
         Applies a digital signature to the given XML string.
-        Returns the signed XML.
+        Returns the signed XML. `cnpj` (the emitente) only matters to
+        multi-tenant signers; a single-certificate signer ignores it.
+        """
+        if self.private_key is None:
+            return f"<signed>{xml}</signed>"
+        return sign_xml(xml, self.private_key, self.certificate, self.digest)
+
+    def sign_many(self, xmls: Iterable[str], cnpj: Optional[str] = None) -> List[str]:
+        return [self.sign(xml) for xml in xmls]
+
+    async def asign(self, xml: str, cnpj: Optional[str] = None) -> str:
+        """
+        Awaitable form of sign(); here it runs inline, ProcessPoolSigner
+        moves it off the event loop.
+        """
+        return self.sign(xml)
+
+    async def asign_many(self, xmls: Iterable[str], cnpj: Optional[str] = None) -> List[str]:
+        return self.sign_many(xmls)
+
+    def close(self) -> None:
+        pass
+
+
+# Estado de cada processo do pool: a chave é carregada uma vez no initializer
+_worker_signer: Optional[Signer] = None
+
+
+def _init_worker(key_pem: bytes, cert_pem: Optional[bytes], digest: str) -> None:
+    global _worker_signer
+    private_key = serialization.load_pem_private_key(key_pem, password=None)
+    certificate = x509.load_pem_x509_certificate(cert_pem) if cert_pem else None
+    _worker_signer = Signer(private_key=private_key, certificate=certificate, digest=digest)
+
+
+def _sign_in_worker(xml: str) -> str:
+    return _worker_signer.sign(xml)
+
+
+def _sign_chunk_in_worker(xmls: List[str]) -> List[str]:
+    return _worker_signer.sign_many(xmls)
+
+
+class ProcessPoolSigner(Signer):
+    """
+    Signer that dispatches RSA work to a pool of `processes` workers
+    (default: one per available core). Each worker deserializes the key once.
+    The pool is started on first use; call close() at shutdown.
+    """
+    def __init__(
+        self,
+        cert_path: str = None,
+        cert_password: str = None,
+        private_key: Optional[rsa.RSAPrivateKey] = None,
+        certificate: Optional[x509.Certificate] = None,
+        digest: str = "sha1",
+        processes: Optional[int] = None,
+        chunk_size: int = 16,
+    ):
+        super().__init__(cert_path, cert_password, private_key, certificate, digest)
+        if self.private_key is None:
+            raise ValueError("ProcessPoolSigner precisa de uma chave privada")
+        self.processes = processes or available_cores()
+        self.chunk_size = chunk_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            key_pem = self.private_key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption(),
+            )
+            cert_pem = self.certificate.public_bytes(serialization.Encoding.PEM) if self.certificate else None
+            # spawn: o processo pai tem threads (event loop, publisher) e fork não é seguro
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(key_pem, cert_pem, self.digest),
+            )
+        return self._executor
+
+    def _chunks(self, xmls: List[str]) -> List[List[str]]:
+        return [xmls[i:i + self.chunk_size] for i in range(0, len(xmls), self.chunk_size)]
+
+    def sign(self, xml: str, cnpj: Optional[str] = None) -> str:
+        return self._pool().submit(_sign_in_worker, xml).result()
+
+    def sign_many(self, xmls: Iterable[str], cnpj: Optional[str] = None) -> List[str]:
+        """
+        Signs a batch, sending `chunk_size` documents per inter-process round
+        trip. Results keep the input order.
         """
-        # TODO: implement actual signing logic
-        signed_xml = f"<signed>{xml}</signed>"
-        return signed_xml
+        chunks = self._chunks(list(xmls))
+        return [signed for chunk in self._pool().map(_sign_chunk_in_worker, chunks) for signed in chunk]
+
+    async def asign(self, xml: str, cnpj: Optional[str] = None) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool(), _sign_in_worker, xml)
+
+    async def asign_many(self, xmls: Iterable[str], cnpj: Optional[str] = None) -> List[str]:
+        loop = asyncio.get_running_loop()
+        pool = self._pool()
+        results = await asyncio.gather(*(
+            loop.run_in_executor(pool, _sign_chunk_in_worker, chunk) for chunk in self._chunks(list(xmls))
+        ))
+        return [signed for chunk in results for signed in chunk]
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -0,0 +1,124 @@
+# infrastructure/external_services/xml_c14n.py
+"""
+Inclusive XML canonicalization (C14N 1.0, without comments) of one element
+of a document, as required by the NF-e XMLDSig profile.
+
+The element is serialized straight from the parse of the original text, so
+prefixes stay as written. The apex receives every namespace declaration in
+scope (including the default namespace inherited from the root) and the
+xml:* attributes of its ancestors. xml.etree's canonicalize() cannot be used
+here: it implements C14N 2.0 and it loses the inherited context of a subtree.
+"""
+from typing import Callable, Dict, List, Optional
+from xml.parsers import expat
+
+XML_NS = "http://www.w3.org/XML/1998/namespace"
+
+# (nome qualificado, atributos) -> é o elemento a canonicalizar?
+Seletor = Callable[[str, Dict[str, str]], bool]
+
+
+def by_id(element_id: str) -> Seletor:
+    return lambda name, attrs: attrs.get("Id") == element_id
+
+
+def by_local_name(local_name: str) -> Seletor:
+    return lambda name, attrs: name.rpartition(":")[2] == local_name
+
+
+def _text(data: str) -> str:
+    return data.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace("\r", "&#xD;")
+
+
+def _attr(value: str) -> str:
+    return (
+        value.replace("&", "&amp;").replace("<", "&lt;").replace('"', "&quot;")
+        .replace("\t", "&#x9;").replace("\n", "&#xA;").replace("\r", "&#xD;")
+    )
+
+
+def _is_xmlns(name: str) -> bool:
+    return name == "xmlns" or name.startswith("xmlns:")
+
+
+def _attr_key(name: str, namespaces: Dict[str, str]):
+    # Atributos sem prefixo (namespace vazio) primeiro; os demais por (URI, nome local)
+    prefix, _, local = name.rpartition(":")
+    if not prefix:
+        return "", local
+    uri = XML_NS if prefix == "xml" else namespaces.get(f"xmlns:{prefix}", "")
+    return uri, local
+
+
+def canonicalize(xml: str, select: Optional[Seletor] = None) -> bytes:
+    """
+    C14N 1.0 of the first element accepted by `select` (the root element
+    when None). Raises ValueError if no element matches.
+    """
+    out: List[str] = []
+    # Por nível: declarações de namespace e atributos xml:* em escopo
+    scopes = [({}, {})]
+    # Namespaces já declarados na saída, por elemento aberto dentro do apex
+    rendered: List[Dict[str, str]] = []
+    state = {"depth": None, "done": False}
+    parser = expat.ParserCreate()
+
+    def start(name, attrs):
+        inherited_ns, inherited_xml = scopes[-1]
+        namespaces = {**inherited_ns, **{k: v for k, v in attrs.items() if _is_xmlns(k)}}
+        xml_attrs = {**inherited_xml, **{k: v for k, v in attrs.items() if k.startswith("xml:")}}
+        scopes.append((namespaces, xml_attrs))
+        if state["done"]:
+            return
+        if state["depth"] is None:
+            if not (select(name, attrs) if select else len(scopes) == 2):
+                return
+            state["depth"] = len(scopes)
+            parent: Dict[str, str] = {}
+            # O apex herda os atributos xml:* dos ancestrais fora do subconjunto
+            own = {**inherited_xml, **attrs}
+        else:
+            parent = rendered[-1]
+            own = attrs
+
+        declarations = [
+            (k, v) for k, v in namespaces.items()
+            if parent.get(k, "") != v
+        ]
+        declarations.sort(key=lambda kv: "" if kv[0] == "xmlns" else kv[0])
+        attributes = sorted(
+            ((k, v) for k, v in own.items() if not _is_xmlns(k)),
+            key=lambda kv: _attr_key(kv[0], namespaces),
+        )
+        out.append(f"<{name}")
+        out.extend(f' {k}="{_attr(v)}"' for k, v in declarations + attributes)
+        out.append(">")
+        rendered.append(namespaces)
+
+    def end(name):
+        if state["depth"] is not None and not state["done"]:
+            out.append(f"</{name}>")
+            rendered.pop()
+            if len(scopes) == state["depth"]:
+                state["done"] = True
+        scopes.pop()
+
+    def inside() -> bool:
+        return state["depth"] is not None and not state["done"]
+
+    def chardata(data):
+        if inside():
+            out.append(_text(data))
+
+    def instruction(target, data):
+        if inside():
+            out.append(f"<?{target} {data}?>" if data else f"<?{target}?>")
+
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    parser.CharacterDataHandler = chardata
+    parser.ProcessingInstructionHandler = instruction
+    parser.Parse(xml.encode("utf-8"), True)
+    if state["depth"] is None:
+        raise ValueError("elemento a canonicalizar não encontrado")
+    return "".join(out).encode("utf-8")
@@ -0,0 +1,281 @@
+# infrastructure/messaging/event_consumer.py
+"""
+Consumer that turns "order paid" events into emitted invoices without
+going through HTTP.
+
+Messages are routed to a fixed worker by the emitente CNPJ, so the notes of
+one emitente are emitted in the order they arrived while different emitentes
+are processed concurrently. Acknowledgements are buffered and sent to the
+source in batches. Delivery is at-least-once: a crash between emission and
+ack redelivers the order on restart. An order that still fails after the
+retries (e.g. during a database outage) is never acknowledged, so the
+source hands it out again.
+
+Usage (backfill from a JSON-lines file):
+    python -m infrastructure.messaging.event_consumer orders.ndjson --workers 16
+"""
+import argparse
+import asyncio
+import logging
+import time
+import zlib
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field, replace
+from typing import AsyncContextManager, AsyncIterator, Callable, List, Optional
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from application.mappers.order_mapper import OrderMapper
+from application.use_cases.emit_invoice import AsyncEmitInvoiceUseCase
+from core.enum.status_nota import StatusNota
+from core.exceptions.domain_exceptions import DomainException
+from core.services.calculadora_impostos import CalculadoraImpostos
+from core.services.ports.emissao_nota_port import AsyncEmissaoNotaPort
+from core.services.ports.event_publisher_port import EventPublisherPort
+from infrastructure.adapters.nota_fiscal_sqlalchemy_async import NotaFiscalAsyncSqlAlchemyAdapter
+from infrastructure.messaging.order_sources import JsonLinesOrderSource, OrderEventSource, OrderMessage
+
+logger = logging.getLogger(__name__)
+
+UseCaseFactory = Callable[[], AsyncContextManager[AsyncEmitInvoiceUseCase]]
+
+
+@dataclass
+class ConsumerStats:
+    received: int = 0
+    emitted: int = 0
+    rejected: int = 0
+    invalid: int = 0
+    failed: int = 0
+    acked: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def processed(self) -> int:
+        return self.emitted + self.rejected + self.invalid + self.failed
+
+    @property
+    def throughput(self) -> float:
+        """Processed orders per second since the consumer started."""
+        elapsed = time.monotonic() - self.started_at
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            "received": self.received,
+            "emitted": self.emitted,
+            "rejected": self.rejected,
+            "invalid": self.invalid,
+            "failed": self.failed,
+            "acked": self.acked,
+            "throughput_per_s": round(self.throughput, 2),
+        }
+
+
+def sqlalchemy_use_case_factory(
+    session_factory: async_sessionmaker,
+    emissor_factory: Callable[[], AsyncEmissaoNotaPort],
+    publisher: Optional[EventPublisherPort] = None,
+    calculadora: Optional[CalculadoraImpostos] = None,
+) -> UseCaseFactory:
+    """
+    Builds one AsyncEmitInvoiceUseCase per order, each on its own session.
+    """
+    @asynccontextmanager
+    async def factory() -> AsyncIterator[AsyncEmitInvoiceUseCase]:
+        async with session_factory() as session:
+            yield AsyncEmitInvoiceUseCase(
+                emissor_factory(), NotaFiscalAsyncSqlAlchemyAdapter(session),
+                publisher=publisher, calculadora=calculadora,
+            )
+
+    return factory
+
+
+class OrderEventConsumer:
+    """
+    Args:
+        source (OrderEventSource): where order events come from.
+        use_case_factory (UseCaseFactory): yields the emission use case for one order.
+        workers (int): concurrent workers; also the number of ordering lanes.
+        fetch_size (int): messages requested from the source per call.
+        worker_queue_size (int): per-worker buffer; a full buffer pauses fetching.
+        ack_batch_size (int): acknowledgements buffered before they are sent.
+        ack_interval (float): maximum seconds an acknowledgement stays buffered.
+        poll_interval (float): seconds to wait when the source is empty.
+        max_retries (int): extra attempts on infrastructure errors; once SEFAZ
+            has answered, only the database write is retried. Domain errors
+            are never retried.
+        retry_backoff (float): seconds before the first retry, doubled each time.
+    """
+    def __init__(
+        self,
+        source: OrderEventSource,
+        use_case_factory: UseCaseFactory,
+        workers: int = 8,
+        fetch_size: int = 100,
+        worker_queue_size: int = 100,
+        ack_batch_size: int = 100,
+        ack_interval: float = 1.0,
+        poll_interval: float = 0.5,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5,
+    ):
+        self.source = source
+        self.use_case_factory = use_case_factory
+        self.workers = workers
+        self.fetch_size = fetch_size
+        self.worker_queue_size = worker_queue_size
+        self.ack_batch_size = ack_batch_size
+        self.ack_interval = ack_interval
+        self.poll_interval = poll_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.stats = ConsumerStats()
+        self._pending_acks: List[OrderMessage] = []
+        self._ack_lock = asyncio.Lock()
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    def _lane(self, message: OrderMessage) -> int:
+        # crc32 é estável entre processos, ao contrário de hash()
+        return zlib.crc32(message.emitente_cnpj.encode()) % self.workers
+
+    async def run(self, stop_when_idle: bool = False) -> ConsumerStats:
+        """
+        Consumes until `stop()` is called or, with `stop_when_idle`, until
+        the source has nothing left. In-flight orders are finished and every
+        acknowledgement is flushed before returning.
+        """
+        self.stats = ConsumerStats()
+        lanes = [asyncio.Queue(maxsize=self.worker_queue_size) for _ in range(self.workers)]
+        workers = [asyncio.create_task(self._work(lane)) for lane in lanes]
+        acker = asyncio.create_task(self._ack_periodically())
+        try:
+            while not self._stopping.is_set():
+                messages = await self.source.fetch(self.fetch_size)
+                if not messages:
+                    if stop_when_idle:
+                        break
+                    try:
+                        await asyncio.wait_for(self._stopping.wait(), self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                self.stats.received += len(messages)
+                for message in messages:
+                    await lanes[self._lane(message)].put(message)
+        finally:
+            for lane in lanes:
+                await lane.put(None)
+            await asyncio.gather(*workers)
+            acker.cancel()
+            await self._flush_acks()
+        return self.stats
+
+    async def _work(self, lane: asyncio.Queue) -> None:
+        while True:
+            message = await lane.get()
+            if message is None:
+                return
+            if not await self._handle(message):
+                continue
+            self._pending_acks.append(message)
+            if len(self._pending_acks) >= self.ack_batch_size:
+                await self._flush_acks()
+
+    async def _handle(self, message: OrderMessage) -> bool:
+        """
+        Processes one order. Returns True when the outcome is final (emitted,
+        rejected or invalid) and the message can be acknowledged.
+        """
+        try:
+            nota = OrderMapper.to_entity(message.payload)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning("pedido %s inválido: %s", message.pedido_id, e)
+            self.stats.invalid += 1
+            return True
+
+        backoff = self.retry_backoff
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self.use_case_factory() as use_case:
+                    if nota.status is StatusNota.EM_PROCESSAMENTO:
+                        nota = await use_case.execute(nota)
+                    else:
+                        # A SEFAZ já respondeu numa tentativa anterior e só a
+                        # gravação falhou: emitir de novo duplicaria a NF-e
+                        await use_case.persist(nota)
+            except DomainException as e:
+                logger.warning("pedido %s rejeitado: %s", message.pedido_id, e)
+                self.stats.rejected += 1
+                return True
+            except Exception:
+                if attempt == self.max_retries:
+                    logger.exception("pedido %s falhou após %d tentativas; não confirmado", message.pedido_id, attempt + 1)
+                    self.stats.failed += 1
+                    return False
+                await asyncio.sleep(backoff)
+                backoff *= 2
+            else:
+                if nota.status is StatusNota.AUTORIZADA:
+                    self.stats.emitted += 1
+                else:
+                    self.stats.rejected += 1
+                return True
+
+    async def _ack_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.ack_interval)
+            await self._flush_acks()
+
+    async def _flush_acks(self) -> None:
+        async with self._ack_lock:
+            if not self._pending_acks:
+                return
+            batch, self._pending_acks = self._pending_acks, []
+            await self.source.ack(batch)
+            self.stats.acked += len(batch)
+
+
+async def _backfill(args: argparse.Namespace) -> ConsumerStats:
+    from app.config.settings import Settings
+    from app.container import Container
+
+    # Mesmos Settings e recursos da API; a fila de emissão fica com a API
+    container = Container(replace(Settings.from_env(), emission_workers=0))
+    await container.start()
+    source = JsonLinesOrderSource(args.path, args.offset_file)
+    consumer = OrderEventConsumer(
+        source,
+        sqlalchemy_use_case_factory(
+            container.session_factory,
+            lambda: container.emissao_adapter,
+            container.event_publisher,
+            container.calculadora,
+        ),
+        workers=args.workers,
+    )
+    try:
+        return await consumer.run(stop_when_idle=not args.follow)
+    finally:
+        await source.close()
+        await container.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Emite NF-e a partir de eventos de pedido pago (JSON-lines).")
+    parser.add_argument("path")
+    parser.add_argument("--offset-file", default=None)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--follow", action="store_true", help="continua lendo o arquivo em vez de parar no fim")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    stats = asyncio.run(_backfill(args))
+    print(stats.snapshot())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+# infrastructure/messaging/event_publisher.py
+"""
+Micro-batching publisher for domain events.
+`publish` only appends to a bounded in-memory queue; a background thread
+drains it and hands the transport one batch whenever `max_batch_size`
+events are buffered or `flush_interval` seconds have passed since the
+first buffered event, whichever comes first.
+"""
+import asyncio
+import logging
+import queue
+import threading
+import time
+from typing import List, Optional
+
+from core.events.domain_events import DomainEvent
+from core.services.ports.event_publisher_port import EventPublisherPort
+from infrastructure.messaging.transports import EventTransport
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_DROP_NEWEST = "drop_newest"
+OVERFLOW_BLOCK = "block"
+
+
+class MicroBatchEventPublisher(EventPublisherPort):
+    """
+    Args:
+        transport (EventTransport): destination of each batch.
+        max_batch_size (int): flush as soon as this many events are buffered.
+        flush_interval (float): maximum seconds an event waits in the buffer.
+        max_queue_size (int): bound of the in-memory queue.
+        overflow (str): what `publish` does with a full queue:
+            "drop_oldest" discards the oldest queued event, "drop_newest"
+            discards the new one, "block" waits up to `block_timeout` seconds
+            and then discards it. Only "block" can delay the caller, and
+            never on an event-loop thread: there the wait runs in the loop's
+            executor and `publish` returns right away.
+        max_retries (int): extra attempts for a batch the transport rejected.
+        retry_backoff (float): seconds before the first retry, doubled each time.
+    """
+    def __init__(
+        self,
+        transport: EventTransport,
+        max_batch_size: int = 100,
+        flush_interval: float = 0.05,
+        max_queue_size: int = 10_000,
+        overflow: str = OVERFLOW_DROP_OLDEST,
+        block_timeout: float = 0.1,
+        max_retries: int = 3,
+        retry_backoff: float = 0.1,
+    ):
+        if overflow not in (OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST, OVERFLOW_BLOCK):
+            raise ValueError(f"Política de overflow inválida: {overflow}")
+        self.transport = transport
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._queue: "queue.Queue[Optional[DomainEvent]]" = queue.Queue(maxsize=max_queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._counter_lock = threading.Lock()
+        self.published = 0
+        self.dropped = 0
+        self.delivered = 0
+        self.failed = 0
+        self.batches = 0
+
+    # Producer side
+
+    def publish(self, event: DomainEvent) -> bool:
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            if self.overflow == OVERFLOW_BLOCK:
+                return self._put_waiting(event)
+            if self.overflow != OVERFLOW_DROP_OLDEST or not self._replace_oldest(event):
+                self._count(dropped=1)
+                return False
+        self._count(published=1)
+        return True
+
+    def _put_waiting(self, event: DomainEvent) -> bool:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return self._put_blocking(event)
+        # Bloquear aqui pararia o event loop inteiro por até block_timeout
+        loop.run_in_executor(None, self._put_blocking, event)
+        return True
+
+    def _put_blocking(self, event: DomainEvent) -> bool:
+        try:
+            self._queue.put(event, timeout=self.block_timeout)
+        except queue.Full:
+            self._count(dropped=1)
+            return False
+        self._count(published=1)
+        return True
+
+    def _replace_oldest(self, event: DomainEvent) -> bool:
+        try:
+            self._queue.get_nowait()
+            self._queue.task_done()
+        except queue.Empty:
+            pass
+        else:
+            self._count(dropped=1)
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            return False
+        return True
+
+    # Lifecycle
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="event-publisher", daemon=True)
+        self._thread.start()
+
+    def flush(self) -> None:
+        """
+        Blocks until every event published so far was handed to the transport.
+        """
+        if self._thread is None:
+            raise RuntimeError("Publisher não foi iniciado")
+        self._queue.join()
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        """
+        Sends what is still buffered, stops the thread and closes the transport.
+        """
+        if self._thread is None:
+            return
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self._put_sentinel(timeout)
+        self._thread.join(None if deadline is None else max(deadline - time.monotonic(), 0))
+        self._thread = None
+        self.transport.close()
+
+    def _put_sentinel(self, timeout: Optional[float]) -> None:
+        # A fila pode estar cheia: espera no máximo `timeout` pelo consumidor e
+        # depois descarta o evento mais antigo para abrir espaço
+        try:
+            self._queue.put(None, timeout=timeout)
+            return
+        except queue.Full:
+            pass
+        while True:
+            try:
+                self._queue.get_nowait()
+                self._queue.task_done()
+            except queue.Empty:
+                pass
+            else:
+                self._count(dropped=1)
+            try:
+                self._queue.put_nowait(None)
+                return
+            except queue.Full:
+                continue
+
+    # Consumer side
+
+    def _run(self) -> None:
+        running = True
+        while running:
+            first = self._queue.get()
+            if first is None:
+                self._queue.task_done()
+                break
+            batch: List[DomainEvent] = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    event = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if event is None:
+                    self._queue.task_done()
+                    running = False
+                    break
+                batch.append(event)
+            self._send(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _send(self, batch: List[DomainEvent]) -> None:
+        backoff = self.retry_backoff
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.transport.send_batch(batch)
+            except Exception:
+                if attempt == self.max_retries:
+                    logger.exception("dropping batch of %d events after %d attempts", len(batch), attempt + 1)
+                    self._count(failed=len(batch))
+                    return
+                time.sleep(backoff)
+                backoff *= 2
+            else:
+                self._count(delivered=len(batch), batches=1)
+                return
+
+    def _count(self, published=0, dropped=0, delivered=0, failed=0, batches=0) -> None:
+        with self._counter_lock:
+            self.published += published
+            self.dropped += dropped
+            self.delivered += delivered
+            self.failed += failed
+            self.batches += batches
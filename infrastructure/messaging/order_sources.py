@@ -0,0 +1,140 @@
+# infrastructure/messaging/order_sources.py
+"""
+Sources of "order paid" events for the event consumer.
+Delivery is at-least-once: a message is only gone for good after it was
+acknowledged, so a restart redelivers whatever was in flight.
+"""
+import asyncio
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Set
+
+
+class OrderMessage(NamedTuple):
+    pedido_id: str
+    emitente_cnpj: str
+    payload: Dict[str, Any]
+    # Posição na fonte, usada no ack
+    offset: int
+
+
+class OrderEventSource(ABC):
+    @abstractmethod
+    async def fetch(self, max_messages: int) -> List[OrderMessage]:
+        """
+        Returns up to `max_messages` new messages, or an empty list when
+        nothing is available right now.
+        """
+        pass
+
+    @abstractmethod
+    async def ack(self, messages: Sequence[OrderMessage]) -> None:
+        """
+        Marks messages as processed, in any order.
+        """
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+def _to_message(data: Dict[str, Any], offset: int) -> OrderMessage:
+    return OrderMessage(
+        pedido_id=str(data.get("pedido_id", offset)),
+        emitente_cnpj=str(data.get("emitente_cnpj", "")),
+        payload=data,
+        offset=offset,
+    )
+
+
+class InMemoryOrderSource(OrderEventSource):
+    """
+    In-process stand-in for a broker queue.
+    """
+    def __init__(self):
+        self._pending: asyncio.Queue = asyncio.Queue()
+        self._next_offset = 0
+        self.acked: Set[int] = set()
+
+    def put(self, data: Dict[str, Any]) -> OrderMessage:
+        message = _to_message(data, self._next_offset)
+        self._next_offset += 1
+        self._pending.put_nowait(message)
+        return message
+
+    async def fetch(self, max_messages: int) -> List[OrderMessage]:
+        messages = []
+        while len(messages) < max_messages and not self._pending.empty():
+            messages.append(self._pending.get_nowait())
+        return messages
+
+    async def ack(self, messages: Sequence[OrderMessage]) -> None:
+        self.acked.update(m.offset for m in messages)
+
+
+class JsonLinesOrderSource(OrderEventSource):
+    """
+    Reads one order per line from a JSON-lines file.
+
+    The committed position (every line before it is acknowledged) is kept in
+    `offset_path` and rewritten atomically on each ack call, so a restart
+    resumes after the last contiguous acknowledged line. Lines that are
+    not valid JSON are handed out with an empty payload so the consumer
+    counts and acknowledges them instead of stalling on them.
+    """
+    def __init__(self, path: str, offset_path: Optional[str] = None):
+        self.path = path
+        self.offset_path = offset_path or f"{path}.offset"
+        self.committed = self._read_committed()
+        self._file = open(path, "r", encoding="utf-8")
+        self._line = 0
+        self._acked: Set[int] = set()
+
+    def _read_committed(self) -> int:
+        try:
+            with open(self.offset_path, "r", encoding="utf-8") as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def _read_lines(self, max_messages: int) -> List[OrderMessage]:
+        messages = []
+        while len(messages) < max_messages:
+            raw = self._file.readline()
+            if not raw:
+                break
+            offset = self._line
+            self._line += 1
+            if offset < self.committed or not raw.strip():
+                if offset >= self.committed:
+                    self._acked.add(offset)
+                continue
+            try:
+                data = json.loads(raw)
+            except ValueError:
+                data = {}
+            messages.append(_to_message(data, offset))
+        return messages
+
+    async def fetch(self, max_messages: int) -> List[OrderMessage]:
+        return await asyncio.to_thread(self._read_lines, max_messages)
+
+    async def ack(self, messages: Sequence[OrderMessage]) -> None:
+        self._acked.update(m.offset for m in messages)
+        committed = self.committed
+        while committed in self._acked:
+            self._acked.discard(committed)
+            committed += 1
+        if committed != self.committed:
+            self.committed = committed
+            await asyncio.to_thread(self._write_committed, committed)
+
+    def _write_committed(self, committed: int) -> None:
+        tmp = f"{self.offset_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(str(committed))
+        os.replace(tmp, self.offset_path)
+
+    async def close(self) -> None:
+        self._file.close()
@@ -0,0 +1,73 @@
+# infrastructure/messaging/transports.py
+"""
+Transports used by the event publisher to reach the broker.
+Until a real broker is wired, a JSON-lines file or an in-process fan-out
+stands in for it.
+"""
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, List, Sequence
+
+from core.events.domain_events import DomainEvent
+
+
+class EventTransport(ABC):
+    @abstractmethod
+    def send_batch(self, events: Sequence[DomainEvent]) -> None:
+        """
+        Delivers a batch in one broker round trip. Raising means the whole
+        batch failed and may be retried.
+        """
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class InProcessTransport(EventTransport):
+    """
+    Fans each batch out to the subscribed handlers in the publisher thread.
+    Nothing is retained when there are no subscribers.
+    """
+    def __init__(self):
+        self._handlers: List[Callable[[Sequence[DomainEvent]], None]] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, handler: Callable[[Sequence[DomainEvent]], None]) -> None:
+        with self._lock:
+            self._handlers.append(handler)
+
+    def send_batch(self, events: Sequence[DomainEvent]) -> None:
+        with self._lock:
+            handlers = list(self._handlers)
+        for handler in handlers:
+            handler(events)
+
+
+class JsonLinesFileTransport(EventTransport):
+    """
+    Appends one JSON object per event to `path`, with a single write and
+    flush per batch. `fsync=True` also forces the batch to disk.
+    """
+    def __init__(self, path: str, fsync: bool = False):
+        self.path = path
+        self.fsync = fsync
+        self._file = None
+
+    def send_batch(self, events: Sequence[DomainEvent]) -> None:
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        payload = "".join(
+            json.dumps(event.to_dict(), ensure_ascii=False) + "\n" for event in events
+        )
+        self._file.write(payload)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
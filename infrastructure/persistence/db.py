@@ -1,8 +1,10 @@
 # infrastructure/persistence/db.py
 """
-Database configuration and session factory using SQLAlchemy.
+Database configuration and the sync session factory using SQLAlchemy.
+The async engine is built by app.container.Container from Settings.
 """
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 import os
 # no topo de infrastructure/persistence/db.py
@@ -25,3 +27,13 @@ SessionLocal = sessionmaker(
     autoflush=False,
     bind=engine
 )
+
+# Async driver per backend: psycopg 3 serves both modes, SQLite needs aiosqlite
+_ASYNC_DRIVERS = {"postgresql": "psycopg", "sqlite": "aiosqlite"}
+
+
+def to_async_url(url: str) -> str:
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    driver = _ASYNC_DRIVERS.get(backend, parsed.get_driver_name())
+    return parsed.set(drivername=f"{backend}+{driver}").render_as_string(hide_password=False)
@@ -0,0 +1,114 @@
+# infrastructure/workers/emission_worker.py
+"""
+Pool of asyncio workers that drain the emissao_job table.
+Each worker claims a small batch, processes it on its own AsyncSession and
+sleeps `poll_interval` seconds when the queue is empty. Any number of
+application instances can run pools against the same database.
+"""
+import asyncio
+import logging
+import os
+import socket
+from typing import Callable, List, Optional
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from application.use_cases.process_emission_job import ProcessEmissionJobUseCase
+from core.services.calculadora_impostos import CalculadoraImpostos
+from core.services.ports.emissao_nota_port import AsyncEmissaoNotaPort
+from core.services.ports.event_publisher_port import EventPublisherPort
+from infrastructure.adapters.fila_emissao_sqlalchemy import FilaEmissaoSqlAlchemyAdapter
+from infrastructure.adapters.nota_fiscal_sqlalchemy_async import NotaFiscalAsyncSqlAlchemyAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class EmissionWorkerPool:
+    """
+    Args:
+        session_factory (async_sessionmaker): source of one session per batch.
+        emissor_factory (Callable[[], AsyncEmissaoNotaPort]): builds the emission adapter.
+        workers (int): number of concurrent worker loops.
+        batch_size (int): jobs claimed per round trip.
+        poll_interval (float): seconds to sleep when no job is available.
+        lock_timeout (float): seconds after which a claimed job is considered abandoned.
+        max_tentativas (int): attempts before a job is marked FALHOU.
+        publisher (EventPublisherPort): receives NotaEmitida for authorized notes.
+        calculadora (CalculadoraImpostos): tax engine applied before emission.
+    """
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        emissor_factory: Callable[[], AsyncEmissaoNotaPort],
+        workers: int = 4,
+        batch_size: int = 10,
+        poll_interval: float = 1.0,
+        lock_timeout: float = 300.0,
+        max_tentativas: int = 5,
+        publisher: Optional[EventPublisherPort] = None,
+        calculadora: Optional[CalculadoraImpostos] = None,
+    ):
+        self.session_factory = session_factory
+        self.emissor_factory = emissor_factory
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lock_timeout = lock_timeout
+        self.max_tentativas = max_tentativas
+        self.publisher = publisher
+        self.calculadora = calculadora
+        self._prefix = f"{socket.gethostname()}-{os.getpid()}"
+        self._tasks: List[asyncio.Task] = []
+        self._stopping: Optional[asyncio.Event] = None
+
+    async def run_once(self, worker_id: str) -> int:
+        """
+        Claims and processes one batch. Returns how many jobs were handled.
+        """
+        async with self.session_factory() as session:
+            fila = FilaEmissaoSqlAlchemyAdapter(session)
+            jobs = await fila.claim(worker_id, self.batch_size, self.lock_timeout)
+            use_case = ProcessEmissionJobUseCase(
+                self.emissor_factory(),
+                NotaFiscalAsyncSqlAlchemyAdapter(session),
+                fila,
+                max_tentativas=self.max_tentativas,
+                publisher=self.publisher,
+                calculadora=self.calculadora,
+            )
+            for job in jobs:
+                await use_case.execute(job)
+            return len(jobs)
+
+    async def _loop(self, worker_id: str) -> None:
+        while not self._stopping.is_set():
+            try:
+                processed = await self.run_once(worker_id)
+            except Exception:
+                logger.exception("emission worker %s failed", worker_id)
+                processed = 0
+            if processed:
+                continue
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._stopping = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._loop(f"{self._prefix}-{i}"))
+            for i in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        """
+        Lets in-flight batches finish and stops every worker loop.
+        """
+        if not self._tasks:
+            return
+        self._stopping.set()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
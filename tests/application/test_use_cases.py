@@ -1,20 +1,26 @@
+import asyncio
+import time
+from datetime import datetime
+
 import pytest
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 
-from application.use_cases.cancel_invoice import CancelInvoiceUseCase
-from application.use_cases.correct_invoice import CorrectionInvoiceUseCase
-from application.use_cases.emit_invoice import EmitInvoiceUseCase
+from application.use_cases.cancel_invoice import AsyncCancelInvoiceUseCase, CancelInvoiceUseCase
+from application.use_cases.correct_invoice import AsyncCorrectionInvoiceUseCase, CorrectionInvoiceUseCase
+from application.use_cases.emit_invoice import AsyncEmitInvoiceUseCase, EmitInvoiceUseCase
 from core.entities.nota_fiscal import NotaFiscal
 from core.enum.status_nota import StatusNota
+from core.events.domain_events import CCeRegistrada, NotaCancelada, NotaEmitida
 from core.exceptions.domain_exceptions import DomainException, NotaNaoEncontradaException
+from core.services.ports.nota_fiscal_repository_port import VersaoNota
 from core.value_objects.cnpjcpf import CnpjCpf
 from core.value_objects.endereço import Endereco
 
 
 def _make_nota(chave: str = None, status: StatusNota = StatusNota.AUTORIZADA) -> NotaFiscal:
     nota = NotaFiscal(
-        emitente_cnpj=CnpjCpf("12345678000199"),
-        destinatario_cnpj=CnpjCpf("98765432000100"),
+        emitente_cnpj=CnpjCpf("12345678000195"),
+        destinatario_cnpj=CnpjCpf("98765432000198"),
         emitente_endereco=Endereco("Av. X", "1", "SP", "SP", "01001000"),
         destinatario_endereco=Endereco("Rua Y", "2", "RJ", "RJ", "20020000"),
     )
@@ -61,6 +67,85 @@ class TestEmitInvoiceUseCase:
 
         repo.save.assert_called_once_with(emitted)
 
+    def test_computes_taxes_before_emitting(self):
+        nota = _make_nota()
+        calculadora = MagicMock()
+        emissor = MagicMock()
+        emissor.emitir.side_effect = lambda n: calculadora.calcular.assert_called_once_with(n) or n
+
+        EmitInvoiceUseCase(emissor, MagicMock(), calculadora=calculadora).execute(nota)
+
+        emissor.emitir.assert_called_once_with(nota)
+
+    def test_default_calculator_fills_impostos_totais(self):
+        nota = _make_nota()
+        emissor = MagicMock()
+        emissor.emitir.side_effect = lambda n: n
+
+        result = EmitInvoiceUseCase(emissor, MagicMock()).execute(nota)
+
+        assert result.impostos_totais is not None
+
+
+class TestEmitInvoiceUseCaseBatch:
+    def test_emits_each_nota_and_saves_all_at_once(self):
+        notas = [_make_nota(chave=str(i) * 44) for i in range(3)]
+        emissor = MagicMock()
+        emissor.emitir.side_effect = lambda n: n
+        repo = MagicMock()
+
+        results = EmitInvoiceUseCase(emissor, repo).execute_batch(notas)
+
+        assert emissor.emitir.call_count == 3
+        repo.save_many.assert_called_once_with(notas)
+        repo.save.assert_not_called()
+        assert [r.nota for r in results] == notas
+
+    def test_domain_error_on_one_nota_is_reported_and_others_are_saved(self):
+        notas = [_make_nota(chave=str(i) * 44) for i in range(3)]
+
+        def emitir(nota):
+            if nota is notas[1]:
+                raise DomainException("rejeitada")
+            return nota
+
+        emissor = MagicMock()
+        emissor.emitir.side_effect = emitir
+        repo = MagicMock()
+
+        results = EmitInvoiceUseCase(emissor, repo).execute_batch(notas)
+
+        assert results[1].nota is None
+        assert results[1].erro == "rejeitada"
+        repo.save_many.assert_called_once_with([notas[0], notas[2]])
+
+    def test_bulk_write_failure_saves_each_nota(self):
+        notas = [_make_nota(chave=str(i) * 44) for i in range(3)]
+        emissor = MagicMock()
+        emissor.emitir.side_effect = lambda n: n
+        repo = MagicMock()
+        repo.save_many.side_effect = ValueError("chave duplicada")
+
+        def save(nota):
+            if nota is notas[0]:
+                raise ValueError("chave duplicada")
+
+        repo.save.side_effect = save
+
+        results = EmitInvoiceUseCase(emissor, repo).execute_batch(notas)
+
+        assert [r.nota for r in results] == [None, notas[1], notas[2]]
+        assert repo.save.call_count == 3
+
+    def test_does_not_touch_repo_when_nothing_was_emitted(self):
+        emissor = MagicMock()
+        emissor.emitir.side_effect = DomainException("falhou")
+        repo = MagicMock()
+
+        EmitInvoiceUseCase(emissor, repo).execute_batch([_make_nota()])
+
+        repo.save_many.assert_not_called()
+
 
 class TestCancelInvoiceUseCase:
     def test_cancels_nota_and_updates_status(self):
@@ -78,7 +163,8 @@ class TestCancelInvoiceUseCase:
 
         repo.get_by_chave.assert_called_once_with(chave)
         cancel_port.cancelar.assert_called_once_with(chave)
-        repo.save.assert_called_once_with(nota)
+        repo.update_status.assert_called_once_with(chave, StatusNota.CANCELADA, "123456789")
+        repo.save.assert_not_called()
         assert result.status == StatusNota.CANCELADA
 
     def test_updates_protocolo_on_original_nota(self):
@@ -114,6 +200,26 @@ class TestCancelInvoiceUseCase:
 
         cancel_port.cancelar.assert_not_called()
 
+    def test_returns_version_from_narrow_update(self):
+        chave = "E" * 44
+        cancel_port = MagicMock()
+        cancel_port.cancelar.return_value = _make_nota(chave=chave, status=StatusNota.CANCELADA)
+        repo = MagicMock()
+        repo.get_by_chave.return_value = _make_nota(chave=chave)
+        repo.update_status.return_value = VersaoNota(repo.get_by_chave.return_value.id, 7, datetime(2025, 1, 1))
+
+        assert CancelInvoiceUseCase(cancel_port, repo).execute(chave).versao == 7
+
+    def test_raises_when_nota_disappears_before_update(self):
+        cancel_port = MagicMock()
+        cancel_port.cancelar.return_value = _make_nota(status=StatusNota.CANCELADA)
+        repo = MagicMock()
+        repo.get_by_chave.return_value = _make_nota()
+        repo.update_status.return_value = None
+
+        with pytest.raises(NotaNaoEncontradaException):
+            CancelInvoiceUseCase(cancel_port, repo).execute("A" * 44)
+
 
 class TestCorrectionInvoiceUseCase:
     def test_corrects_autorizada_nota_and_saves(self):
@@ -130,7 +236,8 @@ class TestCorrectionInvoiceUseCase:
         result = CorrectionInvoiceUseCase(correction_port, repo).execute(chave, "Texto correcao")
 
         correction_port.corrigir.assert_called_once_with(chave, "Texto correcao")
-        repo.save.assert_called_once_with(nota)
+        repo.record_event.assert_called_once_with(chave, "CCE-001")
+        repo.save.assert_not_called()
         assert result.protocolo_cce == "CCE-001"
 
     def test_raises_when_nota_not_found(self):
@@ -161,3 +268,174 @@ class TestCorrectionInvoiceUseCase:
             CorrectionInvoiceUseCase(correction_port, repo).execute("0" * 44, "Texto")
 
         correction_port.corrigir.assert_not_called()
+
+
+class TestAsyncUseCases:
+    def test_async_emit_awaits_emissor_and_repo(self):
+        nota = _make_nota()
+        emissor = AsyncMock()
+        emissor.emitir.return_value = nota
+        repo = AsyncMock()
+
+        result = asyncio.run(AsyncEmitInvoiceUseCase(emissor, repo).execute(nota))
+
+        emissor.emitir.assert_awaited_once_with(nota)
+        repo.save.assert_awaited_once_with(nota)
+        assert result is nota
+
+    def test_async_batch_overlaps_sefaz_latency(self):
+        notas = [_make_nota(chave=str(i % 10) * 44) for i in range(20)]
+
+        class SlowEmissor:
+            async def emitir(self, nota):
+                await asyncio.sleep(0.05)
+                return nota
+
+        repo = AsyncMock()
+        use_case = AsyncEmitInvoiceUseCase(SlowEmissor(), repo, batch_concurrency=20)
+
+        start = time.perf_counter()
+        results = asyncio.run(use_case.execute_batch(notas))
+        elapsed = time.perf_counter() - start
+
+        # 20 sequential calls would take 1s
+        assert elapsed < 0.5
+        assert [r.nota for r in results] == notas
+        repo.save_many.assert_awaited_once_with(notas)
+
+    def test_async_batch_reports_transport_error_per_nota(self):
+        notas = [_make_nota(chave=str(i) * 44) for i in range(3)]
+
+        async def emitir(nota):
+            if nota is notas[1]:
+                raise ConnectionError("SEFAZ respondeu 503")
+            return nota
+
+        emissor = AsyncMock()
+        emissor.emitir.side_effect = emitir
+        repo = AsyncMock()
+
+        results = asyncio.run(AsyncEmitInvoiceUseCase(emissor, repo).execute_batch(notas))
+
+        assert results[1].nota is None and "503" in results[1].erro
+        repo.save_many.assert_awaited_once_with([notas[0], notas[2]])
+
+    def test_async_batch_falls_back_to_per_nota_saves(self):
+        notas = [_make_nota(chave=str(i) * 44) for i in range(3)]
+        emissor = AsyncMock()
+        emissor.emitir.side_effect = lambda n: n
+        repo = AsyncMock()
+        repo.save_many.side_effect = ValueError("chave duplicada")
+
+        async def save(nota):
+            if nota is notas[2]:
+                raise ValueError("chave duplicada")
+
+        repo.save.side_effect = save
+        publisher = MagicMock()
+
+        results = asyncio.run(
+            AsyncEmitInvoiceUseCase(emissor, repo, publisher=publisher).execute_batch(notas)
+        )
+
+        assert [r.nota for r in results] == [notas[0], notas[1], None]
+        assert notas[2].chave_acesso in results[2].erro
+        assert repo.save.await_count == 3
+        assert publisher.publish.call_count == 2
+
+    def test_async_cancel_raises_when_nota_not_found(self):
+        repo = AsyncMock()
+        repo.get_by_chave.return_value = None
+
+        with pytest.raises(NotaNaoEncontradaException):
+            asyncio.run(AsyncCancelInvoiceUseCase(AsyncMock(), repo).execute("0" * 44))
+
+    def test_async_cancel_updates_status(self):
+        chave = "E" * 44
+        nota = _make_nota(chave=chave)
+        cancel_result = _make_nota(chave=chave, status=StatusNota.CANCELADA)
+        cancel_port = AsyncMock()
+        cancel_port.cancelar.return_value = cancel_result
+        repo = AsyncMock()
+        repo.get_by_chave.return_value = nota
+
+        result = asyncio.run(AsyncCancelInvoiceUseCase(cancel_port, repo).execute(chave))
+
+        assert result.status == StatusNota.CANCELADA
+        repo.update_status.assert_awaited_once_with(chave, StatusNota.CANCELADA, None)
+        repo.save.assert_not_awaited()
+
+    def test_async_correction_rejects_non_autorizada(self):
+        nota = _make_nota(status=StatusNota.CANCELADA)
+        correction_port = AsyncMock()
+        repo = AsyncMock()
+        repo.get_by_chave.return_value = nota
+
+        with pytest.raises(DomainException):
+            asyncio.run(AsyncCorrectionInvoiceUseCase(correction_port, repo).execute(nota.chave_acesso, "Texto"))
+
+        correction_port.corrigir.assert_not_awaited()
+
+
+class TestDomainEventPublishing:
+    def test_emit_publishes_nota_emitida_after_save(self):
+        nota = _make_nota()
+        emissor = MagicMock()
+        emissor.emitir.return_value = nota
+        publisher = MagicMock()
+
+        EmitInvoiceUseCase(emissor, MagicMock(), publisher=publisher).execute(nota)
+
+        [event] = [c.args[0] for c in publisher.publish.call_args_list]
+        assert isinstance(event, NotaEmitida)
+        assert event.nota_id == nota.id
+
+    def test_rejected_emission_publishes_nothing(self):
+        nota = _make_nota(status=StatusNota.REJEITADA)
+        emissor = AsyncMock()
+        emissor.emitir.return_value = nota
+        publisher = MagicMock()
+
+        asyncio.run(AsyncEmitInvoiceUseCase(emissor, AsyncMock(), publisher=publisher).execute(nota))
+
+        publisher.publish.assert_not_called()
+
+    def test_batch_publishes_one_event_per_authorized_nota(self):
+        notas = [_make_nota(chave=str(i) * 44) for i in range(3)]
+        emissor = MagicMock()
+        emissor.emitir.side_effect = lambda n: n
+        publisher = MagicMock()
+
+        EmitInvoiceUseCase(emissor, MagicMock(), publisher=publisher).execute_batch(notas)
+
+        assert publisher.publish.call_count == 3
+
+    def test_cancel_publishes_nota_cancelada(self):
+        chave = "E" * 44
+        nota = _make_nota(chave=chave)
+        cancel_port = AsyncMock()
+        cancel_port.cancelar.return_value = _make_nota(chave=chave, status=StatusNota.CANCELADA)
+        repo = AsyncMock()
+        repo.get_by_chave.return_value = nota
+        publisher = MagicMock()
+
+        asyncio.run(AsyncCancelInvoiceUseCase(cancel_port, repo, publisher=publisher).execute(chave))
+
+        assert isinstance(publisher.publish.call_args.args[0], NotaCancelada)
+
+    def test_correction_publishes_cce_registrada(self):
+        chave = "G" * 44
+        correction_result = MagicMock()
+        correction_result.protocol_number = "CCE-001"
+        correction_port = MagicMock()
+        correction_port.corrigir.return_value = correction_result
+        repo = MagicMock()
+        repo.get_by_chave.return_value = _make_nota(chave=chave)
+        publisher = MagicMock()
+
+        CorrectionInvoiceUseCase(correction_port, repo, publisher=publisher).execute(chave, "Texto correcao")
+
+        event = publisher.publish.call_args.args[0]
+        assert isinstance(event, CCeRegistrada)
+        assert event.protocolo_cce == "CCE-001"
+        assert event.texto_correcao == "Texto correcao"
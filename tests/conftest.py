@@ -2,8 +2,11 @@ import os
 
 os.environ.setdefault("DATABASE_URL", "sqlite://")
 
+from contextlib import asynccontextmanager
 from unittest.mock import MagicMock, patch
+from datetime import datetime
 from typing import Dict, List, Optional
+from uuid import UUID
 
 import pytest
 from fastapi.testclient import TestClient
@@ -13,20 +16,38 @@ _patcher.start()
 
 from app.main import app  # noqa: E402
 from app.interfaces.controllers.invoice_controller import (  # noqa: E402
+    get_accept_use_case,
     get_cancel_use_case,
     get_correction_use_case,
     get_emit_use_case,
+    get_fila_emissao,
+    get_idempotencia,
     get_repository,
+    get_stream_repository,
 )
-from application.use_cases.cancel_invoice import CancelInvoiceUseCase  # noqa: E402
-from application.use_cases.correct_invoice import CorrectionInvoiceUseCase  # noqa: E402
-from application.use_cases.emit_invoice import EmitInvoiceUseCase  # noqa: E402
+from application.use_cases.accept_invoice import AcceptInvoiceUseCase  # noqa: E402
+from application.use_cases.cancel_invoice import AsyncCancelInvoiceUseCase  # noqa: E402
+from application.use_cases.correct_invoice import AsyncCorrectionInvoiceUseCase  # noqa: E402
+from application.use_cases.emit_invoice import AsyncEmitInvoiceUseCase  # noqa: E402
 from core.entities.nota_fiscal import NotaFiscal  # noqa: E402
-from core.services.ports.nota_fiscal_repository_port import NotaFiscalRepository  # noqa: E402
-from infrastructure.adapters.cancelamento_nota_adapter import NotaFiscalCancelamentoAdapter  # noqa: E402
-from infrastructure.adapters.carta_correcao_nota_adapter import NotaFiscalCorreccaoAdapter  # noqa: E402
-from infrastructure.adapters.emissao_nota_adapter import NotaFiscalEmissaoAdapter  # noqa: E402
-from infrastructure.external_services.sefaz_client import SefazClient  # noqa: E402
+from core.enum.item_loading import ItemLoading  # noqa: E402
+from core.enum.status_emissao_job import StatusEmissaoJob  # noqa: E402
+from core.services.ports.fila_emissao_port import EmissaoJob, FilaEmissaoPort  # noqa: E402
+from core.services.ports.idempotencia_port import (  # noqa: E402
+    IdempotenciaPort,
+    RegistroIdempotencia,
+    RespostaIdempotente,
+)
+from core.services.ports.nota_fiscal_repository_port import (  # noqa: E402
+    AsyncNotaFiscalRepository,
+    KeysetCursor,
+    NotaFiscalRepository,
+)
+from infrastructure.adapters.cancelamento_nota_adapter import AsyncNotaFiscalCancelamentoAdapter  # noqa: E402
+from infrastructure.adapters.carta_correcao_nota_adapter import AsyncNotaFiscalCorreccaoAdapter  # noqa: E402
+from infrastructure.adapters.emissao_nota_adapter import AsyncNotaFiscalEmissaoAdapter  # noqa: E402
+from infrastructure.adapters.idempotencia import CoordenadorIdempotencia  # noqa: E402
+from infrastructure.external_services.async_sefaz_client import AsyncSefazStubClient  # noqa: E402
 from infrastructure.external_services.signer import Signer  # noqa: E402
 
 _patcher.stop()
@@ -34,17 +55,131 @@ _patcher.stop()
 
 class InMemoryRepository(NotaFiscalRepository):
     def __init__(self):
-        self._store: Dict[str, NotaFiscal] = {}
+        self._store: Dict[UUID, NotaFiscal] = {}
 
     def save(self, nota: NotaFiscal) -> None:
-        self._store[nota.chave_acesso] = nota
+        # Como o adapter SQLAlchemy: cada save() incrementa a versão
+        nota.versao += 1
+        self._store[nota.id] = nota
+
+    def get_by_chave(self, chave_acesso: str, loading: ItemLoading = ItemLoading.JOINED) -> Optional[NotaFiscal]:
+        return next((n for n in self._store.values() if n.chave_acesso == chave_acesso), None)
 
-    def get_by_chave(self, chave_acesso: str) -> Optional[NotaFiscal]:
-        return self._store.get(chave_acesso)
+    def get_by_id(self, nota_id: UUID) -> Optional[NotaFiscal]:
+        return self._store.get(nota_id)
 
-    def list_all(self) -> List[NotaFiscal]:
+    def list_all(self, loading: ItemLoading = ItemLoading.SELECTIN) -> List[NotaFiscal]:
         return list(self._store.values())
 
+    def list_page(
+        self,
+        limit: int,
+        after: Optional[KeysetCursor] = None,
+        loading: ItemLoading = ItemLoading.SELECTIN,
+    ) -> List[NotaFiscal]:
+        ordered = sorted(self._store.values(), key=lambda n: (n.data_emissao, n.id))
+        if after is not None:
+            ordered = [n for n in ordered if (n.data_emissao, n.id) > after]
+        return ordered[:limit]
+
+
+class AsyncInMemoryRepository(AsyncNotaFiscalRepository):
+    """Async view over an InMemoryRepository, so tests can inspect the same store."""
+
+    def __init__(self, store: InMemoryRepository):
+        self._sync = store
+
+    async def save(self, nota: NotaFiscal) -> None:
+        self._sync.save(nota)
+
+    async def get_by_chave(self, chave_acesso: str, loading: ItemLoading = ItemLoading.JOINED) -> Optional[NotaFiscal]:
+        return self._sync.get_by_chave(chave_acesso, loading)
+
+    async def get_by_id(self, nota_id: UUID, loading: ItemLoading = ItemLoading.JOINED) -> Optional[NotaFiscal]:
+        return self._sync.get_by_id(nota_id)
+
+    async def list_all(self, loading: ItemLoading = ItemLoading.SELECTIN) -> List[NotaFiscal]:
+        return self._sync.list_all(loading)
+
+    async def list_page(
+        self,
+        limit: int,
+        after: Optional[KeysetCursor] = None,
+        loading: ItemLoading = ItemLoading.SELECTIN,
+    ) -> List[NotaFiscal]:
+        return self._sync.list_page(limit, after, loading)
+
+
+class InMemoryFilaEmissao(FilaEmissaoPort):
+    def __init__(self, store: InMemoryRepository):
+        self._notas = store
+        self.jobs: Dict[int, EmissaoJob] = {}
+
+    async def enqueue(self, nota: NotaFiscal) -> EmissaoJob:
+        self._notas.save(nota)
+        job = EmissaoJob(len(self.jobs) + 1, nota.id, StatusEmissaoJob.PENDENTE, 0)
+        self.jobs[job.id] = job
+        return job
+
+    async def claim(self, worker_id: str, limit: int, lock_timeout: float) -> List[EmissaoJob]:
+        pendentes = [j for j in self.jobs.values() if j.status is StatusEmissaoJob.PENDENTE][:limit]
+        for job in pendentes:
+            self.jobs[job.id] = job._replace(status=StatusEmissaoJob.PROCESSANDO)
+        return [self.jobs[j.id] for j in pendentes]
+
+    async def complete(self, job_id: int, nota: Optional[NotaFiscal] = None) -> None:
+        if nota is not None:
+            self._notas.save(nota)
+        self.jobs[job_id] = self.jobs[job_id]._replace(status=StatusEmissaoJob.CONCLUIDO)
+
+    async def fail(self, job_id: int, erro: str, retry_at: Optional[datetime]) -> None:
+        job = self.jobs[job_id]
+        self.jobs[job_id] = job._replace(
+            status=StatusEmissaoJob.PENDENTE if retry_at else StatusEmissaoJob.FALHOU,
+            tentativas=job.tentativas + 1,
+            ultimo_erro=erro,
+        )
+
+    async def get_by_nota(self, nota_id: UUID) -> Optional[EmissaoJob]:
+        return next((j for j in self.jobs.values() if j.nota_id == nota_id), None)
+
+
+class InMemoryIdempotencia(IdempotenciaPort):
+    def __init__(self):
+        self.registros: Dict[str, RegistroIdempotencia] = {}
+        self.chamadas = 0
+
+    async def reservar(self, chave: str, fingerprint: str) -> Optional[RegistroIdempotencia]:
+        self.chamadas += 1
+        existente = self.registros.get(chave)
+        if existente is not None:
+            return existente
+        self.registros[chave] = RegistroIdempotencia(chave, fingerprint, datetime.utcnow())
+        return None
+
+    async def concluir(self, chave: str, resposta: RespostaIdempotente) -> None:
+        self.chamadas += 1
+        self.registros[chave] = self.registros[chave]._replace(resposta=resposta)
+
+    async def liberar(self, chave: str) -> None:
+        self.chamadas += 1
+        if chave in self.registros and self.registros[chave].resposta is None:
+            del self.registros[chave]
+
+    async def purgar(self, antes_de: datetime) -> int:
+        self.chamadas += 1
+        antigas = [chave for chave, registro in self.registros.items() if registro.criado_em < antes_de]
+        for chave in antigas:
+            del self.registros[chave]
+        return len(antigas)
+
+    def factory(self):
+        @asynccontextmanager
+        async def abrir():
+            yield self
+
+        return abrir
+
 
 @pytest.fixture
 def repo():
@@ -52,17 +187,38 @@ def repo():
 
 
 @pytest.fixture
-def client(repo):
-    app.dependency_overrides[get_emit_use_case] = lambda: EmitInvoiceUseCase(
-        NotaFiscalEmissaoAdapter(SefazClient(), Signer()), repo
+def async_repo(repo):
+    return AsyncInMemoryRepository(repo)
+
+
+@pytest.fixture
+def fila(repo):
+    return InMemoryFilaEmissao(repo)
+
+
+@pytest.fixture
+def idempotencia_store():
+    return InMemoryIdempotencia()
+
+
+@pytest.fixture
+def client(async_repo, fila, idempotencia_store):
+    sefaz = AsyncSefazStubClient()
+    app.dependency_overrides[get_emit_use_case] = lambda: AsyncEmitInvoiceUseCase(
+        AsyncNotaFiscalEmissaoAdapter(sefaz, Signer()), async_repo
     )
-    app.dependency_overrides[get_cancel_use_case] = lambda: CancelInvoiceUseCase(
-        NotaFiscalCancelamentoAdapter(SefazClient(), Signer()), repo
+    app.dependency_overrides[get_cancel_use_case] = lambda: AsyncCancelInvoiceUseCase(
+        AsyncNotaFiscalCancelamentoAdapter(sefaz, Signer()), async_repo
     )
-    app.dependency_overrides[get_correction_use_case] = lambda: CorrectionInvoiceUseCase(
-        NotaFiscalCorreccaoAdapter(SefazClient()), repo
+    app.dependency_overrides[get_correction_use_case] = lambda: AsyncCorrectionInvoiceUseCase(
+        AsyncNotaFiscalCorreccaoAdapter(sefaz), async_repo
     )
-    app.dependency_overrides[get_repository] = lambda: repo
+    app.dependency_overrides[get_accept_use_case] = lambda: AcceptInvoiceUseCase(fila)
+    app.dependency_overrides[get_fila_emissao] = lambda: fila
+    app.dependency_overrides[get_repository] = lambda: async_repo
+    app.dependency_overrides[get_stream_repository] = lambda: async_repo
+    idempotencia = CoordenadorIdempotencia(idempotencia_store.factory())
+    app.dependency_overrides[get_idempotencia] = lambda: idempotencia
 
     with TestClient(app) as c:
         yield c
@@ -73,8 +229,8 @@ def client(repo):
 @pytest.fixture
 def invoice_payload():
     return {
-        "emitente_cnpj": "12345678000199",
-        "destinatario_cnpj": "98765432000100",
+        "emitente_cnpj": "12345678000195",
+        "destinatario_cnpj": "98765432000198",
         "emitente_endereco": {
             "logradouro": "Av. Exemplo",
             "numero": "1000",
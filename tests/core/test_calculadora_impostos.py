@@ -0,0 +1,117 @@
+from decimal import Decimal
+
+import pytest
+
+from core.entities.nota_fiscal import ItemDaNota, NotaFiscal
+from core.services.calculadora_impostos import CalculadoraImpostos
+from core.services.ports.aliquotas_port import AliquotasPort
+from core.value_objects.aliquotas import Aliquotas
+from core.value_objects.cnpjcpf import CnpjCpf
+from core.value_objects.endereço import Endereco
+from core.value_objects.imposto import Imposto
+
+
+class TabelaAliquotas(AliquotasPort):
+    def __init__(self, regras):
+        self.regras = regras
+        self.consultas = []
+
+    def aliquotas_para(self, ncm, cfop, uf_origem, uf_destino):
+        self.consultas.append((ncm, cfop, uf_origem, uf_destino))
+        return self.regras.get(ncm)
+
+
+def _nota(itens, colunar=False):
+    nota = NotaFiscal(
+        CnpjCpf("12345678000195"),
+        CnpjCpf("98765432000198"),
+        Endereco("Rua X", "1", "Sao Paulo", "SP", "01001000"),
+        Endereco("Rua Y", "2", "Rio", "RJ", "20020000"),
+        itens_colunares=colunar,
+    )
+    for quantidade, valor_unitario, ncm, impostos in itens:
+        nota.adicionar_item(ItemDaNota("SKU1", "Produto", quantidade, valor_unitario, "6102", ncm, "102", impostos))
+    return nota
+
+
+SEM_IMPOSTO = Imposto(0.0, 0.0, 0.0, 0.0)
+
+
+class TestAliquotas:
+    def test_keeps_decimal_and_integer_scale(self):
+        a = Aliquotas(18, Decimal("6.5"), 1.65, "7.6")
+        assert a.icms == Decimal("18")
+        assert a.pis == Decimal("1.65")
+        assert a.escala == (180000, 65000, 16500, 76000)
+
+    @pytest.mark.parametrize("valor", [-1, 101, "1.23456"])
+    def test_rejects_invalid_rates(self, valor):
+        with pytest.raises(ValueError):
+            Aliquotas(valor, 0, 0, 0)
+
+
+class TestCalculadoraImpostos:
+    def test_without_rules_totals_declared_taxes_exactly(self):
+        nota = _nota([(1, 10.0, "12345678", Imposto(0.1, 0.2, 0.0, 0.0))] * 3)
+
+        totais = CalculadoraImpostos().calcular(nota)
+
+        assert totais == Imposto(0.3, 0.6, 0.0, 0.0)
+        assert nota.impostos_totais is totais
+        assert nota.itens[0].impostos == Imposto(0.1, 0.2, 0.0, 0.0)
+
+    @pytest.mark.parametrize("colunar", [False, True])
+    def test_declared_taxes_round_half_up_to_cents(self, colunar):
+        # round() levaria 0,125 a 0,12 (half-to-even) e 1,005 a 1,00 (float abaixo de 100,5)
+        nota = _nota([(1, 10.0, "12345678", Imposto(0.125, 0.135, 1.005, 0.0))], colunar=colunar)
+
+        assert CalculadoraImpostos().calcular(nota) == Imposto(0.13, 0.14, 1.01, 0.0)
+
+    def test_computes_item_taxes_from_rates_with_half_up_cents(self):
+        tabela = TabelaAliquotas({"12345678": Aliquotas(18, 10, "1.65", "7.6")})
+        nota = _nota([(3, 19.99, "12345678", SEM_IMPOSTO)])
+
+        totais = CalculadoraImpostos(tabela).calcular(nota)
+
+        # base 59,97: ICMS 10,7946 -> 10,79; IPI 5,997 -> 6,00; PIS 0,9895 -> 0,99; COFINS 4,5577 -> 4,56
+        assert nota.itens[0].impostos == Imposto(10.79, 6.0, 0.99, 4.56)
+        assert totais == Imposto(10.79, 6.0, 0.99, 4.56)
+        assert tabela.consultas == [("12345678", "6102", "SP", "RJ")]
+
+    def test_items_without_rule_keep_declared_taxes(self):
+        tabela = TabelaAliquotas({"11111111": Aliquotas(12, 0, 0, 0)})
+        nota = _nota([
+            (1, 100.0, "11111111", SEM_IMPOSTO),
+            (1, 100.0, "22222222", Imposto(7.0, 1.0, 0.5, 2.0)),
+        ])
+
+        totais = CalculadoraImpostos(tabela).calcular(nota)
+
+        assert [item.impostos for item in nota.itens] == [Imposto(12.0, 0.0, 0.0, 0.0), Imposto(7.0, 1.0, 0.5, 2.0)]
+        assert totais == Imposto(19.0, 1.0, 0.5, 2.0)
+
+    def test_rules_are_looked_up_once_per_ncm_cfop(self):
+        tabela = TabelaAliquotas({"12345678": Aliquotas(18, 0, 0, 0)})
+        nota = _nota([(1, 1.0, "12345678", SEM_IMPOSTO)] * 500)
+
+        CalculadoraImpostos(tabela).calcular(nota)
+
+        assert len(tabela.consultas) == 1
+
+    def test_totals_do_not_drift_over_many_items(self):
+        nota = _nota([(1, 0.1, "12345678", Imposto(0.01, 0.0, 0.0, 0.0))] * 10000)
+
+        assert CalculadoraImpostos().calcular(nota).icms == 100.0
+
+    @pytest.mark.parametrize("com_regras", [False, True])
+    def test_columnar_items_give_the_same_result(self, com_regras):
+        tabela = TabelaAliquotas({"12345678": Aliquotas(18, 5, "1.65", "7.6")}) if com_regras else None
+        itens = [(i % 7 + 1, 3.33 * (i + 1), "12345678" if i % 2 else "87654321", Imposto(1.11, 0.5, 0.05, 0.25))
+                 for i in range(200)]
+        lista, colunar = _nota(itens), _nota(itens, colunar=True)
+
+        assert CalculadoraImpostos(tabela).calcular(colunar) == CalculadoraImpostos(tabela).calcular(lista)
+        assert [i.impostos for i in colunar.itens] == [i.impostos for i in lista.itens]
+
+    def test_empty_note(self):
+        assert CalculadoraImpostos(TabelaAliquotas({})).calcular(_nota([])) == SEM_IMPOSTO
@@ -1,6 +1,6 @@
 import pytest
 
-from core.entities.nota_fiscal import ItemDaNota, NotaFiscal
+from core.entities.nota_fiscal import ItemDaNota, ItensColunares, NotaFiscal
 from core.enum.status_nota import StatusNota
 from core.value_objects.cnpjcpf import CnpjCpf
 from core.value_objects.endereço import Endereco
@@ -30,15 +30,24 @@ def _make_item(**kwargs):
     return ItemDaNota(**defaults)
 
 
-def _make_nota():
+def _make_nota(**kwargs):
     return NotaFiscal(
-        emitente_cnpj=CnpjCpf("12345678000199"),
-        destinatario_cnpj=CnpjCpf("98765432000100"),
+        emitente_cnpj=CnpjCpf("12345678000195"),
+        destinatario_cnpj=CnpjCpf("98765432000198"),
         emitente_endereco=_make_endereco("SP", "01001000"),
         destinatario_endereco=_make_endereco("RJ", "20020000"),
+        **kwargs,
     )
 
 
+def _varied_items(n):
+    return [
+        _make_item(sku=f"SKU{i}", quantidade=i % 5 + 1, valor_unitario=1.1 * (i + 1),
+                   impostos=Imposto(icms=0.18 * i, ipi=0.05 * i, pis=0.01, cofins=0.03))
+        for i in range(n)
+    ]
+
+
 class TestItemDaNota:
     def test_total_is_quantidade_times_valor_unitario(self):
         item = _make_item(quantidade=3, valor_unitario=20.0)
@@ -64,6 +73,19 @@ class TestItemDaNota:
         assert isinstance(item.to_dict()["impostos"], dict)
 
 
+    def test_fiscal_codes_are_interned(self):
+        a = _make_item(cfop="".join(["51", "02"]), ncm="".join(["1234", "5678"]))
+        b = _make_item(cfop="".join(["5", "102"]), ncm="".join(["12", "345678"]))
+        assert a.cfop is b.cfop
+        assert a.ncm is b.ncm
+
+    def test_is_slotted(self):
+        item = _make_item()
+        assert not hasattr(item, "__dict__")
+        with pytest.raises(AttributeError):
+            item.desconto = 1.0
+
+
 class TestNotaFiscal:
     def test_initial_status_is_em_processamento(self):
         nota = _make_nota()
@@ -101,7 +123,7 @@ class TestNotaFiscal:
 
     def test_to_dict_emitente_cnpj_is_string(self):
         nota = _make_nota()
-        assert nota.to_dict()["emitente_cnpj"] == "12345678000199"
+        assert nota.to_dict()["emitente_cnpj"] == "12345678000195"
 
     def test_to_dict_itens_reflects_added_items(self):
         nota = _make_nota()
@@ -112,3 +134,60 @@ class TestNotaFiscal:
         nota1 = _make_nota()
         nota2 = _make_nota()
         assert nota1.id != nota2.id
+
+    def test_is_slotted(self):
+        nota = _make_nota()
+        assert not hasattr(nota, "__dict__")
+        with pytest.raises(AttributeError):
+            nota.observacao = "x"
+
+
+class TestItensColunares:
+    def _pair(self, n=50):
+        lista, colunar = _make_nota(), _make_nota(itens_colunares=True)
+        for item in _varied_items(n):
+            lista.adicionar_item(item)
+            colunar.adicionar_item(item)
+        return lista, colunar
+
+    def test_adicionar_item_and_iteration_keep_working(self):
+        _, nota = self._pair(3)
+        assert isinstance(nota.itens, ItensColunares)
+        assert len(nota.itens) == 3
+        assert [item.sku for item in nota.itens] == ["SKU0", "SKU1", "SKU2"]
+        assert nota.itens[-1].impostos == Imposto(icms=0.36, ipi=0.1, pis=0.01, cofins=0.03)
+
+    def test_to_dict_matches_list_backed_note(self):
+        lista, colunar = self._pair()
+        esperado, obtido = lista.to_dict(), colunar.to_dict()
+        assert obtido["itens"] == esperado["itens"]
+
+    def test_totals_match_list_backed_note(self):
+        lista, colunar = self._pair()
+        assert colunar.valor_total() == lista.valor_total()
+        assert colunar.somar_impostos() == lista.somar_impostos()
+
+    def test_columns_are_typed_arrays(self):
+        _, nota = self._pair(4)
+        assert nota.itens.quantidade.typecode == "q"
+        assert nota.itens.valor_unitario.typecode == "d"
+        assert list(nota.itens.pis) == [0.01] * 4
+
+    def test_items_are_copies_and_assignment_writes_back(self):
+        _, nota = self._pair(2)
+        item = nota.itens[0]
+        item.descricao = "Alterado"
+        assert nota.itens[0].descricao == "Produto Teste"
+        nota.itens[0] = item
+        assert nota.itens[0].descricao == "Alterado"
+
+    def test_delete_and_insert_keep_columns_aligned(self):
+        _, nota = self._pair(3)
+        del nota.itens[1]
+        nota.itens.insert(0, _make_item(sku="NEW", quantidade=9))
+        assert [(i.sku, i.quantidade) for i in nota.itens] == [("NEW", 9), ("SKU0", 1), ("SKU2", 3)]
+        assert len(nota.itens.cofins) == 3
+
+    def test_out_of_range_index_raises(self):
+        with pytest.raises(IndexError):
+            ItensColunares()[0]
@@ -1,26 +1,29 @@
+from datetime import datetime
+
 import pytest
 
-from core.value_objects.cnpjcpf import CnpjCpf
+from core.value_objects.chave_acesso import ChaveAcesso, calcular_dv, gerar_chaves, validar_chave, validar_chaves
+from core.value_objects.cnpjcpf import CnpjCpf, documento_valido, validar_documentos
 from core.value_objects.endereço import Endereco
 from core.value_objects.imposto import Imposto
 
 
 class TestCnpjCpf:
     def test_valid_cnpj_stores_only_digits(self):
-        c = CnpjCpf("12345678000199")
-        assert c.numero == "12345678000199"
+        c = CnpjCpf("12345678000195")
+        assert c.numero == "12345678000195"
 
     def test_valid_cpf_stores_only_digits(self):
-        c = CnpjCpf("12345678901")
-        assert c.numero == "12345678901"
+        c = CnpjCpf("12345678909")
+        assert c.numero == "12345678909"
 
     def test_strips_formatting_from_cnpj(self):
-        c = CnpjCpf("12.345.678/0001-99")
-        assert c.numero == "12345678000199"
+        c = CnpjCpf("12.345.678/0001-95")
+        assert c.numero == "12345678000195"
 
     def test_strips_formatting_from_cpf(self):
-        c = CnpjCpf("123.456.789-01")
-        assert c.numero == "12345678901"
+        c = CnpjCpf("123.456.789-09")
+        assert c.numero == "12345678909"
 
     def test_too_short_raises_value_error(self):
         with pytest.raises(ValueError):
@@ -34,12 +37,54 @@ class TestCnpjCpf:
         with pytest.raises(ValueError):
             CnpjCpf("123456789012")
 
+    @pytest.mark.parametrize("numero", ["12345678000199", "12345678000185", "12345678901", "12345678919"])
+    def test_wrong_check_digits_raise_value_error(self, numero):
+        with pytest.raises(ValueError):
+            CnpjCpf(numero)
+
+    @pytest.mark.parametrize("numero", ["00000000000000", "11111111111"])
+    def test_repeated_digits_raise_value_error(self, numero):
+        with pytest.raises(ValueError):
+            CnpjCpf(numero)
+
+    def test_validated_numbers_are_memoized(self):
+        documento_valido.cache_clear()
+        for _ in range(3):
+            CnpjCpf("12.345.678/0001-95")
+        info = documento_valido.cache_info()
+        assert (info.hits, info.misses) == (2, 1)
+        assert info.maxsize is not None
+
+    def test_de_confianca_normalizes_without_validating(self):
+        c = CnpjCpf.de_confianca("12.345.678/0001-99")
+        assert c.numero == "12345678000199"
+        assert c == CnpjCpf.de_confianca("12345678000199")
+
     def test_is_immutable(self):
-        c = CnpjCpf("12345678000199")
+        c = CnpjCpf("12345678000195")
         with pytest.raises((AttributeError, TypeError)):
             c.numero = "99999999000199"
 
 
+class TestValidarDocumentos:
+    def test_matches_single_validation_in_input_order(self):
+        documentos = [
+            "12345678000195", "123.456.789-09", "12345678000199", "98765432000198",
+            "12345678901", "123", "00000000000", "", "12345678000195", "11111111000191",
+        ]
+        assert validar_documentos(documentos) == [
+            True, True, False, True, False, False, False, False, True, True,
+        ]
+
+    def test_agrees_with_documento_valido_on_every_check_digit(self):
+        cnpjs = [f"123456780001{dv:02d}" for dv in range(100)]
+        cpfs = [f"123456789{dv:02d}" for dv in range(100)]
+        assert validar_documentos(cnpjs + cpfs) == [documento_valido(d) for d in cnpjs + cpfs]
+
+    def test_empty_batch(self):
+        assert validar_documentos([]) == []
+
+
 class TestEndereco:
     def _make(self, **kwargs):
         defaults = dict(
@@ -82,6 +127,18 @@ class TestEndereco:
         with pytest.raises((AttributeError, TypeError)):
             e.cep = "99999999"
 
+    def test_has_no_instance_dict(self):
+        assert not hasattr(self._make(), "__dict__")
+
+    def test_same_uf_shares_one_string(self):
+        a = self._make(uf="".join(["s", "p"]))
+        b = self._make(uf=" SP ")
+        assert a.uf is b.uf
+
+    def test_to_dict_round_trips(self):
+        e = self._make(complemento="Apto 1", bairro="Centro")
+        assert Endereco(**e.to_dict()) == e
+
     def test_all_valid_ufs_accepted(self):
         valid_ufs = ["AC", "AL", "AP", "AM", "BA", "CE", "DF", "ES", "GO", "MA",
                      "MT", "MS", "MG", "PA", "PB", "PR", "PE", "PI", "RJ", "RN",
@@ -99,6 +156,11 @@ class TestImposto:
         assert imp.pis == 2.0
         assert imp.cofins == 1.0
 
+    def test_to_dict_round_trips(self):
+        imp = Imposto(icms=10.0, ipi=5.0, pis=2.0, cofins=1.0)
+        assert imp.to_dict() == {"icms": 10.0, "ipi": 5.0, "pis": 2.0, "cofins": 1.0}
+        assert not hasattr(imp, "__dict__")
+
     def test_total_geral_sums_all_taxes(self):
         imp = Imposto(icms=10.0, ipi=5.0, pis=2.0, cofins=1.0)
         assert imp.total_geral == 18.0
@@ -115,3 +177,67 @@ class TestImposto:
         imp = Imposto(icms=10.0, ipi=5.0, pis=0.0, cofins=0.0)
         with pytest.raises((AttributeError, TypeError)):
             imp.icms = 99.0
+
+
+def _dv_referencia(base: str) -> str:
+    soma, peso = 0, 2
+    for digito in reversed(base):
+        soma += int(digito) * peso
+        peso = 2 if peso == 9 else peso + 1
+    resto = soma % 11
+    return "0" if resto < 2 else str(11 - resto)
+
+
+class TestChaveAcesso:
+    CHAVE = "52060433009911002506550120000007800267301615"
+
+    def test_parses_fields_by_position(self):
+        chave = ChaveAcesso.parse(self.CHAVE)
+        assert chave.cuf == "52"
+        assert chave.uf == "GO"
+        assert (chave.ano, chave.mes) == (2006, 4)
+        assert chave.cnpj == "33009911002506"
+        assert chave.modelo == "55"
+        assert chave.serie == 12
+        assert chave.numero == 780
+        assert chave.tp_emis == "0"
+        assert chave.codigo == "26730161"
+        assert chave.dv == "5"
+
+    def test_rejects_wrong_dv(self):
+        with pytest.raises(ValueError):
+            ChaveAcesso.parse(self.CHAVE[:43] + "4")
+
+    @pytest.mark.parametrize("chave", ["", "1" * 43, "a" * 44, "١" * 44, None])
+    def test_try_parse_returns_none_for_malformed(self, chave):
+        assert ChaveAcesso.try_parse(chave) is None
+
+    def test_dv_matches_reference_implementation(self):
+        chaves = gerar_chaves("SP", datetime(2025, 3, 1), "12345678000195", 1, range(1, 500))
+        for chave in chaves:
+            assert chave[43] == _dv_referencia(chave[:43])
+            assert calcular_dv(chave[:43]) == chave[43]
+
+    def test_generates_layout_fields(self):
+        chave = ChaveAcesso.gerar("RJ", datetime(2024, 11, 5), "12345678000195", 7, 123, codigo=42)
+        assert chave.valor == "33241112345678000195550070000001231000000425"
+        assert chave.uf == "RJ"
+        assert chave.aamm == "2411"
+        assert chave.serie == 7
+        assert chave.numero == 123
+        assert chave.codigo == "00000042"
+
+    def test_batch_generates_one_key_per_number_with_random_cnf(self):
+        chaves = gerar_chaves("MG", datetime(2025, 1, 1), "12345678000195", 1, range(1, 101))
+        assert len(chaves) == 100
+        assert all(validar_chaves(chaves))
+        assert [ChaveAcesso.parse(c).numero for c in chaves] == list(range(1, 101))
+        assert all(ChaveAcesso.parse(c).codigo != f"{n:08d}" for n, c in enumerate(chaves, 1))
+
+    def test_unknown_uf_is_rejected(self):
+        with pytest.raises(KeyError):
+            gerar_chaves("XX", datetime(2025, 1, 1), "12345678000195", 1, [1])
+
+    def test_validar_chave(self):
+        assert validar_chave(self.CHAVE)
+        assert not validar_chave(self.CHAVE[:-1])
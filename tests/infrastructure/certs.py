@@ -0,0 +1,2 @@
+"""Self-signed A1-like certificates for signing tests (shared with the benchmarks)."""
+from benchmarks._certs import make_certificate, write_pfx  # noqa: F401
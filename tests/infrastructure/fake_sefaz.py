@@ -0,0 +1,76 @@
+"""
+Local stand-in for the SEFAZ web services, used by the async client tests.
+
+Runs a threaded HTTP/1.1 server with keep-alive on 127.0.0.1, waits
+`latency` seconds before each answer and records how many TCP connections
+were opened and how many requests were in flight at the same time.
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeSefazServer:
+    def __init__(self, latency: float = 0.0, status: str = "AUTORIZADO"):
+        self.latency = latency
+        self.status = status
+        self.connections = 0
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "FakeSefazServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with fake._lock:
+                    fake.connections += 1
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with fake._lock:
+                    fake.requests += 1
+                    fake.in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+                    seq = fake.requests
+                try:
+                    time.sleep(fake.latency)
+                    body = (
+                        f"<retorno><status>{fake.status}</status>"
+                        f"<chaveAcesso>{seq:044d}</chaveAcesso>"
+                        f"<protocolo>{100000000 + seq}</protocolo></retorno>"
+                    ).encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/xml")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                finally:
+                    with fake._lock:
+                        fake.in_flight -= 1
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,114 @@
+import asyncio
+
+import httpx
+import pytest
+
+from infrastructure.external_services.async_sefaz_client import AsyncSefazClient
+from tests.infrastructure.fake_sefaz import FakeSefazServer
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+class TestAsyncSefazClient:
+    def test_send_xml_parses_sefaz_response(self):
+        async def scenario(url):
+            async with AsyncSefazClient(url) as client:
+                return await client.send_xml("<signed/>")
+
+        with FakeSefazServer() as server:
+            response = _run(scenario(server.base_url))
+
+        assert response.status == "AUTORIZADO"
+        assert len(response.access_key) == 44
+        assert response.protocol_number
+
+    def test_sequential_requests_reuse_one_keepalive_connection(self):
+        async def scenario(url):
+            async with AsyncSefazClient(url) as client:
+                for _ in range(20):
+                    await client.send_xml("<signed/>")
+
+        with FakeSefazServer() as server:
+            _run(scenario(server.base_url))
+
+        assert server.requests == 20
+        assert server.connections == 1
+
+    def test_concurrent_requests_are_bounded_by_per_host_limit(self):
+        async def scenario(url):
+            async with AsyncSefazClient(url, max_connections_per_host=4) as client:
+                await asyncio.gather(*(client.send_xml("<signed/>") for _ in range(20)))
+
+        with FakeSefazServer(latency=0.05) as server:
+            _run(scenario(server.base_url))
+
+        assert server.requests == 20
+        assert server.connections <= 4
+        assert server.max_in_flight <= 4
+
+    def test_concurrent_requests_overlap_their_latency(self):
+        async def scenario(url):
+            async with AsyncSefazClient(url, max_connections_per_host=10) as client:
+                loop = asyncio.get_running_loop()
+                start = loop.time()
+                await asyncio.gather(*(client.send_xml("<signed/>") for _ in range(10)))
+                return loop.time() - start
+
+        with FakeSefazServer(latency=0.2) as server:
+            elapsed = _run(scenario(server.base_url))
+
+        # 10 requests of 200ms each would take 2s if serialized
+        assert elapsed < 1.0
+
+    def test_read_timeout_is_enforced(self):
+        async def scenario(url):
+            async with AsyncSefazClient(url, read_timeout=0.05) as client:
+                await client.send_xml("<signed/>")
+
+        with FakeSefazServer(latency=0.5) as server:
+            with pytest.raises(httpx.ReadTimeout):
+                _run(scenario(server.base_url))
+
+    def test_cancel_and_cce_use_event_endpoint(self):
+        async def scenario(url):
+            async with AsyncSefazClient(url) as client:
+                cancel = await client.send_cancel("<signed/>")
+                cce = await client.send_cce("<signed/>")
+                return cancel, cce
+
+        with FakeSefazServer(status="CANCELADO") as server:
+            cancel, cce = _run(scenario(server.base_url))
+
+        assert cancel.status == "CANCELADO"
+        assert cce.protocol_number
+
+    def test_transport_override_is_shared_across_hosts_and_left_open(self):
+        class _Transporte(httpx.AsyncBaseTransport):
+            def __init__(self):
+                self.hosts = []
+                self.fechamentos = 0
+
+            async def handle_async_request(self, request):
+                self.hosts.append(request.url.host)
+                return httpx.Response(200, content=b"<r><status>REGISTRADO</status></r>")
+
+            async def aclose(self):
+                self.fechamentos += 1
+
+        transporte = _Transporte()
+
+        async def scenario():
+            client = AsyncSefazClient(
+                "https://autorizacao.sefaz.test",
+                endpoints={"cancelamento": "https://eventos.sefaz.test/nfe/evento"},
+                transport=transporte,
+            )
+            await client.send_xml("<signed/>")
+            await client.send_cancel("<signed/>")
+            await client.aclose()
+
+        _run(scenario())
+        assert transporte.hosts == ["autorizacao.sefaz.test", "eventos.sefaz.test"]
+        assert transporte.fechamentos == 0
@@ -0,0 +1,119 @@
+import asyncio
+import os
+
+import pytest
+
+from core.exceptions.domain_exceptions import CertificadoIndisponivelException
+from infrastructure.external_services.certificate_store import (
+    CertificateStore,
+    DirectoryCertificateLocator,
+    ProcessPoolCertificateSigner,
+)
+from infrastructure.external_services.signer import Signer, verify_xml
+from tests.infrastructure.certs import make_certificate, write_pfx
+
+XML = '<NFe><infNFe Id="NFe1"><ide/></infNFe></NFe>'
+CNPJS = ["11111111000191", "22222222000191", "33333333000191"]
+
+
+@pytest.fixture(scope="module")
+def keys():
+    # Chaves de 1024 bits bastam para os testes e deixam a geração rápida
+    return {cnpj: make_certificate(cnpj, key_size=1024) for cnpj in CNPJS}
+
+
+@pytest.fixture
+def cert_dir(tmp_path, keys):
+    for cnpj, (key, certificate) in keys.items():
+        write_pfx(tmp_path / f"{cnpj}.pfx", key, certificate)
+    return tmp_path
+
+
+@pytest.fixture
+def store(cert_dir):
+    return CertificateStore(DirectoryCertificateLocator(str(cert_dir), default_password="senha"))
+
+
+class TestCertificateStore:
+    def test_signs_with_the_emitente_certificate(self, store, keys):
+        for cnpj in CNPJS:
+            signed = store.sign(XML, cnpj)
+            assert verify_xml(signed, keys[cnpj][0].public_key())
+            assert not verify_xml(signed, keys[CNPJS[0] if cnpj != CNPJS[0] else CNPJS[1]][0].public_key())
+
+    def test_loads_each_certificate_once(self, store):
+        for _ in range(5):
+            store.get(CNPJS[0])
+
+        assert store.loads == 1
+        assert store.hits == 4 and store.misses == 1
+
+    def test_lru_bound_evicts_least_recently_used(self, cert_dir):
+        store = CertificateStore(DirectoryCertificateLocator(str(cert_dir), default_password="senha"), max_entries=2)
+        store.get(CNPJS[0])
+        store.get(CNPJS[1])
+        store.get(CNPJS[0])
+        store.get(CNPJS[2])
+
+        assert len(store) == 2
+        assert store.evictions == 1
+        store.get(CNPJS[0])
+        assert store.loads == 3  # CNPJS[0] continuou em cache
+
+    def test_expired_certificates_are_evicted_first(self, tmp_path, keys):
+        expired_key, expired_cert = make_certificate(CNPJS[0], days=-1, key_size=1024)
+        write_pfx(tmp_path / f"{CNPJS[0]}.pfx", expired_key, expired_cert)
+        for cnpj in CNPJS[1:]:
+            write_pfx(tmp_path / f"{cnpj}.pfx", *keys[cnpj])
+        store = CertificateStore(DirectoryCertificateLocator(str(tmp_path), default_password="senha"), max_entries=2)
+
+        with pytest.raises(CertificadoIndisponivelException):
+            store.get(CNPJS[0])
+        store.get(CNPJS[1])
+        store.get(CNPJS[2])
+
+        # O expirado saiu, embora CNPJS[1] fosse o menos usado entre os válidos
+        assert store.loads == 3
+        store.get(CNPJS[1])
+        assert store.loads == 3
+
+    def test_reloads_certificate_replaced_on_disk(self, store, cert_dir):
+        store.reload_check_interval = 0
+        store.get(CNPJS[0])
+        new_key, new_cert = make_certificate(CNPJS[0], key_size=1024)
+        path = cert_dir / f"{CNPJS[0]}.pfx"
+        write_pfx(path, new_key, new_cert)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        signed = store.sign(XML, CNPJS[0])
+
+        assert store.reloads == 1
+        assert verify_xml(signed, new_key.public_key())
+
+    def test_unknown_cnpj_without_default_raises(self, store):
+        with pytest.raises(CertificadoIndisponivelException):
+            store.get("99999999000199")
+
+    def test_unknown_cnpj_uses_default_signer(self, cert_dir):
+        store = CertificateStore(DirectoryCertificateLocator(str(cert_dir)), default_signer=Signer())
+
+        assert store.sign("<nfe/>", "99999999000199") == "<signed><nfe/></signed>"
+
+
+class TestProcessPoolCertificateSigner:
+    def test_signs_each_tenant_in_the_pool(self, cert_dir, keys):
+        signer = ProcessPoolCertificateSigner(
+            DirectoryCertificateLocator(str(cert_dir), default_password="senha"), processes=2
+        )
+        try:
+            async def scenario():
+                return await asyncio.gather(*(signer.asign(XML, cnpj) for cnpj in CNPJS))
+
+            signed = asyncio.run(scenario())
+            many = signer.sign_many([XML] * 3, CNPJS[1])
+        finally:
+            signer.close()
+
+        assert all(verify_xml(s, keys[c][0].public_key()) for s, c in zip(signed, CNPJS))
+        assert all(verify_xml(s, keys[CNPJS[1]][0].public_key()) for s in many)
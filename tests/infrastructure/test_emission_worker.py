@@ -0,0 +1,338 @@
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from application.use_cases.process_emission_job import ProcessEmissionJobUseCase
+from core.entities.nota_fiscal import NotaFiscal
+from core.enum.status_emissao_job import StatusEmissaoJob
+from core.enum.status_nota import StatusNota
+from core.exceptions.domain_exceptions import DomainException
+from core.services.persistence.base import Base
+from core.services.persistence.emissao_job_model import EmissaoJobModel
+from core.services.ports.fila_emissao_port import EmissaoJob
+from infrastructure.adapters.emissao_nota_adapter import AsyncNotaFiscalEmissaoAdapter
+from infrastructure.adapters.fila_emissao_sqlalchemy import FilaEmissaoSqlAlchemyAdapter
+from infrastructure.adapters.nota_fiscal_sqlalchemy_async import NotaFiscalAsyncSqlAlchemyAdapter
+from infrastructure.external_services.async_sefaz_client import AsyncSefazStubClient
+from infrastructure.external_services.signer import Signer
+from infrastructure.workers.emission_worker import EmissionWorkerPool
+from tests.infrastructure.test_nota_fiscal_sqlalchemy import _make_nota
+
+
+class _FailingEmissor:
+    async def emitir(self, nota: NotaFiscal) -> NotaFiscal:
+        raise ConnectionError("SEFAZ indisponível")
+
+
+class _RejectingEmissor:
+    async def emitir(self, nota: NotaFiscal) -> NotaFiscal:
+        raise DomainException("Rejeição 539: duplicidade de NF-e")
+
+
+async def _expire_lock(session, job_id: int) -> None:
+    await session.execute(
+        update(EmissaoJobModel)
+        .where(EmissaoJobModel.id == job_id)
+        .values(travado_em=datetime.utcnow() - timedelta(seconds=120))
+    )
+    await session.commit()
+
+
+def _pending_nota(seq: int) -> NotaFiscal:
+    nota = _make_nota(seq, itens=2)
+    nota.chave_acesso = None
+    nota.status = StatusNota.EM_PROCESSAMENTO
+    return nota
+
+
+def _run(scenario, url=None):
+    async def main():
+        if url:
+            # Uma conexão por sessão: workers concorrentes não dividem a transação
+            engine = create_async_engine(url)
+        else:
+            engine = create_async_engine(
+                "sqlite+aiosqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+            )
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        try:
+            return await scenario(async_sessionmaker(engine, expire_on_commit=False))
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(main())
+
+
+def _pool(factory, emissor_factory=None, **kwargs):
+    sefaz = AsyncSefazStubClient()
+    return EmissionWorkerPool(
+        factory,
+        emissor_factory or (lambda: AsyncNotaFiscalEmissaoAdapter(sefaz, Signer())),
+        **kwargs,
+    )
+
+
+class TestFilaEmissao:
+    def test_enqueue_persists_nota_and_pending_job(self):
+        nota = _pending_nota(1)
+
+        async def scenario(factory):
+            async with factory() as session:
+                await FilaEmissaoSqlAlchemyAdapter(session).enqueue(nota)
+            async with factory() as session:
+                stored = await NotaFiscalAsyncSqlAlchemyAdapter(session).get_by_id(nota.id)
+                job = await FilaEmissaoSqlAlchemyAdapter(session).get_by_nota(nota.id)
+            return stored, job
+
+        stored, job = _run(scenario)
+        assert stored.status is StatusNota.EM_PROCESSAMENTO
+        assert len(stored.itens) == 2
+        assert job.status is StatusEmissaoJob.PENDENTE
+
+    def test_claimed_jobs_are_not_claimed_again(self):
+        async def scenario(factory):
+            async with factory() as session:
+                fila = FilaEmissaoSqlAlchemyAdapter(session)
+                for i in range(3):
+                    await fila.enqueue(_pending_nota(i))
+                first = await fila.claim("w1", 2, lock_timeout=60)
+                second = await fila.claim("w2", 2, lock_timeout=60)
+                third = await fila.claim("w3", 2, lock_timeout=60)
+            return first, second, third
+
+        first, second, third = _run(scenario)
+        assert len(first) == 2 and len(second) == 1 and third == []
+        assert {j.id for j in first}.isdisjoint(j.id for j in second)
+
+    def test_abandoned_job_is_reclaimed_after_lock_timeout(self):
+        async def scenario(factory):
+            async with factory() as session:
+                fila = FilaEmissaoSqlAlchemyAdapter(session)
+                await fila.enqueue(_pending_nota(1))
+                [job] = await fila.claim("w1", 1, lock_timeout=60)
+                await _expire_lock(session, job.id)
+                reclaimed = await fila.claim("w2", 1, lock_timeout=60)
+                return reclaimed, await fila.get_by_nota(job.nota_id)
+
+        reclaimed, stored = _run(scenario)
+        assert len(reclaimed) == 1
+        # A tentativa interrompida conta
+        assert reclaimed[0].tentativas == stored.tentativas == 1
+
+
+    def test_complete_writes_nota_and_job_in_one_transaction(self):
+        nota = _pending_nota(1)
+
+        async def scenario(factory):
+            async with factory() as session:
+                fila = FilaEmissaoSqlAlchemyAdapter(session)
+                await fila.enqueue(nota)
+                [job] = await fila.claim("w1", 1, lock_timeout=60)
+
+                async def crash():
+                    raise ConnectionError("conexão perdida no commit")
+
+                nota.status = StatusNota.AUTORIZADA
+                session.commit = crash
+                with pytest.raises(ConnectionError):
+                    await fila.complete(job.id, nota)
+                await session.rollback()
+            async with factory() as session:
+                stored = await NotaFiscalAsyncSqlAlchemyAdapter(session).get_by_id(nota.id)
+                job = await FilaEmissaoSqlAlchemyAdapter(session).get_by_nota(nota.id)
+            return stored, job
+
+        stored, job = _run(scenario)
+        assert stored.status is StatusNota.EM_PROCESSAMENTO
+        assert job.status is StatusEmissaoJob.PROCESSANDO
+
+
+class TestEmissionWorkerPool:
+    def test_run_once_emits_and_completes_jobs(self):
+        notas = [_pending_nota(i) for i in range(3)]
+
+        async def scenario(factory):
+            async with factory() as session:
+                fila = FilaEmissaoSqlAlchemyAdapter(session)
+                for nota in notas:
+                    await fila.enqueue(nota)
+            processed = await _pool(factory).run_once("w1")
+            async with factory() as session:
+                repo = NotaFiscalAsyncSqlAlchemyAdapter(session)
+                fila = FilaEmissaoSqlAlchemyAdapter(session)
+                stored = [await repo.get_by_id(n.id) for n in notas]
+                jobs = [await fila.get_by_nota(n.id) for n in notas]
+            return processed, stored, jobs
+
+        processed, stored, jobs = _run(scenario)
+        assert processed == 3
+        assert all(n.status is StatusNota.AUTORIZADA and n.chave_acesso for n in stored)
+        assert all(len(n.itens) == 2 for n in stored)
+        assert all(j.status is StatusEmissaoJob.CONCLUIDO for j in jobs)
+
+    def test_failure_is_retried_then_marked_failed(self):
+        nota = _pending_nota(1)
+
+        async def scenario(factory):
+            async with factory() as session:
+                await FilaEmissaoSqlAlchemyAdapter(session).enqueue(nota)
+            pool = _pool(factory, emissor_factory=_FailingEmissor, max_tentativas=2)
+            await pool.run_once("w1")
+            async with factory() as session:
+                fila = FilaEmissaoSqlAlchemyAdapter(session)
+                after_first = await fila.get_by_nota(nota.id)
+                # Antecipa o retry agendado com backoff
+                await session.execute(update(EmissaoJobModel).values(disponivel_em=datetime.utcnow()))
+                await session.commit()
+            await pool.run_once("w1")
+            async with factory() as session:
+                after_second = await FilaEmissaoSqlAlchemyAdapter(session).get_by_nota(nota.id)
+            return after_first, after_second
+
+        after_first, after_second = _run(scenario)
+        assert after_first.status is StatusEmissaoJob.PENDENTE
+        assert after_first.tentativas == 1
+        assert after_second.status is StatusEmissaoJob.FALHOU
+        assert after_second.tentativas == 2
+        assert "SEFAZ" in after_second.ultimo_erro
+
+    def test_domain_rejection_fails_without_retry(self):
+        nota = _pending_nota(1)
+
+        async def scenario(factory):
+            async with factory() as session:
+                await FilaEmissaoSqlAlchemyAdapter(session).enqueue(nota)
+            await _pool(factory, emissor_factory=_RejectingEmissor, max_tentativas=5).run_once("w1")
+            async with factory() as session:
+                return await FilaEmissaoSqlAlchemyAdapter(session).get_by_nota(nota.id)
+
+        job = _run(scenario)
+        assert job.status is StatusEmissaoJob.FALHOU
+        assert job.tentativas == 1
+        assert "539" in job.ultimo_erro
+
+    def test_reclaimed_job_of_an_authorized_nota_is_not_emitted_again(self):
+        nota = _pending_nota(1)
+
+        async def scenario(factory):
+            async with factory() as session:
+                fila = FilaEmissaoSqlAlchemyAdapter(session)
+                await fila.enqueue(nota)
+                [job] = await fila.claim("w1", 1, lock_timeout=60)
+                # Worker caiu depois de gravar a nota autorizada, com o job ainda travado
+                nota.status = StatusNota.AUTORIZADA
+                nota.chave_acesso = "1" * 44
+                await NotaFiscalAsyncSqlAlchemyAdapter(session).save(nota)
+                await _expire_lock(session, job.id)
+            # Um emissor que falharia se fosse chamado
+            await _pool(factory, emissor_factory=_FailingEmissor, lock_timeout=60).run_once("w2")
+            async with factory() as session:
+                stored = await NotaFiscalAsyncSqlAlchemyAdapter(session).get_by_id(nota.id)
+                job = await FilaEmissaoSqlAlchemyAdapter(session).get_by_nota(nota.id)
+            return stored, job
+
+        stored, job = _run(scenario)
+        assert job.status is StatusEmissaoJob.CONCLUIDO
+        assert stored.chave_acesso == "1" * 44
+
+    def test_failed_completion_retries_the_write_without_emitting_again(self, monkeypatch):
+        nota = _pending_nota(1)
+        emissoes = []
+        complete = FilaEmissaoSqlAlchemyAdapter.complete
+        falhas = [ConnectionError("conexão perdida no commit")]
+
+        async def complete_falha_uma_vez(self, job_id, nota=None):
+            if falhas:
+                raise falhas.pop()
+            await complete(self, job_id, nota)
+
+        monkeypatch.setattr(FilaEmissaoSqlAlchemyAdapter, "complete", complete_falha_uma_vez)
+
+        class CountingEmissor:
+            async def emitir(self, nota):
+                emissoes.append(nota.id)
+                nota.status = StatusNota.AUTORIZADA
+                nota.chave_acesso = "2" * 44
+                return nota
+
+        async def scenario(factory):
+            async with factory() as session:
+                await FilaEmissaoSqlAlchemyAdapter(session).enqueue(nota)
+            await _pool(factory, emissor_factory=CountingEmissor).run_once("w1")
+            async with factory() as session:
+                stored = await NotaFiscalAsyncSqlAlchemyAdapter(session).get_by_id(nota.id)
+                job = await FilaEmissaoSqlAlchemyAdapter(session).get_by_nota(nota.id)
+            return stored, job
+
+        stored, job = _run(scenario)
+        assert emissoes == [nota.id]
+        assert job.status is StatusEmissaoJob.CONCLUIDO
+        assert stored.status is StatusNota.AUTORIZADA and stored.chave_acesso == "2" * 44
+
+    def test_completion_that_keeps_failing_fails_the_job_for_good(self):
+        nota = _pending_nota(1)
+        repository = AsyncMock()
+        repository.get_by_id.return_value = nota
+        fila = AsyncMock()
+        fila.complete.side_effect = ConnectionError("banco fora")
+
+        class Emissor:
+            async def emitir(self, nota):
+                nota.status = StatusNota.AUTORIZADA
+                nota.chave_acesso = "3" * 44
+                return nota
+
+        use_case = ProcessEmissionJobUseCase(
+            Emissor(), repository, fila, persist_tentativas=2, persist_backoff=0.001
+        )
+        asyncio.run(use_case.execute(EmissaoJob(1, nota.id, StatusEmissaoJob.PROCESSANDO, 0)))
+
+        assert fila.complete.await_count == 2
+        [(job_id, erro, retry_at)] = [c.args for c in fila.fail.await_args_list]
+        assert retry_at is None
+        assert "3" * 44 in erro
+
+    def test_lock_expired_too_many_times_fails_without_emitting(self):
+        nota = _pending_nota(1)
+
+        async def scenario(factory):
+            async with factory() as session:
+                fila = FilaEmissaoSqlAlchemyAdapter(session)
+                await fila.enqueue(nota)
+                await session.execute(update(EmissaoJobModel).values(tentativas=1))
+                await session.commit()
+                [job] = await fila.claim("w1", 1, lock_timeout=60)
+                await _expire_lock(session, job.id)
+            await _pool(factory, emissor_factory=_FailingEmissor, max_tentativas=2, lock_timeout=60).run_once("w2")
+            async with factory() as session:
+                return await FilaEmissaoSqlAlchemyAdapter(session).get_by_nota(nota.id)
+
+        job = _run(scenario)
+        assert job.status is StatusEmissaoJob.FALHOU
+        assert job.ultimo_erro == "Trava expirada"
+
+    def test_start_and_stop_drain_queue(self, tmp_path):
+        nota = _pending_nota(1)
+
+        async def scenario(factory):
+            async with factory() as session:
+                await FilaEmissaoSqlAlchemyAdapter(session).enqueue(nota)
+            pool = _pool(factory, workers=2, poll_interval=0.01)
+            await pool.start()
+            for _ in range(100):
+                async with factory() as session:
+                    job = await FilaEmissaoSqlAlchemyAdapter(session).get_by_nota(nota.id)
+                if job.status is StatusEmissaoJob.CONCLUIDO:
+                    break
+                await asyncio.sleep(0.01)
+            await pool.stop()
+            return job
+
+        job = _run(scenario, f"sqlite+aiosqlite:///{tmp_path / 'fila.db'}")
+        assert job.status is StatusEmissaoJob.CONCLUIDO
@@ -0,0 +1,273 @@
+import argparse
+import asyncio
+import json
+import random
+from contextlib import asynccontextmanager
+
+from sqlalchemy import create_engine, func, select
+
+from application.use_cases.emit_invoice import AsyncEmitInvoiceUseCase
+from core.enum.status_nota import StatusNota
+from core.exceptions.domain_exceptions import DomainException
+from core.services.persistence.base import Base
+from core.services.persistence.nota_fiscal_model import NotaFiscalModel
+from infrastructure.messaging.event_consumer import OrderEventConsumer, _backfill
+from infrastructure.messaging.order_sources import InMemoryOrderSource, JsonLinesOrderSource
+from tests.conftest import AsyncInMemoryRepository, InMemoryRepository
+
+
+def _order(pedido_id: int, emitente_cnpj: str = "12345678000195") -> dict:
+    return {
+        "pedido_id": str(pedido_id),
+        "emitente_cnpj": emitente_cnpj,
+        "destinatario_cnpj": "98765432000198",
+        "emitente_endereco": {"logradouro": "Av. X", "numero": "1", "municipio": "Sao Paulo", "uf": "SP", "cep": "01001000"},
+        "destinatario_endereco": {"logradouro": "Rua Y", "numero": "2", "municipio": "Rio", "uf": "RJ", "cep": "20020000"},
+        "itens": [{
+            "sku": "SKU001", "descricao": "Produto", "quantidade": pedido_id + 1, "valor_unitario": 10.0,
+            "cfop": "5102", "ncm": "12345678", "cst": "102",
+            "impostos": {"icms": 1.0, "ipi": 0.0, "pis": 0.0, "cofins": 0.0},
+        }],
+    }
+
+
+class _RecordingUseCase:
+    """Emits instantly after a random delay and records the order per emitente."""
+
+    def __init__(self, failures: int = 0):
+        self.emitted = {}
+        self.failures = failures
+
+    async def execute(self, nota):
+        await asyncio.sleep(random.random() / 1000)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("banco indisponível")
+        self.emitted.setdefault(nota.emitente_cnpj.numero, []).append(nota.itens[0].quantidade)
+        nota.status = StatusNota.AUTORIZADA
+        return nota
+
+
+class _CountingEmissor:
+    def __init__(self, error: Exception = None):
+        self.calls = 0
+        self.error = error
+
+    async def emitir(self, nota):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        nota.chave_acesso = f"{self.calls:044d}"
+        nota.status = StatusNota.AUTORIZADA
+        return nota
+
+
+class _FlakyRepository(AsyncInMemoryRepository):
+    """Fails the first `failures` writes, after SEFAZ has already authorized."""
+
+    def __init__(self, failures: int):
+        self.store = InMemoryRepository()
+        super().__init__(self.store)
+        self.failures = failures
+
+    async def save(self, nota):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("banco indisponível")
+        await super().save(nota)
+
+
+def _factory(use_case):
+    @asynccontextmanager
+    async def factory():
+        yield use_case
+    return factory
+
+
+class _CountingSource(InMemoryOrderSource):
+    def __init__(self):
+        super().__init__()
+        self.ack_calls = 0
+
+    async def ack(self, messages):
+        self.ack_calls += 1
+        await super().ack(messages)
+
+
+class TestOrderEventConsumer:
+    def test_emits_every_order_and_keeps_per_emitente_order(self):
+        emitentes = ["11111111000191", "22222222000191", "33333333000191"]
+        use_case = _RecordingUseCase()
+
+        async def scenario():
+            source = InMemoryOrderSource()
+            for i in range(90):
+                source.put(_order(i, emitentes[i % 3]))
+            consumer = OrderEventConsumer(source, _factory(use_case), workers=4)
+            return source, await consumer.run(stop_when_idle=True)
+
+        source, stats = asyncio.run(scenario())
+        assert stats.emitted == 90
+        assert stats.acked == 90 and len(source.acked) == 90
+        for i, cnpj in enumerate(emitentes):
+            assert use_case.emitted[cnpj] == [q + 1 for q in range(i, 90, 3)]
+        assert stats.snapshot()["throughput_per_s"] > 0
+
+    def test_acknowledgements_are_batched(self):
+        async def scenario():
+            source = _CountingSource()
+            for i in range(100):
+                source.put(_order(i))
+            consumer = OrderEventConsumer(source, _factory(_RecordingUseCase()), workers=2, ack_batch_size=25)
+            await consumer.run(stop_when_idle=True)
+            return source
+
+        source = asyncio.run(scenario())
+        assert len(source.acked) == 100
+        assert source.ack_calls <= 5
+
+    def test_invalid_order_is_counted_and_acknowledged(self):
+        async def scenario():
+            source = InMemoryOrderSource()
+            source.put({**_order(1), "destinatario_cnpj": "123"})
+            source.put({"pedido_id": "2"})
+            source.put(_order(3))
+            return source, await OrderEventConsumer(source, _factory(_RecordingUseCase())).run(stop_when_idle=True)
+
+        source, stats = asyncio.run(scenario())
+        assert stats.invalid == 2 and stats.emitted == 1
+        assert len(source.acked) == 3
+
+    def test_transient_failure_is_retried(self):
+        use_case = _RecordingUseCase(failures=2)
+
+        async def scenario():
+            source = InMemoryOrderSource()
+            source.put(_order(1))
+            consumer = OrderEventConsumer(source, _factory(use_case), retry_backoff=0.001)
+            return await consumer.run(stop_when_idle=True)
+
+        stats = asyncio.run(scenario())
+        assert stats.emitted == 1 and stats.failed == 0
+
+    def test_gives_up_after_max_retries_without_acknowledging(self):
+        async def scenario():
+            source = InMemoryOrderSource()
+            for i in range(3):
+                source.put(_order(i))
+            use_case = _RecordingUseCase(failures=2)
+            consumer = OrderEventConsumer(
+                source, _factory(use_case), workers=1, max_retries=1, retry_backoff=0.001
+            )
+            return source, await consumer.run(stop_when_idle=True)
+
+        source, stats = asyncio.run(scenario())
+        # O primeiro pedido esgota as tentativas e fica para ser reentregue
+        assert stats.failed == 1 and stats.emitted == 2
+        assert stats.acked == 2 and source.acked == {1, 2}
+
+
+    def test_failed_write_after_authorization_does_not_emit_again(self):
+        emissor = _CountingEmissor()
+        repository = _FlakyRepository(failures=2)
+
+        async def scenario():
+            source = InMemoryOrderSource()
+            source.put(_order(1))
+            consumer = OrderEventConsumer(
+                source, _factory(AsyncEmitInvoiceUseCase(emissor, repository)), retry_backoff=0.001
+            )
+            return await consumer.run(stop_when_idle=True)
+
+        stats = asyncio.run(scenario())
+        assert stats.emitted == 1 and stats.failed == 0
+        assert emissor.calls == 1
+        [nota] = repository.store.list_all()
+        assert nota.chave_acesso == "1".zfill(44)
+
+    def test_domain_error_is_not_retried(self):
+        emissor = _CountingEmissor(DomainException("Rejeição 539: duplicidade de NF-e"))
+
+        async def scenario():
+            source = InMemoryOrderSource()
+            source.put(_order(1))
+            use_case = AsyncEmitInvoiceUseCase(emissor, AsyncInMemoryRepository(InMemoryRepository()))
+            consumer = OrderEventConsumer(source, _factory(use_case), retry_backoff=0.001)
+            return await consumer.run(stop_when_idle=True)
+
+        stats = asyncio.run(scenario())
+        assert stats.rejected == 1 and stats.acked == 1
+        assert emissor.calls == 1
+
+
+class TestJsonLinesOrderSource:
+    def test_resumes_after_last_contiguous_ack(self, tmp_path):
+        path = tmp_path / "orders.ndjson"
+        path.write_text("".join(json.dumps(_order(i)) + "\n" for i in range(5)), encoding="utf-8")
+
+        async def first_run():
+            source = JsonLinesOrderSource(str(path))
+            messages = await source.fetch(10)
+            # Linhas 0, 1 e 3 concluídas; 2 ainda em voo
+            await source.ack([messages[3], messages[0], messages[1]])
+            await source.close()
+            return source.committed
+
+        async def second_run():
+            source = JsonLinesOrderSource(str(path))
+            messages = await source.fetch(10)
+            await source.close()
+            return [m.pedido_id for m in messages]
+
+        assert asyncio.run(first_run()) == 2
+        assert asyncio.run(second_run()) == ["2", "3", "4"]
+
+    def test_backfill_from_file(self, tmp_path):
+        path = tmp_path / "orders.ndjson"
+        path.write_text("".join(json.dumps(_order(i)) + "\n" for i in range(20)) + "not json\n", encoding="utf-8")
+
+        async def scenario():
+            source = JsonLinesOrderSource(str(path))
+            stats = await OrderEventConsumer(source, _factory(_RecordingUseCase()), workers=3).run(stop_when_idle=True)
+            await source.close()
+            return stats, source.committed
+
+        stats, committed = asyncio.run(scenario())
+        assert stats.emitted == 20 and stats.invalid == 1
+        assert committed == 21
+
+    def test_failed_order_is_redelivered_after_restart(self, tmp_path):
+        path = tmp_path / "orders.ndjson"
+        path.write_text("".join(json.dumps(_order(i)) + "\n" for i in range(3)), encoding="utf-8")
+
+        async def run(use_case):
+            source = JsonLinesOrderSource(str(path))
+            consumer = OrderEventConsumer(source, _factory(use_case), workers=1, max_retries=0)
+            stats = await consumer.run(stop_when_idle=True)
+            await source.close()
+            return stats, source.committed
+
+        stats, committed = asyncio.run(run(_RecordingUseCase(failures=1)))
+        assert stats.failed == 1 and committed == 0
+
+        stats, committed = asyncio.run(run(_RecordingUseCase()))
+        assert stats.emitted == 3 and committed == 3
+
+
+class TestBackfillCli:
+    def test_uses_the_container_built_from_settings(self, tmp_path, monkeypatch):
+        db = tmp_path / "invoice.db"
+        engine = create_engine(f"sqlite:///{db}")
+        Base.metadata.create_all(engine)
+        path = tmp_path / "orders.ndjson"
+        path.write_text("".join(json.dumps(_order(i)) + "\n" for i in range(3)), encoding="utf-8")
+        monkeypatch.setenv("DATABASE_URL", f"sqlite:///{db}")
+        monkeypatch.delenv("ASYNC_DATABASE_URL", raising=False)
+
+        args = argparse.Namespace(path=str(path), offset_file=None, workers=2, follow=False)
+        stats = asyncio.run(_backfill(args))
+
+        assert stats.emitted == 3
+        with engine.connect() as connection:
+            assert connection.execute(select(func.count()).select_from(NotaFiscalModel)).scalar_one() == 3
+        engine.dispose()
@@ -0,0 +1,220 @@
+import asyncio
+import json
+import threading
+import time
+from uuid import uuid4
+
+import pytest
+
+from core.events.domain_events import CCeRegistrada, NotaCancelada, NotaEmitida
+from infrastructure.messaging.event_publisher import (
+    OVERFLOW_BLOCK,
+    OVERFLOW_DROP_NEWEST,
+    OVERFLOW_DROP_OLDEST,
+    MicroBatchEventPublisher,
+)
+from infrastructure.messaging.transports import EventTransport, InProcessTransport, JsonLinesFileTransport
+
+
+def _event(seq: int = 0) -> NotaEmitida:
+    return NotaEmitida(
+        nota_id=uuid4(),
+        chave_acesso=f"{seq:044d}",
+        emitente_cnpj="12345678000195",
+        protocolo_autorizacao="P",
+        valor_total=10.0,
+    )
+
+
+class _RecordingTransport(EventTransport):
+    def __init__(self, delay: float = 0.0, failures: int = 0):
+        self.batches = []
+        self.delay = delay
+        self.failures = failures
+        self.released = threading.Event()
+        self.released.set()
+
+    def send_batch(self, events):
+        self.released.wait()
+        time.sleep(self.delay)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("broker indisponível")
+        self.batches.append(list(events))
+
+
+@pytest.fixture
+def publishers():
+    started = []
+    yield started
+    for publisher in started:
+        publisher.stop()
+
+
+def _start(publishers, transport, **kwargs):
+    publisher = MicroBatchEventPublisher(transport, **kwargs)
+    publisher.start()
+    publishers.append(publisher)
+    return publisher
+
+
+class TestMicroBatchEventPublisher:
+    def test_flushes_full_batches_by_size(self, publishers):
+        transport = _RecordingTransport()
+        transport.released.clear()
+        publisher = _start(publishers, transport, max_batch_size=10, flush_interval=5.0)
+        for i in range(30):
+            publisher.publish(_event(i))
+        transport.released.set()
+        publisher.flush()
+
+        # O primeiro evento pode sair sozinho antes de o buffer encher
+        assert sum(len(b) for b in transport.batches) == 30
+        assert max(len(b) for b in transport.batches) == 10
+
+    def test_flushes_partial_batch_after_time_window(self, publishers):
+        transport = _RecordingTransport()
+        publisher = _start(publishers, transport, max_batch_size=100, flush_interval=0.05)
+        for i in range(3):
+            publisher.publish(_event(i))
+
+        deadline = time.monotonic() + 2
+        while not transport.batches and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert [len(b) for b in transport.batches] == [3]
+
+    def test_publish_does_not_wait_for_slow_transport(self, publishers):
+        transport = _RecordingTransport(delay=0.2)
+        publisher = _start(publishers, transport, max_batch_size=1, flush_interval=0.0)
+
+        start = time.perf_counter()
+        for i in range(5):
+            publisher.publish(_event(i))
+        elapsed = time.perf_counter() - start
+
+        assert elapsed < 0.1
+
+    def test_full_queue_drops_oldest_by_default(self):
+        transport = _RecordingTransport()
+        publisher = MicroBatchEventPublisher(transport, max_queue_size=2, overflow=OVERFLOW_DROP_OLDEST)
+        events = [_event(i) for i in range(3)]
+        results = [publisher.publish(e) for e in events]
+        publisher.start()
+        publisher.stop()
+
+        assert results == [True, True, True]
+        assert publisher.dropped == 1
+        assert [e.chave_acesso for b in transport.batches for e in b] == [e.chave_acesso for e in events[1:]]
+
+    def test_full_queue_can_reject_newest(self):
+        transport = _RecordingTransport()
+        publisher = MicroBatchEventPublisher(transport, max_queue_size=2, overflow=OVERFLOW_DROP_NEWEST)
+        results = [publisher.publish(_event(i)) for i in range(3)]
+
+        assert results == [True, True, False]
+        assert publisher.dropped == 1
+
+    def test_failed_batch_is_retried(self, publishers):
+        transport = _RecordingTransport(failures=2)
+        publisher = _start(publishers, transport, retry_backoff=0.001)
+        publisher.publish(_event())
+        publisher.flush()
+
+        assert len(transport.batches) == 1
+        assert publisher.delivered == 1 and publisher.failed == 0
+
+    def test_batch_is_dropped_after_retries(self, publishers):
+        transport = _RecordingTransport(failures=10)
+        publisher = _start(publishers, transport, max_retries=1, retry_backoff=0.001)
+        publisher.publish(_event())
+        publisher.flush()
+
+        assert transport.batches == []
+        assert publisher.failed == 1
+
+    def test_stop_sends_buffered_events(self):
+        transport = _RecordingTransport()
+        publisher = MicroBatchEventPublisher(transport, flush_interval=10.0)
+        publisher.start()
+        publisher.publish(_event())
+        publisher.stop()
+
+        assert sum(len(b) for b in transport.batches) == 1
+
+    def test_blocking_overflow_does_not_stall_the_event_loop(self):
+        publisher = MicroBatchEventPublisher(
+            _RecordingTransport(), max_queue_size=1, overflow=OVERFLOW_BLOCK, block_timeout=0.2
+        )
+
+        async def scenario():
+            start = time.perf_counter()
+            results = [publisher.publish(_event(i)) for i in range(2)]
+            elapsed = time.perf_counter() - start
+            # A espera continua fora do loop e termina descartando o evento
+            await asyncio.sleep(0.4)
+            return results, elapsed
+
+        results, elapsed = asyncio.run(scenario())
+        assert results == [True, True]
+        assert elapsed < 0.1
+        assert publisher.published == 1 and publisher.dropped == 1
+
+    def test_blocking_overflow_waits_outside_an_event_loop(self):
+        publisher = MicroBatchEventPublisher(
+            _RecordingTransport(), max_queue_size=1, overflow=OVERFLOW_BLOCK, block_timeout=0.05
+        )
+        results = [publisher.publish(_event(i)) for i in range(2)]
+
+        assert results == [True, False]
+        assert publisher.dropped == 1
+
+    def test_stop_does_not_hang_on_a_full_queue(self):
+        transport = _RecordingTransport()
+        transport.released.clear()
+        publisher = MicroBatchEventPublisher(transport, max_batch_size=1, max_queue_size=2)
+        publisher.start()
+        for i in range(3):
+            publisher.publish(_event(i))
+        time.sleep(0.05)
+
+        start = time.perf_counter()
+        publisher.stop(timeout=0.1)
+        elapsed = time.perf_counter() - start
+        transport.released.set()
+
+        assert elapsed < 1.0
+        assert publisher.dropped >= 1
+
+    def test_invalid_overflow_policy(self):
+        with pytest.raises(ValueError):
+            MicroBatchEventPublisher(_RecordingTransport(), overflow="ignore")
+
+
+class TestTransports:
+    def test_in_process_transport_fans_out_to_subscribers(self):
+        transport = InProcessTransport()
+        received_a, received_b = [], []
+        transport.subscribe(received_a.extend)
+        transport.subscribe(received_b.extend)
+        events = [_event(1), _event(2)]
+
+        transport.send_batch(events)
+
+        assert received_a == received_b == events
+
+    def test_json_lines_transport_appends_one_line_per_event(self, tmp_path):
+        path = tmp_path / "events.ndjson"
+        transport = JsonLinesFileTransport(str(path))
+        nota_id = uuid4()
+        transport.send_batch([
+            NotaCancelada(nota_id=nota_id, chave_acesso="1" * 44, emitente_cnpj="12345678000195", protocolo="P1"),
+            CCeRegistrada(nota_id=nota_id, chave_acesso="1" * 44, emitente_cnpj="12345678000195",
+                          protocolo_cce="C1", texto_correcao="Ajuste"),
+        ])
+        transport.close()
+
+        lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+        assert [line["tipo"] for line in lines] == ["NotaCancelada", "CCeRegistrada"]
+        assert lines[0]["nota_id"] == str(nota_id)
+        assert lines[1]["texto_correcao"] == "Ajuste"
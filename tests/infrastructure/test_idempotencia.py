@@ -0,0 +1,326 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from core.exceptions.domain_exceptions import (
+    IdempotenciaChaveReutilizadaException, IdempotenciaEmAndamentoException,
+)
+from core.services.persistence.base import Base
+from core.services.persistence.idempotencia_model import IdempotenciaModel
+from core.services.ports.idempotencia_port import RespostaIdempotente
+from infrastructure.adapters.idempotencia import CoordenadorIdempotencia
+from infrastructure.adapters.idempotencia_sqlalchemy import IdempotenciaSqlAlchemyAdapter, idempotencia_store
+from tests.conftest import InMemoryIdempotencia
+
+CRIADA = RespostaIdempotente(201, b'{"id":"1"}', {"Location": "/invoices/1"})
+
+
+class _Operacao:
+    def __init__(self, resposta=CRIADA, erro=None, atraso=0.0):
+        self.resposta = resposta
+        self.erro = erro
+        self.atraso = atraso
+        self.chamadas = 0
+
+    async def __call__(self):
+        self.chamadas += 1
+        await asyncio.sleep(self.atraso)
+        if self.erro is not None:
+            raise self.erro
+        return self.resposta
+
+
+class _Relogio:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+class _ConcluirFalha(InMemoryIdempotencia):
+    def __init__(self, falhas):
+        super().__init__()
+        self.falhas = falhas
+
+    async def concluir(self, chave, resposta):
+        if self.falhas:
+            self.falhas -= 1
+            raise ConnectionError("banco indisponível")
+        await super().concluir(chave, resposta)
+
+
+class TestCoordenadorIdempotencia:
+    def test_runs_once_and_replays_completed_key_from_memory(self):
+        store = InMemoryIdempotencia()
+        coordenador = CoordenadorIdempotencia(store.factory())
+        operacao = _Operacao()
+
+        async def scenario():
+            primeira = await coordenador.executar("k", "fp", operacao)
+            chamadas = store.chamadas
+            segunda = await coordenador.executar("k", "fp", operacao)
+            return primeira, segunda, chamadas
+
+        primeira, segunda, chamadas = asyncio.run(scenario())
+        assert primeira == (CRIADA, False)
+        assert segunda == (CRIADA, True)
+        assert operacao.chamadas == 1
+        # A repetição não toca o registro durável
+        assert store.chamadas == chamadas
+        assert coordenador.stats()["hits"] == 1
+
+    def test_concurrent_duplicates_wait_for_the_first_execution(self):
+        coordenador = CoordenadorIdempotencia(InMemoryIdempotencia().factory())
+        operacao = _Operacao(atraso=0.05)
+
+        async def scenario():
+            return await asyncio.gather(*(coordenador.executar("k", "fp", operacao) for _ in range(5)))
+
+        resultados = asyncio.run(scenario())
+        assert operacao.chamadas == 1
+        assert all(r.resposta == CRIADA for r in resultados)
+        assert [r.repetida for r in resultados].count(False) == 1
+        assert coordenador.stats()["waits"] == 4
+
+    def test_waiter_retries_when_the_first_execution_fails(self):
+        store = InMemoryIdempotencia()
+        coordenador = CoordenadorIdempotencia(store.factory())
+        falha = _Operacao(erro=ConnectionError("SEFAZ indisponível"), atraso=0.05)
+        sucesso = _Operacao()
+
+        async def scenario():
+            primeira = asyncio.create_task(coordenador.executar("k", "fp", falha))
+            await asyncio.sleep(0.01)
+            segunda = await coordenador.executar("k", "fp", sucesso)
+            with pytest.raises(ConnectionError):
+                await primeira
+            return segunda
+
+        assert asyncio.run(scenario()) == (CRIADA, False)
+        assert falha.chamadas == sucesso.chamadas == 1
+        assert store.registros["k"].resposta == CRIADA
+
+    def test_server_error_is_not_stored(self):
+        store = InMemoryIdempotencia()
+        coordenador = CoordenadorIdempotencia(store.factory())
+        erro = RespostaIdempotente(503, b"{}", {})
+
+        async def scenario():
+            primeira = await coordenador.executar("k", "fp", _Operacao(resposta=erro))
+            segunda = await coordenador.executar("k", "fp", _Operacao())
+            return primeira, segunda
+
+        assert asyncio.run(scenario()) == ((erro, False), (CRIADA, False))
+
+    def test_completed_key_is_read_from_the_store_after_memory_expires(self):
+        store = InMemoryIdempotencia()
+        relogio = _Relogio()
+        coordenador = CoordenadorIdempotencia(store.factory(), ttl=10, clock=relogio)
+        operacao = _Operacao()
+
+        async def scenario():
+            await coordenador.executar("k", "fp", operacao)
+            relogio.agora = 11
+            return await coordenador.executar("k", "fp", operacao)
+
+        assert asyncio.run(scenario()) == (CRIADA, True)
+        assert operacao.chamadas == 1
+        assert coordenador.stats()["stored_hits"] == 1
+
+    def test_reused_key_with_other_fingerprint_is_rejected(self):
+        coordenador = CoordenadorIdempotencia(InMemoryIdempotencia().factory())
+
+        async def scenario():
+            await coordenador.executar("k", "fp", _Operacao())
+            await coordenador.executar("k", "outro", _Operacao())
+
+        with pytest.raises(IdempotenciaChaveReutilizadaException):
+            asyncio.run(scenario())
+
+    def test_key_in_flight_on_another_instance_raises(self):
+        store = InMemoryIdempotencia()
+        coordenador = CoordenadorIdempotencia(store.factory())
+        operacao = _Operacao()
+
+        async def scenario():
+            await store.reservar("k", "fp")
+            await coordenador.executar("k", "fp", operacao)
+
+        with pytest.raises(IdempotenciaEmAndamentoException):
+            asyncio.run(scenario())
+        assert operacao.chamadas == 0
+        assert coordenador.stats()["in_flight"] == 0
+
+    def test_completion_is_retried_before_giving_up(self):
+        store = _ConcluirFalha(falhas=2)
+        coordenador = CoordenadorIdempotencia(store.factory(), concluir_backoff=0)
+        operacao = _Operacao()
+
+        assert asyncio.run(coordenador.executar("k", "fp", operacao)) == (CRIADA, False)
+        assert operacao.chamadas == 1
+        assert store.registros["k"].resposta == CRIADA
+
+    def test_unstored_response_keeps_the_key_reserved_on_other_instances(self):
+        store = _ConcluirFalha(falhas=3)
+        primeira = CoordenadorIdempotencia(store.factory(), concluir_tentativas=3, concluir_backoff=0)
+        outra_instancia = CoordenadorIdempotencia(store.factory())
+        operacao = _Operacao()
+
+        async def scenario():
+            resultado = await primeira.executar("k", "fp", operacao)
+            # A mesma instância ainda responde pelo LRU
+            repetida = await primeira.executar("k", "fp", operacao)
+            with pytest.raises(IdempotenciaEmAndamentoException):
+                await outra_instancia.executar("k", "fp", operacao)
+            return resultado, repetida
+
+        assert asyncio.run(scenario()) == ((CRIADA, False), (CRIADA, True))
+        assert operacao.chamadas == 1
+        assert store.registros["k"].resposta is None
+
+    def test_purge_removes_keys_older_than_the_retention(self):
+        store = InMemoryIdempotencia()
+        coordenador = CoordenadorIdempotencia(store.factory(), retencao=3600)
+
+        async def scenario():
+            await store.reservar("antiga", "fp")
+            await store.reservar("nova", "fp")
+            antiga = store.registros["antiga"]
+            store.registros["antiga"] = antiga._replace(criado_em=antiga.criado_em - timedelta(hours=2))
+            return await coordenador.purgar()
+
+        assert asyncio.run(scenario()) == 1
+        assert list(store.registros) == ["nova"]
+
+    def test_started_coordinator_purges_periodically_until_stopped(self):
+        store = InMemoryIdempotencia()
+        coordenador = CoordenadorIdempotencia(store.factory(), retencao=0, purge_interval=0.01)
+
+        async def scenario():
+            await coordenador.start()
+            await store.reservar("k", "fp")
+            for _ in range(100):
+                if not store.registros:
+                    break
+                await asyncio.sleep(0.01)
+            await coordenador.stop()
+            await store.reservar("depois", "fp")
+            await asyncio.sleep(0.05)
+
+        asyncio.run(scenario())
+        assert list(store.registros) == ["depois"]
+
+
+def _run(scenario, url=None):
+    async def main():
+        if url:
+            # Uma conexão por sessão, como em produção
+            engine = create_async_engine(url)
+        else:
+            engine = create_async_engine(
+                "sqlite+aiosqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+            )
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        try:
+            return await scenario(async_sessionmaker(engine, expire_on_commit=False))
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(main())
+
+
+class TestIdempotenciaSqlAlchemy:
+    def test_second_reservation_sees_the_first(self):
+        async def scenario(factory):
+            async with factory() as session:
+                primeira = await IdempotenciaSqlAlchemyAdapter(session).reservar("k", "fp")
+            async with factory() as session:
+                segunda = await IdempotenciaSqlAlchemyAdapter(session).reservar("k", "fp")
+            return primeira, segunda
+
+        primeira, segunda = _run(scenario)
+        assert primeira is None
+        assert segunda.fingerprint == "fp"
+        assert segunda.resposta is None
+
+    def test_completed_reservation_returns_the_stored_response(self):
+        async def scenario(factory):
+            async with factory() as session:
+                adapter = IdempotenciaSqlAlchemyAdapter(session)
+                await adapter.reservar("k", "fp")
+                await adapter.concluir("k", CRIADA)
+            async with factory() as session:
+                return await IdempotenciaSqlAlchemyAdapter(session).reservar("k", "fp")
+
+        assert _run(scenario).resposta == CRIADA
+
+    def test_released_key_can_be_reserved_again(self):
+        async def scenario(factory):
+            async with factory() as session:
+                adapter = IdempotenciaSqlAlchemyAdapter(session)
+                await adapter.reservar("k", "fp")
+                await adapter.liberar("k")
+                return await adapter.reservar("k", "fp")
+
+        assert _run(scenario) is None
+
+    def test_old_unfinished_reservation_is_not_taken_over(self):
+        async def scenario(factory):
+            async with factory() as session:
+                adapter = IdempotenciaSqlAlchemyAdapter(session)
+                await adapter.reservar("k", "fp")
+                await session.execute(
+                    update(IdempotenciaModel).values(criado_em=datetime.utcnow() - timedelta(hours=1))
+                )
+                await session.commit()
+                return await adapter.reservar("k", "fp")
+
+        # A operação pode ter acontecido: a chave continua em andamento
+        registro = _run(scenario)
+        assert registro.fingerprint == "fp"
+        assert registro.resposta is None
+
+    def test_purge_removes_only_keys_older_than_the_cutoff(self):
+        async def scenario(factory):
+            async with factory() as session:
+                adapter = IdempotenciaSqlAlchemyAdapter(session)
+                for chave in ("antiga", "antiga-em-andamento", "nova"):
+                    await adapter.reservar(chave, "fp")
+                await adapter.concluir("antiga", CRIADA)
+                await session.execute(
+                    update(IdempotenciaModel)
+                    .where(IdempotenciaModel.chave != "nova")
+                    .values(criado_em=datetime.utcnow() - timedelta(days=2))
+                )
+                await session.commit()
+                removidas = await adapter.purgar(datetime.utcnow() - timedelta(days=1))
+                restantes = (await session.execute(select(IdempotenciaModel.chave))).scalars().all()
+            return removidas, restantes
+
+        assert _run(scenario) == (2, ["nova"])
+
+    def test_concurrent_duplicates_run_the_operation_once(self, tmp_path):
+        operacao = _Operacao(atraso=0.05)
+
+        async def scenario(factory):
+            instancias = [CoordenadorIdempotencia(idempotencia_store(factory)) for _ in range(2)]
+            resultados = await asyncio.gather(
+                *(instancias[i % 2].executar("k", "fp", operacao) for i in range(6)),
+                return_exceptions=True,
+            )
+            async with factory() as session:
+                armazenada = await IdempotenciaSqlAlchemyAdapter(session).reservar("k", "fp")
+            return resultados, armazenada
+
+        resultados, armazenada = _run(scenario, f"sqlite+aiosqlite:///{tmp_path / 'idempotencia.db'}")
+        assert operacao.chamadas == 1
+        assert armazenada.resposta == CRIADA
+        # Mesma instância espera; a outra instância recebe 409 até a primeira concluir
+        assert all(r == (CRIADA, True) or r == (CRIADA, False) or isinstance(r, IdempotenciaEmAndamentoException)
+                   for r in resultados)
@@ -0,0 +1,269 @@
+import os
+import re
+import warnings
+from datetime import datetime, timedelta
+
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import Column, MetaData, Table, column, create_engine, create_mock_engine, insert, inspect, select, table
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import sessionmaker
+
+from application.mappers.nota_fiscal_mapper import NotaFiscalMapper
+from core.enum.status_nota import StatusNota
+from core.services.persistence import emissao_job_model, idempotencia_model  # noqa: F401
+from core.services.persistence.base import Base
+from core.services.persistence.json_columns import campo_json
+from core.services.persistence.item_da_nota_model import ItemDaNotaModel
+from core.services.persistence.nota_fiscal_model import NotaFiscalModel
+from core.services.ports.nota_fiscal_repository_port import FiltroNotas
+from core.value_objects.endereço import Endereco
+from core.value_objects.imposto import Imposto
+from infrastructure.adapters.nota_fiscal_sqlalchemy import NotaFiscalSqlAlchemyAdapter, _condicoes
+from tests.infrastructure.test_nota_fiscal_sqlalchemy import _make_nota
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+N = NotaFiscalModel
+# Índices que só existem no PostgreSQL (GIN)
+SOMENTE_POSTGRES = {"ix_nota_fiscal_destinatario_endereco_gin"}
+
+
+def _config(connection) -> Config:
+    config = Config(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT, "alembic"))
+    config.attributes["connection"] = connection
+    return config
+
+
+def _migrate(engine, revision="head", down=False):
+    with engine.begin() as connection:
+        config = _config(connection)
+        (command.downgrade if down else command.upgrade)(config, revision)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'invoice.db'}")
+    yield engine
+    engine.dispose()
+
+
+def _diferencas(engine):
+    with engine.connect() as connection, warnings.catch_warnings():
+        # SQLite não reflete índices de expressão; eles são conferidos à parte
+        warnings.simplefilter("ignore")
+        diffs = compare_metadata(MigrationContext.configure(connection), Base.metadata)
+    return [d for d in diffs if not (d[0] == "add_index" and d[1].name in SOMENTE_POSTGRES)]
+
+
+def _indices(engine, tabela="nota_fiscal"):
+    with engine.connect() as connection:
+        return {
+            nome for (nome,) in connection.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?", (tabela,)
+            )
+        }
+
+
+class TestMigrationChain:
+    def test_chain_is_linear(self):
+        script = ScriptDirectory.from_config(_config(None))
+        assert len(script.get_heads()) == 1
+        assert [r.revision for r in script.walk_revisions()][-1] == "146d52710ce9"
+
+    def test_upgrade_head_matches_the_models(self, engine):
+        _migrate(engine)
+        assert _diferencas(engine) == []
+        esperados = {ix.name for ix in N.__table__.indexes} - SOMENTE_POSTGRES
+        assert esperados <= _indices(engine)
+
+    def test_upgrade_on_tables_created_by_the_app(self, engine):
+        # A aplicação cria as tabelas no startup (create_all) antes do alembic
+        Base.metadata.create_all(engine)
+        _migrate(engine)
+        assert _diferencas(engine) == []
+
+    def test_upgrade_backfills_valor_total(self, engine):
+        _migrate(engine, "9d4e8c1a6f23")
+        nota_row, item_rows = NotaFiscalMapper.to_rows(_make_nota(1, itens=3))
+        del nota_row["valor_total"]
+        with engine.begin() as connection:
+            # Tabela como era antes da coluna valor_total
+            antes = table("nota_fiscal", *(column(k, N.__table__.c[k].type) for k in nota_row))
+            connection.execute(insert(antes), [nota_row])
+            connection.execute(insert(ItemDaNotaModel), item_rows)
+
+        _migrate(engine)
+
+        with engine.connect() as connection:
+            assert connection.execute(select(N.valor_total)).scalar_one() == 30.0
+
+    @pytest.mark.parametrize("revisao, tipo", [("146d52710ce9", "STATUS_NOTA"), ("5b0f2a9c7e41", "STATUS_JOB")])
+    def test_enum_columns_do_not_emit_create_type(self, revisao, tipo):
+        # No PostgreSQL o tipo é criado à parte com checkfirst; um CREATE TYPE
+        # emitido pelo create_table falharia em bancos criados pelo create_all
+        enum = getattr(ScriptDirectory.from_config(_config(None)).get_revision(revisao).module, tipo)
+        ddl = []
+        mock = create_mock_engine("postgresql://", lambda sql, *a, **kw: ddl.append(str(sql.compile(dialect=mock.dialect))))
+        Table("t", MetaData(), Column("status", enum)).create(mock, checkfirst=False)
+        assert not any(d.strip().startswith("CREATE TYPE") for d in ddl)
+        assert any(d.strip().startswith("CREATE TABLE") and enum.name in d for d in ddl)
+
+    def test_downgrade_to_base_removes_everything(self, engine):
+        _migrate(engine)
+        _migrate(engine, "base", down=True)
+        assert set(inspect(engine).get_table_names()) == {"alembic_version"}
+
+
+def _seed(engine, total=300):
+    _migrate(engine)
+    session = sessionmaker(bind=engine)()
+    adapter = NotaFiscalSqlAlchemyAdapter(session)
+    ufs = ("SP", "RJ", "MG", "PR")
+    notas = []
+    for i in range(total):
+        nota = _make_nota(i)
+        nota.destinatario_endereco = Endereco("Rua Y", "2", f"Cidade {i % 7}", ufs[i % 4], "20020000")
+        nota.impostos_totais = Imposto(icms=float(i), ipi=0.0, pis=0.0, cofins=0.0)
+        notas.append(nota)
+    adapter.save_many(notas)
+    session.close()
+
+
+def _plano(engine, stmt) -> str:
+    compiled = stmt.compile(engine)
+    with engine.connect() as connection:
+        rows = connection.exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {compiled}", tuple(compiled.params[k] for k in compiled.positiontup)
+        )
+        return " | ".join(row[-1] for row in rows)
+
+
+def _usa_indice(plano: str, indice: str) -> bool:
+    return re.search(rf"USING (COVERING )?INDEX {indice}\b", plano) is not None
+
+
+class TestLookupIndexesAreUsed:
+    """
+    EXPLAIN QUERY PLAN no SQLite migrado: cada consulta comum é atendida por
+    um índice, sem varredura da tabela.
+    """
+    @pytest.fixture(autouse=True)
+    def seeded(self, engine):
+        _seed(engine)
+        self.engine = engine
+
+    @pytest.mark.parametrize("coluna, valor, indice", [
+        ("emitente_cnpj", "12345678000195", "ix_nota_fiscal_emitente_emissao"),
+        ("destinatario_cnpj", "98765432000198", "ix_nota_fiscal_destinatario_emissao"),
+        ("status", StatusNota.CANCELADA.value, "ix_nota_fiscal_status_emissao"),
+    ])
+    def test_equality_lookups(self, coluna, valor, indice):
+        plano = _plano(self.engine, select(N.id).where(getattr(N, coluna) == valor))
+        assert _usa_indice(plano, indice)
+
+    def test_emission_date_range(self):
+        inicio = datetime(2025, 1, 1)
+        plano = _plano(self.engine, select(N.id).where(
+            N.data_emissao >= inicio, N.data_emissao < inicio + timedelta(hours=1)
+        ))
+        assert _usa_indice(plano, "ix_nota_fiscal_emissao")
+
+    def test_destinatario_uf_and_municipio(self):
+        endereco = N.destinatario_endereco
+        plano = _plano(self.engine, select(N.id).where(
+            campo_json(endereco, "uf") == "SP", campo_json(endereco, "municipio") == "Cidade 0"
+        ))
+        assert _usa_indice(plano, "ix_nota_fiscal_destinatario_uf_municipio")
+
+    def test_icms_total_range(self):
+        plano = _plano(self.engine, select(N.id).where(campo_json(N.impostos_totais, "icms", numerico=True) >= 290))
+        assert _usa_indice(plano, "ix_nota_fiscal_icms_total")
+
+    @pytest.mark.parametrize("filtro, indices", [
+        # Dois filtros por igualdade: qualquer um dos dois índices entrega a página ordenada
+        (FiltroNotas(emitente_cnpj="12345678000195", status=StatusNota.CANCELADA, emitida_de=datetime(2025, 1, 1, 1)),
+         ("ix_nota_fiscal_emitente_emissao", "ix_nota_fiscal_status_emissao")),
+        (FiltroNotas(destinatario_cnpj="98765432000198", valor_total_min=5), ("ix_nota_fiscal_destinatario_emissao",)),
+        (FiltroNotas(status=StatusNota.AUTORIZADA, icms_max=100), ("ix_nota_fiscal_status_emissao",)),
+        (FiltroNotas(emitida_de=datetime(2025, 1, 1), emitida_ate=datetime(2025, 1, 2)), ("ix_nota_fiscal_emissao",)),
+        (FiltroNotas(), ("ix_nota_fiscal_emissao",)),
+    ])
+    def test_search_pages_come_ordered_from_a_composite_index(self, filtro, indices):
+        stmt = select(N).where(*_condicoes(filtro)).order_by(N.data_emissao, N.id).limit(50)
+        plano = _plano(self.engine, stmt)
+        assert any(_usa_indice(plano, indice) for indice in indices), plano
+        assert "TEMP B-TREE" not in plano
+
+    def test_expression_filter_returns_the_right_notas(self):
+        endereco = N.destinatario_endereco
+        with self.engine.connect() as connection:
+            total = len(connection.execute(select(N.id).where(campo_json(endereco, "uf") == "SP")).all())
+            icms = connection.execute(
+                select(N.id).where(campo_json(N.impostos_totais, "icms", numerico=True) >= 290)
+            ).all()
+        assert total == 75
+        assert len(icms) == 10
+
+
+@pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL não definido")
+class TestPostgresIndexes:
+    """
+    Mesmas verificações num PostgreSQL local (banco descartável em
+    TEST_POSTGRES_URL), incluindo a conversão para JSONB e o índice GIN.
+    """
+    @pytest.fixture(autouse=True)
+    def seeded(self):
+        engine = create_engine(os.environ["TEST_POSTGRES_URL"])
+        _migrate(engine, "base", down=True)
+        _seed(engine, total=2000)
+        self.engine = engine
+        yield
+        _migrate(engine, "base", down=True)
+        engine.dispose()
+
+    def test_json_columns_are_jsonb(self):
+        colunas = {c["name"]: c["type"] for c in inspect(self.engine).get_columns("nota_fiscal")}
+        assert isinstance(colunas["destinatario_endereco"], JSONB)
+
+    @pytest.mark.parametrize("clausula, indice", [
+        (lambda: N.destinatario_cnpj == "98765432000198", "ix_nota_fiscal_destinatario_emissao"),
+        (lambda: campo_json(N.destinatario_endereco, "uf") == "SP", "ix_nota_fiscal_destinatario_uf_municipio"),
+        (lambda: campo_json(N.impostos_totais, "icms", numerico=True) >= 1990, "ix_nota_fiscal_icms_total"),
+        (lambda: N.destinatario_endereco.contains({"uf": "SP"}), "ix_nota_fiscal_destinatario_endereco_gin"),
+    ])
+    def test_lookups_use_indexes(self, clausula, indice):
+        assert indice in _explain_pg(self.engine, select(N.id).where(clausula()))
+
+    def test_count_estimate_uses_the_planner(self):
+        with sessionmaker(bind=self.engine)() as session:
+            contagem = NotaFiscalSqlAlchemyAdapter(session).count(FiltroNotas(), estimate=True)
+        assert not contagem.exata
+        assert contagem.total >= 1000
+
+
+@pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL não definido")
+class TestPostgresMigrations:
+    def test_upgrade_on_tables_created_by_the_app(self):
+        engine = create_engine(os.environ["TEST_POSTGRES_URL"])
+        _migrate(engine, "base", down=True)
+        try:
+            # Tabelas e tipos enum criados pelo startup da aplicação
+            Base.metadata.create_all(engine)
+            _migrate(engine)
+            assert _diferencas(engine) == []
+        finally:
+            _migrate(engine, "base", down=True)
+            engine.dispose()
+
+
+def _explain_pg(engine, stmt) -> str:
+    # Tabela pequena: sem enable_seqscan = off o planner prefere seq scan mesmo com índice
+    compiled = stmt.compile(engine, compile_kwargs={"literal_binds": True})
+    with engine.connect() as connection:
+        connection.exec_driver_sql("SET enable_seqscan = off")
+        return "\n".join(r[0] for r in connection.exec_driver_sql(f"EXPLAIN {compiled}"))
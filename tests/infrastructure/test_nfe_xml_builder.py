@@ -0,0 +1,106 @@
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from core.entities.nota_fiscal import ItensColunares
+from core.value_objects.chave_acesso import ChaveAcesso
+from core.value_objects.cnpjcpf import CnpjCpf
+from infrastructure.external_services.nfe_xml_builder import DET, NFE_NS, NFeXmlBuilder, Tag, Field, compile_template
+from infrastructure.external_services.sefaz_client import SefazClient
+from tests.infrastructure.test_nota_fiscal_sqlalchemy import _make_nota
+
+NS = {"n": NFE_NS}
+
+
+@pytest.fixture
+def builder():
+    return NFeXmlBuilder()
+
+
+def _parse(xml: str) -> ET.Element:
+    return ET.fromstring(xml)
+
+
+class TestCompileTemplate:
+    def test_flattens_tags_attributes_and_fields(self):
+        template = compile_template(Tag("a", (Tag("b", (Field("x"),)), Tag("c", (Field("y", "%.2f"),))), attrs=(("n", Field("n", "%d")),)))
+
+        assert template.text == '<a n="%d"><b>%s</b><c>%.2f</c></a>'
+        assert template.fields == ("n", "x", "y")
+        assert template.render({"n": 1, "x": "v", "y": 2}) == '<a n="1"><b>v</b><c>2.00</c></a>'
+
+
+class TestNFeXmlBuilder:
+    def test_document_has_the_nfe_sections(self, builder):
+        root = _parse(builder.build(_make_nota(1, itens=3)))
+        inf = root.find("n:infNFe", NS)
+
+        assert [child.tag.split("}")[1] for child in inf] == ["ide", "emit", "dest", "det", "det", "det", "total"]
+        assert inf.get("Id") == "NFe" + "0" * 43 + "1"
+        assert inf.find("n:ide/n:cUF", NS).text == "35"
+        assert inf.find("n:ide/n:idDest", NS).text == "2"
+        assert inf.find("n:emit/n:CNPJ", NS).text == "12345678000195"
+        assert inf.find("n:emit/n:enderEmit/n:UF", NS).text == "SP"
+
+    def test_items_are_numbered_and_totals_add_up(self, builder):
+        nota = _make_nota(1, itens=4)
+        inf = _parse(builder.build(nota)).find("n:infNFe", NS)
+
+        assert [det.get("nItem") for det in inf.findall("n:det", NS)] == ["1", "2", "3", "4"]
+        assert inf.find("n:det/n:prod/n:vProd", NS).text == "10.00"
+        assert inf.find("n:total/n:ICMSTot/n:vProd", NS).text == "40.00"
+        assert inf.find("n:total/n:ICMSTot/n:vICMS", NS).text == "4.00"
+
+    def test_det_template_field_order_matches_positional_values(self):
+        assert len(DET.fields) == 22
+        assert DET.fields[:2] == ("nItem", "cProd") and DET.fields[-1] == "vCOFINS"
+
+    def test_text_is_escaped(self, builder):
+        nota = _make_nota(1)
+        nota.itens[0].descricao = 'Cabo <USB> & "adaptador"'
+
+        inf = _parse(builder.build(nota)).find("n:infNFe", NS)
+
+        assert inf.find("n:det/n:prod/n:xProd", NS).text == 'Cabo <USB> & "adaptador"'
+
+    def test_cpf_destinatario(self, builder):
+        nota = _make_nota(1)
+        nota.destinatario_cnpj = CnpjCpf("12345678909")
+
+        dest = _parse(builder.build(nota)).find("n:infNFe/n:dest", NS)
+
+        assert dest.find("n:CPF", NS).text == "12345678909"
+        assert dest.find("n:CNPJ", NS) is None
+
+    def test_numbering_comes_from_the_access_key(self, builder):
+        nota = _make_nota(1)
+        chave = ChaveAcesso.gerar("SP", nota.data_emissao, "12345678000195", 3, 4567, codigo=89)
+        nota.chave_acesso = chave.valor
+
+        ide = _parse(builder.build(nota)).find("n:infNFe/n:ide", NS)
+
+        assert ide.find("n:serie", NS).text == "3"
+        assert ide.find("n:nNF", NS).text == "4567"
+        assert ide.find("n:cNF", NS).text == "00000089"
+        assert ide.find("n:cDV", NS).text == chave.dv
+
+    def test_stub_sefaz_returns_a_valid_key_for_the_emitente(self, builder):
+        nota = _make_nota(1)
+        nota.chave_acesso = None
+
+        chave = ChaveAcesso.parse(SefazClient().send_xml(builder.build(nota)).access_key)
+
+        assert chave.uf == "SP"
+        assert chave.cnpj == "12345678000195"
+
+    def test_columnar_items_render_the_same_document(self, builder):
+        nota = _make_nota(1, itens=20)
+        colunar = _make_nota(1, itens=0)
+        colunar.id, colunar.data_emissao, colunar.itens = nota.id, nota.data_emissao, ItensColunares(nota.itens)
+
+        assert builder.build(colunar) == builder.build(nota)
+
+    def test_build_many_matches_build(self, builder):
+        notas = [_make_nota(i, itens=i + 1) for i in range(5)]
+
+        assert builder.build_many(notas) == [builder.build(n) for n in notas]
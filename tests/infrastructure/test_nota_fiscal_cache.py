@@ -0,0 +1,261 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from application.use_cases.cancel_invoice import AsyncCancelInvoiceUseCase, CancelInvoiceUseCase
+from application.use_cases.correct_invoice import CorrectionInvoiceUseCase
+from core.enum.status_nota import StatusNota
+from core.services.ports.cache_port import CacheCompartilhadoPort
+from core.services.ports.nota_fiscal_repository_port import AsyncNotaFiscalRepository, NotaFiscalRepository
+from infrastructure.adapters.nota_fiscal_cache import (
+    CachedAsyncNotaFiscalRepository,
+    CachedNotaFiscalRepository,
+    MemoriaCacheCompartilhado,
+    NotaCache,
+    build_nota_cache,
+)
+from tests.infrastructure.test_nota_fiscal_sqlalchemy import _make_nota
+
+
+class CountingRepository(NotaFiscalRepository):
+    """Stores copies, like a database would, and counts lookups."""
+
+    def __init__(self, notas=()):
+        self.rows = {}
+        self.ids = {}
+        self.reads = 0
+        for nota in notas:
+            self.save(nota)
+
+    def save(self, nota):
+        self.rows[nota.chave_acesso] = (nota.status, nota.protocolo_autorizacao, nota.protocolo_cce)
+        self.ids[nota.chave_acesso] = nota.id
+
+    def get_by_chave(self, chave_acesso, loading=None):
+        self.reads += 1
+        if chave_acesso not in self.rows:
+            return None
+        nota = _make_nota(int(chave_acesso))
+        nota.id = self.ids[chave_acesso]
+        nota.status, nota.protocolo_autorizacao, nota.protocolo_cce = self.rows[chave_acesso]
+        return nota
+
+    def list_all(self, loading=None):
+        return []
+
+    def list_page(self, limit, after=None, loading=None):
+        return []
+
+
+class AsyncCountingRepository(AsyncNotaFiscalRepository):
+    def __init__(self, inner: CountingRepository):
+        self.inner = inner
+
+    async def save(self, nota):
+        self.inner.save(nota)
+
+    async def get_by_chave(self, chave_acesso, loading=None):
+        return self.inner.get_by_chave(chave_acesso)
+
+    async def get_by_id(self, nota_id, loading=None):
+        return None
+
+    async def list_all(self, loading=None):
+        return []
+
+    async def list_page(self, limit, after=None, loading=None):
+        return []
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _chave(seq):
+    return f"{seq:044d}"
+
+
+def test_second_lookup_is_served_from_cache():
+    inner = CountingRepository([_make_nota(1)])
+    repo = CachedNotaFiscalRepository(inner, NotaCache())
+
+    first = repo.get_by_chave(_chave(1))
+    second = repo.get_by_chave(_chave(1))
+
+    assert inner.reads == 1
+    assert second.to_dict() == first.to_dict()
+    assert repo.cache.stats()["hits"] == 1
+    assert repo.cache.stats()["misses"] == 1
+
+
+def test_hits_return_independent_copies():
+    repo = CachedNotaFiscalRepository(CountingRepository([_make_nota(1)]), NotaCache())
+    repo.get_by_chave(_chave(1))
+
+    nota = repo.get_by_chave(_chave(1))
+    nota.status = StatusNota.CANCELADA
+    nota.itens.clear()
+
+    cached = repo.get_by_chave(_chave(1))
+    assert cached.status is StatusNota.AUTORIZADA
+    assert len(cached.itens) == 1
+
+
+def test_missing_notes_are_not_cached():
+    inner = CountingRepository()
+    repo = CachedNotaFiscalRepository(inner, NotaCache())
+
+    assert repo.get_by_chave(_chave(9)) is None
+    inner.save(_make_nota(9))
+    assert repo.get_by_chave(_chave(9)) is not None
+    assert inner.reads == 2
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    inner = CountingRepository([_make_nota(1)])
+    repo = CachedNotaFiscalRepository(inner, NotaCache(ttl=10, clock=clock))
+
+    repo.get_by_chave(_chave(1))
+    clock.now += 9.9
+    repo.get_by_chave(_chave(1))
+    assert inner.reads == 1
+
+    clock.now += 0.2
+    repo.get_by_chave(_chave(1))
+    assert inner.reads == 2
+    assert repo.cache.stats()["expirations"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    inner = CountingRepository([_make_nota(i) for i in range(3)])
+    repo = CachedNotaFiscalRepository(inner, NotaCache(max_entries=2))
+
+    repo.get_by_chave(_chave(0))
+    repo.get_by_chave(_chave(1))
+    repo.get_by_chave(_chave(0))  # 1 passa a ser o menos usado
+    repo.get_by_chave(_chave(2))
+
+    assert len(repo.cache) == 2
+    assert repo.cache.stats()["evictions"] == 1
+    reads = inner.reads
+    repo.get_by_chave(_chave(0))
+    assert inner.reads == reads
+    repo.get_by_chave(_chave(1))
+    assert inner.reads == reads + 1
+
+
+def test_cancel_invalidates_the_cached_note():
+    inner = CountingRepository([_make_nota(1)])
+    repo = CachedNotaFiscalRepository(inner, NotaCache())
+    assert repo.get_by_chave(_chave(1)).status is StatusNota.AUTORIZADA
+
+    cancel_port = MagicMock()
+    cancel_port.cancelar.return_value = MagicMock(status=StatusNota.CANCELADA, protocolo_autorizacao="999")
+    CancelInvoiceUseCase(cancel_port, repo).execute(_chave(1))
+
+    nota = repo.get_by_chave(_chave(1))
+    assert nota.status is StatusNota.CANCELADA
+    assert nota.protocolo_autorizacao == "999"
+    assert repo.cache.stats()["invalidations"] >= 1
+
+
+def test_correction_invalidates_the_cached_note():
+    repo = CachedNotaFiscalRepository(CountingRepository([_make_nota(1)]), NotaCache())
+    assert repo.get_by_chave(_chave(1)).protocolo_cce is None
+
+    correction_port = MagicMock()
+    correction_port.corrigir.return_value = MagicMock(protocol_number="555")
+    CorrectionInvoiceUseCase(correction_port, repo).execute(_chave(1), "Texto corrigido")
+
+    assert repo.get_by_chave(_chave(1)).protocolo_cce == "555"
+
+
+def test_async_cancel_invalidates_the_cached_note():
+    inner = CountingRepository([_make_nota(1)])
+    repo = CachedAsyncNotaFiscalRepository(AsyncCountingRepository(inner), NotaCache())
+
+    async def scenario():
+        await repo.get_by_chave(_chave(1))
+        cancel_port = MagicMock()
+
+        async def cancelar(chave):
+            return MagicMock(status=StatusNota.CANCELADA, protocolo_autorizacao="999")
+
+        cancel_port.cancelar = cancelar
+        await AsyncCancelInvoiceUseCase(cancel_port, repo).execute(_chave(1))
+        return await repo.get_by_chave(_chave(1))
+
+    assert asyncio.run(scenario()).status is StatusNota.CANCELADA
+
+
+def test_read_started_before_a_save_does_not_fill_the_cache():
+    cache = NotaCache()
+    stale = _make_nota(1)
+
+    token = cache.reservar(_chave(1))
+    cache.invalidate(_chave(1))  # save() concorrente
+    assert cache.put(_chave(1), stale, token) is False
+    assert cache.get(_chave(1)) is None
+
+
+def test_shared_tier_serves_other_instances():
+    shared = MemoriaCacheCompartilhado()
+    inner = CountingRepository([_make_nota(1)])
+    a = CachedNotaFiscalRepository(inner, NotaCache(shared=shared))
+    b = CachedNotaFiscalRepository(inner, NotaCache(shared=shared))
+
+    a.get_by_chave(_chave(1))
+    assert b.get_by_chave(_chave(1)).chave_acesso == _chave(1)
+    assert inner.reads == 1
+    assert b.cache.stats()["shared_hits"] == 1
+
+    # save() em uma instância remove a nota do tier compartilhado
+    a.save(_make_nota(1))
+    assert shared.get("nfe:" + _chave(1)) is None
+
+
+def test_shared_tier_entries_expire():
+    clock = FakeClock()
+    shared = MemoriaCacheCompartilhado(clock=clock)
+    shared.set("k", b"v", ttl=5)
+    assert shared.get("k") == b"v"
+    clock.now += 5
+    assert shared.get("k") is None
+
+
+def test_shared_tier_failures_fall_back_to_the_repository():
+    class BrokenShared(CacheCompartilhadoPort):
+        def get(self, chave):
+            raise ConnectionError("down")
+
+        def set(self, chave, valor, ttl):
+            raise ConnectionError("down")
+
+        def delete(self, chave):
+            raise ConnectionError("down")
+
+    inner = CountingRepository([_make_nota(1)])
+    repo = CachedNotaFiscalRepository(inner, NotaCache(shared=BrokenShared()))
+
+    assert repo.get_by_chave(_chave(1)) is not None
+    assert repo.get_by_chave(_chave(1)) is not None
+    repo.save(_make_nota(1))
+    assert inner.reads == 1
+    assert repo.cache.stats()["shared_errors"] == 3  # get, set e delete
+
+
+def test_build_nota_cache_disabled_by_zero_ttl_or_size():
+    assert build_nota_cache(100, 0) is None
+    assert build_nota_cache(0, 30) is None
+    assert isinstance(build_nota_cache(100, 30), NotaCache)
+
+
+def test_invalid_max_entries():
+    with pytest.raises(ValueError):
+        NotaCache(max_entries=0)
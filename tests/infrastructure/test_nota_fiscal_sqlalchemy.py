@@ -0,0 +1,394 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy.pool import StaticPool
+
+from core.entities.nota_fiscal import ItemDaNota, NotaFiscal
+from core.enum.item_loading import ItemLoading
+from core.enum.status_nota import StatusNota
+from core.services.persistence.base import Base
+from core.value_objects.cnpjcpf import CnpjCpf
+from core.value_objects.endereço import Endereco
+from core.value_objects.imposto import Imposto
+from core.services.persistence.nota_fiscal_model import NotaFiscalModel
+from core.services.ports.nota_fiscal_repository_port import FiltroNotas
+from infrastructure.adapters import nota_fiscal_sqlalchemy
+from infrastructure.adapters.nota_fiscal_sqlalchemy import NotaFiscalSqlAlchemyAdapter
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session(engine):
+    session = sessionmaker(bind=engine, autocommit=False, autoflush=False)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def adapter(session):
+    return NotaFiscalSqlAlchemyAdapter(session)
+
+
+@pytest.fixture
+def count_queries(engine):
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", _record)
+
+
+def _make_nota(seq: int, itens: int = 1) -> NotaFiscal:
+    nota = NotaFiscal(
+        emitente_cnpj=CnpjCpf("12345678000195"),
+        destinatario_cnpj=CnpjCpf("98765432000198"),
+        emitente_endereco=Endereco("Av. X", "1", "Sao Paulo", "SP", "01001000"),
+        destinatario_endereco=Endereco("Rua Y", "2", "Rio", "RJ", "20020000"),
+    )
+    for i in range(itens):
+        nota.adicionar_item(ItemDaNota(
+            sku=f"SKU{i:03d}", descricao="Produto", quantidade=1, valor_unitario=10.0,
+            cfop="5102", ncm="12345678", cst="102",
+            impostos=Imposto(icms=1.0, ipi=0.0, pis=0.0, cofins=0.0),
+        ))
+    nota.chave_acesso = f"{seq:044d}"
+    nota.status = StatusNota.AUTORIZADA
+    nota.data_emissao = datetime(2025, 1, 1) + timedelta(minutes=seq)
+    return nota
+
+
+def _seed(adapter, total: int, itens: int = 1):
+    notas = [_make_nota(i, itens) for i in range(total)]
+    for nota in notas:
+        adapter.save(nota)
+    return notas
+
+
+class TestKeysetPagination:
+    def test_list_page_returns_notas_in_emission_order(self, adapter):
+        notas = _seed(adapter, 5)
+        page = adapter.list_page(3)
+        assert [n.chave_acesso for n in page] == [n.chave_acesso for n in notas[:3]]
+
+    def test_list_page_continues_after_cursor(self, adapter):
+        notas = _seed(adapter, 5)
+        first = adapter.list_page(3)
+        last = first[-1]
+        second = adapter.list_page(3, (last.data_emissao, last.id))
+        assert [n.chave_acesso for n in second] == [n.chave_acesso for n in notas[3:]]
+
+    def test_cursor_breaks_ties_on_id(self, adapter):
+        notas = _seed(adapter, 4)
+        for nota in notas:
+            nota.data_emissao = datetime(2025, 1, 1)
+            adapter.save(nota)
+        seen = []
+        after = None
+        while True:
+            page = adapter.list_page(1, after)
+            if not page:
+                break
+            seen.append(page[0].chave_acesso)
+            after = (page[0].data_emissao, page[0].id)
+        assert sorted(seen) == sorted(n.chave_acesso for n in notas)
+        assert len(seen) == len(set(seen))
+
+    def test_iter_all_visits_every_nota_and_releases_models(self, adapter, session):
+        _seed(adapter, 7)
+        session.expunge_all()
+        visited = []
+        for nota in adapter.iter_all(batch_size=3):
+            visited.append(nota.chave_acesso)
+            assert len(session.identity_map) == 0
+        assert len(visited) == 7
+
+
+class TestItemLoadingQueryCount:
+    def test_get_by_chave_loads_nota_and_items_in_one_query(self, adapter, session, count_queries):
+        notas = _seed(adapter, 1, itens=5)
+        session.expunge_all()
+        count_queries.clear()
+
+        nota = adapter.get_by_chave(notas[0].chave_acesso)
+
+        assert len(nota.itens) == 5
+        assert len(count_queries) == 1
+
+    def test_list_page_loads_items_with_one_extra_query(self, adapter, session, count_queries):
+        _seed(adapter, 20, itens=3)
+        session.expunge_all()
+        count_queries.clear()
+
+        page = adapter.list_page(20)
+
+        assert sum(len(n.itens) for n in page) == 60
+        assert len(count_queries) == 2
+
+    def test_list_all_query_count_does_not_grow_with_notas(self, adapter, session, count_queries):
+        _seed(adapter, 30, itens=2)
+        session.expunge_all()
+        count_queries.clear()
+
+        notas = adapter.list_all()
+
+        assert len(notas) == 30
+        assert len(count_queries) == 2
+
+    def test_lazy_loading_issues_one_query_per_nota(self, adapter, session, count_queries):
+        _seed(adapter, 4, itens=2)
+        session.expunge_all()
+        count_queries.clear()
+
+        adapter.list_page(4, loading=ItemLoading.LAZY)
+
+        assert len(count_queries) == 1 + 4
+
+
+class TestSaveMany:
+    def test_bulk_insert_uses_one_statement_per_table(self, adapter, session, count_queries):
+        notas = [_make_nota(i, itens=4) for i in range(25)]
+
+        adapter.save_many(notas)
+
+        inserts = [q for q in count_queries if q.lstrip().upper().startswith("INSERT")]
+        assert len(inserts) == 2
+        session.expunge_all()
+        persisted = adapter.list_all()
+        assert len(persisted) == 25
+        assert sum(len(n.itens) for n in persisted) == 100
+
+
+class TestVersao:
+    def test_save_bumps_version(self, adapter, session):
+        nota = _make_nota(1)
+        adapter.save(nota)
+        assert nota.versao == 1
+        nota.status = StatusNota.CANCELADA
+        adapter.save(nota)
+        assert nota.versao == 2
+        session.expunge_all()
+        assert adapter.get_by_chave(nota.chave_acesso).versao == 2
+
+    def test_save_many_starts_at_version_one(self, adapter, session):
+        notas = [_make_nota(i) for i in range(2)]
+        adapter.save_many(notas)
+        session.expunge_all()
+        assert [n.versao for n in notas] == [1, 1]
+        assert adapter.get_by_chave(notas[0].chave_acesso).versao == 1
+
+    def test_get_versao_is_one_query_without_items(self, adapter, session, count_queries):
+        nota = _make_nota(1, itens=3)
+        adapter.save(nota)
+        session.expunge_all()
+        count_queries.clear()
+
+        versao = adapter.get_versao(nota.chave_acesso)
+
+        assert versao == (nota.id, 1, nota.data_emissao)
+        assert len(count_queries) == 1
+        assert "item_da_nota" not in count_queries[0]
+        assert adapter.get_versao("0" * 44) is None
+
+    def test_list_page_versoes_matches_list_page(self, adapter, session, count_queries):
+        _seed(adapter, 5, itens=2)
+        session.expunge_all()
+        after = (adapter.list_page(2)[-1].data_emissao, adapter.list_page(2)[-1].id)
+        count_queries.clear()
+
+        versoes = adapter.list_page_versoes(2, after)
+
+        assert len(count_queries) == 1
+        assert [v.id for v in versoes] == [n.id for n in adapter.list_page(2, after)]
+
+    def test_concurrent_save_of_stale_version_fails(self, engine, adapter, session):
+        nota = _make_nota(1)
+        adapter.save(nota)
+        other = sessionmaker(bind=engine)()
+        stale = other.get(NotaFiscalModel, nota.id)
+
+        nota.status = StatusNota.CANCELADA
+        adapter.save(nota)
+
+        stale.protocolo_autorizacao = "123"
+        stale.versao = 2
+        with pytest.raises(StaleDataError):
+            other.commit()
+        other.close()
+
+
+class TestNarrowUpdates:
+    def test_update_status_is_one_update_without_items(self, adapter, session, count_queries):
+        nota = _make_nota(1, itens=5)
+        adapter.save(nota)
+        # Como no caso de uso: a nota já foi lida na mesma sessão
+        adapter.get_by_chave(nota.chave_acesso)
+        count_queries.clear()
+
+        versao = adapter.update_status(nota.chave_acesso, StatusNota.CANCELADA, "135")
+
+        assert len(count_queries) == 1
+        assert count_queries[0].lstrip().upper().startswith("UPDATE NOTA_FISCAL")
+        assert "RETURNING" in count_queries[0].upper()
+        assert versao == (nota.id, 2, nota.data_emissao)
+
+    def test_update_status_persists_status_and_keeps_items(self, adapter, session):
+        nota = _make_nota(1, itens=3)
+        adapter.save(nota)
+        adapter.update_status(nota.chave_acesso, StatusNota.CANCELADA, "135")
+        session.expunge_all()
+
+        stored = adapter.get_by_chave(nota.chave_acesso)
+        assert stored.status is StatusNota.CANCELADA
+        assert stored.protocolo_autorizacao == "135"
+        assert stored.versao == 2
+        assert [i.sku for i in stored.itens] == [i.sku for i in nota.itens]
+
+    def test_same_session_sees_the_update(self, adapter, session):
+        nota = _make_nota(1)
+        adapter.save(nota)
+        adapter.get_by_chave(nota.chave_acesso)
+        adapter.update_status(nota.chave_acesso, StatusNota.CANCELADA, "135")
+        assert adapter.get_by_chave(nota.chave_acesso).status is StatusNota.CANCELADA
+
+    def test_record_event_persists_protocolo_cce(self, adapter, session, count_queries):
+        nota = _make_nota(1, itens=2)
+        adapter.save(nota)
+        count_queries.clear()
+
+        versao = adapter.record_event(nota.chave_acesso, "CCE-1")
+
+        assert len(count_queries) == 1
+        assert versao.versao == 2
+        session.expunge_all()
+        assert adapter.get_by_chave(nota.chave_acesso).protocolo_cce == "CCE-1"
+
+    def test_stored_document_with_invalid_check_digits_is_still_read(self, adapter, session):
+        # Linhas gravadas antes da validação dos dígitos verificadores
+        nota = _make_nota(1)
+        adapter.save(nota)
+        session.query(NotaFiscalModel).update({"emitente_cnpj": "12345678000199"})
+        session.commit()
+        session.expire_all()
+
+        carregada = adapter.get_by_chave(nota.chave_acesso)
+        assert carregada.emitente_cnpj.numero == "12345678000199"
+        assert [n.id for n in adapter.list_page(10)] == [nota.id]
+
+    def test_unknown_chave_returns_none(self, adapter):
+        assert adapter.update_status("0" * 44, StatusNota.CANCELADA, None) is None
+        assert adapter.record_event("0" * 44, "CCE-1") is None
+
+
+def _notas_busca(total: int = 12):
+    """
+    Notas alternando emitente (par/ímpar), status a cada três e itens crescentes:
+    a nota i tem i + 1 itens de 10,00 e ICMS total de i + 1.
+    """
+    notas = []
+    for i in range(total):
+        nota = _make_nota(i, itens=i + 1)
+        if i % 2:
+            nota.emitente_cnpj = CnpjCpf("11222333000181")
+        if i % 3 == 0:
+            nota.status = StatusNota.CANCELADA
+        nota.impostos_totais = nota.somar_impostos()
+        notas.append(nota)
+    return notas
+
+
+def _seed_search(adapter, total: int = 12):
+    notas = _notas_busca(total)
+    adapter.save_many(notas)
+    return notas
+
+
+class TestSearch:
+    @pytest.mark.parametrize("filtro, esperadas", [
+        (FiltroNotas(), list(range(12))),
+        (FiltroNotas(emitente_cnpj="11222333000181"), [1, 3, 5, 7, 9, 11]),
+        (FiltroNotas(status=StatusNota.CANCELADA), [0, 3, 6, 9]),
+        (FiltroNotas(emitente_cnpj="11222333000181", status=StatusNota.CANCELADA), [3, 9]),
+        (FiltroNotas(destinatario_cnpj="11444777000161"), []),
+        (FiltroNotas(emitida_de=datetime(2025, 1, 1, 0, 2), emitida_ate=datetime(2025, 1, 1, 0, 5)), [2, 3, 4]),
+        (FiltroNotas(valor_total_min=30, valor_total_max=50), [2, 3, 4]),
+        (FiltroNotas(icms_min=11), [10, 11]),
+        (FiltroNotas(icms_max=2, status=StatusNota.AUTORIZADA), [1]),
+    ])
+    def test_filters_match_the_in_memory_predicate(self, adapter, session, filtro, esperadas):
+        notas = _seed_search(adapter)
+        session.expunge_all()
+
+        encontradas = adapter.search(filtro, 100)
+
+        assert [n.chave_acesso for n in encontradas] == [notas[i].chave_acesso for i in esperadas]
+        assert [n.chave_acesso for n in notas if filtro.aceita(n)] == [notas[i].chave_acesso for i in esperadas]
+
+    def test_keyset_pages_of_a_filtered_search(self, adapter, session):
+        notas = _seed_search(adapter)
+        filtro = FiltroNotas(emitente_cnpj="11222333000181")
+        vistas, after = [], None
+        while True:
+            page = adapter.search(filtro, 4, after)
+            vistas.extend(n.chave_acesso for n in page)
+            if len(page) < 4:
+                break
+            after = (page[-1].data_emissao, page[-1].id)
+
+        assert vistas == [n.chave_acesso for n in notas[1::2]]
+
+    def test_valor_total_is_stored_by_save_and_save_many(self, adapter, session):
+        nota = _make_nota(100, itens=3)
+        adapter.save(nota)
+        _seed_search(adapter, total=2)
+        session.expunge_all()
+
+        valores = dict(session.query(NotaFiscalModel.chave_acesso, NotaFiscalModel.valor_total))
+
+        assert valores[nota.chave_acesso] == 30.0
+        assert sorted(valores.values()) == [10.0, 20.0, 30.0]
+
+    def test_exact_count(self, adapter):
+        _seed_search(adapter)
+        contagem = adapter.count(FiltroNotas(status=StatusNota.CANCELADA))
+        assert contagem == (4, True)
+
+    def test_estimate_is_exact_below_the_cap(self, adapter, count_queries):
+        _seed_search(adapter)
+        count_queries.clear()
+
+        contagem = adapter.count(FiltroNotas(emitente_cnpj="11222333000181"), estimate=True)
+
+        assert contagem == (6, True)
+        assert len(count_queries) == 1
+        assert "LIMIT" in count_queries[0]
+
+    def test_estimate_stops_counting_at_the_cap(self, adapter, monkeypatch):
+        _seed_search(adapter)
+        monkeypatch.setattr(nota_fiscal_sqlalchemy, "CONTAGEM_EXATA_ATE", 5)
+        # Sem PostgreSQL não há estimativa do planner: o total é o próprio limite
+        assert adapter.count(FiltroNotas(), estimate=True) == (5, False)
+
+    def test_planner_estimate_above_the_cap(self):
+        plano = [{"Plan": {"Node Type": "Index Only Scan", "Plan Rows": 48210}}]
+        assert nota_fiscal_sqlalchemy._contagem_estimada(1000, plano) == (48210, False)
+        assert nota_fiscal_sqlalchemy._contagem_estimada(1000, '[{"Plan": {"Plan Rows": 12}}]') == (1000, False)
+        assert nota_fiscal_sqlalchemy._contagem_estimada(999, plano) == (999, True)
+
+    def test_postgres_estimate_explains_the_filtered_query(self):
+        sql = str(nota_fiscal_sqlalchemy._estimativa(FiltroNotas(icms_min=5)).compile(dialect=postgresql.dialect()))
+        assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT nota_fiscal.id")
+        assert "(nota_fiscal.impostos_totais ->> 'icms')::numeric" in sql
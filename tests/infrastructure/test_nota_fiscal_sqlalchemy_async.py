@@ -0,0 +1,161 @@
+import asyncio
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from application.use_cases.emit_invoice import AsyncEmitInvoiceUseCase
+from core.enum.item_loading import ItemLoading
+from core.enum.status_nota import StatusNota
+from core.services.persistence.base import Base
+from core.services.ports.nota_fiscal_repository_port import FiltroNotas
+from infrastructure.adapters.nota_fiscal_sqlalchemy_async import NotaFiscalAsyncSqlAlchemyAdapter
+from tests.infrastructure.test_nota_fiscal_sqlalchemy import _make_nota, _notas_busca
+
+
+def _run_with_adapter(scenario):
+    async def main():
+        engine = create_async_engine(
+            "sqlite+aiosqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        try:
+            async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+                return await scenario(NotaFiscalAsyncSqlAlchemyAdapter(session), session)
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(main())
+
+
+class TestNotaFiscalAsyncSqlAlchemyAdapter:
+    def test_save_and_get_by_chave_round_trip(self):
+        nota = _make_nota(1, itens=3)
+
+        async def scenario(adapter, session):
+            await adapter.save(nota)
+            session.expunge_all()
+            return await adapter.get_by_chave(nota.chave_acesso)
+
+        found = _run_with_adapter(scenario)
+        assert found.id == nota.id
+        assert len(found.itens) == 3
+
+    def test_get_by_chave_missing_returns_none(self):
+        async def scenario(adapter, session):
+            return await adapter.get_by_chave("0" * 44)
+
+        assert _run_with_adapter(scenario) is None
+
+    def test_save_many_and_keyset_pages(self):
+        notas = [_make_nota(i, itens=2) for i in range(5)]
+
+        async def scenario(adapter, session):
+            await adapter.save_many(notas)
+            session.expunge_all()
+            first = await adapter.list_page(3)
+            last = first[-1]
+            second = await adapter.list_page(3, (last.data_emissao, last.id))
+            return first, second
+
+        first, second = _run_with_adapter(scenario)
+        assert [n.chave_acesso for n in first + second] == [n.chave_acesso for n in notas]
+        assert all(len(n.itens) == 2 for n in first + second)
+
+    def test_iter_all_streams_every_nota(self):
+        notas = [_make_nota(i) for i in range(7)]
+
+        async def scenario(adapter, session):
+            await adapter.save_many(notas)
+            return [n.chave_acesso async for n in adapter.iter_all(batch_size=3)]
+
+        assert len(_run_with_adapter(scenario)) == 7
+
+    @pytest.mark.parametrize("loading", list(ItemLoading))
+    def test_every_loading_strategy_returns_items(self, loading):
+        nota = _make_nota(1, itens=2)
+
+        async def scenario(adapter, session):
+            await adapter.save(nota)
+            session.expunge_all()
+            return await adapter.list_all(loading)
+
+        assert len(_run_with_adapter(scenario)[0].itens) == 2
+
+    def test_save_bumps_version_and_get_versao(self):
+        nota = _make_nota(1, itens=2)
+
+        async def scenario(adapter, session):
+            await adapter.save(nota)
+            await adapter.save(nota)
+            session.expunge_all()
+            versao = await adapter.get_versao(nota.chave_acesso)
+            pagina = await adapter.list_page_versoes(10)
+            return versao, pagina
+
+        versao, pagina = _run_with_adapter(scenario)
+        assert nota.versao == 2
+        assert versao == (nota.id, 2, nota.data_emissao)
+        assert pagina == [versao]
+
+    def test_update_status_and_record_event_issue_one_update_each(self):
+        nota = _make_nota(1, itens=4)
+
+        async def scenario(adapter, session):
+            await adapter.save(nota)
+            statements = []
+            engine = session.bind.sync_engine
+            record = lambda conn, cursor, statement, *args: statements.append(statement)
+            event.listen(engine, "before_cursor_execute", record)
+            cancelada = await adapter.update_status(nota.chave_acesso, StatusNota.CANCELADA, "135")
+            cce = await adapter.record_event(nota.chave_acesso, "CCE-1")
+            event.remove(engine, "before_cursor_execute", record)
+            session.expunge_all()
+            return statements, cancelada, cce, await adapter.get_by_chave(nota.chave_acesso)
+
+        statements, cancelada, cce, stored = _run_with_adapter(scenario)
+        assert len(statements) == 2
+        assert all(s.lstrip().upper().startswith("UPDATE NOTA_FISCAL") for s in statements)
+        assert (cancelada.versao, cce.versao) == (2, 3)
+        assert (stored.status, stored.protocolo_cce, len(stored.itens)) == (StatusNota.CANCELADA, "CCE-1", 4)
+
+    def test_search_and_count(self):
+        async def scenario(adapter, session):
+            notas = _notas_busca(total=6)
+            await adapter.save_many(notas)
+            session.expunge_all()
+            filtro = FiltroNotas(emitente_cnpj="11222333000181", valor_total_min=30)
+            primeira = await adapter.search(filtro, 1)
+            ultima = primeira[-1]
+            segunda = await adapter.search(filtro, 5, (ultima.data_emissao, ultima.id))
+            return notas, primeira + segunda, await adapter.count(filtro), await adapter.count(filtro, estimate=True)
+
+        notas, encontradas, exata, estimada = _run_with_adapter(scenario)
+        assert [n.chave_acesso for n in encontradas] == [notas[3].chave_acesso, notas[5].chave_acesso]
+        assert exata == estimada == (2, True)
+
+
+
+class TestBatchPersistence:
+    def test_duplicate_row_does_not_discard_the_rest_of_the_batch(self):
+        existente = _make_nota(1)
+        notas = [_make_nota(i) for i in range(2, 5)]
+        # Mesma chave de uma nota já gravada: o INSERT do lote inteiro falha
+        notas[1].chave_acesso = existente.chave_acesso
+
+        class Emissor:
+            async def emitir(self, nota):
+                return nota
+
+        async def scenario(adapter, session):
+            await adapter.save(existente)
+            results = await AsyncEmitInvoiceUseCase(Emissor(), adapter).execute_batch(notas)
+            session.expunge_all()
+            gravadas = [await adapter.get_by_id(n.id) for n in notas]
+            return results, gravadas
+
+        results, gravadas = _run_with_adapter(scenario)
+        assert [r.nota is not None for r in results] == [True, False, True]
+        assert [g is not None for g in gravadas] == [True, False, True]
@@ -0,0 +1,152 @@
+import os
+import time
+from decimal import Decimal
+
+import pytest
+
+from infrastructure.adapters.regras_tributarias import (
+    IndiceRegras, RegrasTributariasArquivoAdapter, build_calculadora, ler_regras,
+)
+from tests.infrastructure.test_nota_fiscal_sqlalchemy import _make_nota
+
+CABECALHO = "ncm,cfop,uf_origem,uf_destino,icms,ipi,pis,cofins\n"
+REGRAS = CABECALHO + (
+    "*,,,,17,0,1.65,7.6\n"
+    "8517,,,,18,0,1.65,7.6\n"
+    "8517,6102,SP,*,12,0,1.65,7.6\n"
+    "8517,6102,SP,RJ,7,0,1.65,7.6\n"
+    "85176277,,,,20,15,2.1,9.65\n"
+    "1234,5102,*,*,4,0,0,0\n"
+)
+
+
+def _write(path, content):
+    path.write_text(content, encoding="utf-8")
+    # Garante um mtime diferente mesmo em sistemas de arquivos com resolução baixa
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+
+def _parse(tmp_path, content):
+    path = tmp_path / "outras.csv"
+    _write(path, content)
+    return ler_regras(str(path))
+
+
+@pytest.fixture
+def rules_file(tmp_path):
+    path = tmp_path / "regras.csv"
+    _write(path, REGRAS)
+    return path
+
+
+@pytest.fixture
+def indice(rules_file):
+    return IndiceRegras(ler_regras(str(rules_file)))
+
+
+class TestIndiceRegras:
+    def test_longest_ncm_prefix_wins(self, indice):
+        assert indice.resolver("85176277", "5102", "SP", "SP").icms == Decimal("20")
+        assert indice.resolver("85171231", "5102", "SP", "SP").icms == Decimal("18")
+        assert indice.resolver("22030000", "5102", "SP", "SP").icms == Decimal("17")
+
+    def test_cfop_and_uf_pair_are_matched_most_specific_first(self, indice):
+        assert indice.resolver("85171231", "6102", "SP", "RJ").icms == Decimal("7")
+        assert indice.resolver("85171231", "6102", "SP", "MG").icms == Decimal("12")
+        assert indice.resolver("85171231", "6102", "PR", "MG").icms == Decimal("18")
+
+    def test_falls_back_to_shorter_prefix_when_no_pair_matches(self, indice):
+        assert indice.resolver("12345678", "5102", "SP", "SP").icms == Decimal("4")
+        assert indice.resolver("12345678", "6102", "SP", "SP").icms == Decimal("17")
+
+    def test_no_rule_returns_none(self, tmp_path):
+        indice = IndiceRegras(_parse(tmp_path, CABECALHO + "8517,6102,SP,RJ,7,0,0,0\n"))
+        assert indice.resolver("85171231", "5102", "SP", "RJ") is None
+        assert indice.resolver("22030000", "6102", "SP", "RJ") is None
+
+    def test_later_line_overrides_same_key(self, tmp_path):
+        indice = IndiceRegras(_parse(tmp_path, CABECALHO + "8517,,,,18,0,0,0\n8517,,,,19,0,0,0\n"))
+        assert indice.resolver("85171231", "5102", "SP", "RJ").icms == Decimal("19")
+
+    def test_lookups_are_memoized(self, indice):
+        for _ in range(3):
+            indice.resolver("85176277", "5102", "SP", "SP")
+        assert indice.resolver.cache_info().hits == 2
+
+    @pytest.mark.parametrize("linha", ["851x,,,,1,0,0,0", "851712345,,,,1,0,0,0", "8517,,,,101,0,0,0"])
+    def test_invalid_lines_are_rejected(self, tmp_path, linha):
+        with pytest.raises(ValueError):
+            _parse(tmp_path, CABECALHO + linha + "\n")
+
+    def test_missing_columns_are_rejected(self, tmp_path):
+        with pytest.raises(ValueError, match="cofins"):
+            _parse(tmp_path, "ncm,cfop,uf_origem,uf_destino,icms,ipi,pis\n")
+
+
+class TestRegrasTributariasArquivoAdapter:
+    def test_changed_file_is_swapped_in(self, rules_file):
+        adapter = RegrasTributariasArquivoAdapter(str(rules_file))
+        antigo = adapter.indice
+        assert adapter.aliquotas_para("85176277", "5102", "SP", "SP").icms == Decimal("20")
+
+        _write(rules_file, CABECALHO + "8517,,,,25,0,0,0\n")
+
+        assert adapter.recarregar_se_mudou()
+        assert adapter.aliquotas_para("85176277", "5102", "SP", "SP").icms == Decimal("25")
+        assert adapter.indice is not antigo
+        assert adapter.reloads == 1
+
+    def test_unchanged_file_is_not_reparsed(self, rules_file):
+        adapter = RegrasTributariasArquivoAdapter(str(rules_file))
+        indice = adapter.indice
+        assert not adapter.recarregar_se_mudou()
+        assert adapter.indice is indice and adapter.reloads == 0
+
+    def test_invalid_file_keeps_current_index(self, rules_file):
+        adapter = RegrasTributariasArquivoAdapter(str(rules_file))
+        _write(rules_file, CABECALHO + "abc,,,,1,0,0,0\n")
+
+        assert not adapter.recarregar_se_mudou()
+        assert adapter.aliquotas_para("85176277", "5102", "SP", "SP").icms == Decimal("20")
+        assert adapter.reload_errors == 1
+        # O mesmo arquivo inválido não é relido a cada verificação
+        adapter.recarregar_se_mudou()
+        assert adapter.reload_errors == 1
+
+    def test_lookup_never_touches_the_file(self, rules_file, monkeypatch):
+        adapter = RegrasTributariasArquivoAdapter(str(rules_file), reload_check_interval=0)
+        _write(rules_file, CABECALHO + "8517,,,,25,0,0,0\n")
+        monkeypatch.setattr(os, "stat", lambda *a, **kw: pytest.fail("stat() na consulta"))
+
+        assert adapter.aliquotas_para("85176277", "5102", "SP", "SP").icms == Decimal("20")
+
+    def test_reload_thread_swaps_in_changed_file(self, rules_file):
+        adapter = RegrasTributariasArquivoAdapter(str(rules_file), reload_check_interval=0.01)
+        adapter.start()
+        try:
+            _write(rules_file, CABECALHO + "8517,,,,25,0,0,0\n")
+            deadline = time.monotonic() + 2
+            while adapter.reloads == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            adapter.stop()
+
+        assert adapter.aliquotas_para("85176277", "5102", "SP", "SP").icms == Decimal("25")
+
+
+class TestBuildCalculadora:
+    def test_without_file_totals_declared_taxes(self):
+        nota = _make_nota(1, itens=2)
+        assert build_calculadora(None).calcular(nota).icms == 2.0
+
+    def test_rules_file_rates_are_applied_to_items(self, tmp_path):
+        path = tmp_path / "regras.csv"
+        _write(path, CABECALHO + "1234,5102,SP,RJ,12,0,1.65,7.6\n")
+        nota = _make_nota(1, itens=2)
+
+        totais = build_calculadora(str(path)).calcular(nota)
+
+        assert nota.itens[0].impostos.icms == 1.2
+        assert totais.icms == 2.4
+        assert totais.cofins == 1.52
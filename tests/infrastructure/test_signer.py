@@ -0,0 +1,141 @@
+import asyncio
+import base64
+import hashlib
+import re
+
+import pytest
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding
+
+from infrastructure.external_services.nfe_xml_builder import NFE_NS, NFeXmlBuilder
+from infrastructure.external_services.signer import ProcessPoolSigner, Signer, verify_xml
+from tests.infrastructure.certs import make_certificate, write_pfx
+from tests.infrastructure.test_nota_fiscal_sqlalchemy import _make_nota
+
+NFE_XML = '<NFe xmlns="http://www.portalfiscal.inf.br/nfe"><infNFe Id="NFe123" versao="4.00"><ide><cUF>35</cUF></ide></infNFe></NFe>'
+
+
+@pytest.fixture(scope="module")
+def credentials():
+    return make_certificate()
+
+
+@pytest.fixture(scope="module")
+def pool_signer(credentials):
+    key, certificate = credentials
+    signer = ProcessPoolSigner(private_key=key, certificate=certificate, processes=2, chunk_size=4)
+    yield signer
+    signer.close()
+
+
+class TestSigner:
+    def test_without_key_keeps_stub_behaviour(self):
+        assert Signer().sign("<nfe/>") == "<signed><nfe/></signed>"
+
+    def test_signature_references_element_with_id_and_verifies(self, credentials):
+        key, certificate = credentials
+        signed = Signer(private_key=key, certificate=certificate).sign(NFE_XML)
+
+        assert '<Reference URI="#NFe123">' in signed
+        assert "<X509Certificate>" in signed
+        assert signed.startswith(NFE_XML[:-len("</NFe>")])
+        assert verify_xml(signed, key.public_key())
+
+    def test_tampered_document_fails_verification(self, credentials):
+        key, certificate = credentials
+        signed = Signer(private_key=key, certificate=certificate).sign(NFE_XML)
+
+        assert not verify_xml(signed.replace("<cUF>35</cUF>", "<cUF>33</cUF>"), key.public_key())
+
+    def test_whole_document_is_referenced_without_id(self, credentials):
+        key, _ = credentials
+        signed = Signer(private_key=key).sign("<nfe><id>1</id></nfe>")
+
+        assert '<Reference URI="">' in signed
+        assert verify_xml(signed, key.public_key())
+
+    def test_loads_a1_certificate_from_pfx(self, credentials, tmp_path):
+        key, certificate = credentials
+        path = tmp_path / "a1.pfx"
+        write_pfx(path, key, certificate, "segredo")
+
+        signer = Signer(str(path), "segredo")
+
+        assert verify_xml(signer.sign(NFE_XML), key.public_key())
+
+
+def _sha1(data: str) -> str:
+    return base64.b64encode(hashlib.sha1(data.encode()).digest()).decode()
+
+
+def _digest_value(signed: str) -> str:
+    return re.search(r"<DigestValue>(.*?)</DigestValue>", signed).group(1)
+
+
+class TestStandardXmlDsig:
+    """
+    Digest e assinatura conferidos contra a forma canônica escrita à mão
+    (C14N 1.0 inclusivo), não contra o próprio canonicalizador do signer.
+    """
+    def test_digest_is_over_the_unprefixed_inf_nfe(self, credentials):
+        key, certificate = credentials
+        signed = Signer(private_key=key, certificate=certificate).sign(NFE_XML)
+
+        canonical = f'<infNFe xmlns="{NFE_NS}" Id="NFe123" versao="4.00"><ide><cUF>35</cUF></ide></infNFe>'
+        assert _digest_value(signed) == _sha1(canonical)
+
+    def test_signature_value_is_over_the_signed_info_text(self, credentials):
+        key, certificate = credentials
+        signed = Signer(private_key=key, certificate=certificate).sign(NFE_XML)
+
+        # O SignedInfo gerado já está na forma canônica
+        signed_info = re.search(r"<SignedInfo\b.*?</SignedInfo>", signed, re.S).group(0)
+        signature = base64.b64decode(re.search(r"<SignatureValue>(.*?)</SignatureValue>", signed).group(1))
+        key.public_key().verify(signature, signed_info.encode(), padding.PKCS1v15(), hashes.SHA1())
+
+    def test_digest_of_a_builder_document(self, credentials):
+        key, certificate = credentials
+        nota = _make_nota(1)
+        nota.itens[0].descricao = 'Cabo <USB> & "adaptador"'
+        xml = NFeXmlBuilder().build(nota)
+
+        signed = Signer(private_key=key, certificate=certificate).sign(xml)
+
+        # Da saída do builder para C14N: namespace herdado no apex, atributos em
+        # ordem alfabética e aspas sem escape no texto
+        inf_nfe = re.search(r"<infNFe .*</infNFe>", xml).group(0)
+        ref_id = re.search(r'Id="(NFe\d{44})"', inf_nfe).group(1)
+        canonical = (
+            inf_nfe
+            .replace(f'<infNFe versao="4.00" Id="{ref_id}">', f'<infNFe xmlns="{NFE_NS}" Id="{ref_id}" versao="4.00">')
+            .replace("&quot;", '"')
+        )
+        assert _digest_value(signed) == _sha1(canonical)
+        assert verify_xml(signed, key.public_key())
+
+
+class TestProcessPoolSigner:
+    def test_requires_private_key(self):
+        with pytest.raises(ValueError):
+            ProcessPoolSigner()
+
+    def test_sign_many_preserves_order(self, pool_signer, credentials):
+        key, _ = credentials
+        xmls = [f'<nfe><infNFe Id="NFe{i}"><n>{i}</n></infNFe></nfe>' for i in range(10)]
+
+        signed = pool_signer.sign_many(xmls)
+
+        assert [s[:len(x) - len("</nfe>")] for s, x in zip(signed, xmls)] == [x[:-len("</nfe>")] for x in xmls]
+        assert all(verify_xml(s, key.public_key()) for s in signed)
+
+    def test_async_signing_runs_in_the_pool(self, pool_signer, credentials):
+        key, _ = credentials
+
+        async def scenario():
+            one = await pool_signer.asign(NFE_XML)
+            many = await pool_signer.asign_many([NFE_XML] * 5)
+            return [one, *many]
+
+        signed = asyncio.run(scenario())
+        assert len(signed) == 6
+        assert all(verify_xml(s, key.public_key()) for s in signed)
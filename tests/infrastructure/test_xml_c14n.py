@@ -0,0 +1,49 @@
+import pytest
+
+from infrastructure.external_services.xml_c14n import by_id, by_local_name, canonicalize
+
+NFE_NS = "http://www.portalfiscal.inf.br/nfe"
+XSI_NS = "http://www.w3.org/2001/XMLSchema-instance"
+
+
+class TestCanonicalize:
+    def test_subset_inherits_the_default_namespace_without_prefixes(self):
+        xml = f'<NFe xmlns="{NFE_NS}"><infNFe versao="4.00" Id="NFe1"><ide/></infNFe></NFe>'
+
+        assert canonicalize(xml, by_id("NFe1")) == (
+            f'<infNFe xmlns="{NFE_NS}" Id="NFe1" versao="4.00"><ide></ide></infNFe>'
+        ).encode()
+
+    def test_unused_ancestor_namespaces_stay_on_the_apex(self):
+        # C14N 1.0 inclusivo: todas as declarações em escopo, usadas ou não
+        xml = f'<NFe xmlns="{NFE_NS}" xmlns:xsi="{XSI_NS}"><infNFe Id="NFe1"><a xmlns="{NFE_NS}">1</a></infNFe></NFe>'
+
+        assert canonicalize(xml, by_id("NFe1")) == (
+            f'<infNFe xmlns="{NFE_NS}" xmlns:xsi="{XSI_NS}" Id="NFe1"><a>1</a></infNFe>'
+        ).encode()
+
+    def test_attribute_order_and_escaping(self):
+        xml = (
+            f'<r xmlns:b="urn:b" xmlns:a="urn:a" z="&quot;1&gt;" b:y="2" a:y="3" x="&#9;">'
+            "<t>&lt;&amp;&gt;&quot;&apos;<![CDATA[<x>]]></t><!-- comentário --><?pi dado?></r>"
+        )
+
+        assert canonicalize(xml) == (
+            '<r xmlns:a="urn:a" xmlns:b="urn:b" x="&#x9;" z="&quot;1>" a:y="3" b:y="2">'
+            "<t>&lt;&amp;&gt;\"'&lt;x&gt;</t><?pi dado?></r>"
+        ).encode()
+
+    def test_xml_attributes_of_ancestors_are_inherited_by_the_apex(self):
+        xml = '<r xml:lang="pt"><a Id="1"><b/></a></r>'
+
+        assert canonicalize(xml, by_id("1")) == b'<a Id="1" xml:lang="pt"><b></b></a>'
+
+    def test_empty_default_namespace_is_only_declared_to_undo_a_parent(self):
+        xml = f'<r xmlns="{NFE_NS}"><a xmlns=""><b/></a></r>'
+
+        assert canonicalize(xml) == f'<r xmlns="{NFE_NS}"><a xmlns=""><b></b></a></r>'.encode()
+        assert canonicalize(xml, by_local_name("a")) == b"<a><b></b></a>"
+
+    def test_missing_element(self):
+        with pytest.raises(ValueError):
+            canonicalize("<r/>", by_id("x"))
@@ -0,0 +1,92 @@
+import json
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+from app.interfaces.controllers.invoice_controller import InvoiceResponseSchema
+from app.interfaces.serializers.nota_fiscal_json import (
+    RawJSONResponse, encode_nota, encode_notas, objeto_json, nota_json,
+)
+from core.entities.nota_fiscal import ItemDaNota, NotaFiscal
+from core.enum.status_nota import StatusNota
+from core.value_objects.cnpjcpf import CnpjCpf
+from core.value_objects.endereço import Endereco
+from core.value_objects.imposto import Imposto
+
+
+def _make_nota(colunar=False, itens=3):
+    nota = NotaFiscal(
+        CnpjCpf("12345678000195"),
+        CnpjCpf("98765432000198"),
+        Endereco("Av. São João", "1000", "São Paulo", "SP", "01310100", complemento='Sala "B"\\2'),
+        Endereco("Rua da Assembleia", "10", "Rio de Janeiro", "RJ", "20011000"),
+        itens_colunares=colunar,
+    )
+    for i in range(itens):
+        nota.adicionar_item(ItemDaNota(
+            f"SKU{i}", f"Café torrado ☕ {i}\n", i + 1, 19.9 + i,
+            "6102", "09012100", "102", Imposto(2.39, 0.0, 0.13, 0.1 + 0.2),
+        ))
+    return nota
+
+
+def _expected(nf):
+    # Mesmo caminho usado pelas rotas antes do encoder direto
+    data = nf.to_dict()
+    data['itens'] = [{**it, 'total': it['quantidade'] * it['valor_unitario']} for it in data['itens']]
+    return InvoiceResponseSchema(**data).model_dump(mode="json")
+
+
+@pytest.mark.parametrize("colunar", [False, True])
+def test_encode_nota_matches_response_schema(colunar):
+    nf = _make_nota(colunar)
+    nf.chave_acesso = "3" * 44
+    nf.status = StatusNota.AUTORIZADA
+    nf.protocolo_autorizacao = "123456789"
+    nf.impostos_totais = nf.somar_impostos()
+    assert json.loads(encode_nota(nf)) == _expected(nf)
+
+
+def test_encode_nota_null_fields_and_no_items():
+    nf = _make_nota(itens=0)
+    body = json.loads(encode_nota(nf))
+    assert body == _expected(nf)
+    assert body["chave_acesso"] is None
+    assert body["impostos_totais"] is None
+    assert body["itens"] == []
+
+
+@pytest.mark.parametrize("data_emissao", [
+    datetime(2024, 5, 1, 12, 30, 0, 123456),
+    datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc),
+    datetime(2024, 5, 1, 9, 30, tzinfo=timezone(timedelta(hours=-3))),
+])
+def test_encode_nota_datetime_format_matches_pydantic(data_emissao):
+    nf = _make_nota(itens=1)
+    nf.data_emissao = data_emissao
+    assert json.loads(encode_nota(nf))["data_emissao"] == _expected(nf)["data_emissao"]
+
+
+def test_encode_nota_keeps_unicode_unescaped():
+    body = encode_nota(_make_nota(itens=1))
+    assert "São Paulo".encode() in body
+    assert "☕".encode() in body
+
+
+def test_encode_notas_is_a_json_array():
+    notas = [_make_nota(), _make_nota(colunar=True)]
+    assert json.loads(encode_notas(notas)) == [_expected(nf) for nf in notas]
+    assert encode_notas([]) == b"[]"
+
+
+def test_objeto_json_embeds_encoded_values():
+    nf = _make_nota(itens=1)
+    body = json.loads(objeto_json({"index": "0", "invoice": nota_json(nf), "error": "null"}))
+    assert body == {"index": 0, "invoice": _expected(nf), "error": None}
+
+
+def test_raw_json_response_sends_bytes_as_is():
+    response = RawJSONResponse(b'{"a":1}', status_code=201)
+    assert response.body == b'{"a":1}'
+    assert response.status_code == 201
+    assert response.headers["content-type"] == "application/json"
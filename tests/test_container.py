@@ -0,0 +1,184 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config.settings import DEFAULT_DATABASE_URL, Settings
+from app.container import Container
+from app.interfaces.controllers.invoice_controller import (
+    get_cancel_use_case,
+    get_correction_use_case,
+    get_emit_use_case,
+)
+from app.main import app
+from infrastructure.adapters.idempotencia import CoordenadorIdempotencia
+from infrastructure.adapters.nota_fiscal_cache import NotaCache
+from infrastructure.adapters.regras_tributarias import regras_do_arquivo
+from infrastructure.external_services.async_sefaz_client import AsyncSefazStubClient
+from infrastructure.external_services.signer import Signer
+from infrastructure.messaging.event_publisher import MicroBatchEventPublisher
+from infrastructure.workers.emission_worker import EmissionWorkerPool
+
+
+def _settings(**kwargs):
+    return Settings(database_url="sqlite://", **kwargs)
+
+
+def test_settings_from_env_parses_values_and_treats_empty_as_unset():
+    settings = Settings.from_env({
+        "SEFAZ_BASE_URL": "",
+        "EVENTS_FILE": "/tmp/events.ndjson",
+        "NOTA_CACHE_SIZE": "50",
+        "NOTA_CACHE_TTL": "2.5",
+        "EMISSION_WORKERS": "3",
+    })
+    assert settings.database_url == DEFAULT_DATABASE_URL
+    assert settings.sefaz_base_url is None
+    assert settings.events_file == "/tmp/events.ndjson"
+    assert settings.nota_cache_size == 50
+    assert settings.nota_cache_ttl == 2.5
+    assert settings.emission_workers == 3
+
+
+def test_start_builds_shared_objects_once_and_stop_releases_them(tmp_path):
+    events = tmp_path / "events.ndjson"
+    container = Container(_settings(events_file=str(events)))
+
+    async def scenario():
+        await container.start()
+        publisher_thread = container.event_publisher._thread
+        engine = container.async_engine
+        await container.start()  # idempotente
+        assert container.event_publisher._thread is publisher_thread
+        assert container.async_engine is engine
+        await container.stop()
+        await container.stop()
+
+    asyncio.run(scenario())
+    assert not container.started
+    assert container.event_publisher._thread is None
+    assert isinstance(container.sefaz_client, AsyncSefazStubClient)
+    assert isinstance(container.nota_cache, NotaCache)
+    assert isinstance(container.idempotencia, CoordenadorIdempotencia)
+
+
+def test_tax_rules_file_is_reloaded_by_a_thread_owned_by_the_container(tmp_path):
+    rules = tmp_path / "regras.csv"
+    rules.write_text("ncm,cfop,uf_origem,uf_destino,icms,ipi,pis,cofins\n*,,,,17,0,0,0\n", encoding="utf-8")
+    container = Container(_settings(tax_rules_file=str(rules)))
+
+    async def scenario():
+        await container.start()
+        regras = regras_do_arquivo(container.calculadora)
+        assert regras._thread.is_alive()
+        await container.stop()
+        return regras
+
+    assert asyncio.run(scenario())._thread is None
+
+
+def test_idempotency_purge_task_is_owned_by_the_container():
+    async def scenario(settings):
+        container = Container(settings)
+        await container.start()
+        iniciada = container.idempotencia._purga is not None
+        await container.stop()
+        return iniciada, container.idempotencia._purga
+
+    assert asyncio.run(scenario(_settings(idempotency_retention=60))) == (True, None)
+    # Retenção 0 desliga a limpeza
+    assert asyncio.run(scenario(_settings(idempotency_retention=0))) == (False, None)
+
+
+def test_blocking_cleanups_run_off_the_event_loop_thread(monkeypatch):
+    threads = {}
+    publisher_stop = MicroBatchEventPublisher.stop
+    signer_close = Signer.close
+
+    def stop(self, *args, **kwargs):
+        threads["publisher"] = threading.get_ident()
+        publisher_stop(self, *args, **kwargs)
+
+    def close(self):
+        threads["signer"] = threading.get_ident()
+        signer_close(self)
+
+    monkeypatch.setattr(MicroBatchEventPublisher, "stop", stop)
+    monkeypatch.setattr(Signer, "close", close)
+    container = Container(_settings())
+
+    async def scenario():
+        await container.start()
+        await container.stop()
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(scenario())
+    assert set(threads) == {"publisher", "signer"}
+    assert loop_thread not in threads.values()
+
+
+def test_stop_drains_workers_before_closing_clients(monkeypatch):
+    order = []
+    stop_workers = EmissionWorkerPool.stop
+    aclose = AsyncSefazStubClient.aclose
+
+    async def workers_stop(self):
+        order.append("workers")
+        await stop_workers(self)
+
+    async def sefaz_close(self):
+        order.append("sefaz")
+        await aclose(self)
+
+    monkeypatch.setattr(EmissionWorkerPool, "stop", workers_stop)
+    monkeypatch.setattr(AsyncSefazStubClient, "aclose", sefaz_close)
+    container = Container(_settings(emission_workers=1, emission_poll_interval=0.01))
+
+    async def scenario():
+        await container.start()
+        assert container.emission_workers._tasks
+        await container.stop()
+
+    asyncio.run(scenario())
+    assert order == ["workers", "sefaz"]
+    assert container.emission_workers._tasks == []
+
+
+def test_failed_start_releases_what_was_built(tmp_path):
+    container = Container(_settings(tax_rules_file=str(tmp_path / "missing.csv")))
+
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(container.start())
+
+    assert not container.started
+    assert container.event_publisher._thread is None
+
+
+def test_use_case_dependencies_reuse_container_objects():
+    container = Container(_settings(nota_cache_ttl=0))
+
+    async def scenario():
+        await container.start()
+        try:
+            first = get_emit_use_case(session=None, container=container)
+            second = get_emit_use_case(session=None, container=container)
+            cancel = get_cancel_use_case(session=None, container=container)
+            correction = get_correction_use_case(session=None, container=container)
+        finally:
+            await container.stop()
+        return first, second, cancel, correction
+
+    first, second, cancel, correction = asyncio.run(scenario())
+    assert first.emissor is second.emissor is container.emissao_adapter
+    assert first.publisher is container.event_publisher
+    assert first.calculadora is container.calculadora
+    assert cancel.cancel_port is container.cancelamento_adapter
+    assert correction.correction_port is container.correcao_adapter
+
+
+def test_app_lifespan_starts_and_stops_the_container():
+    with TestClient(app):
+        container = app.state.container
+        assert container.started
+    assert not container.started
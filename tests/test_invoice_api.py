@@ -69,13 +69,269 @@ def test_emit_invoice_item_total_is_correct(client, invoice_payload):
     assert item["total"] == item["quantidade"] * item["valor_unitario"]
 
 
+def test_emit_invoice_with_many_items_uses_columnar_storage(client, invoice_payload):
+    item = invoice_payload["itens"][0]
+    invoice_payload["itens"] = [{**item, "sku": f"SKU{i}", "quantidade": i + 1} for i in range(300)]
+    resp = client.post("/invoices/", json=invoice_payload)
+    assert resp.status_code == 201
+    itens = resp.json()["itens"]
+    assert len(itens) == 300
+    assert itens[-1]["sku"] == "SKU299"
+    assert itens[-1]["total"] == 300 * item["valor_unitario"]
+    assert itens[-1]["impostos"] == item["impostos"]
+
+
+def test_emit_invoice_fills_impostos_totais(client, invoice_payload):
+    item = invoice_payload["itens"][0]
+    invoice_payload["itens"] = [item, {**item, "sku": "XYZ999"}]
+    data = client.post("/invoices/", json=invoice_payload).json()
+    assert data["impostos_totais"] == {"icms": 20.0, "ipi": 10.0, "pis": 0.0, "cofins": 0.0}
+
+
 def test_emit_invoice_invalid_cnpj_returns_422(client, invoice_payload):
     invoice_payload["emitente_cnpj"] = "123"
     resp = client.post("/invoices/", json=invoice_payload)
     assert resp.status_code == 422
 
 
+def test_emit_invoice_wrong_cnpj_check_digits_returns_422(client, invoice_payload):
+    invoice_payload["destinatario_cnpj"] = "98765432000100"
+    resp = client.post("/invoices/", json=invoice_payload)
+    assert resp.status_code == 422
+
+
 def test_emit_invoice_empty_itens_returns_422(client, invoice_payload):
     invoice_payload["itens"] = []
     resp = client.post("/invoices/", json=invoice_payload)
     assert resp.status_code == 422
+
+
+def test_list_invoices_paginates_with_keyset_cursor(client, invoice_payload):
+    chaves = {client.post("/invoices/", json=invoice_payload).json()["chave_acesso"] for _ in range(3)}
+
+    first = client.get("/invoices/", params={"limit": 2})
+    assert len(first.json()) == 2
+    cursor = first.headers["X-Next-Cursor"]
+
+    second = client.get("/invoices/", params={"limit": 2, "cursor": cursor})
+    assert len(second.json()) == 1
+    assert "X-Next-Cursor" not in second.headers
+    assert {n["chave_acesso"] for n in first.json() + second.json()} == chaves
+
+
+def test_list_invoices_invalid_cursor_returns_400(client):
+    resp = client.get("/invoices/", params={"cursor": "not-a-cursor"})
+    assert resp.status_code == 400
+
+
+def test_search_invoices_filters_and_counts(client, invoice_payload):
+    outro = dict(invoice_payload, emitente_cnpj="11222333000181")
+    chaves = [client.post("/invoices/", json=p).json()["chave_acesso"] for p in (invoice_payload, outro, outro)]
+    client.post(f"/invoices/{chaves[2]}/cancel")
+
+    resp = client.get("/invoices/search", params={
+        "emitente_cnpj": "11222333000181", "status": "AUTORIZADA", "valor_total_min": 100, "count": "exact",
+    })
+
+    assert resp.status_code == 200
+    assert [n["chave_acesso"] for n in resp.json()] == [chaves[1]]
+    assert resp.headers["X-Total-Count"] == "1"
+
+
+def test_search_invoices_paginates_with_cursor_and_estimates_count(client, invoice_payload):
+    chaves = [client.post("/invoices/", json=invoice_payload).json()["chave_acesso"] for _ in range(3)]
+    params = {"destinatario_cnpj": invoice_payload["destinatario_cnpj"], "limit": 2, "count": "estimate"}
+
+    first = client.get("/invoices/search", params=params)
+    second = client.get("/invoices/search", params=dict(params, cursor=first.headers["X-Next-Cursor"]))
+
+    assert len(first.json()) == 2
+    assert {n["chave_acesso"] for n in first.json() + second.json()} == set(chaves)
+    assert "X-Next-Cursor" not in second.headers
+    assert first.headers["X-Total-Count"] == "3"
+
+
+def test_search_invoices_rejects_inverted_ranges(client):
+    resp = client.get("/invoices/search", params={"valor_total_min": 10, "valor_total_max": 5})
+    assert resp.status_code == 400
+    resp = client.get("/invoices/search", params={
+        "emitida_de": "2025-02-01T00:00:00Z", "emitida_ate": "2025-01-01T00:00:00Z",
+    })
+    assert resp.status_code == 400
+
+
+def test_search_invoices_validates_status_and_cnpj(client):
+    assert client.get("/invoices/search", params={"status": "DESCONHECIDO"}).status_code == 422
+    assert client.get("/invoices/search", params={"emitente_cnpj": "123"}).status_code == 422
+
+
+def test_get_invoice_returns_etag_and_304_when_unchanged(client, invoice_payload):
+    chave = client.post("/invoices/", json=invoice_payload).json()["chave_acesso"]
+    etag = client.get(f"/invoices/{chave}").headers["ETag"]
+
+    resp = client.get(f"/invoices/{chave}", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.content == b""
+    assert resp.headers["ETag"] == etag
+
+
+def test_get_invoice_etag_changes_after_cancel(client, invoice_payload):
+    chave = client.post("/invoices/", json=invoice_payload).json()["chave_acesso"]
+    etag = client.get(f"/invoices/{chave}").headers["ETag"]
+    client.post(f"/invoices/{chave}/cancel")
+
+    resp = client.get(f"/invoices/{chave}", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.json()["status"] == "CANCELADA"
+    assert resp.headers["ETag"] != etag
+
+
+def test_get_invoice_if_none_match_unknown_chave_returns_404(client):
+    resp = client.get(f"/invoices/{'9' * 44}", headers={"If-None-Match": '"x-1"'})
+    assert resp.status_code == 404
+
+
+def test_list_invoices_page_etag(client, invoice_payload):
+    for _ in range(3):
+        client.post("/invoices/", json=invoice_payload)
+    first = client.get("/invoices/", params={"limit": 2})
+    etag = first.headers["ETag"]
+
+    cached = client.get("/invoices/", params={"limit": 2}, headers={"If-None-Match": f'W/{etag}'})
+    assert cached.status_code == 304
+    assert cached.headers["X-Next-Cursor"] == first.headers["X-Next-Cursor"]
+
+    # Outro tamanho de página é outra representação
+    assert client.get("/invoices/", params={"limit": 3}, headers={"If-None-Match": etag}).status_code == 200
+
+    chave = first.json()[0]["chave_acesso"]
+    client.post(f"/invoices/{chave}/correction", json={"texto_correcao": "Correcao valida"})
+    assert client.get("/invoices/", params={"limit": 2}, headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_stream_invoices_yields_one_json_line_per_nota(client, invoice_payload):
+    for _ in range(3):
+        client.post("/invoices/", json=invoice_payload)
+    resp = client.get("/invoices/stream", params={"batch_size": 2})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    assert len(resp.text.splitlines()) == 3
+
+
+def test_emit_batch_returns_one_result_per_nota(client, invoice_payload, repo):
+    resp = client.post("/invoices/batch", json={"notas": [invoice_payload] * 3})
+    assert resp.status_code == 200
+    results = resp.json()
+    assert [r["index"] for r in results] == [0, 1, 2]
+    assert all(r["status"] == "AUTORIZADA" for r in results)
+    assert len(repo.list_all()) == 3
+
+
+def test_emit_batch_invalid_nota_does_not_fail_the_others(client, invoice_payload):
+    invalid = {**invoice_payload, "emitente_endereco": {**invoice_payload["emitente_endereco"], "uf": "XX"}}
+    resp = client.post("/invoices/batch", json={"notas": [invoice_payload, invalid, invoice_payload]})
+    assert resp.status_code == 200
+    statuses = [r["status"] for r in resp.json()]
+    assert statuses == ["AUTORIZADA", "ERRO", "AUTORIZADA"]
+    assert resp.json()[1]["error"]
+
+
+def test_emit_batch_empty_returns_422(client):
+    resp = client.post("/invoices/batch", json={"notas": []})
+    assert resp.status_code == 422
+
+
+def test_emit_respond_async_returns_202_with_status_url(client, invoice_payload, fila):
+    resp = client.post("/invoices/", json=invoice_payload, headers={"Prefer": "respond-async"})
+    assert resp.status_code == 202
+    body = resp.json()
+    assert body["status"] == "EM_PROCESSAMENTO"
+    assert resp.headers["Location"] == body["status_url"] == f"/invoices/jobs/{body['id']}"
+    assert len(fila.jobs) == 1
+
+
+def test_emission_job_status_reflects_processing(client, invoice_payload, fila, async_repo):
+    import asyncio
+    from application.use_cases.process_emission_job import ProcessEmissionJobUseCase
+    from infrastructure.adapters.emissao_nota_adapter import AsyncNotaFiscalEmissaoAdapter
+    from infrastructure.external_services.async_sefaz_client import AsyncSefazStubClient
+    from infrastructure.external_services.signer import Signer
+
+    status_url = client.post(
+        "/invoices/", json=invoice_payload, headers={"Prefer": "respond-async"}
+    ).json()["status_url"]
+    assert client.get(status_url).json()["status"] == "PENDENTE"
+
+    use_case = ProcessEmissionJobUseCase(
+        AsyncNotaFiscalEmissaoAdapter(AsyncSefazStubClient(), Signer()), async_repo, fila
+    )
+
+    async def drain():
+        for job in await fila.claim("w1", 10, 60):
+            await use_case.execute(job)
+
+    asyncio.run(drain())
+    body = client.get(status_url).json()
+    assert body["status"] == "CONCLUIDO"
+    assert body["invoice"]["status"] == "AUTORIZADA"
+
+
+def test_emission_job_not_found(client):
+    resp = client.get("/invoices/jobs/00000000-0000-0000-0000-000000000000")
+    assert resp.status_code == 404
+
+
+def test_emit_with_idempotency_key_replays_stored_response(client, invoice_payload, repo):
+    headers = {"Idempotency-Key": "pedido-42"}
+    first = client.post("/invoices/", json=invoice_payload, headers=headers)
+    retry = client.post("/invoices/", json=invoice_payload, headers=headers)
+    assert first.status_code == retry.status_code == 201
+    assert retry.content == first.content
+    assert "Idempotent-Replayed" not in first.headers
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert len(repo.list_all()) == 1
+
+
+def test_emit_completed_key_is_answered_from_the_store(client, invoice_payload, idempotencia_store, repo):
+    from app.interfaces.controllers.invoice_controller import get_idempotencia
+    from infrastructure.adapters.idempotencia import CoordenadorIdempotencia
+
+    headers = {"Idempotency-Key": "pedido-43"}
+    first = client.post("/invoices/", json=invoice_payload, headers=headers)
+    # Outra instância: LRU vazio, mesmo registro durável
+    other = CoordenadorIdempotencia(idempotencia_store.factory())
+    client.app.dependency_overrides[get_idempotencia] = lambda: other
+    retry = client.post("/invoices/", json=invoice_payload, headers=headers)
+    assert retry.content == first.content
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert other.stats()["stored_hits"] == 1
+    assert len(repo.list_all()) == 1
+
+
+def test_emit_idempotency_key_reused_with_other_body_returns_422(client, invoice_payload):
+    headers = {"Idempotency-Key": "pedido-44"}
+    assert client.post("/invoices/", json=invoice_payload, headers=headers).status_code == 201
+    invoice_payload["itens"][0]["quantidade"] = 3
+    resp = client.post("/invoices/", json=invoice_payload, headers=headers)
+    assert resp.status_code == 422
+
+
+def test_emit_idempotency_key_in_flight_elsewhere_returns_409(client, invoice_payload, idempotencia_store):
+    import asyncio
+    from app.interfaces.controllers.invoice_controller import InvoiceCreateSchema, fingerprint
+
+    asyncio.run(idempotencia_store.reservar(
+        "pedido-45", fingerprint(InvoiceCreateSchema(**invoice_payload))
+    ))
+    resp = client.post("/invoices/", json=invoice_payload, headers={"Idempotency-Key": "pedido-45"})
+    assert resp.status_code == 409
+    assert resp.headers["Retry-After"] == "1"
+
+
+def test_emit_respond_async_with_idempotency_key_enqueues_once(client, invoice_payload, fila):
+    headers = {"Idempotency-Key": "pedido-46", "Prefer": "respond-async"}
+    first = client.post("/invoices/", json=invoice_payload, headers=headers)
+    retry = client.post("/invoices/", json=invoice_payload, headers=headers)
+    assert first.status_code == retry.status_code == 202
+    assert retry.headers["Location"] == first.headers["Location"]
+    assert len(fila.jobs) == 1